@@ -0,0 +1,6 @@
+"""
+性能基准测试包
+作用: 生成合成 Figma 设计稿,分别测量压缩、AST 构建、XAML 渲染的耗时和吞吐量
+"""
+from benchmarks.generators import SCENARIOS, generate, count_nodes
+from benchmarks.suite import run_suite, compare_with_baseline
@@ -0,0 +1,296 @@
+"""
+V1 / V2 差分回归测试
+作用: 在真实和合成设计稿上同时运行 V1 (字符串拼接) 和 V2 (AST + 规则引擎) 转换器,
+      用语义对比器比较输出,按元素/属性和 V2 规则归类差异,并统计两个转换器的吞吐量
+"""
+import contextlib
+import copy
+import glob
+import io
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.generators import SCENARIOS, generate, count_nodes
+from figma_compressor import compress_tree
+from figma_to_xaml import FigmaToXamlConverter as V1Converter
+from figma_to_xaml_v2 import FigmaToXamlConverter as V2Converter
+from run_tests import extract_main_content
+from src import json_io
+from src.profiler import PipelineProfiler
+from test_content_compare import parse_xaml_fragment, compare_parsed_xaml
+
+
+# 用例: (来源, 名称, 参数)
+#   ('file', 文件路径, 根节点序号)
+#   ('synthetic', 场景名, (种子, 规模))
+Case = Tuple[str, str, Any]
+
+# 真实设计稿的默认搜索路径
+DEFAULT_FILE_PATTERNS = [
+    os.path.join('test_cases', 'inputs', '*.json'),
+    'injson*.json',
+]
+
+# 工作进程内的常驻转换器 (由 _init_worker 创建)
+_v1 = None
+_v2 = None
+_v2_profiled = None
+
+
+def _load_roots(path: str) -> List[Dict[str, Any]]:
+    """读取文件中的压缩根节点 (Node Inspector 原始数组先压缩)"""
+    data = json_io.load(path)
+    if isinstance(data, list):
+        return compress_tree(data)
+    return data.get('compressed_data', [])
+
+
+def collect_cases(
+    file_patterns: Optional[List[str]] = None,
+    scenarios: Optional[List[str]] = None,
+    seeds: int = 5,
+    scale: float = 0.2
+) -> List[Case]:
+    """收集用例
+
+    Args:
+        file_patterns: 真实设计稿的 glob 模式 (默认 DEFAULT_FILE_PATTERNS)
+        scenarios: 合成场景名 (默认全部, 空列表表示不用合成数据)
+        seeds: 每个合成场景生成多少个不同种子的设计稿
+        scale: 合成场景规模系数
+    """
+    cases: List[Case] = []
+    seen = set()
+    for pattern in file_patterns if file_patterns is not None else DEFAULT_FILE_PATTERNS:
+        for path in sorted(glob.glob(pattern)):
+            if path in seen:
+                continue
+            seen.add(path)
+            try:
+                roots = _load_roots(path)
+            except (OSError, ValueError):
+                continue
+            cases.extend(('file', path, index) for index in range(len(roots)))
+
+    for name in scenarios if scenarios is not None else list(SCENARIOS):
+        cases.extend(('synthetic', name, (seed, scale)) for seed in range(seeds))
+    return cases
+
+
+def _init_worker() -> None:
+    """工作进程初始化: 创建常驻转换器 (YAML 只读一次)"""
+    global _v1, _v2, _v2_profiled
+    with contextlib.redirect_stdout(io.StringIO()):
+        _v1 = V1Converter()
+        _v2 = V2Converter()
+        # 只用于统计出现差异的用例触发了哪些规则,不参与计时
+        _v2_profiled = V2Converter(profiler=PipelineProfiler(enabled=True))
+
+
+def _case_root(case: Case) -> Dict[str, Any]:
+    """取得用例的压缩根节点"""
+    source, name, param = case
+    if source == 'file':
+        return _load_roots(name)[param]
+    seed, scale = param
+    return compress_tree(generate(name, scale=scale, seed=seed))[0]
+
+
+def _convert(converter_name: str, root: Dict[str, Any]) -> Tuple[Optional[str], float, Optional[str]]:
+    """运行一个转换器
+
+    Returns:
+        (XAML 或 None, 耗时秒, 异常描述或 None)
+    """
+    node = copy.deepcopy(root)
+    start = time.perf_counter()
+    try:
+        if converter_name == 'v1':
+            xaml = _v1.generate_usercontrol(node, node.get('name', 'Control').replace(' ', ''))
+        else:
+            xaml = _v2.convert_node(node, is_root=True)
+    except Exception as e:
+        return None, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    return xaml, time.perf_counter() - start, None
+
+
+def _parse(xaml: str):
+    """解析转换结果的主内容,失败时返回 None"""
+    try:
+        return parse_xaml_fragment(extract_main_content(xaml))
+    except ET.ParseError:
+        return None
+
+
+def run_case(case: Case) -> Dict[str, Any]:
+    """在工作进程中运行单个用例
+
+    Returns:
+        结果字典: case, nodes, seconds{v1,v2}, match, buckets, rules, differences
+    """
+    root = _case_root(case)
+    result = {
+        'case': f"{case[1]}#{case[2]}" if case[0] == 'file' else f"{case[1]}@seed{case[2][0]}",
+        'source': case[0],
+        'nodes': count_nodes([root]),
+        'seconds': {},
+        'match': False,
+        'buckets': {},
+        'rules': {},
+        'differences': [],
+    }
+
+    outputs = {}
+    for name in ('v1', 'v2'):
+        xaml, seconds, error = _convert(name, root)
+        result['seconds'][name] = seconds
+        if error:
+            result['buckets'][f"异常 {name}: {error.split(':')[0]}"] = 1
+            result['differences'].append(f"{name} 异常: {error}")
+        else:
+            outputs[name] = xaml
+
+    trees = {name: _parse(xaml) for name, xaml in outputs.items()}
+    for name, tree in trees.items():
+        if tree is None:
+            result['buckets'][f"XML 解析失败 {name}"] = 1
+    if len(trees) == 2 and all(tree is not None for tree in trees.values()):
+        is_match, differences = compare_parsed_xaml(trees['v1'], trees['v2'])
+        result['match'] = is_match
+        result['differences'] = differences
+        result['buckets'] = dict(Counter(bucket_difference(d) for d in differences))
+
+    # 出现差异时记录 V2 触发的布局规则,便于定位是哪条规则导致的
+    if not result['match']:
+        profiler = _v2_profiled.profiler
+        profiler.reset()
+        with contextlib.suppress(Exception):
+            _v2_profiled.convert_node(copy.deepcopy(root), is_root=True)
+        result['rules'] = dict(profiler.counters.get('matched_rules', {}))
+
+    return result
+
+
+_ATTRIBUTE_DIFF = re.compile(r'/([\w.]+)(?:\[\d+\])?\[@([\w.:]+)\]:')
+_TEXT_DIFF = re.compile(r'/([\w.]+)(?:\[\d+\])?/text\(\):')
+_TAG_DIFF = re.compile(r'标签不同 \(([\w.]+) vs ([\w.]+)\)')
+_CHILD_DIFF = re.compile(r'/([\w.]+)(?:\[\d+\])?: (多出|缺少)子元素')
+_COUNT_DIFF = re.compile(r'/([\w.]+)(?:\[\d+\])?: 子元素数量不同')
+
+
+def bucket_difference(difference: str) -> str:
+    """把一条差异归类为 "元素@属性" 等桶名"""
+    match = _ATTRIBUTE_DIFF.search(difference)
+    if match:
+        return f"{match.group(1)}@{match.group(2)}"
+    match = _TAG_DIFF.search(difference)
+    if match:
+        return f"标签 {match.group(1)} → {match.group(2)}"
+    match = _CHILD_DIFF.search(difference)
+    if match:
+        side = 'v1' if match.group(2) == '多出' else 'v2'
+        return f"仅 {side} 有 {match.group(1)}"
+    match = _COUNT_DIFF.search(difference)
+    if match:
+        return f"{match.group(1)} 子元素数量"
+    match = _TEXT_DIFF.search(difference)
+    if match:
+        return f"{match.group(1)}/text()"
+    return '其他'
+
+
+def run_differential(cases: List[Case], jobs: int = 1) -> Dict[str, Any]:
+    """运行差分测试
+
+    Args:
+        cases: collect_cases 的结果
+        jobs: 工作进程数 (1 表示在当前进程运行)
+
+    Returns:
+        汇总报告 (可 JSON 序列化)
+    """
+    jobs = max(1, min(jobs, len(cases) or 1))
+    if jobs == 1:
+        _init_worker()
+        results = [run_case(case) for case in cases]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+            results = list(executor.map(run_case, cases, chunksize=max(1, len(cases) // (jobs * 4))))
+
+    return summarize(results)
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """汇总各用例结果"""
+    buckets: Counter = Counter()
+    bucket_cases: Counter = Counter()
+    rules: Counter = Counter()
+    nodes = sum(r['nodes'] for r in results)
+    throughput = {}
+
+    for result in results:
+        buckets.update(result['buckets'])
+        bucket_cases.update(result['buckets'].keys())
+        rules.update(result['rules'].keys())
+
+    for name in ('v1', 'v2'):
+        seconds = sum(r['seconds'].get(name, 0.0) for r in results)
+        throughput[name] = {
+            'seconds': seconds,
+            'nodes_per_second': nodes / seconds if seconds > 0 else 0.0,
+        }
+
+    matched = sum(1 for r in results if r['match'])
+    return {
+        'cases': len(results),
+        'matched': matched,
+        'match_rate': matched / len(results) if results else 0.0,
+        'nodes': nodes,
+        'throughput': throughput,
+        'speedup': (throughput['v1']['seconds'] / throughput['v2']['seconds']
+                    if throughput['v2']['seconds'] > 0 else 0.0),
+        'buckets': {k: {'differences': v, 'cases': bucket_cases[k]} for k, v in buckets.most_common()},
+        'rules_in_mismatches': dict(rules.most_common()),
+        'results': results,
+    }
+
+
+def format_report(report: Dict[str, Any], max_rows: int = 20) -> str:
+    """格式化为文本报告"""
+    lines = [
+        f"用例: {report['cases']} | 一致: {report['matched']} ({report['match_rate'] * 100:.1f}%) | 节点: {report['nodes']}",
+        '',
+        f"{'转换器':<10}{'耗时(ms)':>12}{'节点/秒':>14}",
+    ]
+    for name, stats in report['throughput'].items():
+        lines.append(f"{name:<10}{stats['seconds'] * 1000:>12.1f}{stats['nodes_per_second']:>14,.0f}")
+    lines.append(f"V2 相对 V1 速度: {report['speedup']:.2f}x")
+
+    if report['buckets']:
+        lines.append('')
+        lines.append(f"{'差异类别':<40}{'差异数':>8}{'用例数':>8}")
+        for name, stats in list(report['buckets'].items())[:max_rows]:
+            lines.append(f"{name:<40}{stats['differences']:>8}{stats['cases']:>8}")
+        if len(report['buckets']) > max_rows:
+            lines.append(f"... 还有 {len(report['buckets']) - max_rows} 个类别")
+
+    if report['rules_in_mismatches']:
+        lines.append('')
+        lines.append('出现差异的用例中命中的 V2 布局规则 (用例数):')
+        for name, count in list(report['rules_in_mismatches'].items())[:max_rows]:
+            lines.append(f"  {name:<50}{count:>6}")
+
+    mismatched = [r for r in report['results'] if not r['match']]
+    if mismatched:
+        lines.append('')
+        lines.append('差异最多的用例:')
+        mismatched.sort(key=lambda r: -len(r['differences']))
+        for result in mismatched[:10]:
+            lines.append(f"  {result['case']:<50}{len(result['differences']):>6} 处")
+
+    return '\n'.join(lines)
@@ -0,0 +1,282 @@
+"""
+合成 Figma 设计稿生成器
+作用: 生成 Node Inspector 原始格式的 Figma 节点树,用于性能基准测试
+
+所有生成器都接收 seed 参数,同样的参数和种子总是生成同样的树
+"""
+import random
+from typing import Any, Dict, List
+
+
+class _IdAllocator:
+    """生成 Figma 风格的节点 id (如 "1:23")"""
+
+    def __init__(self):
+        self.next_id = 0
+
+    def __call__(self) -> str:
+        self.next_id += 1
+        return f"1:{self.next_id}"
+
+
+def _color(rng: random.Random) -> Dict[str, float]:
+    """随机颜色 (Figma 0-1 浮点格式)"""
+    return {'r': rng.random(), 'g': rng.random(), 'b': rng.random()}
+
+
+def _paint(color: Dict[str, float]) -> Dict[str, Any]:
+    """纯色 fill/stroke (带 Node Inspector 中常见的默认字段)"""
+    return {
+        'type': 'SOLID',
+        'visible': True,
+        'opacity': 1,
+        'blendMode': 'NORMAL',
+        'color': color,
+        'boundVariables': {},
+    }
+
+
+def _base(node_id: str, node_type: str, name: str, width: float, height: float) -> Dict[str, Any]:
+    """节点公共字段 (大部分是压缩器会删除的默认值)"""
+    return {
+        'id': node_id,
+        'type': node_type,
+        'name': name,
+        'visible': True,
+        'locked': False,
+        'opacity': 1,
+        'blendMode': 'PASS_THROUGH',
+        'isMask': False,
+        'effects': [],
+        'effectStyleId': '',
+        'reactions': [],
+        'rotation': 0,
+        'layoutAlign': 'INHERIT',
+        'layoutGrow': 0,
+        'layoutPositioning': 'AUTO',
+        'constrainProportions': False,
+        'exportSettings': [],
+        'relativeTransform': [[1, 0, 0], [0, 1, 0]],
+        'absoluteTransform': [[1, 0, 0], [0, 1, 0]],
+        'absoluteBoundingBox': {'x': 0, 'y': 0, 'width': width, 'height': height},
+        'x': 0,
+        'y': 0,
+        'width': width,
+        'height': height,
+        'layoutSizingHorizontal': 'FIXED',
+        'layoutSizingVertical': 'FIXED',
+        'strokes': [],
+        'strokeWeight': 1,
+        'strokeAlign': 'INSIDE',
+        'dashPattern': [],
+    }
+
+
+def _frame(new_id: _IdAllocator, name: str, layout_mode: str, width: float, height: float,
+           children: List[Dict[str, Any]], spacing: float = 0, padding: float = 0,
+           fill: Dict[str, float] = None) -> Dict[str, Any]:
+    """FRAME 节点"""
+    node = _base(new_id(), 'FRAME', name, width, height)
+    node.update({
+        'layoutMode': layout_mode,
+        'itemSpacing': spacing,
+        'paddingLeft': padding,
+        'paddingRight': padding,
+        'paddingTop': padding,
+        'paddingBottom': padding,
+        'primaryAxisAlignItems': 'MIN',
+        'counterAxisAlignItems': 'MIN',
+        'layoutWrap': 'NO_WRAP',
+        'cornerRadius': 0,
+        'clipsContent': True,
+        'fills': [_paint(fill)] if fill else [],
+        'children': children,
+    })
+    return node
+
+
+def _rectangle(new_id: _IdAllocator, rng: random.Random, width: float, height: float) -> Dict[str, Any]:
+    """RECTANGLE 节点"""
+    node = _base(new_id(), 'RECTANGLE', 'Rectangle', width, height)
+    node.update({
+        'cornerRadius': rng.choice([0, 0, 4, 8]),
+        'fills': [_paint(_color(rng))],
+    })
+    return node
+
+
+def _text(new_id: _IdAllocator, rng: random.Random, characters: str, font_size: int = 14) -> Dict[str, Any]:
+    """TEXT 节点"""
+    width = len(characters) * font_size * 0.6
+    node = _base(new_id(), 'TEXT', characters[:20], width, font_size * 1.4)
+    node.update({
+        'characters': characters,
+        'fontSize': font_size,
+        'fontName': {'family': 'Inter', 'style': 'Regular'},
+        'fontWeight': rng.choice([400, 400, 700]),
+        'textAlignHorizontal': 'LEFT',
+        'textAlignVertical': 'TOP',
+        'textAutoResize': 'WIDTH_AND_HEIGHT',
+        'layoutSizingHorizontal': 'HUG',
+        'layoutSizingVertical': 'HUG',
+        'fills': [_paint({'r': 0.2, 'g': 0.2, 'b': 0.2})],
+    })
+    return node
+
+
+# ==================== 场景生成器 ====================
+
+def deep_nesting(depth: int = 200, seed: int = 0) -> List[Dict[str, Any]]:
+    """深层嵌套: 每层一个文本 + 一个子 Frame,方向交替"""
+    rng = random.Random(seed)
+    new_id = _IdAllocator()
+
+    node = _text(new_id, rng, 'leaf')
+    for level in reversed(range(depth)):
+        layout = 'VERTICAL' if level % 2 == 0 else 'HORIZONTAL'
+        label = _text(new_id, rng, f'Level {level}')
+        node = _frame(new_id, f'Level{level}', layout, 400, 400, [label, node], spacing=4, padding=2)
+    return [node]
+
+
+def wide_row(width: int = 1000, seed: int = 0) -> List[Dict[str, Any]]:
+    """宽水平行: 大量矩形和文本,部分子元素为 FILL"""
+    rng = random.Random(seed)
+    new_id = _IdAllocator()
+
+    children = []
+    for i in range(width):
+        if rng.random() < 0.5:
+            child = _rectangle(new_id, rng, rng.randint(10, 80), 32)
+        else:
+            child = _text(new_id, rng, f'Cell {i}')
+        if rng.random() < 0.1:
+            child['layoutSizingHorizontal'] = 'FILL'
+        children.append(child)
+    return [_frame(new_id, 'WideRow', 'HORIZONTAL', width * 40, 40, children, spacing=8)]
+
+
+def grid_layout(rows: int = 50, columns: int = 50, span_ratio: float = 0.1, seed: int = 0) -> List[Dict[str, Any]]:
+    """大 GRID 布局: 部分子元素跨行/跨列,其余显式锚定到空闲单元格"""
+    rng = random.Random(seed)
+    new_id = _IdAllocator()
+
+    occupied = [[False] * columns for _ in range(rows)]
+    children = []
+    for r in range(rows):
+        for c in range(columns):
+            if occupied[r][c]:
+                continue
+            row_span = col_span = 1
+            if rng.random() < span_ratio:
+                row_span = rng.randint(1, 3)
+                col_span = rng.randint(1, 3)
+                # 收缩到空闲区域内
+                while r + row_span > rows or any(occupied[r + dr][c] for dr in range(row_span)):
+                    row_span -= 1
+                while c + col_span > columns or any(
+                    occupied[r + dr][c + dc] for dr in range(row_span) for dc in range(col_span)
+                ):
+                    col_span -= 1
+            for dr in range(row_span):
+                for dc in range(col_span):
+                    occupied[r + dr][c + dc] = True
+
+            cell = _rectangle(new_id, rng, 40 * col_span, 40 * row_span)
+            cell.update({
+                'gridRowAnchorIndex': r,
+                'gridColumnAnchorIndex': c,
+                'gridRowSpan': row_span,
+                'gridColumnSpan': col_span,
+                'gridChildHorizontalAlign': 'AUTO',
+                'gridChildVerticalAlign': 'AUTO',
+            })
+            children.append(cell)
+
+    grid = _frame(new_id, 'Grid', 'GRID', columns * 44, rows * 44, children)
+    grid.update({
+        'gridRowCount': rows,
+        'gridColumnCount': columns,
+        'gridRowGap': 4,
+        'gridColumnGap': 4,
+        'gridRowSizes': [{'type': 'FLEX', 'value': 1} for _ in range(rows)],
+        'gridColumnSizes': [{'type': 'FLEX', 'value': 1} for _ in range(columns)],
+    })
+    return [grid]
+
+
+def text_list(items: int = 500, seed: int = 0) -> List[Dict[str, Any]]:
+    """文本密集列表: 每行两段长度随机的文本"""
+    rng = random.Random(seed)
+    new_id = _IdAllocator()
+    words = ['设备', '状态', 'Device', 'Online', 'Offline', '扫描', 'Port', '192.168.0.1', '告警']
+
+    rows = []
+    for i in range(items):
+        title = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 6)))
+        detail = ' '.join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+        rows.append(_frame(new_id, f'Row{i}', 'HORIZONTAL', 600, 24, [
+            _text(new_id, rng, title, 14),
+            _text(new_id, rng, detail, 12),
+        ], spacing=12))
+    return [_frame(new_id, 'TextList', 'VERTICAL', 600, items * 28, rows, spacing=4, padding=8)]
+
+
+def repeated_components(count: int = 200, seed: int = 0) -> List[Dict[str, Any]]:
+    """重复组件: 结构相同的卡片 (圆角 + 边框 + 图标 + 两行文本)"""
+    rng = random.Random(seed)
+    new_id = _IdAllocator()
+    card_fill = {'r': 1, 'g': 1, 'b': 1}
+    border = {'r': 0.88, 'g': 0.88, 'b': 0.88}
+
+    cards = []
+    for i in range(count):
+        texts = _frame(new_id, 'Texts', 'VERTICAL', 200, 40, [
+            _text(new_id, rng, f'Card {i}', 14),
+            _text(new_id, rng, 'Description', 12),
+        ], spacing=2)
+        card = _frame(new_id, 'Card', 'HORIZONTAL', 280, 56, [
+            _rectangle(new_id, rng, 40, 40),
+            texts,
+        ], spacing=8, padding=8, fill=card_fill)
+        card['cornerRadius'] = 6
+        card['strokes'] = [_paint(border)]
+        cards.append(card)
+    return [_frame(new_id, 'Cards', 'VERTICAL', 300, count * 64, cards, spacing=8)]
+
+
+# 场景注册表: 名称 → (生成器, 默认参数)
+SCENARIOS: Dict[str, Any] = {
+    'deep_nesting': (deep_nesting, {'depth': 200}),
+    'wide_row': (wide_row, {'width': 1000}),
+    'grid_layout': (grid_layout, {'rows': 50, 'columns': 50}),
+    'text_list': (text_list, {'items': 500}),
+    'repeated_components': (repeated_components, {'count': 200}),
+}
+
+
+def generate(name: str, scale: float = 1.0, seed: int = 0) -> List[Dict[str, Any]]:
+    """按名称生成场景
+
+    Args:
+        name: 场景名 (SCENARIOS 的键)
+        scale: 规模系数,会乘到所有整数参数上
+        seed: 随机种子
+
+    Returns:
+        Node Inspector 格式的节点数组
+    """
+    generator, params = SCENARIOS[name]
+    scaled = {k: max(1, int(v * scale)) if isinstance(v, int) else v for k, v in params.items()}
+    return generator(seed=seed, **scaled)
+
+
+def count_nodes(nodes: List[Dict[str, Any]]) -> int:
+    """统计 Figma 节点数量"""
+    count = 0
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.get('children', []))
+    return count
@@ -0,0 +1,88 @@
+"""
+JSON 读写基准测试
+作用: 在真实设计稿 (默认 injson.json) 上比较标准库 json 与 src.json_io 当前后端的解析和序列化耗时
+
+标准库一列按改动前的写法计时 (文本方式读取后 json.load / json.dump 缩进写入文本流),
+json_io 一列按字节读写,序列化分缩进和紧凑两种
+"""
+import io
+import json
+import time
+from typing import Any, Callable, Dict
+
+from figma_compressor import compress_tree
+from src import json_io
+
+
+def _best_time(func: Callable[[], Any], repeat: int) -> float:
+    """重复执行取最短耗时 (秒)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _stdlib_dump(obj: Any) -> None:
+    """改动前的写法: json.dump 缩进写入 UTF-8 文本流"""
+    stream = io.TextIOWrapper(io.BytesIO(), encoding='utf-8')
+    json.dump(obj, stream, ensure_ascii=False, indent=2)
+    stream.flush()
+
+
+def run_json_benchmark(path: str = 'injson.json', repeat: int = 5) -> Dict[str, Any]:
+    """运行 JSON 读写基准测试
+
+    分别计时原始设计稿和压缩结果 (压缩器的输出文件) 的解析和序列化
+
+    Returns:
+        {'file', 'bytes', 'backend', 'cases': {数据: {操作: {'json': 秒, 'json_io': 秒}}}}
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = json_io.loads(raw)
+    compressed = {'compressed_data': compress_tree(data) if isinstance(data, list) else data}
+    compressed_bytes = json_io.dumps(compressed, indent=True)
+
+    cases = {}
+    for name, payload, obj in (('原始', raw, data), ('压缩后', compressed_bytes, compressed)):
+        cases[name] = {
+            'load': {
+                'json': _best_time(lambda: json.loads(payload.decode('utf-8')), repeat),
+                'json_io': _best_time(lambda: json_io.loads(payload), repeat),
+            },
+            'dump_indent': {
+                'json': _best_time(lambda: _stdlib_dump(obj), repeat),
+                'json_io': _best_time(lambda: json_io.dumps(obj, indent=True), repeat),
+            },
+            'dump_compact': {
+                'json': _best_time(lambda: _stdlib_dump(obj), repeat),
+                'json_io': _best_time(lambda: json_io.dumps(obj), repeat),
+            },
+        }
+
+    return {
+        'file': path,
+        'bytes': len(raw),
+        'compressed_bytes': {'indent': len(compressed_bytes), 'compact': len(json_io.dumps(compressed))},
+        'backend': json_io.BACKEND,
+        'cases': cases,
+    }
+
+
+def format_json_results(results: Dict[str, Any]) -> str:
+    """格式化为文本表格"""
+    backend = results['backend']
+    lines = [f"文件: {results['file']} ({results['bytes'] / 1024:.0f} KB)  后端: {backend}",
+             f"压缩结果: 缩进 {results['compressed_bytes']['indent'] / 1024:.0f} KB, "
+             f"紧凑 {results['compressed_bytes']['compact'] / 1024:.0f} KB",
+             '',
+             f"{'数据':<8}{'操作':<16}{'json(ms)':>12}{backend + '(ms)':>16}{'加速':>10}"]
+    lines.append('-' * 62)
+    for name, operations in results['cases'].items():
+        for operation, timing in operations.items():
+            baseline, current = timing['json'], timing['json_io']
+            speedup = baseline / current if current > 0 else 0.0
+            lines.append(f"{name:<8}{operation:<16}{baseline * 1000:>12.2f}{current * 1000:>16.2f}{speedup:>9.1f}x")
+    return '\n'.join(lines)
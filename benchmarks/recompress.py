@@ -0,0 +1,122 @@
+"""
+增量压缩基准测试
+作用: 在由多个场景拼成的大设计稿上比较完整压缩和增量压缩 (figma_compressor.CompressionCache):
+      冷缓存、内容不变、只改动一个 Frame 中的一段文本,以及缓存文件的读写耗时
+"""
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.generators import SCENARIOS, generate, count_nodes
+from figma_compressor import CompressionCache, compress_tree
+
+
+def build_document(scale: float = 1.0, seed: int = 0) -> List[Dict[str, Any]]:
+    """所有场景各作为一个顶层 Frame (节点 id 加场景序号前缀,避免不同场景的 id 重复)"""
+    roots = []
+    for index, name in enumerate(SCENARIOS):
+        for root in generate(name, scale=scale, seed=seed):
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                node['id'] = f"{index}{node['id']}"
+                stack.extend(node.get('children', []))
+            roots.append(root)
+    return roots
+
+
+def _copy_tree(root: Dict[str, Any]) -> Dict[str, Any]:
+    """复制节点树 (每个节点浅拷贝,用显式栈遍历)"""
+    result = dict(root)
+    stack = [result]
+    while stack:
+        node = stack.pop()
+        if 'children' in node:
+            node['children'] = [dict(child) for child in node['children']]
+            stack.extend(node['children'])
+    return result
+
+
+def edit_one_frame(document: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """复制设计稿并修改最后一个顶层 Frame 中第一段文本 (模拟只改动一个 Frame 后重新获取)"""
+    edited = [_copy_tree(root) for root in document]
+    stack = [edited[-1]]
+    while stack:
+        node = stack.pop()
+        if node.get('type') == 'TEXT':
+            node['characters'] = f"{node.get('characters', '')} (已修改)"
+            break
+        stack.extend(reversed(node.get('children', [])))
+    return edited
+
+
+def same_tree(a: List[Dict[str, Any]], b: List[Dict[str, Any]]) -> bool:
+    """比较两个节点数组 (children 用显式栈比较,其余字段直接比较)"""
+    stack = [(a, b)]
+    while stack:
+        left, right = stack.pop()
+        if isinstance(left, list) and isinstance(right, list):
+            if len(left) != len(right):
+                return False
+            stack.extend(zip(left, right))
+        elif isinstance(left, dict) and isinstance(right, dict):
+            if left.keys() != right.keys():
+                return False
+            for key, value in left.items():
+                if key == 'children':
+                    stack.append((value, right[key]))
+                elif value != right[key]:
+                    return False
+        elif left != right:
+            return False
+    return True
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run_recompress_benchmark(scale: float = 1.0, seed: int = 0) -> Dict[str, Any]:
+    """运行增量压缩基准测试 (各步骤的结果都与 compress_tree 比较)
+
+    Returns:
+        {'nodes', 'frames', 'seconds': {步骤: 秒}, 'stats': {步骤: 统计摘要}}
+    """
+    document = build_document(scale, seed)
+    edited = edit_one_frame(document)
+    seconds, stats = {}, {}
+
+    expected, seconds['full'] = _timed(lambda: compress_tree(document))
+    expected_edited = compress_tree(edited)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'compressor.pickle')
+        cache = CompressionCache(path)
+        steps = (('cold', document, expected), ('unchanged', document, expected),
+                 ('one_frame', edited, expected_edited))
+        for step, nodes, reference in steps:
+            cache.stats = dict.fromkeys(cache.stats, 0)
+            result, seconds[step] = _timed(lambda: cache.compress_tree(nodes))
+            if not same_tree(result, reference):
+                raise AssertionError(f"增量压缩结果与 compress_tree 不一致: {step}")
+            stats[step] = cache.format_stats()
+
+        _, seconds['save'] = _timed(cache.save)
+        _, seconds['load'] = _timed(lambda: CompressionCache(path))
+
+    return {'nodes': count_nodes(document), 'frames': len(document), 'seconds': seconds, 'stats': stats}
+
+
+def format_recompress_results(results: Dict[str, Any]) -> str:
+    """格式化为文本表格"""
+    labels = {'full': '完整压缩', 'cold': '增量 (冷缓存)', 'unchanged': '增量 (内容不变)',
+              'one_frame': '增量 (改动一个 Frame)', 'save': '写入缓存', 'load': '读取缓存'}
+    lines = [f"设计稿: {results['frames']} 个顶层 Frame, {results['nodes']} 个节点", '',
+             f"{'步骤':<24}{'耗时(ms)':>12}  统计"]
+    lines.append('-' * 90)
+    for step, seconds in results['seconds'].items():
+        lines.append(f"{labels[step]:<24}{seconds * 1000:>12.2f}  {results['stats'].get(step, '')}")
+    return '\n'.join(lines)
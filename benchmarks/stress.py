@@ -0,0 +1,89 @@
+"""
+深层嵌套压力测试
+作用: 在很低的递归深度限制下转换数千层嵌套的设计稿,
+      验证压缩、构建、优化、渲染和语义对比都不依赖 Python 递归
+"""
+import contextlib
+import io
+import sys
+import time
+from typing import Any, Dict, Iterator
+
+from benchmarks.generators import deep_nesting, count_nodes
+from figma_compressor import compress_tree
+from figma_to_xaml_v2 import FigmaToXamlConverter
+from run_tests import extract_main_content
+from test_content_compare import parse_xaml_fragment, compare_parsed_xaml
+
+
+# 压力测试期间使用的递归深度限制 (远小于嵌套层数,任何递归遍历都会失败)
+STRESS_RECURSION_LIMIT = 300
+
+
+@contextlib.contextmanager
+def recursion_limit(limit: int) -> Iterator[None]:
+    """临时修改递归深度限制"""
+    previous = sys.getrecursionlimit()
+    sys.setrecursionlimit(limit)
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(previous)
+
+
+def _max_depth(element) -> int:
+    """XML 元素树的最大深度"""
+    depth = 0
+    stack = [(element, 1)]
+    while stack:
+        node, level = stack.pop()
+        depth = max(depth, level)
+        stack.extend((child, level + 1) for child in node)
+    return depth
+
+
+def run_nesting_stress(depth: int = 5000, optimization_level: int = 2) -> Dict[str, Any]:
+    """转换 depth 层嵌套的设计稿
+
+    Args:
+        depth: 嵌套层数
+        optimization_level: AST 优化等级 (同时开启 Style 提取和列表虚拟化,覆盖所有遍历)
+
+    Returns:
+        {'depth', 'nodes', 'xaml_depth', 'seconds': {阶段: 秒}}
+
+    Raises:
+        RecursionError: 某个阶段仍在使用递归
+        AssertionError: 输出结构不正确
+    """
+    raw = deep_nesting(depth=depth)
+    nodes = count_nodes(raw)
+    seconds = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        converter = FigmaToXamlConverter(
+            optimization_level=optimization_level,
+            style_threshold=3,
+            virtualize_threshold=20,
+        )
+
+    with recursion_limit(STRESS_RECURSION_LIMIT):
+        start = time.perf_counter()
+        root = compress_tree(raw)[0]
+        seconds['compress'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        xaml = converter.convert_node(root, is_root=True)
+        seconds['convert'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tree = parse_xaml_fragment(extract_main_content(xaml))
+        is_match, differences = compare_parsed_xaml(tree, parse_xaml_fragment(extract_main_content(xaml)))
+        seconds['compare'] = time.perf_counter() - start
+
+    # 每层 Frame 至少对应一个容器元素
+    xaml_depth = _max_depth(tree)
+    assert xaml_depth > depth, f"XAML 嵌套深度 {xaml_depth} 小于设计稿层数 {depth}"
+    assert is_match, f"同一 XAML 自身对比出现差异: {differences[:3]}"
+
+    return {'depth': depth, 'nodes': nodes, 'xaml_depth': xaml_depth, 'seconds': seconds}
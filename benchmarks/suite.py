@@ -0,0 +1,179 @@
+"""
+基准测试套件
+作用: 分阶段计时 compress_tree / FigmaToWpfBuilder.build / XamlRenderer.render_usercontrol,
+      记录吞吐量 (节点/秒) 和峰值 RSS,并与基线 JSON 对比发现性能回退
+"""
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.generators import SCENARIOS, generate, count_nodes
+from figma_compressor import compress_tree
+from src import json_io
+from src.ast_builder import FigmaToWpfBuilder
+from src.xaml_renderer import XamlRenderer
+
+
+# 计时的三个阶段
+STAGES = ('compress', 'build', 'render')
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """当前进程的峰值 RSS (字节),无法获取时返回 None"""
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为 KB,macOS 为字节
+        return usage if sys.platform == 'darwin' else usage * 1024
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    except ImportError:
+        return None
+
+
+def _best_time(func: Callable[[], Any], repeat: int) -> float:
+    """重复执行取最短耗时 (秒)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_scenario(
+    name: str,
+    builder: FigmaToWpfBuilder,
+    renderer: XamlRenderer,
+    scale: float = 1.0,
+    seed: int = 0,
+    repeat: int = 3
+) -> Dict[str, Any]:
+    """运行单个场景
+
+    Returns:
+        {'nodes': n, 'stages': {阶段: {'seconds', 'nodes_per_second'}}, 'xaml_bytes', 'peak_rss_bytes'}
+    """
+    raw = generate(name, scale=scale, seed=seed)
+    nodes = count_nodes(raw)
+
+    compressed = compress_tree(raw)
+    root = compressed[0]
+    ast = builder.build(root, is_root=True)
+
+    timings = {
+        'compress': _best_time(lambda: compress_tree(raw), repeat),
+        'build': _best_time(lambda: builder.build(root, is_root=True), repeat),
+        'render': _best_time(lambda: renderer.render_usercontrol(ast), repeat),
+    }
+    xaml = renderer.render_usercontrol(ast)
+
+    return {
+        'nodes': nodes,
+        'stages': {
+            stage: {
+                'seconds': seconds,
+                'nodes_per_second': nodes / seconds if seconds > 0 else 0.0,
+            }
+            for stage, seconds in timings.items()
+        },
+        'xaml_bytes': len(xaml.encode('utf-8')),
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+
+def run_suite(
+    scenarios: Optional[List[str]] = None,
+    scale: float = 1.0,
+    seed: int = 0,
+    repeat: int = 3,
+    config_dir: str = 'config'
+) -> Dict[str, Any]:
+    """运行基准测试套件
+
+    Args:
+        scenarios: 场景名列表 (默认全部)
+        scale: 规模系数
+        seed: 随机种子
+        repeat: 每个阶段重复次数 (取最短耗时)
+        config_dir: 配置文件目录
+
+    Returns:
+        {'params': {...}, 'scenarios': {场景名: 结果}}
+    """
+    builder = FigmaToWpfBuilder(config_dir)
+    renderer = XamlRenderer(config_dir)
+
+    results = {}
+    for name in scenarios or list(SCENARIOS):
+        results[name] = run_scenario(name, builder, renderer, scale=scale, seed=seed, repeat=repeat)
+
+    return {
+        'params': {'scale': scale, 'seed': seed, 'repeat': repeat},
+        'scenarios': results,
+    }
+
+
+def compare_with_baseline(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.25
+) -> List[str]:
+    """与基线对比,返回回退描述列表 (为空表示没有回退)
+
+    Args:
+        results: run_suite 的结果
+        baseline: 之前保存的 run_suite 结果
+        tolerance: 允许的变慢比例 (0.25 表示慢 25% 以内不算回退)
+    """
+    regressions = []
+    if baseline.get('params') != results.get('params'):
+        regressions.append(f"参数不一致: 基线 {baseline.get('params')} vs 当前 {results.get('params')}")
+        return regressions
+
+    for name, result in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        for stage in STAGES:
+            current = result['stages'][stage]['seconds']
+            previous = base['stages'][stage]['seconds']
+            if previous > 0 and current > previous * (1 + tolerance):
+                regressions.append(
+                    f"{name}/{stage}: {previous * 1000:.2f} ms → {current * 1000:.2f} ms "
+                    f"(+{(current / previous - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """格式化为文本表格"""
+    lines = [f"{'场景':<22}{'节点':>8}" + ''.join(f"{stage + '(ms)':>14}{'节点/秒':>12}" for stage in STAGES)]
+    lines.append('-' * (30 + 26 * len(STAGES)))
+    for name, result in results['scenarios'].items():
+        row = f"{name:<22}{result['nodes']:>8}"
+        for stage in STAGES:
+            stats = result['stages'][stage]
+            row += f"{stats['seconds'] * 1000:>14.2f}{stats['nodes_per_second']:>12,.0f}"
+        lines.append(row)
+
+    rss = [r['peak_rss_bytes'] for r in results['scenarios'].values() if r['peak_rss_bytes']]
+    if rss:
+        lines.append('')
+        lines.append(f"峰值 RSS: {max(rss) / 1024 / 1024:.1f} MB")
+    return '\n'.join(lines)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    """读取基线 JSON"""
+    return json_io.load(path)
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    """保存结果 (可作为新的基线)"""
+    json_io.dump(results, path, indent=True)
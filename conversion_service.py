@@ -0,0 +1,370 @@
+"""
+异步转换服务
+作用: 供 asyncio Web 服务调用的转换 API,CPU 密集的构建和渲染在进程池中执行
+
+    result = await convert_async(node_json, {'optimization_level': 1})
+    async for chunk in convert_stream(node_json):
+        await response.write(chunk.encode('utf-8'))
+
+    async with ConversionService(max_workers=4, max_pending=8) as service:
+        xaml = (await service.convert(node_json))['wpf']
+
+- 有界并发: 同时提交到进程池的任务不超过 max_pending,其余请求在信号量上等待 (反压)
+- 请求合并: 内容和选项相同的请求正在转换时,后来的请求等待同一个任务的结果
+- 流式输出: 工作进程边渲染边把 XAML 片段送回,调用方不必等整个文档渲染完
+"""
+import asyncio
+import hashlib
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from figma_compressor import compress_tree
+from figma_to_xaml_v2 import FigmaToXamlConverter
+from src import json_io
+
+
+# 可以通过 options 传给 FigmaToXamlConverter 的参数 (输出单个文档,不写文件)
+CONVERTER_OPTIONS = (
+    'optimization_level', 'style_threshold', 'virtualize_threshold',
+    'text_measure', 'targets', 'infer_layout',
+)
+
+# 流式输出每块的行数
+DEFAULT_CHUNK_LINES = 256
+
+# 请求的输入: Figma 节点 (dict)、压缩文件 ({'compressed_data': [...]})、Node Inspector 数组,或它们的 JSON 文本/字节
+NodeJson = Union[Dict[str, Any], List[Any], str, bytes]
+
+# 规范化的选项: (转换器参数, 类名)
+Options = Tuple[Tuple[Tuple[str, Any], ...], Optional[str]]
+
+
+def normalize_options(options: Optional[Dict[str, Any]]) -> Options:
+    """检查并规范化选项 (排序后可哈希,相同选项的请求可以合并)
+
+    Raises:
+        ValueError: 不支持的选项
+    """
+    options = dict(options or {})
+    class_name = options.pop('class_name', None)
+    unknown = [key for key in options if key not in CONVERTER_OPTIONS]
+    if unknown:
+        raise ValueError(f"不支持的选项: {', '.join(unknown)} (可用: class_name, {', '.join(CONVERTER_OPTIONS)})")
+    if 'targets' in options:
+        options['targets'] = tuple(options['targets'])
+    return tuple(sorted(options.items())), class_name
+
+
+def content_key(payload: bytes, options: Options) -> str:
+    """请求的内容哈希 (输入字节 + 选项)"""
+    digest = hashlib.sha1(payload)
+    digest.update(repr(options).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _payload(node_json: NodeJson) -> bytes:
+    """请求输入 → JSON 字节 (文本和字节原样使用,不重新序列化)"""
+    if isinstance(node_json, bytes):
+        return node_json
+    if isinstance(node_json, str):
+        return node_json.encode('utf-8')
+    return json_io.dumps(node_json)
+
+
+# ========== 工作进程 ==========
+
+# 工作进程内的全局状态 (由 _init_worker 设置)
+_chunks = None
+_converters: Dict[Tuple[Tuple[str, Any], ...], FigmaToXamlConverter] = {}
+
+
+def _init_worker(chunks) -> None:
+    """工作进程初始化: 保存输出片段队列"""
+    global _chunks
+    _chunks = chunks
+
+
+def _converter(converter_options: Tuple[Tuple[str, Any], ...]) -> FigmaToXamlConverter:
+    """按选项复用常驻转换器 (配置只加载一次)"""
+    converter = _converters.get(converter_options)
+    if converter is None:
+        kwargs = dict(converter_options)
+        if 'targets' in kwargs:
+            kwargs['targets'] = list(kwargs['targets'])
+        converter = _converters[converter_options] = FigmaToXamlConverter(**kwargs)
+    return converter
+
+
+def _root_node(payload: bytes) -> Dict[str, Any]:
+    """解析请求输入,返回要转换的根节点 (Node Inspector 数组先压缩,压缩文件取第一个根节点)"""
+    data = json_io.loads(payload)
+    if isinstance(data, list):
+        data = compress_tree(data)
+    elif 'compressed_data' in data:
+        data = data['compressed_data']
+    else:
+        return data
+    if not data:
+        raise ValueError("没有找到可转换的节点")
+    return data[0]
+
+
+def _convert_worker(payload: bytes, options: Options) -> Dict[str, str]:
+    """在工作进程中转换为所有目标方言"""
+    converter_options, class_name = options
+    return _converter(converter_options).convert_node_targets(_root_node(payload), is_root=True, class_name=class_name)
+
+
+def _stream_worker(token: int, payload: bytes, options: Options, chunk_lines: int) -> int:
+    """在工作进程中逐块转换 (第一个目标方言),片段经队列送回,结束时 (含出错) 发送 None
+
+    Returns:
+        输出的字符数
+    """
+    converter_options, class_name = options
+    chars = 0
+    try:
+        converter = _converter(converter_options)
+        for chunk in converter.iter_node(_root_node(payload), is_root=True, class_name=class_name,
+                                         chunk_lines=chunk_lines):
+            _chunks.put((token, chunk))
+            chars += len(chunk)
+    finally:
+        _chunks.put((token, None))
+    return chars
+
+
+# ========== 服务 ==========
+
+class _Job:
+    """进行中的转换任务 (合并的请求共享同一个任务)"""
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.chunks: List[str] = []                 # 已收到的片段 (后加入的订阅者先补发)
+        self.subscribers: List[asyncio.Queue] = []
+        self.ended = asyncio.Event()                # 工作进程的结束标记已到达
+        self.closed = False
+
+    def subscribe(self) -> asyncio.Queue:
+        """订阅片段 (队列以 None 结束)"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for chunk in self.chunks:
+            queue.put_nowait(chunk)
+        if self.closed:
+            queue.put_nowait(None)
+        else:
+            self.subscribers.append(queue)
+        return queue
+
+    def push(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        for queue in self.subscribers:
+            queue.put_nowait(chunk)
+
+    def close(self) -> None:
+        self.closed = True
+        for queue in self.subscribers:
+            queue.put_nowait(None)
+        self.subscribers.clear()
+
+
+class ConversionService:
+    """异步转换服务 (进程池 + 有界并发 + 请求合并 + 流式输出)
+
+    在第一次请求时于当前事件循环中启动进程池,之后只能在同一个事件循环中使用
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = None,
+                 chunk_lines: int = DEFAULT_CHUNK_LINES):
+        """初始化服务
+
+        Args:
+            max_workers: 工作进程数 (默认 CPU 核数)
+            max_pending: 同时提交到进程池的任务上限 (默认工作进程数的 2 倍),超出的请求等待
+            chunk_lines: 流式输出每块的行数
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 2
+        self.chunk_lines = chunk_lines
+        self.stats = {'requests': 0, 'coalesced': 0, 'completed': 0, 'failed': 0, 'waited': 0, 'peak_pending': 0}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._chunk_queue = None
+        self._reader: Optional[threading.Thread] = None
+        self._jobs: Dict[Tuple[str, str], _Job] = {}
+        self._streams: Dict[int, _Job] = {}
+        self._tokens = itertools.count(1)
+        self._pending = 0
+
+    async def __aenter__(self) -> 'ConversionService':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def convert(self, node_json: NodeJson, options: Dict[str, Any] = None) -> Dict[str, str]:
+        """转换为所有目标方言
+
+        Args:
+            node_json: Figma 节点 / 压缩文件 / Node Inspector 数组 (对象、JSON 文本或字节)
+            options: 转换选项 (class_name 和 CONVERTER_OPTIONS 中的 FigmaToXamlConverter 参数)
+
+        Returns:
+            {目标方言: XAML 字符串}
+        """
+        job = self._submit('convert', node_json, options)
+        # 合并的请求共享任务: 单个调用方取消不影响其他调用方
+        return await asyncio.shield(job.future)
+
+    async def stream(self, node_json: NodeJson, options: Dict[str, Any] = None) -> AsyncIterator[str]:
+        """逐块转换 (第一个目标方言),拼接结果与 convert 相同
+
+        Yields:
+            XAML 片段
+        """
+        job = self._submit('stream', node_json, options)
+        queue = job.subscribe()
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield chunk
+        await asyncio.shield(job.future)   # 转换出错时抛出
+
+    def close(self) -> None:
+        """关闭进程池和片段读取线程 (等待进行中的任务结束)"""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._chunk_queue.put(None)
+        self._reader.join()
+        self._executor = None
+
+    def format_stats(self) -> str:
+        """格式化统计信息"""
+        stats = self.stats
+        return (f"请求 {stats['requests']}, 合并 {stats['coalesced']}, 完成 {stats['completed']}, "
+                f"失败 {stats['failed']}, 排队 {stats['waited']}, 峰值并发 {stats['peak_pending']}")
+
+    # ========== 内部 ==========
+
+    def _start(self) -> None:
+        """首次请求时启动进程池和片段读取线程
+
+        使用 spawn 启动工作进程: 读取线程运行时 fork 不安全
+        """
+        if self._executor is not None:
+            return
+        context = multiprocessing.get_context('spawn')
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._chunk_queue = context.Queue()
+        self._executor = ProcessPoolExecutor(self.max_workers, mp_context=context,
+                                             initializer=_init_worker, initargs=(self._chunk_queue,))
+        self._reader = threading.Thread(target=self._read_chunks, name='xaml-chunks', daemon=True)
+        self._reader.start()
+
+    def _submit(self, mode: str, node_json: NodeJson, options: Optional[Dict[str, Any]]) -> _Job:
+        """登记请求: 相同内容的任务正在进行时直接共享,否则创建新任务"""
+        options = normalize_options(options)
+        payload = _payload(node_json)
+        self._start()
+
+        self.stats['requests'] += 1
+        key = (mode, content_key(payload, options))
+        job = self._jobs.get(key)
+        if job is not None:
+            self.stats['coalesced'] += 1
+            return job
+
+        job = self._jobs[key] = _Job(self._loop.create_future())
+        self._loop.create_task(self._run(key, job, mode, payload, options))
+        return job
+
+    async def _run(self, key: Tuple[str, str], job: _Job, mode: str, payload: bytes, options: Options) -> None:
+        """等待并发名额后在进程池中执行任务"""
+        try:
+            if self._slots.locked():
+                self.stats['waited'] += 1
+            async with self._slots:
+                self._pending += 1
+                self.stats['peak_pending'] = max(self.stats['peak_pending'], self._pending)
+                try:
+                    if mode == 'stream':
+                        token = next(self._tokens)
+                        self._streams[token] = job
+                        try:
+                            await self._loop.run_in_executor(
+                                self._executor, _stream_worker, token, payload, options, self.chunk_lines)
+                            # 片段和结果经不同的通道返回,等结束标记到达后才算完成
+                            await job.ended.wait()
+                        finally:
+                            self._streams.pop(token, None)
+                        result = ''.join(job.chunks)
+                    else:
+                        result = await self._loop.run_in_executor(self._executor, _convert_worker, payload, options)
+                finally:
+                    self._pending -= 1
+        except Exception as e:
+            self.stats['failed'] += 1
+            job.future.set_exception(e)
+        else:
+            self.stats['completed'] += 1
+            job.future.set_result(result)
+        finally:
+            self._jobs.pop(key, None)
+            job.close()
+
+    def _read_chunks(self) -> None:
+        """读取线程: 把工作进程送回的片段转交给事件循环"""
+        while True:
+            item = self._chunk_queue.get()
+            if item is None:
+                return
+            try:
+                self._loop.call_soon_threadsafe(self._on_chunk, *item)
+            except RuntimeError:   # 事件循环已关闭
+                return
+
+    def _on_chunk(self, token: int, chunk: Optional[str]) -> None:
+        job = self._streams.get(token)
+        if job is None:
+            return
+        if chunk is None:
+            job.ended.set()
+        else:
+            job.push(chunk)
+
+
+# ========== 默认服务 ==========
+
+_default_service: Optional[ConversionService] = None
+
+
+def _service() -> ConversionService:
+    """当前事件循环的默认服务 (事件循环变化时重新创建)"""
+    global _default_service
+    loop = asyncio.get_running_loop()
+    if _default_service is None or _default_service._loop not in (None, loop):
+        if _default_service is not None:
+            _default_service.close()
+        _default_service = ConversionService()
+    return _default_service
+
+
+async def convert_async(node_json: NodeJson, options: Dict[str, Any] = None) -> Dict[str, str]:
+    """使用默认服务转换 (见 ConversionService.convert)"""
+    return await _service().convert(node_json, options)
+
+
+async def convert_stream(node_json: NodeJson, options: Dict[str, Any] = None) -> AsyncIterator[str]:
+    """使用默认服务逐块转换 (见 ConversionService.stream)"""
+    async for chunk in _service().stream(node_json, options):
+        yield chunk
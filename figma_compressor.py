@@ -10,12 +10,19 @@ Figma Node Inspector JSON 压缩工具
 
 使用方法:
     python figma_compressor.py input.json output.json
+    python figma_compressor.py input.json output.json --compact   # 不缩进
+    python figma_compressor.py input.json output.json --no-cache  # 不使用增量压缩缓存
 """
 
-import json
+import hashlib
+import os
+import pickle
 import sys
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
+
+from src import json_io
 
 
 # ==================== Figma 默认值定义 ====================
@@ -210,6 +217,9 @@ COMPUTED_PROPERTIES = {
     "strokeGeometry",  # SVG 描边路径,可从形状属性重建
 }
 
+# 矢量节点的几何数据无法从形状属性重建 (转换为 Path 时需要),这些类型保留 fillGeometry
+VECTOR_NODE_TYPES = {"VECTOR", "BOOLEAN_OPERATION", "STAR", "POLYGON"}
+
 # 需要删除的 UI 状态和辅助属性
 UI_STATE_PROPERTIES = {
     "expanded",  # Figma UI 状态
@@ -352,10 +362,27 @@ def is_identity_transform(transform: Any) -> bool:
 
 
 def compress_object(obj: Any, node_type: Optional[str] = None) -> Any:
-    """递归压缩对象"""
+    """压缩对象 (children 中的所有后代节点都按 node_type 压缩)"""
     if not isinstance(obj, dict):
         return obj
     
+    # 用显式栈遍历 children,避免深层嵌套时超出递归深度
+    root = _compress_fields(obj, node_type)
+    stack = [root]
+    while stack:
+        compressed = stack.pop()
+        children = compressed.get("children")
+        if isinstance(children, list):
+            for i, item in enumerate(children):
+                if isinstance(item, dict):
+                    children[i] = _compress_fields(item, node_type)
+                    stack.append(children[i])
+    
+    return root
+
+
+def _compress_fields(obj: Dict[str, Any], node_type: Optional[str] = None) -> Dict[str, Any]:
+    """压缩单个对象的字段 (children 只做浅拷贝,由调用方继续处理)"""
     compressed = {}
     
     for key, value in obj.items():
@@ -363,8 +390,10 @@ def compress_object(obj: Any, node_type: Optional[str] = None) -> Any:
         if value is None:
             continue
             
-        # 跳过计算属性
+        # 跳过计算属性 (矢量节点的 fillGeometry 除外)
         if key in COMPUTED_PROPERTIES:
+            if key == "fillGeometry" and obj.get("type") in VECTOR_NODE_TYPES:
+                compressed[key] = value
             continue
         
         # 跳过 UI 状态属性
@@ -397,11 +426,8 @@ def compress_object(obj: Any, node_type: Optional[str] = None) -> Any:
         # 保留关键属性 (即使是 null 也要检查是否在 children 中)
         if key in CRITICAL_PROPERTIES:
             # children 即使为空也保留
-            if key == "children":
-                if isinstance(value, list):
-                    compressed[key] = [compress_object(item, node_type) for item in value]
-                else:
-                    compressed[key] = value
+            if key == "children" and isinstance(value, list):
+                compressed[key] = list(value)
             else:
                 # 其他关键属性,跳过 null 值
                 if value is not None:
@@ -416,7 +442,7 @@ def compress_object(obj: Any, node_type: Optional[str] = None) -> Any:
         if node_type and is_default_value(node_type, key, value):
             continue
         
-        # 递归处理嵌套对象
+        # 递归处理嵌套对象 (颜色、约束等,层级很浅)
         if isinstance(value, dict):
             compressed_value = compress_object(value, node_type)
             if compressed_value:  # 只保留非空对象
@@ -438,17 +464,37 @@ def compress_object(obj: Any, node_type: Optional[str] = None) -> Any:
 
 
 def compress_node(node: Dict[str, Any]) -> Dict[str, Any]:
-    """压缩单个节点"""
-    node_type = node.get("type", "")
+    """压缩单个节点
     
-    # 递归压缩节点
-    compressed = compress_object(node, node_type)
-    
-    # 递归处理子节点
-    if "children" in compressed:
-        compressed["children"] = [compress_node(child) for child in compressed["children"]]
+    每个节点依次按祖先节点类型和自身类型去除默认值 (与逐层递归压缩的结果一致),
+    同一类型只处理一次,用显式栈遍历,嵌套深度不受递归限制
+    """
+    root = {}
+    # 栈元素: (原始节点, 祖先类型序列, 结果写入的列表, 下标)
+    stack = [(node, (), None, 0)]
+    while stack:
+        raw, ancestor_types, target, index = stack.pop()
+        
+        # 压缩类型序列: 祖先类型 + 自身类型,按首次出现去重
+        node_type = raw.get("type", "")
+        types = ancestor_types if node_type in ancestor_types else ancestor_types + (node_type,)
+        
+        compressed = raw
+        for type_name in types:
+            compressed = _compress_fields(compressed, type_name)
+        
+        if target is None:
+            root = compressed
+        else:
+            target[index] = compressed
+        
+        children = compressed.get("children")
+        if isinstance(children, list):
+            for i in range(len(children) - 1, -1, -1):
+                if isinstance(children[i], dict):
+                    stack.append((children[i], types, children, i))
     
-    return compressed
+    return root
 
 
 def compress_tree(nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -456,6 +502,256 @@ def compress_tree(nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return [compress_node(node) for node in nodes]
 
 
+# ==================== 增量压缩 ====================
+
+# 默认缓存文件
+DEFAULT_CACHE_FILE = Path(".cache") / "figma_compressor.pickle"
+
+# 缓存格式版本,压缩逻辑变化时递增
+CACHE_VERSION = 2
+
+# 缓存保留的根节点数 (超过时丢弃最久未使用的)
+MAX_CACHED_ROOTS = 256
+
+# 缓存项下标: [原始子树哈希, 压缩类型序列, 压缩后的子树, {子节点 id: 缓存项}, 子树节点数, 文档版本]
+_HASH, _TYPES, _NODE, _CHILDREN, _COUNT, _VERSION = range(6)
+
+
+def _defaults_fingerprint() -> str:
+    """默认值表的指纹 (默认值变化时缓存失效)"""
+    return hashlib.blake2b(json_io.dumps(FIGMA_DEFAULTS), digest_size=8).hexdigest()
+
+
+# _digests 中没有记录的标记 (None 表示无法哈希)
+_MISSING = object()
+
+
+class CompressionCache:
+    """按节点 id 和原始 JSON 内容哈希缓存压缩结果
+
+    从根节点向下比较: 子树哈希 (自身字段 JSON 与子节点哈希组合的 Merkle 哈希) 和压缩类型序列都与缓存一致时,
+    直接拼接缓存的压缩子树,不再访问其后代; 不一致时只重新压缩该节点自身的字段,再逐个比较子节点。
+    只改动一个 Frame 时,只有从根到该 Frame 路径上的节点和该 Frame 的子树重新压缩。
+    根节点带文档版本 (REST API 的 version) 且与缓存一致时不计算哈希。
+
+    缓存用 pickle 保存,每个根节点单独序列化,用到时才反序列化; 压缩子树在各层缓存项之间共享,
+    文件大小与压缩结果相当。嵌套过深无法 pickle 的根节点不写入缓存文件。
+    返回的节点与缓存共享,调用方不要修改。
+    """
+
+    def __init__(self, path: Optional[Path] = DEFAULT_CACHE_FILE):
+        """
+        Args:
+            path: 缓存文件 (None=只在内存中缓存)
+        """
+        self.path = Path(path) if path else None
+        self.stats = {'reused': 0, 'recompressed': 0, 'spliced': 0, 'hashed_bytes': 0}
+        self._roots = self._load()
+        # 本次 compress_tree 中已算出的子树哈希: id(原始节点) → 哈希
+        self._digests = {}
+
+    def _load(self) -> Dict[str, Union[list, bytes]]:
+        """读取缓存 ({根节点 id: 序列化的缓存项}): 版本或默认值表不一致时返回空缓存"""
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, 'rb') as f:
+                version, fingerprint, roots = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+            return {}
+        if version != CACHE_VERSION or fingerprint != _defaults_fingerprint():
+            return {}
+        return roots
+
+    def save(self) -> None:
+        """写入缓存文件 (只保留最近使用的 MAX_CACHED_ROOTS 个根节点)"""
+        if self.path is None:
+            return
+        while len(self._roots) > MAX_CACHED_ROOTS:
+            del self._roots[next(iter(self._roots))]
+        roots = {}
+        for node_id, entry in self._roots.items():
+            if isinstance(entry, list):
+                try:
+                    entry = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+                except RecursionError:
+                    continue
+            roots[node_id] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((CACHE_VERSION, _defaults_fingerprint(), roots), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def _root_entry(self, node_id: str) -> Optional[list]:
+        """根节点的缓存项 (首次使用时反序列化)"""
+        entry = self._roots.get(node_id)
+        if isinstance(entry, bytes):
+            try:
+                entry = pickle.loads(entry)
+            except (EOFError, pickle.UnpicklingError, ValueError, TypeError, RecursionError):
+                entry = None
+            if entry is None:
+                del self._roots[node_id]
+            else:
+                self._roots[node_id] = entry
+        return entry
+
+    def _hash(self, raw: Dict[str, Any]) -> Optional[bytes]:
+        """原始子树的哈希 (自底向上的 Merkle 哈希: 节点自身字段的 JSON + 子节点哈希)
+
+        第一次遇到子树时对整棵子树算一遍,后代的哈希一并记住 (本次 compress_tree 内有效),
+        向下比较时直接取用: 每个字节只序列化、哈希一次,也不受序列化深度限制 (orjson 为 255 层)
+        """
+        digest = self._digests.get(id(raw), _MISSING)
+        if digest is _MISSING:
+            digest = self._merkle_hash(raw)
+        return digest
+
+    def _merkle_hash(self, root: Dict[str, Any]) -> Optional[bytes]:
+        """后序计算子树中每个节点的哈希; 自身字段无法序列化时为 None (不缓存,祖先也为 None)"""
+        digests = self._digests
+        dumps = json_io.dumps
+        sha1 = hashlib.sha1
+        hashed = 0
+        # 栈元素: (节点, 子节点列表或 None, 子节点是否已入栈)
+        stack = [(root, None, False)]
+        while stack:
+            node, children, expanded = stack.pop()
+            if not expanded:
+                children = node.get("children")
+                if isinstance(children, list):
+                    stack.append((node, children, True))
+                    stack.extend((child, None, False) for child in children
+                                 if isinstance(child, dict) and id(child) not in digests)
+                    continue
+                children = None
+
+            # 自身字段: 叶子节点直接序列化,容器节点去掉 children (复制在 C 层完成,比逐键过滤快)
+            fields = node
+            if children is not None:
+                fields = dict(node)
+                del fields["children"]
+            try:
+                own = dumps(fields)
+            except (TypeError, ValueError, RecursionError):
+                digests[id(node)] = None
+                continue
+            hashed += len(own)
+            hasher = sha1(b'merkle:' + own)
+            digest = None
+            if children is not None:
+                hasher.update(len(children).to_bytes(4, 'little'))
+                for child in children:
+                    child_digest = digests.get(id(child)) if isinstance(child, dict) else dumps(child)
+                    if child_digest is None:
+                        break
+                    hasher.update(child_digest)
+                else:
+                    digest = hasher.digest()
+            else:
+                digest = hasher.digest()
+            digests[id(node)] = digest
+        self.stats['hashed_bytes'] += hashed
+        return digests[id(root)]
+
+    def cached(self, node_id: str, version: str) -> Optional[Dict[str, Any]]:
+        """按文档版本取根节点的压缩结果 (不需要原始节点),没有时返回 None"""
+        entry = self._root_entry(node_id)
+        if entry is None or version is None or entry[_VERSION] != version:
+            return None
+        self._roots[node_id] = self._roots.pop(node_id)
+        self.stats['reused'] += entry[_COUNT]
+        self.stats['spliced'] += 1
+        return entry[_NODE]
+
+    def compress_tree(self, nodes: List[Dict[str, Any]], version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """增量压缩节点树,结果与 compress_tree 相同
+
+        Args:
+            nodes: 原始节点数组
+            version: 文档版本 (可选),与缓存的根节点版本一致时直接复用
+        """
+        results = [None] * len(nodes)
+        # 栈元素: (原始节点, 祖先类型序列, 旧的同级缓存项, 父缓存项, 结果写入的列表, 下标);
+        # 原始节点为 None 时表示子节点处理完毕,把缓存项的节点数累加到父缓存项
+        stack = []
+        for i in range(len(nodes) - 1, -1, -1):
+            if isinstance(nodes[i], dict):
+                stack.append((nodes[i], (), None, None, results, i))
+            else:
+                results[i] = nodes[i]
+
+        while stack:
+            raw, types, old_entries, parent, target, index = stack.pop()
+            if raw is None:
+                if parent is not None:
+                    parent[_COUNT] += types[_COUNT]
+                continue
+
+            node_id = raw.get("id")
+            if node_id is None:
+                old = None
+            elif parent is None:
+                old = self._root_entry(node_id)
+            else:
+                old = old_entries.get(node_id)
+            node_type = raw.get("type", "")
+            node_types = types if node_type in types else types + (node_type,)
+
+            if parent is None and old is not None and version is not None and old[_VERSION] == version:
+                digest = old[_HASH]
+            else:
+                digest = self._hash(raw)
+
+            if old is not None and digest is not None and old[_HASH] == digest and old[_TYPES] == node_types:
+                # 命中: 拼接缓存的压缩子树
+                entry = old
+                if parent is not None:
+                    parent[_COUNT] += entry[_COUNT]
+                self.stats['reused'] += entry[_COUNT]
+                self.stats['spliced'] += 1
+            else:
+                compressed = raw
+                for type_name in node_types:
+                    compressed = _compress_fields(compressed, type_name)
+                entry = [digest, node_types, compressed, {}, 1, version]
+                self.stats['recompressed'] += 1
+
+                children = compressed.get("children")
+                if isinstance(children, list):
+                    stack.append((None, entry, None, parent, None, None))
+                    old_children = old[_CHILDREN] if old is not None else {}
+                    for i in range(len(children) - 1, -1, -1):
+                        if isinstance(children[i], dict):
+                            stack.append((children[i], node_types, old_children, entry, children, i))
+                elif parent is not None:
+                    parent[_COUNT] += 1
+
+            target[index] = entry[_NODE]
+            if node_id is None:
+                continue
+            if parent is None:
+                # 根节点移到末尾 (最近使用),并记录文档版本
+                self._roots.pop(node_id, None)
+                entry[_VERSION] = version
+                self._roots[node_id] = entry
+            else:
+                parent[_CHILDREN][node_id] = entry
+
+        self._digests.clear()
+        return results
+
+    def format_stats(self) -> str:
+        """统计摘要"""
+        stats = self.stats
+        total = stats['reused'] + stats['recompressed']
+        hit_rate = stats['reused'] / total * 100 if total else 0.0
+        return (f"节点 {total}, 复用 {stats['reused']} (命中率 {hit_rate:.1f}%), "
+                f"重新压缩 {stats['recompressed']}, 拼接子树 {stats['spliced']}, "
+                f"哈希 {stats['hashed_bytes'] / 1024:.0f} KB")
+
+
 # ==================== 主函数 ====================
 
 def main():
@@ -467,30 +763,43 @@ def main():
         sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
         sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
     
-    if len(sys.argv) < 2:
-        print("使用方法: python figma_compressor.py input.json [output.json]")
+    # --compact: 不缩进 (作为中间文件交给转换器时更快、更小)
+    # --no-cache: 不读写增量压缩缓存 (.cache/figma_compressor.pickle)
+    flags = {'--compact', '--no-cache'}
+    compact = '--compact' in sys.argv[1:]
+    use_cache = '--no-cache' not in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg not in flags]
+    
+    if len(args) < 1:
+        print("使用方法: python figma_compressor.py input.json [output.json] [--compact] [--no-cache]")
         print("如果不指定输出文件,将使用 input_compressed.json")
+        print("--compact: 输出不缩进的紧凑 JSON")
+        print("--no-cache: 不使用增量压缩缓存 (默认只重新压缩内容变化的节点)")
         sys.exit(1)
     
-    input_path = Path(sys.argv[1])
+    input_path = Path(args[0])
     
-    if len(sys.argv) >= 3:
-        output_path = Path(sys.argv[2])
+    if len(args) >= 2:
+        output_path = Path(args[1])
     else:
         output_path = input_path.parent / f"{input_path.stem}_compressed.json"
     
     # 读取输入文件
     print(f"读取文件: {input_path}")
     try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json_io.load(input_path)
     except Exception as e:
         print(f"错误: 无法读取文件 - {e}")
         sys.exit(1)
     
-    # 压缩数据
+    # 压缩数据 (有缓存时只重新压缩内容变化的节点)
     print("压缩中...")
-    compressed_nodes = compress_tree(data)
+    start = time.perf_counter()
+    cache = CompressionCache() if use_cache else None
+    compressed_nodes = cache.compress_tree(data) if cache else compress_tree(data)
+    seconds = time.perf_counter() - start
+    if cache:
+        cache.save()
     
     # 构建输出结构
     output = {
@@ -506,8 +815,7 @@ def main():
     # 写入输出文件
     print(f"写入文件: {output_path}")
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+        json_io.dump(output, output_path, indent=not compact)
     except Exception as e:
         print(f"错误: 无法写入文件 - {e}")
         sys.exit(1)
@@ -521,6 +829,9 @@ def main():
     print(f"原始大小: {original_size:,} bytes")
     print(f"压缩后大小: {compressed_size:,} bytes")
     print(f"压缩率: {reduction:.1f}%")
+    print(f"压缩耗时: {seconds * 1000:.1f} ms")
+    if cache:
+        print(f"增量缓存: {cache.format_stats()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+"""
+Figma REST API 获取工具
+作用: 通过 Figma REST API 获取节点 JSON 并直接压缩,输出与 figma_compressor.py 相同结构的文件,
+可以直接交给 figma_to_xaml_v2.py 转换 (代替从 Node Inspector 手工复制)
+
+使用方法:
+    set FIGMA_TOKEN=figd_xxx
+    python figma_fetch.py FILE_KEY                          # 所有页面的顶层节点 → FILE_KEY_compressed.json
+    python figma_fetch.py FILE_KEY login.json --ids 1:2 1:3
+    python figma_fetch.py FILE_KEY --record recordings      # 同时录制响应,供桩服务器回放
+
+    # 本地桩服务器 (回放录制的响应,离线开发和测试)
+    python figma_fetch.py --serve test_cases/figma_api --port 8765 --rate-limit 5
+    python figma_fetch.py TestCases --base-url http://127.0.0.1:8765
+"""
+import argparse
+import sys
+import time
+
+from src import json_io
+from src.figma_client import API_BASE, DEFAULT_CACHE_DIR, DEFAULT_RATE, FigmaClient
+from src.figma_stub import FigmaStubServer
+
+
+def serve(args) -> None:
+    """运行桩服务器直到 Ctrl+C"""
+    stub = FigmaStubServer(args.serve, port=args.port, rate_limit=args.rate_limit, latency=args.latency)
+    print(f"🛰️  Figma 桩服务器: {stub.url} (录制目录: {args.serve})")
+    print("   按 Ctrl+C 结束")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"\n📊 {stub.format_stats()}")
+
+
+def fetch(args) -> None:
+    """获取节点并写入压缩文件"""
+    output_path = args.output_file or f"{args.file_key}_compressed.json"
+    client = FigmaClient(
+        token=args.token,
+        base_url=args.base_url,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        max_workers=args.jobs,
+        batch_size=args.batch_size,
+        rate=args.rate,
+        record_dir=args.record
+    )
+
+    print(f"🌐 获取文件: {args.file_key} ({args.base_url})")
+    start = time.perf_counter()
+    try:
+        with client:
+            data = client.fetch(args.file_key, args.ids)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ 获取失败: {e}")
+        sys.exit(1)
+    seconds = time.perf_counter() - start
+
+    for node in data['compressed_data']:
+        print(f"   ✓ {node.get('id')} {node.get('name', '')}")
+    missing = data['metadata']['requested_nodes'] - data['metadata']['compressed_nodes']
+    if missing:
+        print(f"⚠️  {missing} 个节点在文件中不存在")
+
+    size = json_io.dump(data, output_path, indent=not args.compact)
+    print(f"\n✅ 已写入: {output_path} ({size:,} bytes, 版本 {data['metadata']['version']}, {seconds:.2f}s)")
+    print(f"📊 {client.format_stats()}")
+    if client.compression:
+        print(f"♻️  增量压缩: {client.compression.format_stats()}")
+    print(f"👉 转换: python figma_to_xaml_v2.py {output_path} output.xaml")
+
+
+def main():
+    """主函数"""
+    # 设置 Windows 控制台 UTF-8 编码
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='通过 Figma REST API 获取并压缩节点 JSON')
+    parser.add_argument('file_key', nargs='?', help='文件 key (figma.com/file/<key>/... 中的部分)')
+    parser.add_argument('output_file', nargs='?', help='输出文件 (默认 <file_key>_compressed.json)')
+    parser.add_argument('--ids', nargs='+', default=None, metavar='ID',
+                        help='节点 id (默认所有页面的顶层节点)')
+    parser.add_argument('--token', default=None, help='个人访问令牌 (默认读取环境变量 FIGMA_TOKEN)')
+    parser.add_argument('--base-url', default=API_BASE, help=f'API 地址 (默认 {API_BASE})')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'缓存目录 (默认 {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true', help='不使用磁盘缓存')
+    parser.add_argument('-j', '--jobs', type=int, default=4, help='并发请求数 (默认 4)')
+    parser.add_argument('--batch-size', type=int, default=20, help='每个请求包含的节点数 (默认 20)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'每秒请求数, 0=不限速 (默认 {DEFAULT_RATE:g})')
+    parser.add_argument('--record', default=None, metavar='DIR', help='录制响应到 DIR (桩服务器格式)')
+    parser.add_argument('--compact', action='store_true', help='输出不缩进的紧凑 JSON')
+    parser.add_argument('--serve', default=None, metavar='DIR', help='运行桩服务器,回放 DIR 中录制的响应')
+    parser.add_argument('--port', type=int, default=8765, help='桩服务器端口 (默认 8765)')
+    parser.add_argument('--rate-limit', type=float, default=0,
+                        help='桩服务器每秒允许的请求数,超过返回 429 (默认 0=不限流)')
+    parser.add_argument('--latency', type=float, default=0, help='桩服务器响应延迟秒数 (默认 0)')
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+    elif args.file_key:
+        fetch(args)
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
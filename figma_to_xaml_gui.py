@@ -3,7 +3,6 @@ Figma JSON 到 XAML 转换器 GUI
 支持粘贴 JSON，自动压缩并转换为 XAML（仅内容，不含 UserControl 头尾）
 """
 import sys
-import json
 import subprocess
 import tempfile
 import os
@@ -15,6 +14,8 @@ from PySide2.QtWidgets import (
 from PySide2.QtCore import Qt
 from PySide2.QtGui import QFont
 
+from src import json_io
+
 
 class FigmaToXamlConverter(QMainWindow):
     """Figma 到 XAML 转换器主窗口"""
@@ -328,9 +329,10 @@ class FigmaToXamlConverter(QMainWindow):
             QApplication.processEvents()  # 刷新 UI
             
             # 1. 验证 JSON 格式
+            json_bytes = json_text.encode('utf-8')
             try:
-                json_data = json.loads(json_text)
-            except json.JSONDecodeError as e:
+                json_io.loads(json_bytes)
+            except ValueError as e:
                 self.update_status(f"❌ JSON 格式错误: {str(e)}", "error")
                 QMessageBox.critical(self, "JSON 错误", f"JSON 格式不正确：\n{str(e)}")
                 return
@@ -341,9 +343,9 @@ class FigmaToXamlConverter(QMainWindow):
             compressed_json = os.path.join(temp_dir, "figma_compressed_temp.json")
             output_xaml = os.path.join(temp_dir, "figma_output_temp.xaml")
             
-            # 保存输入 JSON
-            with open(input_json, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, ensure_ascii=False, indent=2)
+            # 保存输入 JSON (原样写入已校验的字节,不重新序列化)
+            with open(input_json, 'wb') as f:
+                f.write(json_bytes)
             
             self.update_status("⏳ 步骤 1/3: 压缩 JSON...", "info")
             QApplication.processEvents()
@@ -351,7 +353,7 @@ class FigmaToXamlConverter(QMainWindow):
             # 3. 调用压缩脚本（subprocess 方式，不修改原脚本）
             compress_script = Path(__file__).parent / "figma_compressor.py"
             result = subprocess.run(
-                [sys.executable, str(compress_script), input_json, compressed_json],
+                [sys.executable, str(compress_script), input_json, compressed_json, '--compact'],
                 capture_output=True,
                 text=True,
                 errors='ignore'  # 忽略编码错误
@@ -4,7 +4,7 @@ Figma 到 WPF XAML 转换器 V2
 作者: GitHub Copilot
 版本: 2.0
 """
-import json
+import argparse
 import sys
 from pathlib import Path
 
@@ -14,7 +14,20 @@ sys.path.insert(0, str(project_root))
 
 from src.ast_builder import FigmaToWpfBuilder
 from src.wpf_ast import ASTOptimizer
-from src.xaml_renderer import XamlRenderer
+from src.style_extractor import StyleExtractor
+from src.list_virtualizer import ListVirtualizer
+from src.text_measurer import TextMeasurer
+from src.component_library import ComponentLibrary
+from src.layout_inference import LayoutInferencer
+from src.layout_simulator import LayoutValidator
+from src.preview_renderer import PreviewRenderer, preview_available
+from src.xaml_patcher import XamlPatcher, design_ids
+from src.source_map import AttributeOrigins, SourceMap, source_map_path
+from src.dialects import available_targets
+from src.xaml_renderer import XamlRenderer, MultiTargetRenderer
+from src.profiler import PipelineProfiler
+from src import json_io
+from figma_compressor import compress_tree
 
 
 class FigmaToXamlConverter:
@@ -23,47 +36,206 @@ class FigmaToXamlConverter:
     使用 AST + 规则引擎 + Python 字符串拼接
     """
     
-    def __init__(self, config_dir: str = 'config'):
+    def __init__(
+        self,
+        config_dir: str = 'config',
+        optimization_level: int = 0,
+        style_threshold: int = 0,
+        virtualize_threshold: int = 0,
+        profiler: PipelineProfiler = None,
+        text_measure: str = None,
+        targets: list = None,
+        extract_components: bool = False,
+        infer_layout: bool = False,
+        validate_layout: bool = False,
+        preview_dir: str = None,
+        update: bool = False,
+        source_map: bool = False
+    ):
         """初始化转换器
         
         Args:
             config_dir: 配置文件目录
+            optimization_level: AST 优化等级 (0=不优化, 1=基础优化, 2=激进优化)
+            style_threshold: 属性组合/颜色重复多少次提取为 Style/画刷资源 (0=不提取)
+            virtualize_threshold: 连续多少个相同列表项转换为虚拟化 ItemsControl (0=不转换)
+            profiler: 性能分析器 (可选,默认不启用)
+            text_measure: 文本测量模式 ('flag' 标记溢出, 'adjust' 放大溢出尺寸, None 不测量)
+            targets: 目标方言列表 (默认 ['wpf']),多个目标共用同一棵 AST,一次遍历全部渲染
+            extract_components: 组件提取为独立的 UserControl,没有内容覆盖的实例输出为引用
+            infer_layout: 为绝对定位 (layoutMode NONE) 的 Frame 推断自动布局
+            validate_layout: 模拟 WPF 布局,把元素矩形与 Figma 几何比较并报告偏差
+            preview_dir: 预览图输出目录 (按模拟布局画出 PNG 并与 Figma 参照图比较, 需要 Pillow)
+            update: 增量更新模式,输出文件已存在时只修补设计中变化的元素 (保留手工修改)
+            source_map: 输出源映射 (输出文件名.map.json): XAML 行列范围 → Figma 节点 id 和产生它的规则
         """
         self.builder = FigmaToWpfBuilder(config_dir)
-        self.optimizer = ASTOptimizer(optimization_level=0)  # 第一版: 不优化
-        self.renderer = XamlRenderer()
+        self.targets = list(dict.fromkeys(targets or ['wpf']))
+        self.renderer = XamlRenderer(target=self.targets[0])
+        self.multi_renderer = MultiTargetRenderer(self.targets) if len(self.targets) > 1 else None
+        self.optimizer = ASTOptimizer(
+            optimization_level=optimization_level,
+            wpf_defaults=self.renderer.wpf_defaults
+        )
+        self.list_virtualizer = ListVirtualizer(min_items=virtualize_threshold)
+        self.style_extractor = StyleExtractor(threshold=style_threshold)
+        
+        # 性能分析: 构建器和规则引擎共享同一个分析器
+        self.profiler = profiler or PipelineProfiler(enabled=False)
+        self.builder.profiler = self.profiler
+        self.builder.rule_engine.profiler = self.profiler
+        self.profiler.register_cache('rule_expressions', self.builder.rule_engine.evaluator.cache_stats)
+        
+        # 文本测量 (可选)
+        self.text_measurer = TextMeasurer(mode=text_measure) if text_measure else None
+        if self.text_measurer:
+            self.profiler.register_cache('font_metrics', self.text_measurer.cache_stats)
+        
+        # 自动布局推断 (可选)
+        self.layout_inferencer = LayoutInferencer() if infer_layout else None
+        
+        # 组件提取 (可选): 构建器遇到实例时查询组件库
+        self.components = ComponentLibrary() if extract_components else None
+        self.builder.components = self.components
+        
+        # 布局校验 (可选): 构建器记录每个 AST 节点的来源 Figma 节点
+        self.layout_validator = LayoutValidator(
+            self.renderer.wpf_defaults, text_measurer=self.text_measurer) if validate_layout else None
+        
+        # 预览图 (可选)
+        self.preview_dir = preview_dir
+        self.previewer = PreviewRenderer(
+            self.renderer.wpf_defaults, text_measurer=self.text_measurer) if preview_dir else None
+        
+        # 增量更新 (可选): 元素带设计时 id,按 id 修补已有文件
+        self.patcher = XamlPatcher() if update else None
+        
+        # 源映射 (可选): 构建器记录容器选择规则,各阶段记录属性来源
+        self.attribute_origins = AttributeOrigins() if source_map else None
     
-    def convert_node(self, figma_node: dict, is_root: bool = False) -> str:
+    def convert_node(self, figma_node: dict, is_root: bool = False, class_name: str = None) -> str:
         """转换单个 Figma 节点
         
         Args:
             figma_node: Figma JSON 节点
             is_root: 是否是根节点
+            class_name: UserControl 类名 (默认由节点名生成)
         
         Returns:
-            XAML 字符串
+            XAML 字符串 (第一个目标方言)
         """
-        # 1. 构建 AST
-        ast = self.builder.build(figma_node, is_root=is_root)
+        ast = self._build_ast(figma_node, is_root)
+        with self.profiler.stage('render'):
+            return self.renderer.render_usercontrol(ast, **self._document_info(figma_node, class_name))
+    
+    def iter_node(self, figma_node: dict, is_root: bool = False, class_name: str = None,
+                  chunk_lines: int = 256):
+        """逐块转换单个 Figma 节点 (第一个目标方言),拼接结果与 convert_node 相同
+        
+        AST 构建完成后边渲染边输出,每块约 chunk_lines 行
+        
+        Yields:
+            XAML 片段
+        """
+        ast = self._build_ast(figma_node, is_root)
+        yield from self.renderer.iter_usercontrol(
+            ast, **self._document_info(figma_node, class_name), chunk_lines=chunk_lines)
+    
+    def convert_node_targets(self, figma_node: dict, is_root: bool = False, class_name: str = None) -> dict:
+        """转换单个 Figma 节点为所有目标方言
         
-        # 2. 优化 AST (第一版: 不优化)
-        # ast = self.optimizer.optimize(ast)
+        AST 只构建、优化一次,所有目标在同一次遍历中渲染
         
-        # 3. 渲染 XAML
+        Returns:
+            {目标方言: XAML 字符串}
+        """
+        if self.multi_renderer is None:
+            return {self.renderer.target: self.convert_node(figma_node, is_root, class_name)}
+        ast = self._build_ast(figma_node, is_root)
+        with self.profiler.stage('render'):
+            return self.multi_renderer.render_usercontrol(ast, **self._document_info(figma_node, class_name))
+    
+    def _document_info(self, figma_node: dict, class_name: str = None) -> dict:
+        """UserControl 类名和设计尺寸"""
         node_name = figma_node.get('name', 'Control')
-        class_name = node_name.replace(' ', '')
+        return {
+            'class_name': class_name or node_name.replace(' ', ''),
+            'design_width': figma_node.get('width', 200),
+            'design_height': figma_node.get('height', 200),
+        }
+    
+    def _build_ast(self, figma_node: dict, is_root: bool):
+        """测量、构建并优化 AST (渲染之前的所有阶段)"""
+        profiler = self.profiler
         
-        design_width = figma_node.get('width', 200)
-        design_height = figma_node.get('height', 200)
+        # 0. 推断绝对定位 Frame 的自动布局 (未启用时跳过)
+        if self.layout_inferencer:
+            with profiler.stage('infer_layout'):
+                self.layout_inferencer.infer_tree(figma_node)
         
-        xaml = self.renderer.render_usercontrol(
-            ast,
-            class_name=class_name,
-            design_width=design_width,
-            design_height=design_height
-        )
+        # 1. 批量测量文本 (未启用时跳过)
+        if self.text_measurer:
+            with profiler.stage('measure'):
+                self.text_measurer.measure_tree(figma_node)
+        
+        # 2. 构建 AST
+        origins = self.attribute_origins
+        if self.layout_validator or self.patcher or origins or self.list_virtualizer.min_items > 0:
+            self.builder.sources = {}
+        if origins:
+            self.builder.rules = {}
+            self.builder.attribute_rules = {}
+            origins.reset()
+        with profiler.stage('build'):
+            ast = self.builder.build(figma_node, is_root=is_root)
+            if origins:
+                origins.record_build(ast, self.builder.sources, self.builder.rules, self.builder.attribute_rules)
+        
+        # 3. 优化 AST (等级 0 时保持原样)
+        with profiler.stage('optimize'):
+            ast = self.optimizer.optimize(ast)
+            if origins:
+                origins.record(ast, 'optimize')
+        
+        # 4. 长列表虚拟化 (阈值为 0 时跳过)
+        with profiler.stage('virtualize'):
+            ast = self.list_virtualizer.virtualize(ast, self.builder.sources)
+            if origins:
+                origins.record(ast, 'virtualize')
+        
+        # 5. 提取重复属性为 Style/画刷资源 (阈值为 0 时跳过)
+        with profiler.stage('styles'):
+            ast = self.style_extractor.extract(ast)
+            if origins:
+                origins.record(ast, 'styles')
+        
+        # 6. 模拟布局并与 Figma 几何比较 (未启用时跳过)
+        if self.layout_validator:
+            with profiler.stage('validate'):
+                self.layout_validator.validate(ast, figma_node, self.builder.sources,
+                                               figma_node.get('width', 200), figma_node.get('height', 200))
+        
+        # 7. 画出预览图并与 Figma 参照图比较 (未启用时跳过)
+        if self.previewer:
+            with profiler.stage('preview'):
+                self.previewer.preview(ast, figma_node, figma_node.get('width', 200), figma_node.get('height', 200))
+        
+        # 8. 为元素分配设计时 id,渲染时输出 d:FigmaId/d:FigmaHash (未启用时跳过)
+        if self.patcher:
+            ids = design_ids(ast, self.builder.sources)
+            for renderer in self._renderers():
+                renderer.design_ids = ids
         
-        return xaml
+        # 9. 渲染时收集源映射 (每个目标一份,未启用时跳过)
+        if origins:
+            for renderer in self._renderers():
+                renderer.source_map = SourceMap(self.builder.sources, origins)
+        
+        return ast
+    
+    def _renderers(self) -> list:
+        """所有目标方言的渲染器"""
+        return self.multi_renderer.renderers if self.multi_renderer else [self.renderer]
     
     def convert_file(self, input_path: str, output_path: str = None) -> None:
         """转换 Figma JSON 文件
@@ -72,40 +244,178 @@ class FigmaToXamlConverter:
             input_path: 输入的 JSON 文件路径
             output_path: 输出的 XAML 文件路径 (可选)
         """
+        profiler = self.profiler
+        
         # 读取 JSON
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with profiler.stage('json_load'):
+            data = json_io.load(input_path)
         
-        # 获取压缩数据
-        compressed_data = data.get('compressed_data', [])
+        # 获取压缩数据 (Node Inspector 原始数组先压缩)
+        if isinstance(data, list):
+            with profiler.stage('compression'):
+                compressed_data = compress_tree(data)
+        else:
+            compressed_data = data.get('compressed_data', [])
         
         if not compressed_data:
             print("❌ 没有找到压缩数据!")
             return
         
+        # 登记导出数据中的组件定义 (启用组件提取时,每个文件使用新的组件库)
+        if self.components is not None:
+            self.components = self.builder.components = ComponentLibrary()
+            self.components.index(compressed_data)
+        
         # 转换每个根节点
         for i, node in enumerate(compressed_data):
             node_name = node.get('name', f'Control{i}')
             class_name = node_name.replace(' ', '')
             
-            # 转换
-            xaml_content = self.convert_node(node, is_root=True)
-            
-            # 确定输出文件名
-            if output_path:
-                output_file = output_path
-            else:
-                output_file = f"{class_name}.xaml"
-            
-            # 写入文件
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(xaml_content)
+            # 转换 (多个目标时一次渲染全部方言)
+            outputs = self.convert_node_targets(node, is_root=True)
             
-            print(f"✅ 已生成: {output_file}")
+            for target, xaml_content in outputs.items():
+                output_file = self._output_file(output_path, class_name, target)
+                
+                # 写入文件
+                self._write_output(output_file, xaml_content, target)
             print(f"   节点名称: {node_name}")
             print(f"   节点类型: {node.get('type')}")
             print(f"   子元素数: {len(node.get('children', []))}")
+            if self.optimizer.level > 0:
+                print(f"   优化: {self.optimizer.format_stats()}")
+            if self.list_virtualizer.min_items > 0:
+                print(f"   列表: {self.list_virtualizer.format_stats()}")
+            if self.style_extractor.threshold > 0:
+                print(f"   资源: {self.style_extractor.format_stats()}")
+            if self.text_measurer:
+                print(f"   文本: {self.text_measurer.format_stats()}")
+            if self.layout_inferencer:
+                print(f"   布局: {self.layout_inferencer.format_stats()}")
+            if self.layout_validator:
+                print(f"   校验: {self.layout_validator.format_report()}")
+            if self.previewer:
+                self._save_preview(class_name)
             print()
+        
+        # 被引用的组件各输出一个 UserControl
+        if self.components is not None:
+            self._convert_components(output_path)
+    
+    def _convert_components(self, output_path: str = None) -> None:
+        """把被引用的组件转换为独立的 UserControl (与输出文件放在同一目录)
+        
+        组件内部的实例也会输出为引用,转换过程中新引用的组件继续转换;
+        实例覆盖过文本/填充的组件,对应元素绑定到组件属性,并在旁边输出声明这些属性的 partial 类
+        (之后的转换又覆盖了新的内容时重新转换)
+        """
+        directory = Path(output_path).parent if output_path else Path()
+        converted = {}  # 组件 id → 转换时的组件属性数
+        
+        pending = self.components.referenced()
+        while pending:
+            for entry in pending:
+                converted[entry.key] = len(entry.properties)
+                self.builder.component_properties = self.components.bindings(entry) or None
+                try:
+                    outputs = self.convert_node_targets(entry.source, is_root=True, class_name=entry.class_name)
+                finally:
+                    self.builder.component_properties = None
+                for target, xaml_content in outputs.items():
+                    output_file = str(directory / f"{entry.class_name}{self._file_suffix(target)}")
+                    self._write_output(output_file, xaml_content, target, label='组件')
+                    self._write_component_properties(directory, entry.class_name, target)
+                if self.previewer:
+                    self._save_preview(entry.class_name)
+            pending = [entry for entry in self.components.referenced()
+                       if converted.get(entry.key) != len(entry.properties)]
+        
+        print(f"   {self.components.format_stats()}")
+        print()
+    
+    def _write_component_properties(self, directory: Path, class_name: str, target: str) -> None:
+        """写入组件属性的 partial 类 (组件没有绑定的属性时跳过)"""
+        renderer = self._renderers()[self.targets.index(target)]
+        if not renderer.component_properties:
+            return
+        dialect = renderer.dialect
+        output_file = str(directory / f"{class_name}{dialect.component_properties.get('file_suffix', '.Properties.cs')}")
+        with self.profiler.stage('write'):
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(dialect.properties_code(class_name, renderer.component_properties))
+        print(f"✅ 已生成组件属性: {output_file} ({', '.join(renderer.component_properties)})")
+    
+    def _write_output(self, output_file: str, xaml_content: str, target: str, label: str = '') -> None:
+        """写入输出文件 (启用源映射时同时写入 输出文件名.map.json)
+        
+        增量更新模式下文件已存在时只修补设计中变化的部分,无法解析时保持原文件不变;
+        源映射描述的是生成的内容,修补过的文件不写源映射
+        """
+        with self.profiler.stage('write'):
+            if self.patcher and Path(output_file).exists():
+                with open(output_file, 'r', encoding='utf-8') as f:
+                    existing = f.read()
+                try:
+                    xaml_content = self.patcher.patch(existing, xaml_content)
+                except ValueError as e:
+                    print(f"⚠️ 无法增量更新{label} {output_file}: {e},保持原文件不变")
+                    return
+                if xaml_content != existing:
+                    with open(output_file, 'w', encoding='utf-8') as f:
+                        f.write(xaml_content)
+                print(f"✅ 已更新{label}: {output_file} ({self.patcher.format_stats()})")
+                return
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(xaml_content)
+            source_map = self._renderers()[self.targets.index(target)].source_map
+            if source_map is not None:
+                source_map.save(source_map_path(output_file), Path(output_file).name, target)
+        print(f"✅ 已生成{label}: {output_file}")
+        if source_map is not None:
+            print(f"   源映射: {source_map.format_stats()} → {source_map_path(output_file)}")
+    
+    def _save_preview(self, class_name: str) -> None:
+        """保存最近一次转换的预览图 (类名.png / 类名.figma.png / 类名.diff.png)"""
+        with self.profiler.stage('write'):
+            paths = self.previewer.save(self.preview_dir, class_name)
+        print(f"   预览: {self.previewer.format_stats()} → {paths[0]}")
+    
+    def _file_suffix(self, target: str) -> str:
+        """目标方言的输出文件后缀"""
+        if self.multi_renderer is None:
+            return self.renderer.dialect.file_suffix
+        return self.multi_renderer.renderers[self.targets.index(target)].dialect.file_suffix
+    
+    def _output_file(self, output_path: str, class_name: str, target: str) -> str:
+        """确定输出文件名
+        
+        单个目标时使用指定路径 (默认 类名.xaml);
+        多个目标时按方言后缀区分,如 Card.xaml / Card.axaml / Card.maui.xaml
+        """
+        suffix = self._file_suffix(target)
+        if self.multi_renderer is None:
+            return output_path or f"{class_name}{suffix}"
+        stem = str(Path(output_path).with_suffix('')) if output_path else class_name
+        return f"{stem}{suffix}"
+
+
+def report_profile(profiler: PipelineProfiler, destination: str) -> None:
+    """输出性能分析结果
+    
+    Args:
+        profiler: 性能分析器
+        destination: '-' 打印表格, 其他值为 JSON 输出路径, None 不输出
+    """
+    if destination is None:
+        return
+    
+    if destination == '-':
+        print("📊 性能分析:")
+        print(profiler.format_table())
+        print()
+    else:
+        profiler.write_json(destination)
+        print(f"📊 性能数据已写入: {destination}")
 
 
 def main():
@@ -122,32 +432,95 @@ def main():
     print("=" * 70)
     print()
     
-    # 检查命令行参数
-    if len(sys.argv) >= 3:
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='Figma JSON → WPF XAML 转换器 V2.0')
+    parser.add_argument('input_file', nargs='?', help='压缩后的 Figma JSON 文件')
+    parser.add_argument('output_file', nargs='?', help='输出的 XAML 文件 (可选)')
+    parser.add_argument('-O', '--optimize', type=int, choices=[0, 1, 2], default=0,
+                        help='AST 优化等级: 0=不优化, 1=基础优化, 2=激进优化')
+    parser.add_argument('--style-threshold', type=int, default=0, metavar='N',
+                        help='属性组合/颜色重复 N 次以上时提取为 Style/画刷资源 (0=不提取)')
+    parser.add_argument('--virtualize', type=int, default=0, metavar='N',
+                        help='连续 N 个以上结构相同的列表项转换为虚拟化 ItemsControl (0=不转换)')
+    parser.add_argument('--profile', nargs='?', const='-', default=None, metavar='JSON',
+                        help='输出各阶段耗时/分配统计: 不带参数打印表格,指定路径则写入 JSON')
+    parser.add_argument('--measure-text', nargs='?', const='flag', default=None, choices=TextMeasurer.MODES,
+                        help='测量文本宽高: flag=在注释中标记溢出 (默认), adjust=放大溢出的 Width/Height')
+    parser.add_argument('--target', nargs='+', default=['wpf'], choices=available_targets(), metavar='TARGET',
+                        help=f"目标方言,可指定多个 (默认 wpf, 可选: {', '.join(available_targets())})")
+    parser.add_argument('--components', action='store_true',
+                        help='组件提取为独立的 UserControl 文件,没有内容覆盖的实例输出为引用')
+    parser.add_argument('--infer-layout', action='store_true',
+                        help='根据子元素坐标为绝对定位 Frame 推断水平/垂直/网格布局')
+    parser.add_argument('--validate-layout', action='store_true',
+                        help='模拟 WPF 布局 (measure/arrange),报告与 Figma 坐标尺寸偏差超过 1px 的元素')
+    parser.add_argument('--preview', default=None, metavar='DIR',
+                        help='按模拟布局画出预览 PNG 并与 Figma 参照图做感知差异比较,输出到 DIR (需要 Pillow)')
+    parser.add_argument('--update', action='store_true',
+                        help='增量更新: 输出文件已存在时按设计时 id 只修补设计中变化的元素,保留手工修改')
+    parser.add_argument('--source-map', action='store_true',
+                        help='输出源映射 (输出文件名.map.json): XAML 行列范围对应的 Figma 节点 id 和产生各属性的规则')
+    args = parser.parse_args()
+    
+    if args.preview and not preview_available():
+        print("❌ 预览需要安装 Pillow: pip install pillow")
+        sys.exit(1)
+    
+    profiler = PipelineProfiler(enabled=args.profile is not None)
+    
+    if args.input_file and args.output_file:
         # 命令行模式: python figma_to_xaml_v2.py input.json output.xaml
-        input_file = sys.argv[1]
-        output_file = sys.argv[2]
+        input_file = args.input_file
+        output_file = args.output_file
         
         if not Path(input_file).exists():
             print(f"❌ 找不到文件: {input_file}")
             sys.exit(1)
         
-        converter = FigmaToXamlConverter()
+        converter = FigmaToXamlConverter(
+            optimization_level=args.optimize,
+            style_threshold=args.style_threshold,
+            virtualize_threshold=args.virtualize,
+            profiler=profiler,
+            text_measure=args.measure_text,
+            targets=args.target,
+            extract_components=args.components,
+            infer_layout=args.infer_layout,
+            validate_layout=args.validate_layout,
+            preview_dir=args.preview,
+            update=args.update,
+            source_map=args.source_map
+        )
         converter.convert_file(input_file, output_file)
+        report_profile(profiler, args.profile)
         
         print(f"✅ 转换完成!")
         sys.exit(0)
     
-    elif len(sys.argv) == 2:
+    elif args.input_file:
         # 只有输入文件
-        input_file = sys.argv[1]
+        input_file = args.input_file
         
         if not Path(input_file).exists():
             print(f"❌ 找不到文件: {input_file}")
             sys.exit(1)
         
-        converter = FigmaToXamlConverter()
+        converter = FigmaToXamlConverter(
+            optimization_level=args.optimize,
+            style_threshold=args.style_threshold,
+            virtualize_threshold=args.virtualize,
+            profiler=profiler,
+            text_measure=args.measure_text,
+            targets=args.target,
+            extract_components=args.components,
+            infer_layout=args.infer_layout,
+            validate_layout=args.validate_layout,
+            preview_dir=args.preview,
+            update=args.update,
+            source_map=args.source_map
+        )
         converter.convert_file(input_file)
+        report_profile(profiler, args.profile)
         
         print("=" * 70)
         print("🎉 转换完成!")
@@ -157,7 +530,7 @@ def main():
     else:
         # 默认模式
         print("📖 使用方法:")
-        print("  python figma_to_xaml_v2.py <input.json> [output.xaml]")
+        print("  python figma_to_xaml_v2.py <input.json> [output.xaml] [-O 0|1|2]")
         print()
         print("📂 默认输入: injson_compressed.json")
         print()
@@ -171,8 +544,22 @@ def main():
             print("  python figma_to_xaml_v2.py your_file.json")
             sys.exit(1)
         
-        converter = FigmaToXamlConverter()
+        converter = FigmaToXamlConverter(
+            optimization_level=args.optimize,
+            style_threshold=args.style_threshold,
+            virtualize_threshold=args.virtualize,
+            profiler=profiler,
+            text_measure=args.measure_text,
+            targets=args.target,
+            extract_components=args.components,
+            infer_layout=args.infer_layout,
+            validate_layout=args.validate_layout,
+            preview_dir=args.preview,
+            update=args.update,
+            source_map=args.source_map
+        )
         converter.convert_file(input_file)
+        report_profile(profiler, args.profile)
         
         print("=" * 70)
         print("🎉 转换完成!")
@@ -0,0 +1,122 @@
+"""
+性能基准测试脚本
+作用: 用合成 Figma 设计稿分别测量压缩、AST 构建、XAML 渲染的耗时,并与基线对比
+
+用法:
+    python run_benchmarks.py                          # 运行全部场景
+    python run_benchmarks.py --scale 0.2 --repeat 1   # 快速运行
+    python run_benchmarks.py --baseline                # 与仓库中的基线 benchmarks/baseline.json 对比
+    python run_benchmarks.py --baseline --save-baseline  # 更新仓库中的基线
+    python run_benchmarks.py --output bench.json --save-baseline
+    python run_benchmarks.py --baseline bench.json --tolerance 0.3
+    python run_benchmarks.py --stress                 # 5000 层嵌套压力测试
+    python run_benchmarks.py --json-io                # JSON 读写: 标准库 vs orjson/simdjson (injson.json)
+    python run_benchmarks.py --recompress             # 增量压缩: 改动一个 Frame 后重新压缩
+"""
+import argparse
+import os
+import sys
+
+from benchmarks.generators import SCENARIOS
+from benchmarks.json_bench import run_json_benchmark, format_json_results
+from benchmarks.recompress import run_recompress_benchmark, format_recompress_results
+from benchmarks.stress import run_nesting_stress
+from benchmarks.suite import run_suite, compare_with_baseline, format_results, load_baseline, save_results
+
+# 仓库中提交的基线 (默认规模和种子)
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+
+
+def main():
+    """主函数"""
+    # 设置 Windows 控制台 UTF-8 编码
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Figma → XAML 性能基准测试')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=None,
+                        help='要运行的场景 (默认全部)')
+    parser.add_argument('--scale', type=float, default=1.0, help='规模系数 (默认 1.0)')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子 (默认 0)')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段重复次数,取最短耗时 (默认 3)')
+    parser.add_argument('--output', metavar='JSON', help='结果写入 JSON 文件')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE, metavar='JSON',
+                        help=f'与基线 JSON 对比,有回退时返回码为 1 (不带文件名时为 {DEFAULT_BASELINE})')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='把本次结果写入 --baseline 指定的文件 (未指定时写入 --output)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='允许的变慢比例 (默认 0.25 即 25%%)')
+    parser.add_argument('--stress', type=int, nargs='?', const=5000, metavar='DEPTH',
+                        help='只运行深层嵌套压力测试 (默认 5000 层)')
+    parser.add_argument('--json-io', nargs='?', const='injson.json', metavar='FILE',
+                        help='只运行 JSON 读写基准测试 (默认 injson.json)')
+    parser.add_argument('--recompress', action='store_true',
+                        help='只运行增量压缩基准测试 (规模由 --scale 指定)')
+    args = parser.parse_args()
+
+    if args.stress:
+        run_stress(args.stress)
+        return
+
+    if args.json_io:
+        print(f"🧾 JSON 读写基准测试 (重复 {args.repeat} 次取最短)")
+        print(format_json_results(run_json_benchmark(args.json_io, repeat=args.repeat)))
+        return
+
+    if args.recompress:
+        print(f"♻️  增量压缩基准测试 (规模 {args.scale})")
+        print(format_recompress_results(run_recompress_benchmark(scale=args.scale, seed=args.seed)))
+        return
+
+    print("=" * 70)
+    print("🏁 Figma → XAML 性能基准测试")
+    print(f"   规模: {args.scale}  种子: {args.seed}  重复: {args.repeat}")
+    print("=" * 70)
+    print()
+
+    results = run_suite(args.scenarios, scale=args.scale, seed=args.seed, repeat=args.repeat)
+    print(format_results(results))
+    print()
+
+    if args.output:
+        save_results(results, args.output)
+        print(f"📄 结果已写入: {args.output}")
+
+    if args.save_baseline:
+        path = args.baseline or args.output
+        if not path:
+            print("❌ --save-baseline 需要同时指定 --baseline 或 --output")
+            sys.exit(2)
+        save_results(results, path)
+        print(f"📌 基线已保存: {path}")
+        sys.exit(0)
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"❌ 找不到基线文件: {args.baseline}")
+            sys.exit(2)
+        regressions = compare_with_baseline(results, load_baseline(args.baseline), args.tolerance)
+        if regressions:
+            print(f"❌ 发现 {len(regressions)} 处性能回退 (容差 {args.tolerance * 100:.0f}%):")
+            for item in regressions:
+                print(f"   • {item}")
+            sys.exit(1)
+        print(f"✅ 无性能回退 (容差 {args.tolerance * 100:.0f}%)")
+
+
+def run_stress(depth):
+    """运行深层嵌套压力测试,失败时返回码为 1"""
+    print(f"🧱 深层嵌套压力测试: {depth} 层")
+    try:
+        result = run_nesting_stress(depth)
+    except (RecursionError, AssertionError) as e:
+        print(f"❌ 失败: {type(e).__name__}: {e}")
+        sys.exit(1)
+    for stage, seconds in result['seconds'].items():
+        print(f"   {stage:<10}{seconds * 1000:>10.1f} ms")
+    print(f"✅ 通过: {result['nodes']} 个节点, XAML 深度 {result['xaml_depth']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+V1 / V2 差分回归测试脚本
+作用: 在真实和合成设计稿上对比 V1、V2 转换器的输出和吞吐量,为下线 V1 提供数据
+
+用法:
+    python run_differential.py                        # 默认语料 (测试用例 + injson*.json + 合成场景)
+    python run_differential.py --seeds 20 --scale 0.5 -j 8
+    python run_differential.py --files "designs/*.json" --no-synthetic --output diff.json
+"""
+import argparse
+import os
+import sys
+
+from benchmarks.generators import SCENARIOS
+from benchmarks.differential import collect_cases, run_differential, format_report
+from src import json_io
+
+
+def main():
+    """主函数"""
+    # 设置 Windows 控制台 UTF-8 编码
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='V1 / V2 转换器差分回归测试')
+    parser.add_argument('--files', nargs='*', default=None, metavar='GLOB',
+                        help='真实设计稿的 glob 模式 (默认 test_cases/inputs/*.json 和 injson*.json)')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=None,
+                        help='合成场景 (默认全部)')
+    parser.add_argument('--no-synthetic', action='store_true', help='不使用合成设计稿')
+    parser.add_argument('--seeds', type=int, default=5, help='每个合成场景的种子数 (默认 5)')
+    parser.add_argument('--scale', type=float, default=0.2, help='合成场景规模系数 (默认 0.2)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='工作进程数 (默认 CPU 核数)')
+    parser.add_argument('--output', metavar='JSON', help='完整报告写入 JSON 文件')
+    args = parser.parse_args()
+
+    cases = collect_cases(
+        file_patterns=args.files,
+        scenarios=[] if args.no_synthetic else args.scenarios,
+        seeds=args.seeds,
+        scale=args.scale,
+    )
+    if not cases:
+        print("❌ 没有找到用例")
+        sys.exit(1)
+
+    print("=" * 70)
+    print(f"🔀 V1 / V2 差分测试: {len(cases)} 个用例, {args.jobs} 个进程")
+    print("=" * 70)
+    print()
+
+    report = run_differential(cases, jobs=args.jobs)
+    print(format_report(report))
+    print()
+
+    if args.output:
+        json_io.dump(report, args.output, indent=True)
+        print(f"📄 报告已写入: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
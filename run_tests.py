@@ -3,8 +3,8 @@
 作用: 批量测试 Figma JSON 转 XAML,对比生成结果与预期结果
 """
 import os
-import json
 from figma_to_xaml_v2 import FigmaToXamlConverter
+from src import json_io
 from test_content_compare import compare_xaml_semantically
 
 # 测试用例目录
@@ -136,11 +136,10 @@ def run_single_test(test_name):
     
     try:
         # 1. 读取输入 JSON
-        with open(input_file, 'r', encoding='utf-8') as f:
-            figma_data = json.load(f)
+        figma_data = json_io.load(input_file)
         
-        # 2. 转换为 XAML
-        converter = FigmaToXamlConverter()
+        # 2. 转换为 XAML (用例可以用 converter_options 指定转换器参数,如优化等级)
+        converter = FigmaToXamlConverter(**figma_data.get('converter_options', {}))
         
         # 获取第一个节点
         nodes = figma_data.get('compressed_data', [])
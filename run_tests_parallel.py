@@ -0,0 +1,262 @@
+"""
+并行测试脚本
+作用: 把 test_cases/inputs 中的用例分片到多个工作进程运行
+
+与 run_tests.py 的区别:
+- 每个工作进程只创建一次 FigmaToXamlConverter (YAML 只读一次)
+- 预期 XAML 的解析结果按文件 mtime 缓存到 test_cases/.cache,预期文件不变时不再解析
+- 报告每个用例的转换耗时
+
+用法:
+    python run_tests_parallel.py                    # 全部用例, 进程数 = CPU 核数
+    python run_tests_parallel.py -j 1               # 单进程 (便于调试)
+    python run_tests_parallel.py 01_horizontal_stack 04_grid_layout
+"""
+import argparse
+import contextlib
+import io
+import os
+import pickle
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from figma_to_xaml_v2 import FigmaToXamlConverter
+from src import json_io
+from run_tests import Colors, extract_main_content, INPUTS_DIR, EXPECTED_DIR, OUTPUT_DIR
+from test_content_compare import parse_xaml_fragment, compare_parsed_xaml
+
+# 解析结果缓存文件
+CACHE_DIR = os.path.join("test_cases", ".cache")
+CACHE_FILE = os.path.join(CACHE_DIR, "expected_trees.pickle")
+
+# 缓存格式版本,比较逻辑或包装方式变化时递增
+CACHE_VERSION = 1
+
+# 工作进程内的全局状态 (由 _init_worker 创建)
+_converters = {}
+_expected_cache = {}
+
+
+def load_expected_cache(path=CACHE_FILE):
+    """读取解析缓存: {预期文件路径: (mtime_ns, size, Element)}"""
+    try:
+        with open(path, 'rb') as f:
+            version, entries = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        return {}
+    return entries if version == CACHE_VERSION else {}
+
+
+def save_expected_cache(entries, path=CACHE_FILE):
+    """写入解析缓存"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump((CACHE_VERSION, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _init_worker(cache_entries=None):
+    """工作进程初始化: 创建常驻转换器并加载解析缓存"""
+    global _expected_cache
+
+    _get_converter({})
+    _expected_cache = cache_entries if cache_entries is not None else load_expected_cache()
+
+
+def _get_converter(options):
+    """按转换器参数 (用例的 converter_options) 取常驻转换器,同一组参数只创建一次"""
+    key = tuple(sorted(options.items()))
+    if key not in _converters:
+        # 转换器初始化会打印配置加载信息,并行时静默
+        with contextlib.redirect_stdout(io.StringIO()):
+            _converters[key] = FigmaToXamlConverter(**options)
+    return _converters[key]
+
+
+def _load_expected(expected_file):
+    """读取预期文件的解析树 (命中缓存时不解析)
+
+    Returns:
+        (Element, 新缓存项或 None)
+    """
+    stat = os.stat(expected_file)
+    cached = _expected_cache.get(expected_file)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2], None
+
+    with open(expected_file, 'r', encoding='utf-8') as f:
+        tree = parse_xaml_fragment(f.read())
+    entry = (stat.st_mtime_ns, stat.st_size, tree)
+    _expected_cache[expected_file] = entry
+    return tree, entry
+
+
+def run_case(test_name, write_output=True):
+    """在工作进程中运行单个用例
+
+    Returns:
+        结果字典: name, passed, reason, differences, seconds, cache_entry
+    """
+    input_file = os.path.join(INPUTS_DIR, f"{test_name}.json")
+    expected_file = os.path.join(EXPECTED_DIR, f"{test_name}.xaml")
+    output_file = os.path.join(OUTPUT_DIR, f"{test_name}.xaml")
+    result = {'name': test_name, 'passed': False, 'reason': '', 'differences': [],
+              'seconds': 0.0, 'cache_entry': None, 'expected_file': expected_file}
+
+    if not os.path.exists(input_file):
+        result['reason'] = f'输入文件不存在: {input_file}'
+        return result
+    if not os.path.exists(expected_file):
+        result['reason'] = f'预期文件不存在: {expected_file}'
+        return result
+
+    try:
+        figma_data = json_io.load(input_file)
+        nodes = figma_data.get('compressed_data', [])
+        if not nodes:
+            result['reason'] = '没有找到 compressed_data'
+            return result
+
+        converter = _get_converter(figma_data.get('converter_options', {}))
+        start = time.perf_counter()
+        xaml_output = converter.convert_node(nodes[0], is_root=True)
+        result['seconds'] = time.perf_counter() - start
+
+        if write_output:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(xaml_output)
+
+        expected_tree, result['cache_entry'] = _load_expected(expected_file)
+        try:
+            actual_tree = parse_xaml_fragment(extract_main_content(xaml_output))
+        except ET.ParseError as e:
+            result['reason'] = f'XML 解析失败: {e}'
+            return result
+
+        is_match, differences = compare_parsed_xaml(actual_tree, expected_tree)
+        result['passed'] = is_match
+        result['differences'] = differences
+        if not is_match:
+            result['reason'] = f'生成的 XAML 与预期不符 (共 {len(differences)} 处差异)'
+    except Exception as e:
+        result['reason'] = f'异常: {str(e)}'
+
+    return result
+
+
+def _run_shard(test_names, write_output):
+    """在工作进程中运行一个分片"""
+    return [run_case(name, write_output) for name in test_names]
+
+
+def shard(items, count):
+    """把用例轮流分配到 count 个分片 (相邻用例规模相近,轮流分配更均衡)"""
+    shards = [items[i::count] for i in range(count)]
+    return [s for s in shards if s]
+
+
+def run_tests(test_names, jobs, write_output=True):
+    """运行用例
+
+    Args:
+        test_names: 用例名列表
+        jobs: 工作进程数 (1 表示在当前进程运行)
+        write_output: 是否写入 test_cases/outputs
+
+    Returns:
+        按用例名排序的结果列表
+    """
+    if write_output:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    cache = load_expected_cache()
+    jobs = max(1, min(jobs, len(test_names)))
+
+    if jobs == 1:
+        _init_worker(cache)
+        results = _run_shard(test_names, write_output)
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+            futures = [executor.submit(_run_shard, s, write_output) for s in shard(test_names, jobs)]
+            for future in futures:
+                results.extend(future.result())
+
+    # 合并工作进程新解析的预期树,并清理已删除文件的缓存项
+    updated = False
+    for result in results:
+        if result['cache_entry'] is not None:
+            cache[result['expected_file']] = result['cache_entry']
+            updated = True
+        result.pop('cache_entry')
+    stale = [path for path in cache if not os.path.exists(path)]
+    for path in stale:
+        del cache[path]
+    if updated or stale:
+        save_expected_cache(cache)
+
+    return sorted(results, key=lambda r: r['name'])
+
+
+def print_report(results, wall_seconds, max_details=10):
+    """打印结果汇总"""
+    print(f"\n{Colors.BLUE}{Colors.BOLD}{'='*60}{Colors.RESET}")
+    print(f"{Colors.BLUE}{Colors.BOLD}测试汇总{Colors.RESET}")
+    print(f"{Colors.BLUE}{Colors.BOLD}{'='*60}{Colors.RESET}\n")
+
+    for result in results:
+        status = f"{Colors.GREEN}✅ PASS{Colors.RESET}" if result['passed'] else f"{Colors.RED}❌ FAIL{Colors.RESET}"
+        print(f"{status} {result['seconds'] * 1000:>8.2f} ms - {result['name']}")
+        if not result['passed']:
+            print(f"  {Colors.RED}原因: {result['reason']}{Colors.RESET}")
+            for detail in result['differences'][:max_details]:
+                print(f"    • {detail}")
+            if len(result['differences']) > max_details:
+                print(f"    {Colors.YELLOW}... 还有 {len(result['differences']) - max_details} 个差异{Colors.RESET}")
+
+    passed = sum(1 for r in results if r['passed'])
+    failed = len(results) - passed
+    total = len(results)
+    pass_rate = (passed / total * 100) if total > 0 else 0
+    convert_seconds = sum(r['seconds'] for r in results)
+
+    print(f"\n{Colors.BOLD}总计: {total} | 通过: {Colors.GREEN}{passed}{Colors.RESET}{Colors.BOLD} | 失败: {Colors.RED}{failed}{Colors.RESET}{Colors.BOLD} | 通过率: {pass_rate:.1f}%{Colors.RESET}")
+    print(f"⏱️  转换耗时合计: {convert_seconds * 1000:.1f} ms | 总耗时: {wall_seconds:.2f} s\n")
+
+
+def main():
+    """主函数"""
+    # 设置 Windows 控制台 UTF-8 编码
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='并行运行 XAML 转换测试用例')
+    parser.add_argument('tests', nargs='*', help='要运行的用例名 (默认全部)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='工作进程数 (默认 CPU 核数)')
+    parser.add_argument('--no-output', action='store_true',
+                        help='不写入 test_cases/outputs')
+    args = parser.parse_args()
+
+    test_names = args.tests or sorted(
+        os.path.splitext(f)[0] for f in os.listdir(INPUTS_DIR) if f.endswith('.json')
+    )
+    if not test_names:
+        print(f"{Colors.YELLOW}❌ 未找到测试用例{Colors.RESET}")
+        sys.exit(1)
+
+    print(f"\n{Colors.BLUE}{Colors.BOLD}运行 {len(test_names)} 个用例 ({args.jobs} 个进程){Colors.RESET}")
+
+    start = time.perf_counter()
+    results = run_tests(test_names, args.jobs, write_output=not args.no_output)
+    print_report(results, time.perf_counter() - start)
+
+    sys.exit(0 if all(r['passed'] for r in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,9 +2,43 @@
 Figma 到 WPF AST 构建器
 作用: 将 Figma JSON 转换为 WPF AST 对象树
 """
-from typing import Dict, List, Any, Optional
-from src.wpf_ast import WpfNode, create_border, create_stackpanel, create_grid, create_wrappanel, create_textblock
+import math
+from typing import Callable, Dict, List, Any, Generator, Optional, Tuple, Union
+from src.grid_placement import GridPlacementEngine, track_definitions
+from src.layout_inference import child_rects, group_clusters, has_overlap
+from src.wpf_ast import WpfNode, create_border, create_stackpanel, create_grid, create_wrappanel, create_textblock, create_canvas
 from src.rule_engine import RuleEngine
+from src.profiler import NULL_PROFILER
+from src.component_library import ComponentLibrary, ComponentEntry
+
+
+# 容器节点的构建过程: yield 子元素 Figma 节点, send 回子 AST, return 自身 AST
+BuildTask = Generator[Dict[str, Any], WpfNode, WpfNode]
+
+# 节点构建方法: (Figma 节点, 是否根节点) → WpfNode 或 BuildTask
+NodeHandler = Callable[[Dict[str, Any], bool], Union[WpfNode, BuildTask]]
+
+# 节点类型处理器登记表 {Figma 节点类型: 构建方法名} (由 @node_handler 填充)
+NODE_HANDLERS: Dict[str, str] = {}
+
+
+def node_handler(*node_types: str):
+    """登记节点类型的构建方法 (装饰器)
+    
+    登记的是方法名,子类覆盖同名方法即可替换处理器;
+    配置中的 node_type_handlers 可以把其他类型指向已登记的类型
+    """
+    def register(method):
+        for node_type in node_types:
+            NODE_HANDLERS[node_type] = method.__name__
+        return method
+    return register
+
+
+def _format_number(value: float) -> str:
+    """数值转字符串 (整数去掉小数部分,其余保留两位小数)"""
+    value = round(value, 2)
+    return str(int(value)) if value == int(value) else str(value)
 
 
 class FigmaToWpfBuilder:
@@ -21,10 +55,35 @@ class FigmaToWpfBuilder:
         """
         self.rule_engine = RuleEngine(config_dir)
         self.indent_str = "    "  # 4空格缩进
+        self.profiler = NULL_PROFILER  # 由转换器替换为启用的分析器
+        self.components: Optional[ComponentLibrary] = None  # 启用组件提取时由转换器设置
+        # 源节点表 {id(AST 节点): (AST 节点, Figma 节点)},为 None 时不记录 (布局校验时由转换器设置)
+        self.sources: Optional[Dict[int, Any]] = None
+        # 容器选择规则表 {id(容器节点): 规则名},为 None 时不记录 (生成源映射时由转换器设置)
+        self.rules: Optional[Dict[int, str]] = None
+        # 属性规则表 {id(节点): (节点, {属性名: (产生属性的规则或构建方法, 值)})},为 None 时不记录 (同上)
+        self.attribute_rules: Optional[Dict[int, Tuple[WpfNode, Dict[str, Tuple[str, Any]]]]] = None
+        # 组件属性绑定 {id(Figma 节点): [(种类, 组件属性名)]},只在转换被覆盖过的组件时由转换器设置
+        self.component_properties: Optional[Dict[int, List[Tuple[str, str]]]] = None
+        self._handlers = self._load_handlers()
+    
+    def _load_handlers(self) -> Dict[str, NodeHandler]:
+        """生成节点类型 → 构建方法的分派表
+        
+        装饰器登记的处理器 + 配置 (figma_wpf_mapping.yaml 的 node_type_handlers) 中的类型别名
+        """
+        handlers = {node_type: getattr(self, name) for node_type, name in NODE_HANDLERS.items()}
+        for node_type, target in (self.rule_engine.mappings.get('node_type_handlers') or {}).items():
+            if target in handlers:
+                handlers[node_type] = handlers[target]
+        return handlers
     
     def build(self, figma_node: Dict[str, Any], is_root: bool = False) -> WpfNode:
         """构建 WPF AST
         
+        用显式栈代替递归: Frame 的构建过程是生成器,每遇到一个子元素就 yield 出去,
+        由这里构建完成后再 send 回去,节点顺序与递归构建完全一致,嵌套深度不受递归限制
+        
         Args:
             figma_node: Figma JSON 节点
             is_root: 是否是根节点
@@ -32,20 +91,66 @@ class FigmaToWpfBuilder:
         Returns:
             WPF AST 节点
         """
+        sources = self.sources
+        result = self._start_node(figma_node, is_root)
+        if isinstance(result, WpfNode):
+            if sources is not None:
+                sources[id(result)] = (result, figma_node)
+            return result
+        
+        # 栈元素: (构建过程, 对应的 Figma 节点)
+        stack = [(result, figma_node)]
+        value = None
+        while stack:
+            try:
+                child = stack[-1][0].send(value)
+            except StopIteration as done:
+                task, source = stack.pop()
+                value = done.value
+                self._label_built(value, task.__name__)
+                if self.component_properties:
+                    self._bind_properties(value, source)
+                if sources is not None:
+                    sources[id(value)] = (value, source)
+                continue
+            
+            task = self._start_node(child, is_root=False)
+            if isinstance(task, WpfNode):
+                if sources is not None:
+                    sources[id(task)] = (task, child)
+                value = task
+            else:
+                stack.append((task, child))
+                value = None
+        
+        return value
+    
+    def _start_node(self, figma_node: Dict[str, Any], is_root: bool) -> Union[WpfNode, BuildTask]:
+        """开始构建一个节点
+        
+        Returns:
+            叶子节点直接返回 WpfNode,容器节点返回待驱动的生成器
+        """
         node_type = figma_node.get('type')
+        self.profiler.count('node_types', str(node_type))
         
-        if node_type == 'FRAME':
-            return self._build_frame(figma_node, is_root)
-        elif node_type == 'RECTANGLE':
-            return self._build_rectangle(figma_node)
-        elif node_type == 'TEXT':
-            return self._build_text(figma_node)
-        else:
+        handler = self._handlers.get(node_type)
+        if handler is None:
             # 未知类型,返回空节点
             return WpfNode(type='Unknown', comment=f"未知类型: {node_type}")
+        result = handler(figma_node, is_root)
+        if isinstance(result, WpfNode):
+            self._label(result, handler.__name__)
+            if self.component_properties:
+                self._bind_properties(result, figma_node)
+        return result
     
-    def _build_frame(self, node: Dict[str, Any], is_root: bool = False) -> WpfNode:
-        """构建 Frame 节点 → Border + 容器"""
+    @node_handler('FRAME')
+    def _build_frame(self, node: Dict[str, Any], is_root: bool = False) -> BuildTask:
+        """构建 Frame 节点 → Border + 容器
+        
+        生成器: yield 子元素的 Figma 节点,接收构建好的子 AST,最终 return Frame 的 AST
+        """
         name = node.get('name', 'Frame')
         
         # 获取布局属性
@@ -64,6 +169,16 @@ class FigmaToWpfBuilder:
         children = node.get('children', [])
         visible_children = [c for c in children if c.get('visible', True)]
         
+        # 无自动布局时互相重叠的子元素各自成组 (构建为 Canvas / 单元格 Grid),其余子元素照常堆叠;
+        # 所有子元素连成一组时整个 Frame 回退为 Canvas
+        has_overlapping_children = False
+        if layout_mode == 'NONE' and has_overlap(child_rects(visible_children)):
+            grouped = group_clusters(visible_children)
+            if len(grouped) > 1:
+                children = visible_children = grouped
+            else:
+                has_overlapping_children = True
+        
         # 检查是否有填充子元素
         has_fill_child = any(
             child.get('layoutSizingHorizontal') == 'FILL'
@@ -83,9 +198,12 @@ class FigmaToWpfBuilder:
             'layout_wrap': layout_wrap,
             'has_fill_child': has_fill_child,
             'visible_children_count': len(visible_children),
-            'primary_axis_align': primary_axis_align  # 添加主轴对齐
+            'primary_axis_align': primary_axis_align,  # 添加主轴对齐
+            # 无自动布局且所有子元素重叠成一组 (无法用堆叠容器表达)
+            'has_overlapping_children': has_overlapping_children
         }
-        container_config = self.rule_engine.select_container(container_context)
+        container_rule = self.rule_engine.select_container_rule(container_context)
+        container_config = container_rule['result']
         
         # 创建容器节点
         container = self._create_container(
@@ -98,38 +216,34 @@ class FigmaToWpfBuilder:
             primary_axis_align
         )
         
+        # Border 被优化合并后由容器代表 Frame (布局校验按最外层的元素比较)
+        if self.sources is not None:
+            self.sources[id(container)] = (container, node)
+        if self.rules is not None:
+            self.rules[id(container)] = container_rule['name']
+        self._label(container, container_rule['name'], 'Orientation')
+        
         # 处理子元素
         use_grid = container_config.get('use_grid', False)
         use_grid_layout = container_config.get('use_grid_layout', False)
+        use_canvas = container_config.get('use_canvas', False)
         
         if use_grid_layout:
             # Figma Grid 布局: 处理行列定义
-            grid_row_sizes = node.get('gridRowSizes', [])
-            grid_column_sizes = node.get('gridColumnSizes', [])
+            row_definitions = track_definitions(node.get('gridRowSizes', []))
+            column_definitions = track_definitions(node.get('gridColumnSizes', []))
             
-            # 转换行定义
-            row_definitions = []
-            for row_size in grid_row_sizes:
-                if row_size.get('type') == 'FLEX':
-                    value = row_size.get('value', 1)
-                    # 如果是1,简化为 "*"
-                    row_definitions.append('*' if value == 1 else f"{value}*")
-                elif row_size.get('type') == 'FIXED':
-                    row_definitions.append(str(row_size.get('value', 'Auto')))
-                else:
-                    row_definitions.append('Auto')
+            # 一次性计算所有子元素的位置、跨度和间距
+            placement_engine = GridPlacementEngine(
+                len(row_definitions),
+                len(column_definitions),
+                row_gap=node.get('gridRowGap', 0),
+                column_gap=node.get('gridColumnGap', 0)
+            )
+            grid_placements, grid_row_count = placement_engine.place(visible_children)
             
-            # 转换列定义
-            column_definitions = []
-            for col_size in grid_column_sizes:
-                if col_size.get('type') == 'FLEX':
-                    value = col_size.get('value', 1)
-                    # 如果是1,简化为 "*"
-                    column_definitions.append('*' if value == 1 else f"{value}*")
-                elif col_size.get('type') == 'FIXED':
-                    column_definitions.append(str(col_size.get('value', 'Auto')))
-                else:
-                    column_definitions.append('Auto')
+            # 自动流溢出的子元素放在隐式行中 (与 CSS Grid 的 auto 行相同)
+            row_definitions.extend(['Auto'] * (grid_row_count - len(row_definitions)))
             
             if row_definitions:
                 container.set_attribute('_row_definitions', row_definitions)
@@ -174,38 +288,21 @@ class FigmaToWpfBuilder:
             child['_is_last_child'] = (visible_child_index == len(visible_children) - 1)
             child['_in_fill_column'] = is_in_fill_column
             
-            # 构建子节点
-            child_ast = self.build(child, is_root=False)
+            # 构建子节点 (由 build 的显式栈完成)
+            child_ast = yield child
             
             # Figma Grid 布局: 设置 Grid.Row 和 Grid.Column
             if use_grid_layout:
-                # 获取子元素在 Grid 中的位置
-                grid_row = child.get('gridRowAnchorIndex', -1)
-                grid_col = child.get('gridColumnAnchorIndex', -1)
-                
-                # 获取 Grid 的行列数
-                grid_column_count = len(container.attributes.get('_column_definitions', []))
-                grid_row_count = len(container.attributes.get('_row_definitions', []))
-                
-                # 如果没有明确指定位置,按顺序自动分配
-                if grid_row == -1 or grid_col == -1:
-                    if grid_column_count > 0:
-                        grid_row = visible_child_index // grid_column_count
-                        grid_col = visible_child_index % grid_column_count
-                    else:
-                        grid_row = 0
-                        grid_col = visible_child_index
-                
-                child_ast.set_attribute('Grid.Row', str(grid_row))
-                child_ast.set_attribute('Grid.Column', str(grid_col))
+                placement = grid_placements[visible_child_index]
+                child_ast.set_attribute('Grid.Row', str(placement.row))
+                child_ast.set_attribute('Grid.Column', str(placement.column))
                 
                 # 设置行列跨度
-                grid_row_span = child.get('gridRowSpan', 1)
-                grid_col_span = child.get('gridColumnSpan', 1)
-                if grid_row_span > 1:
-                    child_ast.set_attribute('Grid.RowSpan', str(grid_row_span))
-                if grid_col_span > 1:
-                    child_ast.set_attribute('Grid.ColumnSpan', str(grid_col_span))
+                if placement.row_span > 1:
+                    child_ast.set_attribute('Grid.RowSpan', str(placement.row_span))
+                if placement.column_span > 1:
+                    child_ast.set_attribute('Grid.ColumnSpan', str(placement.column_span))
+                self._label(child_ast, 'GridPlacementEngine.place', 'Grid.Row', 'Grid.Column', 'Grid.RowSpan', 'Grid.ColumnSpan')
                 
                 # 设置Grid单元格内的对齐方式
                 grid_h_align = child.get('gridChildHorizontalAlign')
@@ -220,6 +317,7 @@ class FigmaToWpfBuilder:
                     }
                     if grid_h_align in h_align_map:
                         child_ast.set_attribute('HorizontalAlignment', h_align_map[grid_h_align])
+                        self._label(child_ast, f"gridChildHorizontalAlign[{grid_h_align}]", 'HorizontalAlignment')
                 
                 if grid_v_align:
                     v_align_map = {
@@ -230,27 +328,12 @@ class FigmaToWpfBuilder:
                     }
                     if grid_v_align in v_align_map:
                         child_ast.set_attribute('VerticalAlignment', v_align_map[grid_v_align])
+                        self._label(child_ast, f"gridChildVerticalAlign[{grid_v_align}]", 'VerticalAlignment')
                 
                 # 设置 Grid 间距 (通过 Margin 实现)
-                # gridRowGap: 行间距, gridColumnGap: 列间距
-                row_spacing = node.get('gridRowGap', 0)  # 行间距
-                col_spacing = node.get('gridColumnGap', 0)  # 列间距
-                
-                # 计算 Margin: 左,上,右,下
-                # 间距应该完整加在前一个元素上,而不是平分
-                margin_left = 0
-                margin_top = 0
-                margin_right = col_spacing if grid_col < grid_column_count - 1 else 0
-                margin_bottom = row_spacing if grid_row < grid_row_count - 1 else 0
-                
-                if margin_left > 0 or margin_top > 0 or margin_right > 0 or margin_bottom > 0:
-                    # 转换为整数（如果是整数值）
-                    margin_left = int(margin_left) if margin_left == int(margin_left) else margin_left
-                    margin_top = int(margin_top) if margin_top == int(margin_top) else margin_top
-                    margin_right = int(margin_right) if margin_right == int(margin_right) else margin_right
-                    margin_bottom = int(margin_bottom) if margin_bottom == int(margin_bottom) else margin_bottom
-                    margin_str = f"{margin_left},{margin_top},{margin_right},{margin_bottom}"
-                    child_ast.set_attribute('Margin', margin_str)
+                if placement.margin:
+                    child_ast.set_attribute('Margin', placement.margin)
+                    self._label(child_ast, 'GridPlacementEngine.place', 'Margin')
             
             # 水平布局 Grid: 设置 Grid.Column
             elif use_grid:
@@ -268,6 +351,13 @@ class FigmaToWpfBuilder:
                     # 普通 Grid: 按顺序排列
                     child_ast.set_attribute('Grid.Column', str(visible_child_index))
             
+            # Canvas: 按 Figma 坐标定位 (坐标相对于 Frame)
+            elif use_canvas:
+                if child.get('x'):
+                    child_ast.set_attribute('Canvas.Left', _format_number(child['x']))
+                if child.get('y'):
+                    child_ast.set_attribute('Canvas.Top', _format_number(child['y']))
+            
             container.add_child(child_ast)
             visible_child_index += 1
         
@@ -311,6 +401,10 @@ class FigmaToWpfBuilder:
             # 非根节点也不需要 Border，直接返回容器
             # 但保留注释
             container.comment = f"{node.get('name', 'Frame')} 容器"
+            if use_canvas:
+                # Canvas 没有固有尺寸,保留 Frame 的宽高
+                container.set_attribute('Width', border.attributes.get('Width'))
+                container.set_attribute('Height', border.attributes.get('Height'))
             return container
     
     def _create_border_for_frame(
@@ -362,9 +456,11 @@ class FigmaToWpfBuilder:
         
         if should_set_width and width:
             border.set_attribute('Width', str(width))
+            self._label(border, f"sizing_mode[{sizing_horizontal}]", 'Width')
         
         if should_set_height and height:
             border.set_attribute('Height', str(height))
+            self._label(border, f"sizing_mode[{sizing_vertical}]", 'Height')
         
         # HorizontalAlignment
         if sizing_horizontal == 'FILL' or layout_align == 'STRETCH':
@@ -380,6 +476,7 @@ class FigmaToWpfBuilder:
         else:
             border.set_attribute('Padding', '0')
         
+        self._label(border, '_create_border_for_frame')
         return border
     
     def _create_container(
@@ -407,11 +504,13 @@ class FigmaToWpfBuilder:
                 # 垂直布局,设置水平对齐
                 h_align = self.rule_engine.get_alignment('counter_axis', counter_axis_align, 'horizontal')
                 container.set_attribute('HorizontalAlignment', h_align)
+                self._label(container, f"alignment_mapping.counter_axis[{counter_axis_align}]", 'HorizontalAlignment')
             
             if orientation == 'Horizontal' and not is_container_fill_vertical:
                 # 水平布局,设置垂直对齐
                 v_align = self.rule_engine.get_alignment('counter_axis', counter_axis_align, 'vertical')
                 container.set_attribute('VerticalAlignment', v_align)
+                self._label(container, f"alignment_mapping.counter_axis[{counter_axis_align}]", 'VerticalAlignment')
         
         elif container_type == 'WrapPanel':
             container = create_wrappanel(orientation=orientation)
@@ -422,6 +521,8 @@ class FigmaToWpfBuilder:
             
             container.set_attribute('HorizontalAlignment', h_align)
             container.set_attribute('VerticalAlignment', v_align)
+            self._label(container, f"alignment_mapping.primary_axis[{primary_axis_align}]", 'HorizontalAlignment')
+            self._label(container, f"alignment_mapping.counter_axis[{counter_axis_align}]", 'VerticalAlignment')
         
         elif container_type == 'Grid':
             container = create_grid()
@@ -437,51 +538,26 @@ class FigmaToWpfBuilder:
                     # 垂直两端对齐: Auto - * - Auto (行)
                     container.attributes['_row_definitions'] = ['Auto', '*', 'Auto']
         
+        elif container_type == 'Canvas':
+            container = create_canvas()
+        
         else:
             # 默认 StackPanel
             container = create_stackpanel()
         
+        self._label(container, '_create_container')
         return container
     
-    def _build_rectangle(self, node: Dict[str, Any]) -> WpfNode:
+    @node_handler('RECTANGLE')
+    def _build_rectangle(self, node: Dict[str, Any], is_root: bool = False) -> WpfNode:
         """构建 Rectangle 节点 → Border"""
         name = node.get('name', 'Rectangle')
-        width = node.get('width', 0)
-        height = node.get('height', 0)
-        
-        # 获取布局信息
-        sizing_horizontal = node.get('layoutSizingHorizontal', 'FIXED')
-        sizing_vertical = node.get('layoutSizingVertical', 'FIXED')
-        layout_align = node.get('layoutAlign', 'INHERIT')
-        is_in_fill_column = node.get('_in_fill_column', False)
-        
-        # 判断是否设置宽高
-        if sizing_horizontal == 'FILL' or layout_align == 'STRETCH' or is_in_fill_column:
-            should_set_width = False
-        else:
-            should_set_width = self.rule_engine.should_set_dimension(sizing_horizontal)
-        
-        if sizing_vertical == 'FILL':
-            should_set_height = False
-        else:
-            should_set_height = self.rule_engine.should_set_dimension(sizing_vertical)
         
         # 创建 Border
         border = create_border(comment=name)
         
-        # 设置宽高
-        if should_set_width and width:
-            border.set_attribute('Width', str(width))
-        if should_set_height and height:
-            border.set_attribute('Height', str(height))
-        
-        # HorizontalAlignment
-        if sizing_horizontal == 'FILL' or layout_align == 'STRETCH':
-            border.set_attribute('HorizontalAlignment', 'Stretch')
-        
-        # VerticalAlignment  
-        if sizing_vertical == 'FILL':
-            border.set_attribute('VerticalAlignment', 'Stretch')
+        # 宽高和拉伸对齐
+        self._set_shape_size(border, node)
         
         # 背景色
         background = self._get_background_color(node)
@@ -494,13 +570,12 @@ class FigmaToWpfBuilder:
             border.set_attribute('CornerRadius', corner_radius_str)
         
         # Margin
-        margin = self._calculate_margin(node)
-        if margin:
-            border.set_attribute('Margin', margin)
+        self._set_margin(border, node)
         
         return border
     
-    def _build_text(self, node: Dict[str, Any]) -> WpfNode:
+    @node_handler('TEXT')
+    def _build_text(self, node: Dict[str, Any], is_root: bool = False) -> WpfNode:
         """构建 Text 节点 → TextBlock"""
         name = node.get('name', 'Text')
         text = node.get('characters', name)
@@ -543,15 +618,293 @@ class FigmaToWpfBuilder:
         if sizing_vertical != 'HUG' and height:
             textblock.set_attribute('Height', str(height))
         
+        # 文本测量结果 (可选, 由 TextMeasurer 标注): 放大溢出的尺寸或在注释中标记
+        for attr_name, value in node.get('_text_adjust', {}).items():
+            textblock.set_attribute(attr_name, value)
+        if node.get('_text_warning'):
+            textblock.comment = f"{name} ⚠ {node['_text_warning']}"
+        
         # Margin
-        margin = self._calculate_margin(node)
-        if margin:
-            textblock.set_attribute('Margin', margin)
+        self._set_margin(textblock, node)
         
         return textblock
     
+    @node_handler('INSTANCE')
+    def _build_instance(self, node: Dict[str, Any], is_root: bool = False) -> BuildTask:
+        """构建组件实例
+        
+        启用组件提取且实例没有内容覆盖 (或只覆盖了文本/填充) 时输出组件引用 (不构建子元素),
+        否则按 Frame 展开,注释中记录所属组件
+        """
+        if self.components is not None and not is_root:
+            resolved = self.components.resolve(node)
+            if resolved is not None:
+                return self._build_component_reference(node, *resolved)
+        
+        ast = yield from self._build_frame(node, is_root)
+        self._label_built(ast, '_build_frame')
+        component = node.get('mainComponent') or {}
+        component_name = component.get('name') if isinstance(component, dict) else None
+        if component_name:
+            ast.comment = f"{node.get('name', 'Instance')} (组件: {component_name})"
+        return ast
+    
+    def _build_component_reference(self, node: Dict[str, Any], entry: ComponentEntry,
+                                   overrides: List[Tuple[str, str, Dict[str, Any]]]) -> WpfNode:
+        """组件引用 → <local:组件类名>,只带实例自身的尺寸、对齐、边距和覆盖的文本/填充 (如 LabelText="保存")"""
+        reference = WpfNode(
+            type='ComponentReference',
+            comment=f"{node.get('name', 'Instance')} (组件: {entry.name})",
+            attributes={'_element': f"local:{entry.class_name}"}
+        )
+        self._set_shape_size(reference, node)
+        self._set_margin(reference, node)
+        
+        for name, kind, slot in overrides:
+            if kind == 'Text':
+                value = slot.get('characters', '')
+            elif slot.get('type') == 'TEXT':
+                value = self._get_text_color(slot)
+            else:
+                value = self._get_background_color(slot)
+            reference.set_attribute(name, value)
+        
+        return reference
+    
+    def _bind_properties(self, element: WpfNode, node: Dict[str, Any]) -> None:
+        """转换组件时,被实例覆盖过的文本/填充绑定到组件属性 (记录在 _bindings 中,由渲染器输出为绑定)"""
+        bindings = self.component_properties.get(id(node))
+        if not bindings:
+            return
+        bound = {}
+        for kind, name in bindings:
+            if kind == 'Text':
+                attribute = 'Text' if 'Text' in element.attributes else None
+            else:
+                attribute = next((a for a in ('Foreground', 'Background', 'Fill') if a in element.attributes), None)
+            if attribute is not None:
+                bound[attribute] = name
+        if bound:
+            element.attributes['_bindings'] = bound
+    
+    @node_handler('GROUP')
+    def _build_group(self, node: Dict[str, Any], is_root: bool = False) -> BuildTask:
+        """构建 Group 节点 → Canvas (子元素绝对定位) 或单元格 Grid (子元素完全重叠)
+        
+        Group 不参与布局,子元素坐标与 Group 在同一坐标系中,
+        以子元素包围盒的左上角为原点换算 Canvas.Left/Top
+        """
+        name = node.get('name', 'Group')
+        visible_children = [c for c in node.get('children', []) if c.get('visible', True)]
+        
+        # 子元素包围盒
+        bounds = [(c.get('x', 0), c.get('y', 0), c.get('width', 0), c.get('height', 0)) for c in visible_children]
+        left = min((b[0] for b in bounds), default=0)
+        top = min((b[1] for b in bounds), default=0)
+        
+        # 所有子元素与包围盒重合 (如图标的多层叠加) 时用 Grid 叠放,无需坐标
+        overlay = len(set(bounds)) == 1
+        group = create_grid(comment=f"{name} 组") if overlay else create_canvas(comment=f"{name} 组")
+        
+        # Canvas 没有固有尺寸,必须设置宽高
+        if not overlay and not is_root:
+            group.set_attribute('Width', _format_number(node.get('width') or max((b[0] + b[2] for b in bounds), default=0) - left))
+            group.set_attribute('Height', _format_number(node.get('height') or max((b[1] + b[3] for b in bounds), default=0) - top))
+        
+        opacity = node.get('opacity', 1)
+        if opacity < 1:
+            group.set_attribute('Opacity', _format_number(opacity))
+        
+        for index, child in enumerate(visible_children):
+            # Group 内没有自动布局间距
+            child['_parent_spacing'] = 0
+            child['_parent_layout'] = 'NONE'
+            child['_is_first_child'] = (index == 0)
+            child['_is_last_child'] = (index == len(visible_children) - 1)
+            child['_in_fill_column'] = False
+            
+            child_ast = yield child
+            
+            if not overlay:
+                child_x, child_y = bounds[index][0] - left, bounds[index][1] - top
+                if child_x:
+                    child_ast.set_attribute('Canvas.Left', _format_number(child_x))
+                if child_y:
+                    child_ast.set_attribute('Canvas.Top', _format_number(child_y))
+            group.add_child(child_ast)
+        
+        self._set_margin(group, node)
+        
+        return group
+    
+    @node_handler('ELLIPSE')
+    def _build_ellipse(self, node: Dict[str, Any], is_root: bool = False) -> WpfNode:
+        """构建 Ellipse 节点 → Ellipse"""
+        ellipse = WpfNode(type='Ellipse', comment=node.get('name', 'Ellipse'))
+        self._set_shape_size(ellipse, node)
+        self._set_shape_paint(ellipse, node)
+        
+        self._set_margin(ellipse, node)
+        
+        return ellipse
+    
+    @node_handler('LINE')
+    def _build_line(self, node: Dict[str, Any], is_root: bool = False) -> WpfNode:
+        """构建 Line 节点 → Line
+        
+        Figma 直线的 width 是长度, rotation 是逆时针角度 (竖线通常是旋转 90° 的直线)
+        """
+        line = WpfNode(type='Line', comment=node.get('name', 'Line'))
+        length = node.get('width', 0)
+        angle = math.radians(node.get('rotation', 0))
+        
+        # 终点平移到非负坐标,布局容器按 (|dx|, |dy|) 为直线分配空间
+        dx = length * math.cos(angle)
+        dy = -length * math.sin(angle)
+        x1, y1 = max(-dx, 0), max(-dy, 0)
+        line.set_attribute('X1', _format_number(x1))
+        line.set_attribute('Y1', _format_number(y1))
+        line.set_attribute('X2', _format_number(x1 + dx))
+        line.set_attribute('Y2', _format_number(y1 + dy))
+        
+        stroke = self._get_border_color(node)
+        if stroke:
+            line.set_attribute('Stroke', stroke)
+            line.set_attribute('StrokeThickness', _format_number(node.get('strokeWeight', 1)))
+        
+        self._set_margin(line, node)
+        
+        return line
+    
+    @node_handler('VECTOR')
+    def _build_vector(self, node: Dict[str, Any], is_root: bool = False) -> WpfNode:
+        """构建矢量节点 → Path (几何数据来自 fillGeometry / vectorPaths)
+        
+        没有几何数据时退化为 Rectangle 同样的 Border 占位
+        """
+        data = self._get_path_data(node)
+        if data is None:
+            placeholder = self._build_rectangle(node)
+            placeholder.comment = f"{node.get('name', 'Vector')} (无几何数据)"
+            return placeholder
+        
+        path = WpfNode(type='Path', comment=node.get('name', 'Vector'))
+        self._set_shape_size(path, node)
+        self._set_shape_paint(path, node)
+        path.set_attribute('Data', data)
+        
+        self._set_margin(path, node)
+        
+        return path
+    
     # ========== 辅助方法 ==========
     
+    def _set_shape_size(self, element: WpfNode, node: Dict[str, Any]) -> None:
+        """设置形状的宽高 (按尺寸模式) 和拉伸对齐"""
+        width = node.get('width', 0)
+        height = node.get('height', 0)
+        
+        # 获取布局信息
+        sizing_horizontal = node.get('layoutSizingHorizontal', 'FIXED')
+        sizing_vertical = node.get('layoutSizingVertical', 'FIXED')
+        layout_align = node.get('layoutAlign', 'INHERIT')
+        is_in_fill_column = node.get('_in_fill_column', False)
+        
+        # 判断是否设置宽高
+        if sizing_horizontal == 'FILL' or layout_align == 'STRETCH' or is_in_fill_column:
+            should_set_width = False
+        else:
+            should_set_width = self.rule_engine.should_set_dimension(sizing_horizontal)
+        
+        if sizing_vertical == 'FILL':
+            should_set_height = False
+        else:
+            should_set_height = self.rule_engine.should_set_dimension(sizing_vertical)
+        
+        # 设置宽高
+        if should_set_width and width:
+            element.set_attribute('Width', str(width))
+            self._label(element, f"sizing_mode[{sizing_horizontal}]", 'Width')
+        if should_set_height and height:
+            element.set_attribute('Height', str(height))
+            self._label(element, f"sizing_mode[{sizing_vertical}]", 'Height')
+        
+        # HorizontalAlignment
+        if sizing_horizontal == 'FILL' or layout_align == 'STRETCH':
+            element.set_attribute('HorizontalAlignment', 'Stretch')
+        
+        # VerticalAlignment  
+        if sizing_vertical == 'FILL':
+            element.set_attribute('VerticalAlignment', 'Stretch')
+        
+        self._label(element, '_set_shape_size')
+    
+    def _set_shape_paint(self, element: WpfNode, node: Dict[str, Any]) -> None:
+        """设置形状的填充和描边 (Fill / Stroke / StrokeThickness)"""
+        fill = self._get_background_color(node)
+        if fill:
+            element.set_attribute('Fill', fill)
+        
+        stroke = self._get_border_color(node)
+        if stroke:
+            element.set_attribute('Stroke', stroke)
+            element.set_attribute('StrokeThickness', _format_number(node.get('strokeWeight', 1)))
+        
+        self._label(element, '_set_shape_paint')
+    
+    def _set_margin(self, element: WpfNode, node: Dict[str, Any]) -> None:
+        """设置父容器间距产生的 Margin"""
+        margin = self._calculate_margin(node)
+        if margin:
+            element.set_attribute('Margin', margin)
+            self._label(element, '_calculate_margin', 'Margin')
+    
+    def _label(self, element: WpfNode, rule: str, *names: str) -> None:
+        """记录属性的产生规则 (生成源映射时)
+        
+        指定属性名时记录这些属性,否则记录尚未记录或值已被改变的全部属性
+        """
+        if self.attribute_rules is None:
+            return
+        entry = self.attribute_rules.get(id(element))
+        if entry is None or entry[0] is not element:
+            entry = self.attribute_rules[id(element)] = (element, {})
+        labels = entry[1]
+        for name in names or list(element.attributes):
+            value = element.attributes.get(name)
+            if name.startswith('_') or value is None:
+                continue
+            previous = labels.get(name)
+            if names or previous is None or previous[1] != value:
+                labels[name] = (rule, value)
+    
+    def _label_built(self, element: WpfNode, rule: str) -> None:
+        """构建过程结束: 记录它在自身、子元素和孙元素 (Border 包装的容器的子元素) 上设置的属性"""
+        if self.attribute_rules is None:
+            return
+        self._label(element, rule)
+        for child in element.children:
+            self._label(child, rule)
+            for grandchild in child.children:
+                self._label(grandchild, rule)
+    
+    def _get_path_data(self, node: Dict[str, Any]) -> Optional[str]:
+        """获取 Path 几何数据 (WPF 路径标记语法)
+        
+        Figma 路径数据 (SVG 语法) 与 WPF 路径标记兼容;
+        填充规则 NONZERO 对应前缀 F1,EVENODD 为 WPF 默认 (F0)
+        """
+        geometry = node.get('fillGeometry') or node.get('vectorPaths') or []
+        segments = [g.get('data') or g.get('path') for g in geometry if isinstance(g, dict)]
+        segments = [segment for segment in segments if segment]
+        if not segments:
+            return None
+        
+        data = ' '.join(segments)
+        if geometry[0].get('windingRule', 'NONZERO') == 'NONZERO':
+            data = f"F1 {data}"
+        return data
+    
     def _get_current_layout(self, layout_mode: str, layout_wrap: str) -> str:
         """获取当前布局类型"""
         if layout_mode == 'HORIZONTAL' and layout_wrap == 'WRAP':
@@ -0,0 +1,253 @@
+"""
+组件库
+作用: 按 mainComponent id 索引组件,每个组件只转换一次为独立的 UserControl,
+      内容与组件一致的实例输出为只带覆盖属性 (尺寸、对齐、边距、布局位置) 的引用元素;
+      只覆盖了文本或填充色的实例也输出为引用,覆盖的值写成引用的属性 (组件中对应的元素绑定到同名属性)
+"""
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# 实例顶层上描述"放在哪里、多大"的属性,不属于组件内容 (不参与内容比较)
+PLACEMENT_KEYS = frozenset({
+    'type', 'name', 'x', 'y', 'width', 'height', 'visible',
+    'layoutSizingHorizontal', 'layoutSizingVertical', 'layoutAlign', 'layoutGrow', 'layoutPositioning',
+    'constraints', 'relativeTransform', 'rotation',
+    'gridRowSpan', 'gridColumnSpan', 'gridRowAnchorIndex', 'gridColumnAnchorIndex',
+    'gridChildHorizontalAlign', 'gridChildVerticalAlign',
+    'mainComponent', 'componentId', 'componentProperties', 'overrides', 'exposedInstances',
+})
+
+# 实例可以用引用属性覆盖的内容: 文本 (characters) 和填充 (fills)
+OVERRIDE_KEYS = frozenset({'characters', 'fills'})
+
+# 填充会输出为颜色属性 (Background / Foreground / Fill) 的节点类型,其余类型的填充不影响输出
+FILL_TYPES = frozenset({'FRAME', 'COMPONENT', 'RECTANGLE', 'TEXT', 'ELLIPSE', 'VECTOR'})
+
+# 自动布局: 子元素坐标由布局决定 (文本长度变化时随之变化,不影响输出)
+AUTO_LAYOUT_MODES = frozenset({'HORIZONTAL', 'VERTICAL'})
+
+# 覆盖属性: ((子元素下标路径), 种类 'Text' / 'Fill')
+PropertySlot = Tuple[Tuple[int, ...], str]
+
+
+def component_key(node: Dict[str, Any]) -> Optional[str]:
+    """实例所属组件的 id (Plugin API 的 mainComponent 或 REST API 的 componentId)"""
+    main_component = node.get('mainComponent')
+    if isinstance(main_component, dict):
+        return main_component.get('id')
+    if isinstance(main_component, str):
+        return main_component
+    return node.get('componentId')
+
+
+def content_signature(node: Dict[str, Any], overridable: bool = False) -> str:
+    """组件内容签名
+
+    顶层去掉位置/尺寸属性,所有层去掉 id 和 _ 开头的上下文属性,
+    实例与组件 (或同一组件的其他实例) 签名相同即没有内容覆盖;
+    用显式栈按前序序列化,嵌套深度不受递归限制
+
+    Args:
+        node: 组件或实例节点
+        overridable: 同时去掉可以用引用属性覆盖的文本和填充,以及随文本长度变化而不影响输出的几何
+                     (HUG 尺寸、自动布局中的子元素坐标); 嵌套实例输出为引用,其内容不去掉
+    """
+    digest = hashlib.sha1()
+    # 栈元素: (节点, 是否顶层, 是否去掉可覆盖内容, 是否去掉坐标)
+    stack: List[Any] = [(node, True, overridable, False)]
+    while stack:
+        item = stack.pop()
+        if item is None:
+            digest.update(b')')
+            continue
+        figma_node, is_top, loose, free_position = item
+        ignored = _ignored_keys(figma_node, free_position) if loose else ()
+        fields = {
+            key: value for key, value in figma_node.items()
+            if key != 'children' and key != 'id' and key[:1] != '_' and not (is_top and key in PLACEMENT_KEYS)
+            and key not in ignored
+        }
+        digest.update(json.dumps(fields, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(b'(')
+        stack.append(None)
+        children = figma_node.get('children') or []
+        auto_layout = loose and figma_node.get('layoutMode') in AUTO_LAYOUT_MODES
+        stack.extend((child, False, loose and child.get('type') != 'INSTANCE', auto_layout)
+                     for child in reversed(children))
+    return digest.hexdigest()
+
+
+def _ignored_keys(node: Dict[str, Any], free_position: bool) -> set:
+    """可覆盖签名中去掉的属性"""
+    ignored = set(OVERRIDE_KEYS)
+    if node.get('type') != 'GROUP':
+        # Group 的宽高决定 Canvas 尺寸,其余节点的 HUG 尺寸不输出
+        if node.get('layoutSizingHorizontal') == 'HUG':
+            ignored.add('width')
+        if node.get('layoutSizingVertical') == 'HUG':
+            ignored.add('height')
+    if free_position:
+        ignored.update(('x', 'y'))
+    return ignored
+
+
+def _class_name(name: str) -> str:
+    """组件名 → 合法的类名 (如 'Button/Primary' → 'ButtonPrimary')"""
+    parts = [part for part in re.split(r'[^0-9A-Za-z_]+', name) if part]
+    class_name = ''.join(part[0].upper() + part[1:] for part in parts) or 'Component'
+    return f"C{class_name}" if class_name[0].isdigit() else class_name
+
+
+@dataclass
+class ComponentEntry:
+    """组件索引条目"""
+    key: str                    # mainComponent id
+    name: str                   # 组件名
+    class_name: str             # 生成的 UserControl 类名
+    source: Dict[str, Any]      # 转换为 UserControl 的 Figma 节点 (COMPONENT 定义或第一个实例)
+    signature: str              # 组件内容签名 (不含可覆盖的文本和填充)
+    references: int = 0         # 输出为引用的实例数
+    expanded: int = 0           # 有内容覆盖而展开的实例数
+    overridden: int = 0         # 带覆盖属性的引用数
+    properties: Dict[PropertySlot, str] = field(default_factory=dict)  # 被覆盖过的内容 → 组件属性名
+
+
+class ComponentLibrary:
+    """组件索引
+
+    index() 先登记导出数据中的 COMPONENT 定义;没有定义的组件以第一个实例为准。
+    构建器遇到实例时调用 resolve(): 内容一致或只覆盖了文本/填充时返回组件条目和覆盖属性 (输出引用),
+    否则返回 None (按 Frame 展开); 转换组件时 bindings() 给出需要绑定到组件属性的节点
+    """
+
+    def __init__(self):
+        """初始化组件库"""
+        self.entries: Dict[str, ComponentEntry] = {}
+        self._class_names: Dict[str, int] = {}
+
+    def index(self, roots: List[Dict[str, Any]]) -> int:
+        """登记节点树中的所有 COMPONENT 定义
+
+        变体 (COMPONENT_SET 下的 COMPONENT) 的名称加上组件集名称,如 'Button State=Hover'
+
+        Returns:
+            新登记的组件数
+        """
+        count = 0
+        stack = [(root, None) for root in reversed(roots)]
+        while stack:
+            node, parent = stack.pop()
+            if node.get('type') == 'COMPONENT' and node.get('id') and node['id'] not in self.entries:
+                name = node.get('name', 'Component')
+                if parent is not None and parent.get('type') == 'COMPONENT_SET':
+                    name = f"{parent.get('name', '')} {name}"
+                self._add(node['id'], name, node)
+                count += 1
+            stack.extend((child, node) for child in reversed(node.get('children') or []))
+        return count
+
+    def resolve(self, instance: Dict[str, Any]) -> Optional[Tuple[ComponentEntry, List[Tuple[str, str, Dict[str, Any]]]]]:
+        """查找实例对应的组件
+
+        Returns:
+            (组件条目, [(组件属性名, 种类 'Text' / 'Fill', 实例中被覆盖的节点)]);
+            没有组件 id 或有无法用属性表达的内容覆盖时返回 None
+        """
+        key = component_key(instance)
+        if not key:
+            return None
+
+        signature = content_signature(instance, overridable=True)
+        entry = self.entries.get(key)
+        if entry is None:
+            main_component = instance.get('mainComponent')
+            name = main_component.get('name') if isinstance(main_component, dict) else None
+            entry = self._add(key, name or instance.get('name', 'Component'), instance, signature)
+
+        slots = self._override_slots(entry.source, instance) if signature == entry.signature else None
+        if slots is None:
+            entry.expanded += 1
+            return None
+        entry.references += 1
+        if slots:
+            entry.overridden += 1
+        return entry, [(self._property_name(entry, path, kind, component_node), kind, instance_node)
+                       for path, kind, component_node, instance_node in slots]
+
+    def bindings(self, entry: ComponentEntry) -> Dict[int, List[Tuple[str, str]]]:
+        """转换组件时需要绑定到组件属性的节点 {id(组件中的 Figma 节点): [(种类, 组件属性名)]}"""
+        result: Dict[int, List[Tuple[str, str]]] = {}
+        for (path, kind), name in entry.properties.items():
+            node = entry.source
+            for index in path:
+                node = node['children'][index]
+            result.setdefault(id(node), []).append((kind, name))
+        return result
+
+    def _override_slots(self, component: Dict[str, Any], instance: Dict[str, Any]) -> Optional[List[Any]]:
+        """逐层比较组件和实例 (签名已相同,结构一致),找出被覆盖的文本和填充
+
+        Returns:
+            [(路径, 种类, 组件节点, 实例节点)],有无法表达的覆盖 (填充被删除或新增) 时返回 None
+        """
+        slots = []
+        stack = [(component, instance, ())]
+        while stack:
+            component_node, instance_node, path = stack.pop()
+            node_type = component_node.get('type')
+            if node_type == 'TEXT' and component_node.get('characters') != instance_node.get('characters'):
+                slots.append((path, 'Text', component_node, instance_node))
+            if (path == () or node_type in FILL_TYPES) and component_node.get('fills') != instance_node.get('fills'):
+                if not component_node.get('fills') or not instance_node.get('fills'):
+                    return None
+                slots.append((path, 'Fill', component_node, instance_node))
+            # 嵌套实例输出为引用,内容已由签名比较
+            pairs = zip(component_node.get('children') or [], instance_node.get('children') or [])
+            stack.extend((child, other, path + (index,)) for index, (child, other) in enumerate(pairs)
+                         if child.get('type') != 'INSTANCE')
+        slots.sort(key=lambda slot: (slot[0], slot[1]))
+        return slots
+
+    def _property_name(self, entry: ComponentEntry, path: Tuple[int, ...], kind: str,
+                       node: Dict[str, Any]) -> str:
+        """组件属性名: 图层名 + 种类,如 'Label' 的文本 → LabelText (重复时加序号)"""
+        name = entry.properties.get((path, kind))
+        if name is None:
+            base = _class_name(node.get('name', 'Part')) + kind
+            used = set(entry.properties.values())
+            name, number = base, 1
+            while name in used:
+                number += 1
+                name = f"{base}{number}"
+            entry.properties[(path, kind)] = name
+        return name
+
+    def referenced(self) -> List[ComponentEntry]:
+        """被引用过的组件 (需要输出 UserControl)"""
+        return [entry for entry in self.entries.values() if entry.references]
+
+    def format_stats(self) -> str:
+        """格式化统计信息"""
+        referenced = self.referenced()
+        return (
+            f"组件 {len(referenced)} 个, "
+            f"引用 {sum(e.references for e in referenced)} 处 "
+            f"(带覆盖属性 {sum(e.overridden for e in referenced)} 处), "
+            f"展开 {sum(e.expanded for e in self.entries.values())} 处 (有内容覆盖)"
+        )
+
+    def _add(self, key: str, name: str, source: Dict[str, Any], signature: Optional[str] = None) -> ComponentEntry:
+        """登记组件 (类名重复时加序号)"""
+        class_name = _class_name(name)
+        seen = self._class_names.get(class_name, 0)
+        self._class_names[class_name] = seen + 1
+        if seen:
+            class_name = f"{class_name}{seen + 1}"
+
+        entry = ComponentEntry(key, name, class_name, source, signature or content_signature(source, overridable=True))
+        self.entries[key] = entry
+        return entry
@@ -0,0 +1,220 @@
+"""
+XAML 目标方言
+作用: 把同一棵 WPF AST 映射为不同 XAML 方言 (WPF / Avalonia / MAUI) 的元素名、属性名、属性值和默认值,
+      映射关系全部来自 config/targets/<方言>.yaml 和对应的默认值文件
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import yaml
+
+
+# 方言配置目录 (相对配置目录)
+TARGETS_DIR = 'targets'
+
+# 项目自带的配置目录 (自定义配置目录中没有方言文件时回退到这里)
+BUILTIN_CONFIG_DIR = Path(__file__).resolve().parent.parent / 'config'
+
+# 渲染后的属性: [(属性名, 属性值)]
+AttributePairs = List[Tuple[str, str]]
+
+# 没有默认值配置的元素
+EMPTY_DEFAULTS: FrozenSet[Tuple[str, str]] = frozenset()
+
+
+def available_targets(config_dir: str = 'config') -> List[str]:
+    """列出可用的目标方言"""
+    names = set()
+    for directory in (Path(config_dir) / TARGETS_DIR, BUILTIN_CONFIG_DIR / TARGETS_DIR):
+        if directory.is_dir():
+            names.update(path.stem for path in directory.glob('*.yaml'))
+    return sorted(names)
+
+
+def _load_yaml(path: Path) -> Dict[str, Any]:
+    """读取 YAML (文件不存在时返回空字典)"""
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+class Dialect:
+    """目标 XAML 方言
+
+    映射顺序: 元素名 → 属性名 (按 WPF 类型覆盖 → 全局) → 属性值 → 值模板 → 排除目标元素的默认值
+    """
+
+    def __init__(self, spec: Dict[str, Any], defaults: Dict[str, Dict[str, Any]]):
+        """初始化方言
+
+        Args:
+            spec: 方言配置 (targets/<方言>.yaml 的内容)
+            defaults: 目标控件默认值 {目标元素: {目标属性: 默认值}}
+        """
+        self.name = spec.get('name', 'wpf')
+        self.file_suffix = spec.get('file_suffix', '.xaml')
+        root = spec.get('root', {})
+        self.root_element = root.get('element', 'UserControl')
+        self.header = root.get('header', [])
+        self.component_namespace = root.get('component_namespace', '')
+        self.design_namespace = root.get('design_namespace', [])
+        self.grid_definitions = spec.get('grid_definitions', 'element')
+        self.style_selectors = spec.get('style_selectors', False)
+        self.items_prelude = spec.get('items_prelude', [])
+        self.component_properties = spec.get('component_properties', {})
+
+        self.elements = spec.get('elements', {})
+        self.element_attributes = spec.get('element_attributes', {})
+        self.content_attributes = spec.get('content_attributes', {})
+        self.attribute_names = spec.get('attributes', {})
+        self.element_attribute_names = spec.get('element_attribute_names', {})
+        self.values = spec.get('values', {})
+        self.formats = spec.get('formats', {})
+
+        # 各目标元素的默认值集合 {(属性名, 属性值)},过滤默认值只需一次集合查找
+        self.defaults: Dict[str, FrozenSet[Tuple[str, str]]] = {
+            element: frozenset((name, str(value)) for name, value in attrs.items())
+            for element, attrs in defaults.items()
+        }
+
+        # 没有任何属性映射时 (WPF) 走快速路径
+        self._passthrough = not (self.attribute_names or self.element_attribute_names or self.values or
+                                 self.formats or self.element_attributes or self.style_selectors)
+
+        # 每个 WPF 类型合并后的属性名映射 (首次使用时生成)
+        self._name_tables: Dict[str, Dict[str, Optional[str]]] = {}
+
+    @classmethod
+    def load(cls, name: str = 'wpf', config_dir: str = 'config') -> 'Dialect':
+        """从配置目录读取方言
+
+        Args:
+            name: 方言名 (targets/<name>.yaml)
+            config_dir: 配置目录 (找不到方言文件时使用项目自带配置)
+
+        Raises:
+            ValueError: 方言不存在
+        """
+        for base in (Path(config_dir), BUILTIN_CONFIG_DIR):
+            spec_file = base / TARGETS_DIR / f'{name}.yaml'
+            if spec_file.exists():
+                spec = _load_yaml(spec_file)
+                defaults_name = spec.get('defaults')
+                defaults = _load_yaml(base / defaults_name) if defaults_name else {}
+                return cls(spec, defaults)
+        raise ValueError(f"未知的目标方言: {name} (可选: {', '.join(available_targets(config_dir))})")
+
+    def header_lines(self, class_name: str, design_width: Any, design_height: Any) -> List[str]:
+        """文档头"""
+        return [line.format(class_name=class_name, design_width=design_width, design_height=design_height)
+                for line in self.header]
+
+    def property_binding(self, name: str) -> str:
+        """绑定到组件属性的属性值"""
+        template = self.component_properties.get(
+            'binding', '{Binding {name}, RelativeSource={RelativeSource AncestorType=UserControl}}')
+        return template.replace('{name}', name)
+
+    def properties_code(self, class_name: str, properties: Dict[str, str]) -> str:
+        """声明组件属性的 partial 类代码
+
+        Args:
+            class_name: 组件类名
+            properties: {属性名: 默认值 (组件中的原值)}
+        """
+        config = self.component_properties
+        template = config.get('property', '').replace('{class_name}', class_name)
+        blocks = [template.replace('{name}', name).replace('{default}', json.dumps(default, ensure_ascii=False))
+                  for name, default in properties.items()]
+        return (config.get('header', '').replace('{class_name}', class_name) + '\n'.join(blocks)
+                + config.get('footer', '').replace('{class_name}', class_name))
+
+    def element_name(self, node_type: str, attributes: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """WPF 类型 → 目标元素名 (None 表示目标不支持)"""
+        if node_type not in self.elements:
+            return node_type
+        mapping = self.elements[node_type]
+        if isinstance(mapping, dict):
+            value = str((attributes or {}).get(mapping.get('attribute'), ''))
+            return mapping.get('values', {}).get(value, mapping.get('default', node_type))
+        return mapping
+
+    def _name_table(self, node_type: str) -> Dict[str, Optional[str]]:
+        """合并全局和按类型的属性名映射"""
+        table = self._name_tables.get(node_type)
+        if table is None:
+            table = dict(self.attribute_names)
+            table.update(self.element_attribute_names.get(node_type, {}))
+            self._name_tables[node_type] = table
+        return table
+
+    def map_attribute(self, node_type: str, name: str, value: Any) -> Optional[Tuple[str, str]]:
+        """映射单个属性
+
+        Returns:
+            (目标属性名, 目标属性值) 或 None (丢弃)
+        """
+        table = self._name_table(node_type)
+        target_name = table.get(name, name)
+        if target_name is None:
+            return None
+        if target_name == 'Style' and self.style_selectors:
+            # {StaticResource Key} → 样式类
+            return 'Classes', str(value).replace('{StaticResource ', '').rstrip('}')
+        text = str(value)
+        text = self.values.get(target_name, {}).get(text, text)
+        template = self.formats.get(target_name)
+        if template:
+            text = template.format(value=text)
+        return target_name, text
+
+    def attribute_pairs(self, node_type: str, attributes: Dict[str, Any],
+                        element: Optional[str] = None) -> AttributePairs:
+        """映射节点的全部可渲染属性,并排除目标元素的默认值
+
+        Args:
+            node_type: WPF 类型
+            attributes: 节点属性 (跳过 None 和 _ 开头的内部属性)
+            element: 目标元素名 (默认按 node_type 映射)
+        """
+        element = element or self.element_name(node_type, attributes)
+        defaults = self.defaults.get(element, EMPTY_DEFAULTS)
+        if self._passthrough:
+            return [(key, text) for key, value in attributes.items()
+                    if value is not None and key[:1] != '_' and (key, (text := str(value))) not in defaults]
+
+        pairs = []
+        for key, value in attributes.items():
+            if value is None or key.startswith('_'):
+                continue
+            mapped = self.map_attribute(node_type, key, value)
+            if mapped is None or mapped in defaults:
+                continue
+            pairs.append(mapped)
+
+        extra = self.element_attributes.get(element)
+        if extra and 'Style' not in attributes:
+            present = {name for name, _ in pairs}
+            pairs.extend((name, str(value)) for name, value in extra.items() if name not in present)
+        return pairs
+
+    def style_attributes(self, style_attributes: Dict[str, Any]) -> AttributePairs:
+        """Style 资源自身的属性 (TargetType 映射为目标元素, Avalonia 变为 Selector)"""
+        target_type = style_attributes.get('TargetType', '')
+        element = self.element_name(target_type)
+        if self.style_selectors:
+            key = style_attributes.get('x:Key')
+            return [('Selector', f"{element}.{key}" if key else element)]
+        pairs = []
+        for key, value in style_attributes.items():
+            if key.startswith('_'):
+                continue
+            if key == 'TargetType':
+                pairs.append((key, element))
+                continue
+            mapped = self.map_attribute('Style', key, value)
+            if mapped is not None:
+                pairs.append(mapped)
+        return pairs
@@ -0,0 +1,577 @@
+"""
+Figma REST API 客户端
+作用: 通过 Figma REST API 获取文件和节点 JSON,转换为 Node Inspector (Plugin API) 形状后直接交给压缩器,
+不再需要手工从 Node Inspector 复制 JSON
+
+- 连接池: 同一主机的 HTTP/1.1 keep-alive 连接复用,并发请求数不超过池大小
+- 并发获取: 节点 id 分批 (GET /v1/files/:key/nodes?ids=...),多批并发请求,先到的批次先压缩
+- 限流: 令牌桶控制请求速率,429 时按 Retry-After 暂停所有请求后重试
+- 磁盘缓存: 响应按请求路径保存 ETag,再次请求带 If-None-Match (304 时使用缓存);
+  节点按文件版本 (version) 保存,版本不变时不再请求;
+  压缩结果按节点 id 和内容哈希增量缓存 (figma_compressor.CompressionCache),版本不变时直接复用
+"""
+import gzip
+import hashlib
+import http.client
+import math
+import os
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from figma_compressor import FIGMA_DEFAULTS, CompressionCache, compress_node
+from src import json_io
+from src.figma_stub import Recordings
+
+API_BASE = 'https://api.figma.com'
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'figma')
+
+# 令牌桶默认速率 (每秒请求数)
+DEFAULT_RATE = 2.0
+
+# 可重试的连接错误 (keep-alive 连接被服务器关闭等)
+RETRYABLE_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                    ConnectionResetError, BrokenPipeError)
+
+# REST API 独有、转换器不使用的属性
+REST_ONLY_PROPERTIES = {
+    'absoluteBoundingBox', 'absoluteRenderBounds', 'size', 'style', 'rectangleCornerRadii',
+    'constraints', 'interactions', 'scrollBehavior', 'styles', 'exportSettings',
+    'characterStyleOverrides', 'styleOverrideTable', 'lineTypes', 'lineIndentations',
+    'background', 'backgroundColor', 'prototypeStartNodeID', 'flowStartingPoints', 'prototypeDevice',
+}
+
+# REST 文本样式中与 Plugin API 同名的字段
+TEXT_STYLE_FIELDS = ('fontSize', 'fontWeight', 'textAlignHorizontal', 'textAlignVertical',
+                     'textAutoResize', 'textCase', 'textDecoration', 'paragraphSpacing')
+
+# 字重 → 字形名 (Plugin API fontName.style)
+FONT_STYLES = {100: 'Thin', 200: 'ExtraLight', 300: 'Light', 400: 'Regular', 500: 'Medium',
+               600: 'SemiBold', 700: 'Bold', 800: 'ExtraBold', 900: 'Black'}
+
+# rectangleCornerRadii 的顺序
+CORNER_RADII = ('topLeftRadius', 'topRightRadius', 'bottomRightRadius', 'bottomLeftRadius')
+
+
+# ==================== REST → Plugin API 形状 ====================
+
+def normalize_node(node: Dict[str, Any]) -> Dict[str, Any]:
+    """把 REST API 节点转换为 Node Inspector (Plugin API) 形状
+
+    - absoluteBoundingBox / relativeTransform → x, y (相对父节点), width, height, rotation (度)
+    - style → fontSize, fontWeight, fontName, lineHeight, letterSpacing 等
+    - 颜色 {r, g, b, a} → {r, g, b} + 画笔 opacity
+    - rectangleCornerRadii → topLeftRadius 等
+
+    用显式栈遍历,嵌套深度不受递归限制
+    """
+    root = {}
+    # 栈元素: (原始节点, 父节点包围盒, 结果写入的列表, 下标)
+    stack = [(node, None, None, 0)]
+    while stack:
+        raw, parent_box, target, index = stack.pop()
+        converted = _normalize_fields(raw, parent_box)
+        if target is None:
+            root = converted
+        else:
+            target[index] = converted
+
+        children = raw.get('children')
+        if isinstance(children, list):
+            converted['children'] = list(children)
+            box = raw.get('absoluteBoundingBox')
+            for i in range(len(children) - 1, -1, -1):
+                if isinstance(children[i], dict):
+                    stack.append((children[i], box, converted['children'], i))
+    return root
+
+
+def _number(value: float) -> float:
+    """去掉浮点误差,整数值输出为 int"""
+    value = round(value, 3)
+    return int(value) if value == int(value) else value
+
+
+def _normalize_fields(raw: Dict[str, Any], parent_box: Optional[Dict[str, float]]) -> Dict[str, Any]:
+    """转换单个节点的字段 (children 由调用方处理)"""
+    result = {key: value for key, value in raw.items() if key not in REST_ONLY_PROPERTIES and key != 'children'}
+
+    # 位置: relativeTransform (geometry=paths 时返回) 与 Plugin API 相同,否则按包围盒相对父节点计算
+    box = raw.get('absoluteBoundingBox') or {}
+    transform = raw.get('relativeTransform')
+    if isinstance(transform, list) and len(transform) == 2:
+        result['x'], result['y'] = _number(transform[0][2]), _number(transform[1][2])
+        rotation = _number(math.degrees(math.atan2(transform[0][1], transform[0][0])))
+        if rotation:
+            result['rotation'] = rotation
+        else:
+            result.pop('rotation', None)
+    else:
+        if box:
+            origin = parent_box or {'x': 0, 'y': 0}
+            result['x'], result['y'] = _number(box['x'] - origin['x']), _number(box['y'] - origin['y'])
+        # REST 的 rotation 为弧度
+        if raw.get('rotation'):
+            result['rotation'] = _number(math.degrees(raw['rotation']))
+
+    size = raw.get('size')
+    if isinstance(size, dict):
+        result['width'], result['height'] = _number(size['x']), _number(size['y'])
+    elif box:
+        result['width'], result['height'] = _number(box['width']), _number(box['height'])
+
+    # 文本样式
+    style = raw.get('style')
+    if isinstance(style, dict):
+        for key in TEXT_STYLE_FIELDS:
+            if key in style:
+                result[key] = style[key]
+        if style.get('fontFamily'):
+            weight_name = FONT_STYLES.get(style.get('fontWeight', 400), 'Regular')
+            if style.get('italic'):
+                weight_name = 'Italic' if weight_name == 'Regular' else f"{weight_name} Italic"
+            result['fontName'] = {'family': style['fontFamily'], 'style': weight_name}
+        if 'letterSpacing' in style:
+            result['letterSpacing'] = {'unit': 'PIXELS', 'value': style['letterSpacing']}
+        unit = style.get('lineHeightUnit')
+        if unit == 'PIXELS' and 'lineHeightPx' in style:
+            result['lineHeight'] = {'unit': 'PIXELS', 'value': style['lineHeightPx']}
+        elif unit == 'FONT_SIZE_%' and 'lineHeightPercentFontSize' in style:
+            result['lineHeight'] = {'unit': 'PERCENT', 'value': style['lineHeightPercentFontSize']}
+        elif unit == 'INTRINSIC_%':
+            result['lineHeight'] = {'unit': 'AUTO'}
+
+    # 圆角
+    radii = raw.get('rectangleCornerRadii')
+    if isinstance(radii, list) and len(radii) == 4:
+        if len(set(radii)) == 1:
+            result['cornerRadius'] = radii[0]
+        else:
+            result.update(zip(CORNER_RADII, radii))
+
+    # 画笔颜色: alpha 并入画笔 opacity
+    for key in ('fills', 'strokes'):
+        if isinstance(raw.get(key), list):
+            result[key] = [_normalize_paint(paint) if isinstance(paint, dict) else paint for paint in raw[key]]
+
+    return result
+
+
+def _normalize_paint(paint: Dict[str, Any]) -> Dict[str, Any]:
+    """REST 画笔 → Plugin API 画笔"""
+    color = paint.get('color')
+    if not isinstance(color, dict) or 'a' not in color:
+        return paint
+    result = dict(paint)
+    result['color'] = {channel: color[channel] for channel in ('r', 'g', 'b') if channel in color}
+    if color['a'] != 1:
+        result['opacity'] = _number(paint.get('opacity', 1) * color['a'])
+    return result
+
+
+def compress_rest_node(node: Dict[str, Any]) -> Dict[str, Any]:
+    """REST 节点 → 压缩后的节点 (与压缩 Node Inspector JSON 的结果形状相同)"""
+    return compress_node(normalize_node(node))
+
+
+# ==================== 连接池 / 限流 / 缓存 ====================
+
+class ConnectionPool:
+    """单一主机的 HTTP keep-alive 连接池 (线程安全)"""
+
+    def __init__(self, base_url: str, size: int = 4, timeout: float = 30):
+        parts = urllib.parse.urlsplit(base_url)
+        self.https = parts.scheme == 'https'
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.created = 0
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+
+    def _connect(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self.created += 1
+        if self.https:
+            return http.client.HTTPSConnection(self.host, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+    def request(self, method: str, path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """发送请求,复用空闲连接; 复用的连接已被服务器关闭时换新连接重试一次
+
+        Returns:
+            (状态码, 响应头 (小写名), 响应体)
+        """
+        with self._slots:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            reused = connection is not None
+            while True:
+                if connection is None:
+                    connection = self._connect()
+                try:
+                    connection.request(method, self.prefix + path, headers=headers)
+                    response = connection.getresponse()
+                    body = response.read()
+                    break
+                except RETRYABLE_ERRORS:
+                    connection.close()
+                    connection = None
+                    if not reused:
+                        raise
+                    reused = False
+                except Exception:
+                    connection.close()
+                    raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                with self._lock:
+                    self._idle.append(connection)
+            return response.status, {name.lower(): value for name, value in response.getheaders()}, body
+
+    def close(self) -> None:
+        """关闭所有空闲连接"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class RateLimiter:
+    """令牌桶限速: 每秒 rate 个请求,最多突发 burst 个; pause() 让所有请求暂停 (429 Retry-After)"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: Optional[int] = None):
+        """
+        Args:
+            rate: 每秒请求数 (0=不限速,仍然遵守 pause)
+            burst: 令牌桶容量 (默认 max(1, rate))
+        """
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.waited = 0.0
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """取一个令牌,没有令牌时等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self.rate <= 0:
+                    return
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+                self.waited += delay
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """暂停所有请求 seconds 秒,并清空令牌 (恢复后按速率重新积累)"""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class ResponseCache:
+    """磁盘缓存
+
+    - responses/<sha1(请求路径)>.json + .etag: 响应体和 ETag,用于条件请求
+    - nodes/<文件 key>/<版本>/<节点 id>.json: 节点响应,同一版本不再请求 (写入新版本时删除旧版本)
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _response_path(self, path: str) -> str:
+        digest = hashlib.sha1(path.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, 'responses', digest)
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        """节点 id / 版本号 → 文件名 (1:2 → 1-2, I1:2;3:4 → I1-2_3-4)"""
+        return ''.join(c if c.isalnum() or c in '-_.' else {':': '-', ';': '_'}.get(c, '~') for c in name)
+
+    def _node_dir(self, file_key: str, version: str) -> str:
+        return os.path.join(self.directory, 'nodes', self._safe_name(file_key), self._safe_name(version))
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_response(self, path: str) -> Optional[Tuple[str, bytes]]:
+        """(ETag, 响应体),没有缓存时返回 None"""
+        base = self._response_path(path)
+        try:
+            with open(f"{base}.etag", 'r', encoding='utf-8') as f:
+                etag = f.read()
+            with open(f"{base}.json", 'rb') as f:
+                return etag, f.read()
+        except OSError:
+            return None
+
+    def put_response(self, path: str, etag: str, body: bytes) -> None:
+        base = self._response_path(path)
+        self._write(f"{base}.json", body)
+        self._write(f"{base}.etag", etag.encode('utf-8'))
+
+    def get_node(self, file_key: str, version: str, node_id: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self._node_dir(file_key, version), f"{self._safe_name(node_id)}.json")
+        try:
+            return json_io.load(path)
+        except (OSError, ValueError):
+            return None
+
+    def put_node(self, file_key: str, version: str, node_id: str, entry: Dict[str, Any]) -> None:
+        directory = self._node_dir(file_key, version)
+        with self._lock:
+            if not os.path.isdir(directory):
+                self._prune(file_key)
+        self._write(os.path.join(directory, f"{self._safe_name(node_id)}.json"), json_io.dumps(entry))
+
+    def _prune(self, file_key: str) -> None:
+        """删除该文件旧版本的节点缓存"""
+        parent = os.path.join(self.directory, 'nodes', self._safe_name(file_key))
+        if not os.path.isdir(parent):
+            return
+        for version in os.listdir(parent):
+            version_dir = os.path.join(parent, version)
+            for name in os.listdir(version_dir):
+                os.remove(os.path.join(version_dir, name))
+            os.rmdir(version_dir)
+
+
+# ==================== 客户端 ====================
+
+class FigmaClient:
+    """Figma REST API 客户端
+
+    用法:
+        with FigmaClient(token) as client:
+            data = client.fetch('FILE_KEY', ['1:2', '1:3'])   # 与 figma_compressor.py 的输出结构相同
+    """
+
+    def __init__(self, token: Optional[str] = None, base_url: str = API_BASE,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR, max_workers: int = 4, batch_size: int = 20,
+                 rate: float = DEFAULT_RATE, max_retries: int = 5, timeout: float = 30,
+                 geometry: bool = True, record_dir: Optional[str] = None):
+        """
+        Args:
+            token: 个人访问令牌 (默认读取环境变量 FIGMA_TOKEN)
+            base_url: API 地址 (桩服务器地址用于离线开发)
+            cache_dir: 磁盘缓存目录 (None=不缓存)
+            max_workers: 并发请求数 (也是连接池大小)
+            batch_size: 每个节点请求包含的 id 数
+            rate: 每秒请求数 (令牌桶,0=不限速)
+            max_retries: 429 / 5xx 的最大重试次数
+            timeout: 连接和读取超时 (秒)
+            geometry: 请求矢量路径 (geometry=paths),矢量图标转换为 Path 需要
+            record_dir: 录制目录,响应按桩服务器格式保存 (src/figma_stub.py)
+        """
+        self.token = token if token is not None else os.environ.get('FIGMA_TOKEN', '')
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.geometry = geometry
+        self.pool = ConnectionPool(base_url, size=self.max_workers, timeout=timeout)
+        self.limiter = RateLimiter(rate, burst=self.max_workers)
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.compression = CompressionCache(os.path.join(cache_dir, 'compressed.pickle')) if cache_dir else None
+        self.recordings = Recordings(record_dir) if record_dir else None
+        self.stats = {'requests': 0, 'not_modified': 0, 'retries': 0, 'bytes': 0,
+                      'node_hits': 0, 'node_fetched': 0, 'missing': 0}
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def __enter__(self) -> 'FigmaClient':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += amount
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET 请求并解析 JSON
+
+        带缓存的 ETag 发送 If-None-Match (304 时使用缓存);
+        429 / 5xx 按 Retry-After (没有时指数退避) 暂停所有请求后重试
+        """
+        if params:
+            path = f"{path}?{urllib.parse.urlencode(params, safe=':,;')}"
+        cached = self.cache.get_response(path) if self.cache else None
+
+        headers = {'Accept-Encoding': 'gzip'}
+        if self.token:
+            headers['X-Figma-Token'] = self.token
+        if cached:
+            headers['If-None-Match'] = cached[0]
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            status, response_headers, body = self.pool.request('GET', path, headers)
+            self._count('requests')
+            self._count('bytes', len(body))
+
+            if status == 304 and cached:
+                self._count('not_modified')
+                return json_io.loads(cached[1])
+            if status == 200:
+                if response_headers.get('content-encoding') == 'gzip':
+                    body = gzip.decompress(body)
+                etag = response_headers.get('etag')
+                if self.cache and etag:
+                    self.cache.put_response(path, etag, body)
+                return json_io.loads(body)
+            if (status == 429 or status >= 500) and attempt < self.max_retries:
+                self._count('retries')
+                self.limiter.pause(_retry_after(response_headers, attempt))
+                continue
+            raise RuntimeError(f"Figma API 请求失败: HTTP {status} {path} {body[:200].decode('utf-8', 'replace')}")
+
+    def get_file(self, file_key: str, depth: Optional[int] = None) -> Dict[str, Any]:
+        """GET /v1/files/:key (depth 限制文档树层数: 1=页面, 2=页面和顶层节点)"""
+        params = {'depth': depth} if depth else None
+        payload = self.get_json(f"/v1/files/{urllib.parse.quote(file_key)}", params)
+        if self.recordings and depth is None:
+            self.recordings.record_file(file_key, payload)
+        return payload
+
+    def file_version(self, file_key: str) -> str:
+        """文件当前版本号 (depth=1 的轻量请求,ETag 未变时服务器返回 304)"""
+        return str(self.get_file(file_key, depth=1).get('version', ''))
+
+    def top_level_ids(self, file_key: str) -> List[str]:
+        """所有页面的顶层节点 id"""
+        document = self.get_file(file_key, depth=2).get('document', {})
+        return [child['id'] for page in document.get('children', []) for child in page.get('children', [])]
+
+    def _fetch_batch(self, file_key: str, ids: List[str]) -> Dict[str, Any]:
+        """请求一批节点"""
+        params = {'ids': ','.join(ids)}
+        if self.geometry:
+            params['geometry'] = 'paths'
+        payload = self.get_json(f"/v1/files/{urllib.parse.quote(file_key)}/nodes", params)
+        if self.recordings:
+            self.recordings.record_nodes(file_key, payload)
+        return payload
+
+    def iter_nodes(self, file_key: str, ids: List[str],
+                   version: Optional[str] = None) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """按到达顺序产出 (节点 id, 节点响应),文件中不存在的节点为 None
+
+        先产出版本缓存命中的节点,其余分批并发请求,每批到达后立即产出
+        """
+        if self.cache and version is None:
+            version = self.file_version(file_key)
+
+        pending = []
+        for node_id in dict.fromkeys(ids):
+            entry = self.cache.get_node(file_key, version, node_id) if self.cache else None
+            if entry is None:
+                pending.append(node_id)
+                continue
+            self._count('node_hits')
+            yield node_id, entry
+
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        if not batches:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            futures = {executor.submit(self._fetch_batch, file_key, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                nodes = future.result().get('nodes') or {}
+                for node_id in futures[future]:
+                    entry = nodes.get(node_id)
+                    if entry is None:
+                        self._count('missing')
+                    else:
+                        self._count('node_fetched')
+                        if self.cache:
+                            self.cache.put_node(file_key, version, node_id, entry)
+                    yield node_id, entry
+
+    def iter_compressed(self, file_key: str, ids: List[str],
+                        version: Optional[str] = None) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """按到达顺序产出 (节点 id, 压缩后的节点): 每批到达后立即转换和压缩,与其余批次的网络请求重叠
+
+        有增量压缩缓存时,版本相同的节点直接复用压缩结果,版本变化时只重新压缩内容变化的子树
+        """
+        for node_id, entry in self.iter_nodes(file_key, ids, version):
+            document = entry.get('document') if entry else None
+            if not document:
+                yield node_id, None
+            elif self.compression is None:
+                yield node_id, compress_rest_node(document)
+            else:
+                node = self.compression.cached(node_id, version)
+                if node is None:
+                    node = self.compression.compress_tree([normalize_node(document)], version)[0]
+                yield node_id, node
+
+    def fetch(self, file_key: str, ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """获取节点并压缩,结构与 figma_compressor.py 的输出相同 (compressed_data 按 ids 顺序)
+
+        Args:
+            file_key: 文件 key (文件链接 figma.com/file/<key>/... 中的部分)
+            ids: 节点 id 列表 (默认所有页面的顶层节点)
+        """
+        version = self.file_version(file_key)
+        ids = list(ids) if ids else self.top_level_ids(file_key)
+        compressed = dict(self.iter_compressed(file_key, ids, version))
+        if self.compression:
+            self.compression.save()
+        nodes = [compressed[node_id] for node_id in ids if compressed.get(node_id)]
+        return {
+            'compressed_data': nodes,
+            'defaults': FIGMA_DEFAULTS,
+            'metadata': {
+                'source': 'figma-rest',
+                'file_key': file_key,
+                'version': version,
+                'requested_nodes': len(ids),
+                'compressed_nodes': len(nodes),
+                'note': '本文件由 Figma REST API 获取,已转换为 Node Inspector 形状并压缩。',
+            },
+        }
+
+    def format_stats(self) -> str:
+        """统计摘要"""
+        stats = self.stats
+        requested = stats['node_hits'] + stats['node_fetched'] + stats['missing']
+        hit_rate = stats['node_hits'] / requested * 100 if requested else 0.0
+        return (f"请求 {stats['requests']} (304 {stats['not_modified']}, 重试 {stats['retries']}), "
+                f"节点缓存命中 {stats['node_hits']}/{requested} ({hit_rate:.0f}%), "
+                f"未找到 {stats['missing']}, 连接 {self.pool.created}, "
+                f"接收 {stats['bytes'] / 1024:.1f} KB, 限速等待累计 {self.limiter.waited:.2f}s")
+
+
+def _retry_after(headers: Dict[str, str], attempt: int) -> float:
+    """重试等待秒数: Retry-After 头,没有时指数退避"""
+    try:
+        return max(0.0, float(headers['retry-after']))
+    except (KeyError, ValueError):
+        return min(2.0 ** attempt, 30.0)
@@ -0,0 +1,301 @@
+"""
+Figma REST API 本地桩服务器
+作用: 回放录制的 Figma REST 响应,离线开发和测试 figma_client
+
+录制目录格式 (FigmaClient(record_dir=...) 写入,也可以手工放入):
+    <file_key>.json         GET /v1/files/:key 的完整响应
+    <file_key>.nodes.json   GET /v1/files/:key/nodes 的响应合并 ({'name', 'version', 'nodes': {id: 节点}})
+
+支持的接口:
+    GET /v1/files/:key?depth=N         按 depth 截断文档树
+    GET /v1/files/:key/nodes?ids=a,b   先查 nodes 录制,再从文件文档树中查找
+
+响应带 ETag,请求带 If-None-Match 且一致时返回 304;
+可以模拟限流 (超过每秒请求数时返回 429 + Retry-After) 和网络延迟
+"""
+import gzip
+import hashlib
+import os
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from src import json_io
+
+# 接口路径: /v1/files/:key 和 /v1/files/:key/nodes
+ROUTE = re.compile(r'^/v1/files/([^/]+)(/nodes)?/?$')
+
+# 响应体超过该字节数且客户端接受 gzip 时压缩
+GZIP_MIN_BYTES = 1024
+
+
+class Recordings:
+    """录制的响应 (按文件 key 读取并缓存)"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._files = {}
+        self._nodes = {}
+
+    def _path(self, file_key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{file_key}{suffix}")
+
+    def _load(self, file_key: str, suffix: str, cache: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if file_key not in cache:
+                path = self._path(file_key, suffix)
+                cache[file_key] = json_io.load(path) if os.path.exists(path) else None
+            return cache[file_key]
+
+    def file(self, file_key: str, depth: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """文件响应 (没有录制完整文件时用录制的节点拼出一个页面)"""
+        recorded = self._load(file_key, '.json', self._files)
+        if recorded is None:
+            nodes = self._load(file_key, '.nodes.json', self._nodes)
+            if nodes is None:
+                return None
+            page = {'id': '0:1', 'name': 'Page 1', 'type': 'CANVAS',
+                    'children': [entry['document'] for entry in nodes.get('nodes', {}).values()
+                                 if isinstance(entry, dict) and 'document' in entry]}
+            recorded = {key: value for key, value in nodes.items() if key != 'nodes'}
+            recorded['document'] = {'id': '0:0', 'name': 'Document', 'type': 'DOCUMENT', 'children': [page]}
+        if depth is None:
+            return recorded
+        result = dict(recorded)
+        result['document'] = truncate_tree(recorded.get('document', {}), depth)
+        return result
+
+    def nodes(self, file_key: str, ids: List[str]) -> Optional[Dict[str, Any]]:
+        """节点响应: {'name', 'version', 'nodes': {id: 节点或 None}}"""
+        recorded = self._load(file_key, '.nodes.json', self._nodes) or {}
+        document = self._load(file_key, '.json', self._files)
+        if not recorded and document is None:
+            return None
+
+        entries = recorded.get('nodes', {})
+        index = None
+        result = {key: value for key, value in (document or recorded).items() if key not in ('document', 'nodes')}
+        result['nodes'] = {}
+        for node_id in ids:
+            entry = entries.get(node_id)
+            if entry is None and document is not None:
+                if index is None:
+                    index = index_tree(document.get('document', {}))
+                node = index.get(node_id)
+                entry = {'document': node, 'components': {}, 'styles': {}} if node else None
+            result['nodes'][node_id] = entry
+        return result
+
+    def record_file(self, file_key: str, payload: Dict[str, Any]) -> None:
+        """录制完整文件响应"""
+        with self._lock:
+            self._write(self._path(file_key, '.json'), payload)
+            self._files[file_key] = payload
+
+    def record_nodes(self, file_key: str, payload: Dict[str, Any]) -> None:
+        """录制节点响应,合并到已录制的同一版本节点中 (版本变化时替换)"""
+        with self._lock:
+            path = self._path(file_key, '.nodes.json')
+            recorded = json_io.load(path) if os.path.exists(path) else {}
+            nodes = recorded.get('nodes', {}) if recorded.get('version') == payload.get('version') else {}
+            nodes.update((node_id, entry) for node_id, entry in payload.get('nodes', {}).items() if entry)
+            merged = {key: value for key, value in payload.items() if key != 'nodes'}
+            merged['nodes'] = nodes
+            self._write(path, merged)
+            self._nodes[file_key] = merged
+
+    def _write(self, path: str, payload: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        json_io.dump(payload, tmp_path, indent=True)
+        os.replace(tmp_path, path)
+
+
+def truncate_tree(root: Dict[str, Any], depth: int) -> Dict[str, Any]:
+    """复制文档树,只保留 depth 层以内的节点 (文档为第 0 层,页面为第 1 层)"""
+    result = dict(root)
+    stack = [(result, 0)]
+    while stack:
+        node, level = stack.pop()
+        children = node.get('children')
+        if not isinstance(children, list):
+            continue
+        if level >= depth:
+            del node['children']
+            continue
+        node['children'] = [dict(child) for child in children]
+        stack.extend((child, level + 1) for child in node['children'])
+    return result
+
+
+def index_tree(root: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """节点 id → 节点"""
+    index = {}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if 'id' in node:
+            index[node['id']] = node
+        stack.extend(child for child in node.get('children', []) if isinstance(child, dict))
+    return index
+
+
+class FigmaStubServer:
+    """回放录制响应的 Figma REST API 桩服务器
+
+    用法:
+        with FigmaStubServer('test_cases/figma_api', rate_limit=5) as stub:
+            client = FigmaClient(base_url=stub.url, cache_dir=None)
+    """
+
+    def __init__(self, recordings_dir: str, host: str = '127.0.0.1', port: int = 0,
+                 rate_limit: float = 0, latency: float = 0, token: Optional[str] = None):
+        """
+        Args:
+            recordings_dir: 录制目录
+            host, port: 监听地址 (port=0 时随机分配)
+            rate_limit: 每秒允许的请求数 (0=不限流),超过时返回 429
+            latency: 每个响应的模拟延迟 (秒)
+            token: 指定时要求请求头 X-Figma-Token 一致,否则返回 403
+        """
+        self.recordings = Recordings(recordings_dir)
+        self.rate_limit = rate_limit
+        self.latency = latency
+        self.token = token
+        self.stats = {'requests': 0, 'not_modified': 0, 'rate_limited': 0}
+        self._lock = threading.Lock()
+        self._window = []
+        self._thread = None
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FigmaStubServer':
+        """在后台线程中开始服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='figma-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """在当前线程中服务 (Ctrl+C 结束)"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'FigmaStubServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _retry_after(self) -> float:
+        """限流窗口 (最近 1 秒的请求时刻) 已满时返回需要等待的秒数,否则记录本次请求并返回 0"""
+        if self.rate_limit <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.rate_limit:
+                return max(0.05, 1.0 - (now - self._window[0]))
+            self._window.append(now)
+        return 0.0
+
+    def handle(self, path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """处理一个 GET 请求
+
+        Returns:
+            (状态码, 响应头, 响应体)
+        """
+        with self._lock:
+            self.stats['requests'] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.token is not None and headers.get('X-Figma-Token') != self.token:
+            return _error(403, 'Invalid token')
+
+        retry_after = self._retry_after()
+        if retry_after:
+            with self._lock:
+                self.stats['rate_limited'] += 1
+            status, response_headers, body = _error(429, 'Rate limit exceeded')
+            response_headers['Retry-After'] = f"{retry_after:.2f}"
+            return status, response_headers, body
+
+        parts = urllib.parse.urlsplit(path)
+        match = ROUTE.match(parts.path)
+        if not match:
+            return _error(404, 'Not found')
+        file_key = urllib.parse.unquote(match.group(1))
+        query = urllib.parse.parse_qs(parts.query)
+
+        if match.group(2):
+            ids = [i for value in query.get('ids', []) for i in value.split(',') if i]
+            if not ids:
+                return _error(400, 'Missing ids')
+            payload = self.recordings.nodes(file_key, ids)
+        else:
+            depth = query.get('depth', [None])[0]
+            payload = self.recordings.file(file_key, int(depth) if depth else None)
+        if payload is None:
+            return _error(404, 'Not found')
+
+        body = json_io.dumps(payload)
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        if headers.get('If-None-Match') == etag:
+            with self._lock:
+                self.stats['not_modified'] += 1
+            return 304, {'ETag': etag}, b''
+
+        response_headers = {'Content-Type': 'application/json; charset=utf-8', 'ETag': etag}
+        if len(body) > GZIP_MIN_BYTES and 'gzip' in headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=5)
+            response_headers['Content-Encoding'] = 'gzip'
+        return 200, response_headers, body
+
+    def format_stats(self) -> str:
+        """统计摘要"""
+        return (f"请求 {self.stats['requests']}, 304 {self.stats['not_modified']}, "
+                f"限流 {self.stats['rate_limited']}")
+
+
+def _error(status: int, message: str) -> Tuple[int, Dict[str, str], bytes]:
+    """Figma 风格的错误响应"""
+    body = json_io.dumps({'status': status, 'err': message})
+    return status, {'Content-Type': 'application/json; charset=utf-8'}, body
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive 请求处理,逻辑在 FigmaStubServer.handle 中"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        status, headers, body = self.server.stub.handle(self.path, self.headers)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """不打印访问日志"""
@@ -0,0 +1,233 @@
+"""
+Grid 放置引擎
+作用: 为 Figma GRID 布局的子元素计算 Grid.Row / Grid.Column / 跨度和间距 Margin,
+      每个 Grid 只建立一次占用位图,未锚定的子元素按 CSS Grid 的自动流 (row, sparse)
+      绕开已占用 (含跨行跨列) 的单元格
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# 子元素坐标: -1 表示未锚定 (自动放置)
+AUTO = -1
+
+
+@dataclass
+class GridPlacement:
+    """单个子元素的放置结果"""
+    row: int
+    column: int
+    row_span: int = 1
+    column_span: int = 1
+    margin: Optional[str] = None
+
+
+def track_definitions(sizes: List[Dict[str, Any]]) -> List[str]:
+    """把 gridRowSizes / gridColumnSizes 转换为 WPF 行列定义
+
+    Args:
+        sizes: Figma 轨道尺寸列表 ({'type': 'FLEX'|'FIXED'|..., 'value': ...})
+
+    Returns:
+        ['*', '2*', '120', 'Auto', ...]
+    """
+    definitions = []
+    for size in sizes:
+        if size.get('type') == 'FLEX':
+            value = size.get('value', 1)
+            # 如果是1,简化为 "*"
+            definitions.append('*' if value == 1 else f"{value}*")
+        elif size.get('type') == 'FIXED':
+            definitions.append(str(size.get('value', 'Auto')))
+        else:
+            definitions.append('Auto')
+    return definitions
+
+
+def _format_number(value) -> Any:
+    """整数值去掉小数部分"""
+    return int(value) if value == int(value) else value
+
+
+class OccupancyMap:
+    """按行存储的单元格占用位图
+
+    列数固定,行数按需增长 (隐式行);column_count 为 0 时只有一行,列数按需增长
+    """
+
+    def __init__(self, row_count: int, column_count: int):
+        """初始化位图
+
+        Args:
+            row_count: 显式行数
+            column_count: 显式列数 (0 表示单行、列数不限)
+        """
+        self.single_row = column_count <= 0
+        self.column_count = column_count
+        self.row_count = 1 if self.single_row else max(row_count, 0)
+        self.cells = bytearray(self.row_count * max(column_count, 0))
+
+    def _ensure_rows(self, rows: int) -> None:
+        """行数不足时追加隐式行"""
+        if rows > self.row_count:
+            self.cells.extend(bytes((rows - self.row_count) * self.column_count))
+            self.row_count = rows
+
+    def _ensure_columns(self, columns: int) -> None:
+        """单行模式下追加列"""
+        if columns > self.column_count:
+            self.cells.extend(bytes(columns - self.column_count))
+            self.column_count = columns
+
+    def fits(self, row: int, column: int, row_span: int, column_span: int) -> bool:
+        """区域内所有 (已存在的) 单元格是否空闲"""
+        width = self.column_count
+        last_row = min(row + row_span, self.row_count)
+        last_column = min(column + column_span, width)
+        for r in range(row, last_row):
+            start = r * width
+            if any(self.cells[start + column:start + last_column]):
+                return False
+        return True
+
+    def occupy(self, row: int, column: int, row_span: int, column_span: int) -> None:
+        """标记区域为已占用 (超出显式列的部分忽略)"""
+        if self.single_row:
+            self._ensure_columns(column + column_span)
+        else:
+            self._ensure_rows(row + row_span)
+        width = self.column_count
+        last_column = min(column + column_span, width)
+        if column >= last_column:
+            return
+        fill = b'\x01' * (last_column - column)
+        for r in range(row, row + row_span):
+            start = r * width
+            self.cells[start + column:start + last_column] = fill
+
+
+class GridPlacementEngine:
+    """Figma GRID 子元素放置引擎
+
+    放置顺序与 CSS Grid 相同:
+        1. 行列都锚定的子元素
+        2. 只锚定行的子元素: 在该行中从左到右找第一个空位 (每行一个游标)
+        3. 其余子元素: 全局游标按行优先自动流;只锚定列的子元素把游标移到该列
+    游标只前进不回退 (sparse),整个过程对单元格只扫描常数次
+    """
+
+    def __init__(self, row_count: int, column_count: int, row_gap: float = 0, column_gap: float = 0):
+        """初始化引擎
+
+        Args:
+            row_count: 行定义数
+            column_count: 列定义数
+            row_gap: 行间距 (gridRowGap)
+            column_gap: 列间距 (gridColumnGap)
+        """
+        self.row_count = row_count
+        self.column_count = column_count
+        self.row_gap = row_gap or 0
+        self.column_gap = column_gap or 0
+
+    def _span(self, value: Any, limit: int) -> int:
+        """规范化跨度: 至少为 1,不超过显式轨道数"""
+        span = value if isinstance(value, int) and value > 1 else 1
+        return min(span, limit) if limit > 0 else span
+
+    def place(self, children: List[Dict[str, Any]]) -> Tuple[List[GridPlacement], int]:
+        """计算所有可见子元素的位置
+
+        Args:
+            children: 可见子元素 (按文档顺序)
+
+        Returns:
+            (与 children 一一对应的放置结果, 放置后的总行数 (含隐式行))
+        """
+        occupancy = OccupancyMap(self.row_count, self.column_count)
+        placements: List[Optional[GridPlacement]] = [None] * len(children)
+        row_locked = []
+        auto = []
+
+        for index, child in enumerate(children):
+            row = child.get('gridRowAnchorIndex', AUTO)
+            column = child.get('gridColumnAnchorIndex', AUTO)
+            placement = GridPlacement(
+                row=row,
+                column=column,
+                row_span=self._span(child.get('gridRowSpan', 1), 0),
+                column_span=self._span(child.get('gridColumnSpan', 1), self.column_count),
+            )
+            placements[index] = placement
+            if row != AUTO and column != AUTO:
+                occupancy.occupy(row, column, placement.row_span, placement.column_span)
+            elif row != AUTO:
+                row_locked.append(placement)
+            else:
+                auto.append(placement)
+
+        # 只锚定行: 每行独立的列游标
+        row_cursors: Dict[int, int] = {}
+        for placement in row_locked:
+            column = row_cursors.get(placement.row, 0)
+            column = self._scan_row(occupancy, placement.row, column, placement)
+            placement.column = column
+            occupancy.occupy(placement.row, column, placement.row_span, placement.column_span)
+            row_cursors[placement.row] = column + placement.column_span
+
+        # 自动流
+        cursor_row, cursor_column = 0, 0
+        for placement in auto:
+            if placement.column != AUTO:
+                # 只锚定列: 游标移到该列,已越过则换行
+                if placement.column < cursor_column:
+                    cursor_row += 1
+                cursor_column = placement.column
+                while not occupancy.fits(cursor_row, cursor_column, placement.row_span, placement.column_span):
+                    cursor_row += 1
+            else:
+                cursor_row, cursor_column = self._scan_flow(occupancy, cursor_row, cursor_column, placement)
+            placement.row, placement.column = cursor_row, cursor_column
+            occupancy.occupy(cursor_row, cursor_column, placement.row_span, placement.column_span)
+            cursor_column += placement.column_span
+
+        row_count = occupancy.row_count if self.row_count > 0 else self.row_count
+        for placement in placements:
+            placement.margin = self._margin(placement, row_count)
+        return placements, row_count
+
+    def _scan_row(self, occupancy: OccupancyMap, row: int, column: int, placement: GridPlacement) -> int:
+        """在指定行中从 column 开始找第一个放得下的列 (放不下时放在行尾之后)"""
+        width = occupancy.column_count
+        if occupancy.single_row:
+            width = max(width, column)
+        while column + placement.column_span <= width:
+            if occupancy.fits(row, column, placement.row_span, placement.column_span):
+                return column
+            column += 1
+        return column if occupancy.single_row else max(0, width - placement.column_span)
+
+    def _scan_flow(self, occupancy: OccupancyMap, row: int, column: int,
+                   placement: GridPlacement) -> Tuple[int, int]:
+        """从游标开始按行优先找第一个放得下的位置"""
+        if occupancy.single_row:
+            return 0, self._scan_row(occupancy, 0, column, placement)
+        width = occupancy.column_count
+        while True:
+            if column + placement.column_span > width:
+                row, column = row + 1, 0
+                continue
+            if row >= occupancy.row_count:
+                # 隐式行全部空闲
+                return row, column
+            if occupancy.fits(row, column, placement.row_span, placement.column_span):
+                return row, column
+            column += 1
+
+    def _margin(self, placement: GridPlacement, row_count: int) -> Optional[str]:
+        """间距完整加在前一个元素上: 起始单元格右侧还有列时加列间距,下方还有行时加行间距"""
+        margin_right = self.column_gap if placement.column < self.column_count - 1 else 0
+        margin_bottom = self.row_gap if placement.row < row_count - 1 else 0
+        if margin_right > 0 or margin_bottom > 0:
+            return f"0,0,{_format_number(margin_right)},{_format_number(margin_bottom)}"
+        return None
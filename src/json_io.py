@@ -0,0 +1,76 @@
+"""
+JSON 读写
+作用: 所有入口共用的 JSON 编解码,安装了 orjson 时使用 orjson (解析也可使用 simdjson),
+否则回退到标准库 json
+
+数据以 UTF-8 字节读写 (文件 → bytes → 对象 → bytes → 文件),不经过 str 中转;
+缩进可选,中间文件默认不缩进
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+
+# 当前使用的编解码后端
+if orjson is not None:
+    BACKEND = 'orjson'
+elif simdjson is not None:
+    BACKEND = 'simdjson'
+else:
+    BACKEND = 'json'
+
+# 缩进空格数 (orjson 只支持 2 空格缩进,标准库保持一致)
+INDENT = 2
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """解析 JSON (字节或字符串)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if simdjson is not None:
+        return simdjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 字节 (非 ASCII 字符原样输出)
+
+    Args:
+        obj: 要序列化的对象
+        indent: 是否缩进 (2 空格),否则输出紧凑格式
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=INDENT).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def load(path: str) -> Any:
+    """读取 JSON 文件"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump(obj: Any, path: str, indent: bool = False) -> int:
+    """写入 JSON 文件
+
+    Returns:
+        写入的字节数
+    """
+    data = dumps(obj, indent)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
@@ -0,0 +1,379 @@
+"""
+自动布局推断
+作用: 在构建 AST 之前,为 layoutMode == 'NONE' (子元素按 x/y 绝对定位) 的 Frame
+      根据子元素包围盒推断等价的自动布局属性 (水平/垂直排列、统一间距、网格),
+      使 _build_frame 按推断结果选择 StackPanel / Grid,而不是把子元素简单堆叠
+
+算法: 按 x (或 y) 排序后扫描合并重叠区间 (sort-and-sweep),得到列带和行带,
+      每个 Frame 为 O(n log n),数千个子元素也只需毫秒级;
+      子元素有无重叠用 Shamos–Hoey 扫描线 (活动 y 区间有序,只比较相邻区间),
+      成组时沿相交较少的方向扫描列出重叠对
+"""
+import bisect
+import heapq
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# 可以推断自动布局的节点类型 (构建器按 Frame 处理的类型)
+FRAME_TYPES = frozenset({'FRAME', 'COMPONENT', 'COMPONENT_SET', 'INSTANCE', 'SECTION'})
+
+# 区间: (起点, 终点)
+Band = Tuple[float, float]
+
+# 矩形: (左, 上, 右, 下)
+Rect = Tuple[float, float, float, float]
+
+
+def child_rects(children: List[Dict[str, Any]]) -> List[Rect]:
+    """子元素包围盒"""
+    rects = []
+    for child in children:
+        x, y = child.get('x', 0), child.get('y', 0)
+        rects.append((x, y, x + child.get('width', 0), y + child.get('height', 0)))
+    return rects
+
+
+def _span(start: float, end: float, tolerance: float) -> Band:
+    """区间两端各收缩半个容差 (重叠不超过容差时视为相邻),不足容差的区间收缩为中点"""
+    if end - start > tolerance:
+        return start + tolerance / 2, end - tolerance / 2
+    middle = (start + end) / 2
+    return middle, middle
+
+
+def _spans(rects: List[Rect], tolerance: float) -> List[Tuple[Band, Band]]:
+    """矩形 → 收缩后的 (x 区间, y 区间),两个矩形重叠当且仅当两个方向的开区间都相交"""
+    return [(_span(left, right, tolerance), _span(top, bottom, tolerance))
+            for left, top, right, bottom in rects]
+
+
+def _intersects(a: Band, b: Band) -> bool:
+    """开区间是否相交"""
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def _crossing_estimate(bands: List[Band]) -> int:
+    """一维区间两两相交的对数 (估计值,用于选择扫描方向): O(n log n)"""
+    starts = sorted(start for start, _ in bands)
+    apart = sum(len(starts) - bisect.bisect_left(starts, end) for _, end in bands)
+    return len(bands) * (len(bands) - 1) // 2 - apart
+
+
+def has_overlap(rects: List[Rect], tolerance: float = 1.0) -> bool:
+    """是否存在重叠的矩形 (Shamos–Hoey 扫描线,找到第一对即返回)
+
+    按 x 扫描,活动集合中的 y 区间两两不相交 (否则已经返回),按起点排序后终点也有序,
+    所以新区间只需与插入位置前后相邻的两个区间比较: O(n log n)
+
+    Args:
+        rects: 矩形列表
+        tolerance: 重叠不超过该值时视为相邻 (共享边界不算重叠)
+    """
+    spans = _spans(rects, tolerance)
+    ending: List[Tuple[float, Band]] = []  # (x 终点, y 区间) 堆
+    active: List[Band] = []                # 按 (起点, 终点) 排序的 y 区间
+    for x_band, y_band in sorted(spans):
+        while ending and ending[0][0] <= x_band[0]:
+            _, band = heapq.heappop(ending)
+            del active[bisect.bisect_left(active, band)]
+        position = bisect.bisect_left(active, y_band)
+        if position > 0 and _intersects(active[position - 1], y_band):
+            return True
+        if position < len(active) and _intersects(active[position], y_band):
+            return True
+        active.insert(position, y_band)
+        heapq.heappush(ending, (x_band[1], y_band))
+    return False
+
+
+def overlapping_pairs(rects: List[Rect], tolerance: float = 1.0) -> Iterator[Tuple[int, int]]:
+    """扫描线找出所有互相重叠的矩形对 (成组和预览需要全部的对,只判断有无时用 has_overlap)
+
+    沿两两相交区间较少的方向扫描 (松散的一列沿 y 扫描,一行沿 x 扫描),
+    新矩形只与扫描方向上仍然活动的矩形比较另一方向: O(n log n + k),
+    k 为扫描方向上相交的矩形对数 (取两个方向中较小的)
+
+    Args:
+        rects: 矩形列表
+        tolerance: 重叠不超过该值时视为相邻 (共享边界不算重叠)
+    """
+    spans = _spans(rects, tolerance)
+    axis = 0 if _crossing_estimate([s[0] for s in spans]) <= _crossing_estimate([s[1] for s in spans]) else 1
+    active: List[Tuple[float, int]] = []
+    for index in sorted(range(len(spans)), key=lambda i: spans[i][axis]):
+        sweep, other = spans[index][axis], spans[index][1 - axis]
+        while active and active[0][0] <= sweep[0]:
+            heapq.heappop(active)
+        for _, previous in active:
+            if _intersects(spans[previous][1 - axis], other):
+                yield previous, index
+        heapq.heappush(active, (sweep[1], index))
+
+
+def overlap_clusters(rects: List[Rect], tolerance: float = 1.0) -> List[List[int]]:
+    """把互相重叠 (含传递) 的矩形合并为簇 (并查集)
+
+    Returns:
+        簇列表,每个簇为按原顺序排列的矩形序号,簇按第一个成员的位置排序
+    """
+    parent = list(range(len(rects)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in overlapping_pairs(rects, tolerance):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters: Dict[int, List[int]] = {}
+    for index in range(len(rects)):
+        clusters.setdefault(find(index), []).append(index)
+    return list(clusters.values())
+
+
+def group_clusters(visible: List[Dict[str, Any]], tolerance: float = 1.0) -> List[Dict[str, Any]]:
+    """把互相重叠的子元素包装为 GROUP 节点 (坐标与 Figma Group 相同: 子元素保持父级坐标)
+
+    Returns:
+        按第一个成员的顺序排列的子元素/合成 GROUP (带 _synthetic 标记)
+    """
+    rects = child_rects(visible)
+    items = []
+    for cluster in overlap_clusters(rects, tolerance):
+        if len(cluster) == 1:
+            items.append(visible[cluster[0]])
+            continue
+        left = min(rects[i][0] for i in cluster)
+        top = min(rects[i][1] for i in cluster)
+        items.append({
+            'type': 'GROUP',
+            'name': f"{visible[cluster[0]].get('name', 'Layer')} 叠放",
+            'x': left,
+            'y': top,
+            'width': _round(max(rects[i][2] for i in cluster) - left),
+            'height': _round(max(rects[i][3] for i in cluster) - top),
+            'children': [visible[i] for i in cluster],
+            '_synthetic': True,
+        })
+    return items
+
+
+def sweep_bands(starts: List[float], ends: List[float], tolerance: float) -> Tuple[List[Band], List[int]]:
+    """把一维区间合并为互不重叠的带
+
+    Args:
+        starts: 各区间起点
+        ends: 各区间终点
+        tolerance: 重叠不超过该值时视为不重叠 (吸收取整误差)
+
+    Returns:
+        (按起点排序的带列表, 每个区间所属带的序号)
+    """
+    order = sorted(range(len(starts)), key=starts.__getitem__)
+    bands: List[Band] = []
+    band_of = [0] * len(starts)
+    for index in order:
+        start, end = starts[index], ends[index]
+        if bands and start < bands[-1][1] - tolerance:
+            band_start, band_end = bands[-1]
+            bands[-1] = (band_start, max(band_end, end))
+        else:
+            bands.append((start, end))
+        band_of[index] = len(bands) - 1
+    return bands, band_of
+
+
+def _gaps(bands: List[Band]) -> List[float]:
+    """相邻带之间的间距"""
+    return [bands[i + 1][0] - bands[i][1] for i in range(len(bands) - 1)]
+
+
+def _uniform(values: List[float], tolerance: float) -> bool:
+    """所有值相差不超过容差"""
+    return not values or max(values) - min(values) <= tolerance
+
+
+def _round(value: float) -> Any:
+    """坐标取整 (整数去掉小数部分,其余保留两位小数)"""
+    value = round(value, 2)
+    return int(value) if value == int(value) else value
+
+
+class LayoutInferencer:
+    """绝对定位 Frame 的自动布局推断器
+
+    推断结果直接写回 Figma 节点 (就地修改),只使用构建器已支持的 Figma 属性:
+    - 单行且间距一致 → layoutMode HORIZONTAL + itemSpacing + counterAxisAlignItems
+    - 单列且间距一致 → layoutMode VERTICAL + itemSpacing + counterAxisAlignItems
+    - 其他每个子元素独占一个 (行带, 列带) 单元格的情况 → layoutMode GRID,
+      子元素锚定到单元格并靠左上对齐;间距不一致时并入轨道尺寸
+    - 子元素重叠时,把每组互相重叠的子元素包装为 GROUP (构建为 Canvas / 单元格 Grid),
+      再按上面的规则排列这些组;组之间仍然重叠时保持 NONE (构建器回退为 Canvas)
+    子元素列表按推断的排列顺序重排;Frame 上标注 _inferred_layout
+    """
+
+    def __init__(self, tolerance: float = 1.0, min_children: int = 2):
+        """初始化推断器
+
+        Args:
+            tolerance: 坐标对齐/间距一致的容差 (像素)
+            min_children: 至少多少个可见子元素才推断
+        """
+        self.tolerance = tolerance
+        self.min_children = min_children
+        self.stats: Dict[str, int] = {}  # 由 reset 填充
+        self.reset()
+
+    def reset(self) -> None:
+        """清零统计信息 (infer_tree 开始时调用,单独调用 infer_frame 时累计)"""
+        self.stats = {'frames': 0, 'horizontal': 0, 'vertical': 0, 'grid': 0, 'clusters': 0, 'skipped': 0}
+
+    def infer_tree(self, root: Dict[str, Any]) -> Dict[str, int]:
+        """推断整棵树中所有绝对定位 Frame 的布局
+
+        Args:
+            root: Figma 根节点 (会被就地修改)
+
+        Returns:
+            统计信息
+        """
+        self.reset()
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.get('type') in FRAME_TYPES and node.get('layoutMode', 'NONE') == 'NONE':
+                self.infer_frame(node)
+            stack.extend(node.get('children', []))
+        return self.stats
+
+    def infer_frame(self, frame: Dict[str, Any]) -> Optional[str]:
+        """推断单个 Frame 的布局
+
+        Returns:
+            推断出的 layoutMode,无法推断时返回 None
+        """
+        children = frame.get('children', [])
+        visible = [c for c in children if c.get('visible', True)]
+        if len(visible) < self.min_children:
+            return None
+
+        self.stats['frames'] += 1
+        layout_mode = self._infer(frame, children, visible)
+        if layout_mode is None:
+            # 重叠的子元素各自成组后再推断 (组之间仍然重叠时放弃)
+            clustered = group_clusters(visible, self.tolerance)
+            if len(clustered) < len(visible) and self._infer(frame, children, clustered):
+                self.stats['clusters'] += sum(1 for item in clustered if item.get('_synthetic'))
+                return frame['layoutMode']
+            self.stats['skipped'] += 1
+        return layout_mode
+
+    def _infer(self, frame: Dict[str, Any], children: List[Dict[str, Any]],
+               visible: List[Dict[str, Any]]) -> Optional[str]:
+        """按行带/列带推断布局,成功时写回 Frame"""
+        tolerance = self.tolerance
+        xs = [c.get('x', 0) for c in visible]
+        ys = [c.get('y', 0) for c in visible]
+        rights = [x + c.get('width', 0) for x, c in zip(xs, visible)]
+        bottoms = [y + c.get('height', 0) for y, c in zip(ys, visible)]
+
+        columns, column_of = sweep_bands(xs, rights, tolerance)
+        rows, row_of = sweep_bands(ys, bottoms, tolerance)
+
+        if len(rows) == 1 and len(columns) == len(visible) and _uniform(_gaps(columns), tolerance):
+            self._apply_stack(frame, visible, 'HORIZONTAL', column_of, columns, ys, bottoms)
+        elif len(columns) == 1 and len(rows) == len(visible) and _uniform(_gaps(rows), tolerance):
+            self._apply_stack(frame, visible, 'VERTICAL', row_of, rows, xs, rights)
+        elif len(set(zip(row_of, column_of))) == len(visible):
+            self._apply_grid(frame, visible, rows, row_of, columns, column_of)
+        else:
+            # 子元素重叠,无法用自动布局表达
+            return None
+
+        # 不可见子元素不参与布局,放在最后
+        frame['children'] = visible + [c for c in children if not c.get('visible', True)]
+        layout_mode = frame['layoutMode']
+        frame['_inferred_layout'] = layout_mode
+        self.stats[layout_mode.lower()] += 1
+        return layout_mode
+
+    def _apply_stack(self, frame: Dict[str, Any], visible: List[Dict[str, Any]], layout_mode: str,
+                     band_of: List[int], bands: List[Band],
+                     cross_starts: List[float], cross_ends: List[float]) -> None:
+        """单行/单列: 主轴按带排序,交叉轴按起点/中心/终点中最一致的一个对齐"""
+        gaps = _gaps(bands)
+        frame['layoutMode'] = layout_mode
+        frame['itemSpacing'] = _round(max(min(gaps), 0)) if gaps else 0
+        frame['counterAxisAlignItems'] = self._counter_alignment(cross_starts, cross_ends)
+        order = sorted(range(len(visible)), key=band_of.__getitem__)
+        visible[:] = [visible[i] for i in order]
+        self._set_padding(frame, bands[0][0], min(cross_starts), layout_mode == 'HORIZONTAL')
+
+    def _counter_alignment(self, starts: List[float], ends: List[float]) -> str:
+        """交叉轴对齐: 起点一致 MIN, 中心一致 CENTER, 终点一致 MAX (都不一致时取偏差最小的)"""
+        centers = [(s + e) / 2 for s, e in zip(starts, ends)]
+        spreads = [
+            (max(values) - min(values), align)
+            for values, align in ((starts, 'MIN'), (centers, 'CENTER'), (ends, 'MAX'))
+        ]
+        return min(spreads, key=lambda item: item[0])[1]
+
+    def _apply_grid(self, frame: Dict[str, Any], visible: List[Dict[str, Any]],
+                    rows: List[Band], row_of: List[int], columns: List[Band], column_of: List[int]) -> None:
+        """网格: 每个子元素锚定到 (行带, 列带),轨道为固定尺寸"""
+        tolerance = self.tolerance
+        row_sizes, row_gap = self._tracks(rows, tolerance)
+        column_sizes, column_gap = self._tracks(columns, tolerance)
+
+        frame['layoutMode'] = 'GRID'
+        frame['gridRowCount'] = len(rows)
+        frame['gridColumnCount'] = len(columns)
+        frame['gridRowSizes'] = row_sizes
+        frame['gridColumnSizes'] = column_sizes
+        frame['gridRowGap'] = row_gap
+        frame['gridColumnGap'] = column_gap
+
+        for child, row, column in zip(visible, row_of, column_of):
+            child['gridRowAnchorIndex'] = row
+            child['gridColumnAnchorIndex'] = column
+            child['gridChildHorizontalAlign'] = 'MIN'
+            child['gridChildVerticalAlign'] = 'MIN'
+
+        # 按行优先顺序排列 (与自动流一致,便于阅读输出)
+        order = sorted(range(len(visible)), key=lambda i: (row_of[i], column_of[i]))
+        visible[:] = [visible[i] for i in order]
+        self._set_padding(frame, columns[0][0], rows[0][0], True)
+
+    def _tracks(self, bands: List[Band], tolerance: float) -> Tuple[List[Dict[str, Any]], Any]:
+        """带 → 固定尺寸轨道
+
+        间距一致时轨道为带宽度 + 统一间距,否则把间距并入前一个轨道 (间距为 0)
+        """
+        gaps = _gaps(bands)
+        if _uniform(gaps, tolerance):
+            sizes = [end - start for start, end in bands]
+            gap = _round(max(min(gaps), 0)) if gaps else 0
+        else:
+            sizes = [bands[i + 1][0] - bands[i][0] for i in range(len(bands) - 1)]
+            sizes.append(bands[-1][1] - bands[-1][0])
+            gap = 0
+        return [{'type': 'FIXED', 'value': _round(size)} for size in sizes], gap
+
+    def _set_padding(self, frame: Dict[str, Any], first: float, cross: float, horizontal: bool) -> None:
+        """子元素包围盒左上角的偏移作为 Padding (左/上)"""
+        left, top = (first, cross) if horizontal else (cross, first)
+        if left > self.tolerance:
+            frame['paddingLeft'] = _round(left)
+        if top > self.tolerance:
+            frame['paddingTop'] = _round(top)
+
+    def format_stats(self) -> str:
+        """格式化统计信息"""
+        return (f"推断 {self.stats.get('frames', 0)} 个绝对定位 Frame: "
+                f"水平 {self.stats.get('horizontal', 0)}, 垂直 {self.stats.get('vertical', 0)}, "
+                f"网格 {self.stats.get('grid', 0)}, 成组 {self.stats.get('clusters', 0)}, "
+                f"重叠跳过 {self.stats.get('skipped', 0)}")
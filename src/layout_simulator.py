@@ -0,0 +1,566 @@
+"""
+布局模拟器
+作用: 在没有 WPF 的环境中,对生成的 WPF AST 执行与 WPF 相同的两遍布局 (measure / arrange),
+      计算每个元素的矩形,并与来源 Figma 节点的 x/y/width/height 比较,找出几何偏差
+
+支持的子集: Border / StackPanel / WrapPanel / Grid (固定、Auto、星号行列) / Canvas / ItemsControl,
+           Margin / Padding / BorderThickness / 对齐 / Width / Height,以及隐式和命名 Style 中的属性;
+           TextBlock 没有固定尺寸时用 TextMeasurer 的字体度量估算文本宽高 (不做自动换行)
+"""
+import math
+from functools import lru_cache
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from src.text_measurer import TextMeasurer
+from src.wpf_ast import WpfNode
+
+
+INF = math.inf
+
+# 尺寸 (宽, 高) 和矩形 (x, y, 宽, 高)
+Size = Tuple[float, float]
+Rect = Tuple[float, float, float, float]
+
+# 容器的测量过程: yield (子元素, 可用尺寸), send 回子元素期望尺寸 (含 Margin), return 内容尺寸
+MeasureTask = Generator[Tuple[WpfNode, Size], Size, Size]
+
+# Grid 轨道: (类型, 值) 类型为 'fixed' / 'auto' / 'star'
+Track = Tuple[str, float]
+
+
+def parse_number(value: Any, default: Optional[float] = None) -> Optional[float]:
+    """属性值 → 数值 (无法解析时返回 default)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@lru_cache(maxsize=1024)
+def parse_thickness(value: Any) -> Tuple[float, float, float, float]:
+    """Thickness 字符串 ('8' / '8,4' / '1,2,3,4') → (左, 上, 右, 下) (同一字符串只解析一次)"""
+    if value is None:
+        return 0.0, 0.0, 0.0, 0.0
+    parts = [parse_number(part, 0.0) for part in str(value).replace(' ', ',').split(',') if part]
+    if len(parts) == 1:
+        return parts[0], parts[0], parts[0], parts[0]
+    if len(parts) == 2:
+        return parts[0], parts[1], parts[0], parts[1]
+    if len(parts) == 4:
+        return parts[0], parts[1], parts[2], parts[3]
+    return 0.0, 0.0, 0.0, 0.0
+
+
+def parse_track(definition: str) -> Track:
+    """行列定义 ('Auto' / '*' / '2*' / '120') → 轨道"""
+    text = str(definition).strip()
+    if text.lower() == 'auto':
+        return 'auto', 0.0
+    if text.endswith('*'):
+        return 'star', parse_number(text[:-1], 1.0) if text[:-1] else 1.0
+    return 'fixed', parse_number(text, 0.0)
+
+
+def resolve_stars(tracks: List[Track], sizes: List[float], available: float) -> List[float]:
+    """星号轨道按权重一次性分配剩余空间 (固定和 Auto 轨道的尺寸已在 sizes 中)"""
+    weights = [value if kind == 'star' else 0.0 for kind, value in tracks]
+    total_weight = sum(weights)
+    if not total_weight or math.isinf(available):
+        return sizes
+    remaining = max(available - sum(size for size, weight in zip(sizes, weights) if not weight), 0.0)
+    unit = remaining / total_weight
+    return [weight * unit if weight else size for size, weight in zip(sizes, weights)]
+
+
+def _static_resource_key(value: Any) -> Optional[str]:
+    """'{StaticResource Key}' → 'Key' ('{StaticResource {x:Type T}}' → '{x:Type T}')"""
+    text = str(value)
+    if text.startswith('{StaticResource ') and text.endswith('}'):
+        return text[len('{StaticResource '):-1].strip()
+    return None
+
+
+class LayoutSimulator:
+    """WPF 布局模拟器
+
+    layout() 返回 {id(节点): 矩形},矩形为元素去掉 Margin 后的布局框 (相对根元素);
+    与渲染器一致,等于默认值表中取值的属性视为未设置 (按 WPF 真正的默认值布局)
+    """
+
+    # 各元素的 Stretch 对齐默认值 (WPF FrameworkElement 默认 Stretch)
+    STRETCH = 'Stretch'
+
+    def __init__(self, wpf_defaults: Optional[Dict[str, Dict[str, Any]]] = None,
+                 resources: Optional[List[WpfNode]] = None, text_measurer: Optional[TextMeasurer] = None):
+        """初始化模拟器
+
+        Args:
+            wpf_defaults: 渲染时省略的默认值表 (wpf_defaults.yaml 的内容)
+            resources: 根节点的资源 (Style),用于解析 Style 中的布局属性
+            text_measurer: 提供字体度量的文本测量器 (默认使用不持久化缓存的新实例)
+        """
+        self.text_measurer = text_measurer or TextMeasurer(cache_path=None)
+        self.defaults = {
+            element: {name: str(value) for name, value in attrs.items()}
+            for element, attrs in (wpf_defaults or {}).items()
+        }
+        self._styles: Dict[str, WpfNode] = {}
+        self._attributes: Dict[int, Dict[str, Any]] = {}
+        self._desired: Dict[int, Size] = {}
+        self._grids: Dict[int, Tuple[List[Track], List[float], List[Track], List[float]]] = {}
+        self.set_resources(resources or [])
+
+    def set_resources(self, resources: List[WpfNode]) -> None:
+        """登记 Style 资源 (隐式 Style 以 {x:Type 类型} 为键)"""
+        self._styles = {}
+        for resource in resources:
+            if resource.type != 'Style':
+                continue
+            key = resource.attributes.get('x:Key') or f"{{x:Type {resource.attributes.get('TargetType', '')}}}"
+            self._styles[key] = resource
+
+    # ========== 属性 ==========
+
+    def attributes(self, node: WpfNode) -> Dict[str, Any]:
+        """节点的有效属性: Style Setter (含 BasedOn 链) + 本地属性,去掉渲染时省略的默认值"""
+        cached = self._attributes.get(id(node))
+        if cached is not None:
+            return cached
+
+        style_key = _static_resource_key(node.attributes.get('Style', '')) or f"{{x:Type {node.type}}}"
+        chain = []
+        while style_key and style_key in self._styles and len(chain) < 8:
+            style = self._styles[style_key]
+            chain.append(style)
+            style_key = _static_resource_key(style.attributes.get('BasedOn', ''))
+
+        effective: Dict[str, Any] = {}
+        for style in reversed(chain):
+            for setter in style.children:
+                effective[setter.attributes.get('Property')] = setter.attributes.get('Value')
+        effective.update(node.attributes)
+
+        defaults = self.defaults.get(node.type, {})
+        effective = {k: v for k, v in effective.items()
+                     if v is not None and not (k in defaults and str(v) == defaults[k])}
+        self._attributes[id(node)] = effective
+        return effective
+
+    # ========== 布局 ==========
+
+    def layout(self, root: WpfNode, width: float, height: float) -> Dict[int, Rect]:
+        """对整棵树执行 measure + arrange
+
+        Args:
+            root: AST 根节点
+            width: 根元素可用宽度 (UserControl 设计宽度)
+            height: 根元素可用高度
+
+        Returns:
+            {id(节点): (x, y, 宽, 高)}
+        """
+        self._attributes = {}
+        self._desired = {}
+        self._grids = {}
+        self._measure(root, (width, height))
+        return self._arrange(root, (0.0, 0.0, width, height))
+
+    def _measure(self, root: WpfNode, available: Size) -> Size:
+        """测量 (显式栈驱动各容器的测量生成器,嵌套深度不受递归限制)"""
+        result = self._start_measure(root, available)
+        if not isinstance(result, tuple):
+            stack = [(root, available, result)]
+            value = None
+            while stack:
+                node, node_available, task = stack[-1]
+                try:
+                    child, child_available = task.send(value)
+                except StopIteration as done:
+                    stack.pop()
+                    value = self._finish_measure(node, node_available, done.value)
+                    continue
+                started = self._start_measure(child, child_available)
+                if isinstance(started, tuple):
+                    value = started
+                else:
+                    stack.append((child, child_available, started))
+                    value = None
+            result = value
+        return result
+
+    def _start_measure(self, node: WpfNode, available: Size) -> Any:
+        """开始测量节点: 叶子元素直接返回期望尺寸,容器返回测量生成器"""
+        attrs = self.attributes(node)
+        inner = self._inner_available(attrs, available)
+        task = self._measure_task(node, attrs, inner)
+        if isinstance(task, tuple):
+            return self._finish_measure(node, available, task)
+        return task
+
+    def _inner_available(self, attrs: Dict[str, Any], available: Size) -> Size:
+        """去掉 Margin、应用固定宽高后的可用尺寸"""
+        left, top, right, bottom = parse_thickness(attrs.get('Margin'))
+        width = parse_number(attrs.get('Width'), max(available[0] - left - right, 0.0))
+        height = parse_number(attrs.get('Height'), max(available[1] - top - bottom, 0.0))
+        return width, height
+
+    def _finish_measure(self, node: WpfNode, available: Size, content: Size) -> Size:
+        """内容尺寸 → 期望尺寸 (固定宽高优先,加上 Margin,不超过可用尺寸)"""
+        attrs = self.attributes(node)
+        left, top, right, bottom = parse_thickness(attrs.get('Margin'))
+        width = parse_number(attrs.get('Width'), content[0])
+        height = parse_number(attrs.get('Height'), content[1])
+        desired = (min(width + left + right, available[0]), min(height + top + bottom, available[1]))
+        self._desired[id(node)] = desired
+        return desired
+
+    def _measure_task(self, node: WpfNode, attrs: Dict[str, Any], available: Size) -> Any:
+        """按控件类型选择测量方法"""
+        node_type = node.type
+        if node_type == 'Border':
+            return self._measure_border(node, attrs, available) if node.children else self._chrome(attrs)
+        if node_type in ('StackPanel', 'ItemsControl'):
+            horizontal = node_type == 'StackPanel' and attrs.get('Orientation', 'Vertical') == 'Horizontal'
+            return self._measure_stack(node, available, horizontal)
+        if node_type == 'WrapPanel':
+            return self._measure_wrap(node, available)
+        if node_type == 'Grid':
+            return self._measure_grid(node, attrs, available)
+        if node_type == 'Canvas':
+            return self._measure_canvas(node)
+        if node_type == 'TextBlock':
+            return self._measure_text(attrs)
+        if node_type == 'Line':
+            return (max(parse_number(attrs.get('X1'), 0.0), parse_number(attrs.get('X2'), 0.0)),
+                    max(parse_number(attrs.get('Y1'), 0.0), parse_number(attrs.get('Y2'), 0.0)))
+        return 0.0, 0.0
+
+    def _chrome(self, attrs: Dict[str, Any]) -> Tuple[float, float]:
+        """Border 的边框 + Padding 占用的宽高"""
+        padding = parse_thickness(attrs.get('Padding'))
+        border = parse_thickness(attrs.get('BorderThickness'))
+        return (padding[0] + padding[2] + border[0] + border[2],
+                padding[1] + padding[3] + border[1] + border[3])
+
+    def _measure_border(self, node: WpfNode, attrs: Dict[str, Any], available: Size) -> MeasureTask:
+        chrome_w, chrome_h = self._chrome(attrs)
+        child_w, child_h = yield node.children[0], (max(available[0] - chrome_w, 0.0), max(available[1] - chrome_h, 0.0))
+        return child_w + chrome_w, child_h + chrome_h
+
+    def _measure_stack(self, node: WpfNode, available: Size, horizontal: bool) -> MeasureTask:
+        main = cross = 0.0
+        child_available = (INF, available[1]) if horizontal else (available[0], INF)
+        for child in node.children:
+            width, height = yield child, child_available
+            if horizontal:
+                main, cross = main + width, max(cross, height)
+            else:
+                main, cross = main + height, max(cross, width)
+        return (main, cross) if horizontal else (cross, main)
+
+    def _measure_wrap(self, node: WpfNode, available: Size) -> MeasureTask:
+        line_w = line_h = width = height = 0.0
+        for child in node.children:
+            child_w, child_h = yield child, available
+            if line_w and line_w + child_w > available[0]:
+                width, height = max(width, line_w), height + line_h
+                line_w = line_h = 0.0
+            line_w, line_h = line_w + child_w, max(line_h, child_h)
+        return max(width, line_w), height + line_h
+
+    def _measure_canvas(self, node: WpfNode) -> MeasureTask:
+        # Canvas 子元素不受约束,Canvas 自身不需要空间
+        for child in node.children:
+            yield child, (INF, INF)
+        return 0.0, 0.0
+
+    def _measure_text(self, attrs: Dict[str, Any]) -> Size:
+        font_size = parse_number(attrs.get('FontSize'), 12.0)
+        weight = str(attrs.get('FontWeight', 'Regular'))
+        metrics = self.text_measurer.get_metrics(str(attrs.get('FontFamily', 'Segoe UI')), weight, font_size)
+        lines = str(attrs.get('Text', '')).split('\n')
+        line_height = metrics['ascent'] + metrics['descent'] + metrics['line_gap']
+        return max(self.text_measurer.measure_text(line, metrics) for line in lines), len(lines) * line_height
+
+    def _measure_grid(self, node: WpfNode, attrs: Dict[str, Any], available: Size) -> MeasureTask:
+        """Grid 测量: 先测量不在星号轨道中的子元素得到 Auto 尺寸,再按权重分配星号轨道,最后测量其余子元素
+
+        可用尺寸为无穷大时,星号轨道按 Auto 处理
+        """
+        rows = [parse_track(d) for d in node.attributes.get('_row_definitions') or ['*']]
+        columns = [parse_track(d) for d in node.attributes.get('_column_definitions') or ['*']]
+        if math.isinf(available[1]):
+            rows = [('auto', 0.0) if kind == 'star' else (kind, value) for kind, value in rows]
+        if math.isinf(available[0]):
+            columns = [('auto', 0.0) if kind == 'star' else (kind, value) for kind, value in columns]
+        row_sizes = [value if kind == 'fixed' else 0.0 for kind, value in rows]
+        column_sizes = [value if kind == 'fixed' else 0.0 for kind, value in columns]
+
+        cells = [(child, self._cell(child, len(rows), len(columns))) for child in node.children]
+
+        def in_star(span: Tuple[int, int], tracks: List[Track]) -> bool:
+            return any(tracks[i][0] == 'star' for i in range(span[0], span[0] + span[1]))
+
+        def track_available(span: Tuple[int, int], tracks: List[Track], sizes: List[float]) -> float:
+            indices = range(span[0], span[0] + span[1])
+            if any(tracks[i][0] == 'auto' for i in indices):
+                return INF
+            return sum(sizes[i] for i in indices)
+
+        def grow_auto(span: Tuple[int, int], tracks: List[Track], sizes: List[float], desired: float) -> None:
+            # 跨多个轨道时把不足部分加到最后一个 Auto 轨道
+            indices = range(span[0], span[0] + span[1])
+            autos = [i for i in indices if tracks[i][0] == 'auto']
+            if autos:
+                shortfall = desired - sum(sizes[i] for i in indices)
+                if shortfall > 0:
+                    sizes[autos[-1]] += shortfall
+
+        deferred = []
+        for child, (row_span, column_span) in cells:
+            if in_star(row_span, rows) or in_star(column_span, columns):
+                deferred.append((child, row_span, column_span))
+                continue
+            width, height = yield child, (track_available(column_span, columns, column_sizes),
+                                          track_available(row_span, rows, row_sizes))
+            grow_auto(column_span, columns, column_sizes, width)
+            grow_auto(row_span, rows, row_sizes, height)
+
+        column_sizes = resolve_stars(columns, column_sizes, available[0])
+        row_sizes = resolve_stars(rows, row_sizes, available[1])
+        for child, row_span, column_span in deferred:
+            width, height = yield child, (track_available(column_span, columns, column_sizes),
+                                          track_available(row_span, rows, row_sizes))
+            grow_auto(column_span, columns, column_sizes, width)
+            grow_auto(row_span, rows, row_sizes, height)
+
+        self._grids[id(node)] = (rows, row_sizes, columns, column_sizes)
+        return sum(column_sizes), sum(row_sizes)
+
+    def _cell(self, child: WpfNode, row_count: int, column_count: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """子元素所在的 ((起始行, 行数), (起始列, 列数)),超出范围时收拢到最后一行/列"""
+        attrs = self.attributes(child)
+        row = min(int(parse_number(attrs.get('Grid.Row'), 0)), row_count - 1)
+        column = min(int(parse_number(attrs.get('Grid.Column'), 0)), column_count - 1)
+        row_span = max(min(int(parse_number(attrs.get('Grid.RowSpan'), 1)), row_count - row), 1)
+        column_span = max(min(int(parse_number(attrs.get('Grid.ColumnSpan'), 1)), column_count - column), 1)
+        return (row, row_span), (column, column_span)
+
+    def _arrange(self, root: WpfNode, slot: Rect) -> Dict[int, Rect]:
+        """排列 (自上而下,显式栈)"""
+        rects: Dict[int, Rect] = {}
+        stack = [(root, slot)]
+        while stack:
+            node, slot = stack.pop()
+            attrs = self.attributes(node)
+            rect = self._place(node, attrs, slot)
+            rects[id(node)] = rect
+            if node.children:
+                stack.extend(reversed(self._child_slots(node, attrs, rect)))
+        return rects
+
+    def _place(self, node: WpfNode, attrs: Dict[str, Any], slot: Rect) -> Rect:
+        """在分配的槽位中按 Margin / 固定尺寸 / 对齐确定元素矩形"""
+        left, top, right, bottom = parse_thickness(attrs.get('Margin'))
+        x, y = slot[0] + left, slot[1] + top
+        slot_w, slot_h = max(slot[2] - left - right, 0.0), max(slot[3] - top - bottom, 0.0)
+        desired_w, desired_h = self._desired.get(id(node), (0.0, 0.0))
+        desired_w, desired_h = max(desired_w - left - right, 0.0), max(desired_h - top - bottom, 0.0)
+
+        h_align = attrs.get('HorizontalAlignment', self.STRETCH)
+        v_align = attrs.get('VerticalAlignment', self.STRETCH)
+        width = parse_number(attrs.get('Width'))
+        height = parse_number(attrs.get('Height'))
+        if width is None:
+            width = slot_w if h_align == self.STRETCH else min(desired_w, slot_w)
+        if height is None:
+            height = slot_h if v_align == self.STRETCH else min(desired_h, slot_h)
+
+        # 固定尺寸小于槽位时, Stretch 与 Center 相同
+        x += self._offset(h_align, slot_w - width, 'Left', 'Right')
+        y += self._offset(v_align, slot_h - height, 'Top', 'Bottom')
+        return x, y, width, height
+
+    @staticmethod
+    def _offset(alignment: str, free: float, start: str, end: str) -> float:
+        """对齐方式 → 槽位内的偏移"""
+        if alignment == start:
+            return 0.0
+        if alignment == end:
+            return free
+        return free / 2
+
+    def _child_slots(self, node: WpfNode, attrs: Dict[str, Any], rect: Rect) -> List[Tuple[WpfNode, Rect]]:
+        """按容器类型为子元素分配槽位"""
+        x, y, width, height = rect
+        children = node.children
+        node_type = node.type
+
+        if node_type == 'Border':
+            padding = parse_thickness(attrs.get('Padding'))
+            border = parse_thickness(attrs.get('BorderThickness'))
+            inner_x = x + padding[0] + border[0]
+            inner_y = y + padding[1] + border[1]
+            chrome_w, chrome_h = self._chrome(attrs)
+            return [(children[0], (inner_x, inner_y, max(width - chrome_w, 0.0), max(height - chrome_h, 0.0)))]
+
+        if node_type in ('StackPanel', 'ItemsControl'):
+            horizontal = node_type == 'StackPanel' and attrs.get('Orientation', 'Vertical') == 'Horizontal'
+            slots = []
+            offset = 0.0
+            for child in children:
+                child_w, child_h = self._desired.get(id(child), (0.0, 0.0))
+                if horizontal:
+                    slots.append((child, (x + offset, y, child_w, height)))
+                    offset += child_w
+                else:
+                    slots.append((child, (x, y + offset, width, child_h)))
+                    offset += child_h
+            return slots
+
+        if node_type == 'WrapPanel':
+            slots = []
+            line: List[Tuple[WpfNode, float, float]] = []
+            line_x = line_y = line_h = 0.0
+            for child in children:
+                child_w, child_h = self._desired.get(id(child), (0.0, 0.0))
+                if line and line_x + child_w > width:
+                    slots.extend((c, (x + cx, y + line_y, cw, line_h)) for c, cx, cw in line)
+                    line, line_x, line_y, line_h = [], 0.0, line_y + line_h, 0.0
+                line.append((child, line_x, child_w))
+                line_x, line_h = line_x + child_w, max(line_h, child_h)
+            slots.extend((c, (x + cx, y + line_y, cw, line_h)) for c, cx, cw in line)
+            return slots
+
+        if node_type == 'Grid':
+            rows, row_sizes, columns, column_sizes = self._grids.get(id(node), ([('star', 1.0)], [height], [('star', 1.0)], [width]))
+            # 排列时星号轨道按最终尺寸重新分配
+            row_sizes = resolve_stars(rows, row_sizes, height)
+            column_sizes = resolve_stars(columns, column_sizes, width)
+            row_starts = [y]
+            for size in row_sizes:
+                row_starts.append(row_starts[-1] + size)
+            column_starts = [x]
+            for size in column_sizes:
+                column_starts.append(column_starts[-1] + size)
+            slots = []
+            for child in children:
+                (row, row_span), (column, column_span) = self._cell(child, len(rows), len(columns))
+                slots.append((child, (
+                    column_starts[column], row_starts[row],
+                    column_starts[column + column_span] - column_starts[column],
+                    row_starts[row + row_span] - row_starts[row],
+                )))
+            return slots
+
+        if node_type == 'Canvas':
+            slots = []
+            for child in children:
+                child_attrs = self.attributes(child)
+                child_w, child_h = self._desired.get(id(child), (0.0, 0.0))
+                slots.append((child, (x + parse_number(child_attrs.get('Canvas.Left'), 0.0),
+                                      y + parse_number(child_attrs.get('Canvas.Top'), 0.0), child_w, child_h)))
+            return slots
+
+        # 其他元素的子元素 (如未知控件) 叠放在元素内
+        return [(child, rect) for child in children]
+
+
+def figma_rects(root: Dict[str, Any]) -> Dict[int, Rect]:
+    """Figma 节点的绝对矩形 (根节点在原点)
+
+    x/y 相对于父节点; Group 不是坐标空间,其子元素的坐标与 Group 相同,都相对于 Group 的父节点
+    """
+    rects: Dict[int, Rect] = {}
+    stack = [(root, 0.0, 0.0, True)]
+    while stack:
+        node, origin_x, origin_y, is_root = stack.pop()
+        x = 0.0 if is_root else origin_x + node.get('x', 0)
+        y = 0.0 if is_root else origin_y + node.get('y', 0)
+        rects[id(node)] = (x, y, node.get('width', 0), node.get('height', 0))
+        child_x, child_y = (origin_x, origin_y) if node.get('type') == 'GROUP' and not is_root else (x, y)
+        stack.extend((child, child_x, child_y, False) for child in node.get('children', []))
+    return rects
+
+
+class LayoutValidator:
+    """布局校验: 模拟布局的元素矩形与来源 Figma 节点的矩形比较"""
+
+    def __init__(self, wpf_defaults: Optional[Dict[str, Dict[str, Any]]] = None, tolerance: float = 1.0,
+                 max_reported: int = 10, text_measurer: Optional[TextMeasurer] = None):
+        """初始化校验器
+
+        Args:
+            wpf_defaults: 渲染时省略的默认值表
+            text_measurer: 文本测量器 (与转换器共用时复用其度量缓存)
+            tolerance: 允许的偏差 (像素)
+            max_reported: 报告中保留的最大偏差条目数
+        """
+        self.simulator = LayoutSimulator(wpf_defaults, text_measurer=text_measurer)
+        self.tolerance = tolerance
+        self.max_reported = max_reported
+        self.report: Dict[str, Any] = {}
+
+    def validate(self, root: WpfNode, figma_root: Dict[str, Any], sources: Dict[int, Any],
+                 width: float, height: float) -> Dict[str, Any]:
+        """模拟布局并与 Figma 几何比较
+
+        Args:
+            root: 最终的 AST 根节点 (优化、样式提取之后)
+            figma_root: 来源 Figma 根节点
+            sources: 构建器记录的源节点表 {id(AST 节点): (AST 节点, Figma 节点)}
+            width: 设计宽度
+            height: 设计高度
+
+        Returns:
+            报告: compared / mismatched / max_error / mismatches [(名称, 期望矩形, 实际矩形, 偏差)]
+        """
+        self.simulator.set_resources(root.attributes.get('_resources', []))
+        rects = self.simulator.layout(root, width, height)
+        expected_rects = figma_rects(figma_root)
+
+        # 每个 Figma 节点只与最外层的对应元素比较 (前序遍历中第一次出现的); 未知控件没有几何信息,跳过
+        compared = set()
+        mismatches = []
+        max_error = 0.0
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            stack.extend(reversed(node.children))
+            source = sources.get(id(node))
+            if source is None or source[0] is not node or node.type == 'Unknown':
+                continue
+            figma_node = source[1]
+            if id(figma_node) in compared or id(figma_node) not in expected_rects:
+                continue
+            compared.add(id(figma_node))
+
+            expected = expected_rects[id(figma_node)]
+            actual = rects[id(node)]
+            error = max(abs(a - e) for a, e in zip(actual, expected))
+            max_error = max(max_error, error)
+            if error > self.tolerance:
+                mismatches.append((figma_node.get('name', figma_node.get('type', '')), expected, actual, error))
+
+        mismatches.sort(key=lambda item: -item[3])
+        self.report = {
+            'compared': len(compared),
+            'mismatched': len(mismatches),
+            'max_error': max_error,
+            'mismatches': mismatches[:self.max_reported],
+        }
+        return self.report
+
+    def format_report(self) -> str:
+        """格式化校验结果 (偏差最大的几个元素各占一行)"""
+        report = self.report
+        lines = [f"比较 {report.get('compared', 0)} 个元素, 偏差超过 {self.tolerance:g}px: "
+                 f"{report.get('mismatched', 0)}, 最大偏差 {report.get('max_error', 0):.1f}px"]
+        for name, expected, actual, error in report.get('mismatches', []):
+            lines.append(f"      {name}: Figma {_format_rect(expected)} → WPF {_format_rect(actual)} (偏差 {error:.1f})")
+        return '\n'.join(lines)
+
+
+def _format_rect(rect: Rect) -> str:
+    """矩形 → 'x,y 宽×高'"""
+    return f"{rect[0]:g},{rect[1]:g} {rect[2]:g}×{rect[3]:g}"
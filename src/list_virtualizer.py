@@ -0,0 +1,307 @@
+"""
+长列表虚拟化
+作用: 在垂直 StackPanel 中找出连续的结构相同子树,
+      替换为 ItemsControl + VirtualizingStackPanel + 单个 DataTemplate
+"""
+import copy
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from src.layout_simulator import parse_number, parse_thickness
+from src.wpf_ast import WpfNode
+
+
+class ListVirtualizer:
+    """长列表虚拟化器
+
+    结构哈希忽略文本内容 (Text) 和列表项根节点的 Margin (间距),
+    各项之间不同的属性值 (包括各项不同的间距 Margin) 变成 DataTemplate 中的 XPath 绑定,
+    示例数据写入 UserControl.Resources 中的 XmlDataProvider;
+    原来的列表项保存在 ItemsControl 的 _expanded 中 (不支持 XmlDataProvider 的方言渲染展开的列表)
+
+    垂直 StackPanel 用无限高度测量子元素,ItemsControl 没有固定高度时 VirtualizingStackPanel 会实现所有项;
+    高度等于列表全长时所有项也都在视口内,同样全部实现。所以 ItemsControl 的 Height 取列表在 Figma 中的可见高度
+    (裁剪内容的祖先 Frame 或滚动容器截取的部分),没有截取列表的视口时不转换 (全部可见,虚拟化没有意义)
+    """
+
+    # 不参与结构哈希、在模板中变为绑定的内容属性
+    CONTENT_ATTRIBUTES = {'Text'}
+
+    # 列表项根节点上不参与结构哈希的属性 (最后一项没有间距 Margin)
+    ITEM_ROOT_IGNORED = frozenset({'Margin'})
+
+    def __init__(self, min_items: int = 20):
+        """初始化虚拟化器
+
+        Args:
+            min_items: 连续多少个结构相同的子元素才转换为虚拟化列表 (0 表示不转换)
+        """
+        self.min_items = min_items
+        self.stats: Dict[str, int] = {}
+        self._hashes: Dict[int, int] = {}
+        self._sources: Dict[int, Any] = {}
+        self._parents: Optional[Dict[int, Dict[str, Any]]] = None
+
+    def virtualize(self, root: WpfNode, sources: Optional[Dict[int, Any]] = None) -> WpfNode:
+        """对整棵树执行列表虚拟化
+
+        Args:
+            root: AST 根节点
+            sources: 构建器记录的源节点表 {id(AST 节点): (AST 节点, Figma 节点)},
+                     用于计算列表高度 (列表项没有 Height 属性时) 和列表的可见高度 (没有时列表不转换)
+
+        Returns:
+            处理后的根节点
+        """
+        self.stats = {'lists': 0, 'items': 0, 'unbounded': 0, 'elements_before': root.count_elements()}
+        self._hashes = {}
+        self._sources = sources or {}
+
+        if self.min_items > 0:
+            self._compute_hashes(root)
+            root = self._virtualize_subtree(root, root)
+
+        self._hashes = {}
+        self._sources = {}
+        self._parents = None
+        self.stats['elements_after'] = root.count_elements()
+        return root
+
+    def format_stats(self) -> str:
+        """格式化虚拟化统计"""
+        text = (
+            f"虚拟化列表 {self.stats.get('lists', 0)} 个 ({self.stats.get('items', 0)} 项), "
+            f"元素数: {self.stats.get('elements_before', 0)} → {self.stats.get('elements_after', 0)}"
+        )
+        if self.stats.get('unbounded'):
+            text += f", 没有截取列表的视口未转换 {self.stats['unbounded']} 个"
+        return text
+
+    # ========== 结构哈希 ==========
+
+    def _compute_hashes(self, root: WpfNode) -> None:
+        """后序计算每个子树的结构哈希 (每个节点只算一次)"""
+        stack: List[Tuple[WpfNode, bool]] = [(root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children)
+                continue
+            self._hashes[id(node)] = self._node_hash(node)
+
+    def _node_hash(self, node: WpfNode, ignored: FrozenSet[str] = frozenset()) -> int:
+        """节点哈希 = 类型 + 属性签名 + 子树哈希 (子节点哈希需已计算)
+
+        Args:
+            node: 节点
+            ignored: 额外忽略的属性
+        """
+        signature = tuple(sorted(
+            (k, str(v)) for k, v in node.attributes.items()
+            if k not in self.CONTENT_ATTRIBUTES and k not in ignored and not k.startswith('_')
+        ))
+        return hash((node.type, signature, tuple(self._hashes[id(child)] for child in node.children)))
+
+    # ========== 列表检测 ==========
+
+    def _virtualize_subtree(self, node: WpfNode, root: WpfNode) -> WpfNode:
+        """后序遍历 (显式栈),在垂直 StackPanel 中替换长列表"""
+        holder = [node]
+        # 栈元素: (节点, 所在列表, 下标, 子节点是否已处理)
+        stack = [(node, holder, 0, False)]
+        while stack:
+            current, siblings, index, visited = stack.pop()
+            if not visited:
+                stack.append((current, siblings, index, True))
+                for i in range(len(current.children) - 1, -1, -1):
+                    stack.append((current.children[i], current.children, i, False))
+                continue
+            siblings[index] = self._virtualize_node(current, root)
+
+        return holder[0]
+
+    def _virtualize_node(self, node: WpfNode, root: WpfNode) -> WpfNode:
+        """处理单个节点 (子节点已处理完毕)"""
+        if node.type != 'StackPanel' or node.attributes.get('Orientation', 'Vertical') != 'Vertical':
+            return node
+        if len(node.children) < self.min_items:
+            return node
+
+        runs = self._find_runs(node.children)
+        if not runs:
+            return node
+
+        # 整个 StackPanel 就是一个列表: 用 ItemsControl 替换 StackPanel 本身
+        if len(runs) == 1 and runs[0] == (0, len(node.children)):
+            items_control = self._build_items_control(node.children, root)
+            if items_control is None:
+                return node
+            for key, value in node.attributes.items():
+                if key != 'Orientation':
+                    items_control.attributes.setdefault(key, value)
+            items_control.attributes['_expanded'] = node
+            return items_control
+
+        # 否则只替换列表部分
+        new_children: List[WpfNode] = []
+        cursor = 0
+        for start, end in runs:
+            new_children.extend(node.children[cursor:start])
+            items_control = self._build_items_control(node.children[start:end], root)
+            if items_control is None:
+                new_children.extend(node.children[start:end])
+            else:
+                new_children.append(items_control)
+            cursor = end
+        new_children.extend(node.children[cursor:])
+        node.children = new_children
+
+        # 子节点变化后更新本节点哈希,供上层继续检测
+        self._hashes[id(node)] = self._node_hash(node)
+        return node
+
+    def _find_runs(self, children: List[WpfNode]) -> List[Tuple[int, int]]:
+        """找出长度不小于 min_items 的连续相同子树区间 [start, end)"""
+        runs = []
+        start = 0
+        current = None
+        for i, child in enumerate(children):
+            item_hash = self._node_hash(child, self.ITEM_ROOT_IGNORED)
+            if item_hash != current:
+                if current is not None and i - start >= self.min_items:
+                    runs.append((start, i))
+                start = i
+                current = item_hash
+        if current is not None and len(children) - start >= self.min_items:
+            runs.append((start, len(children)))
+        return runs
+
+    # ========== ItemsControl 生成 ==========
+
+    def _run_height(self, items: List[WpfNode]) -> Optional[float]:
+        """列表高度 = 各项高度 (Height 属性或来源 Figma 节点的高度) + 上下 Margin,无法确定时返回 None"""
+        total = 0.0
+        for item in items:
+            height = parse_number(item.attributes.get('Height'))
+            if height is None:
+                source = self._sources.get(id(item))
+                if source is None or source[0] is not item:
+                    return None
+                height = parse_number(source[1].get('height'))
+                if height is None:
+                    return None
+            _, top, _, bottom = parse_thickness(item.attributes.get('Margin'))
+            total += height + top + bottom
+        return total
+
+    def _figma_parents(self) -> Dict[int, Dict[str, Any]]:
+        """Figma 父节点表 {id(子节点): 父节点} (由源节点表中构建过的容器得到,首次使用时建立)"""
+        if self._parents is None:
+            self._parents = {}
+            for _, figma_node in self._sources.values():
+                for child in figma_node.get('children', ()):
+                    self._parents[id(child)] = figma_node
+        return self._parents
+
+    def _viewport_height(self, items: List[WpfNode]) -> Optional[float]:
+        """列表的可见高度: 从第一项向上,裁剪内容的祖先 Frame 可见的部分为其高度减去列表在其中的偏移,
+        滚动容器为其高度 (内容在其中滚动,更外层只按容器自身的位置计算偏移),取最小值;
+        没有裁剪的祖先或无法确定时返回 None
+        """
+        source = self._sources.get(id(items[0]))
+        if source is None or source[0] is not items[0]:
+            return None
+        parents = self._figma_parents()
+        node = source[1]
+        offset = parse_number(node.get('y')) or 0.0
+        viewport = None
+        parent = parents.get(id(node))
+        while parent is not None:
+            height = parse_number(parent.get('height'))
+            # VERTICAL_SCROLLING / HORIZONTAL_AND_VERTICAL_SCROLLING
+            scrolls = 'VERTICAL' in parent.get('overflowDirection', 'NONE')
+            if height is not None and (scrolls or parent.get('clipsContent', True)):
+                visible = height if scrolls else height - offset
+                viewport = visible if viewport is None else min(viewport, visible)
+            offset = (0.0 if scrolls else offset) + (parse_number(parent.get('y')) or 0.0)
+            parent = parents.get(id(parent))
+        return viewport
+
+    def _build_items_control(self, items: List[WpfNode], root: WpfNode) -> Optional[WpfNode]:
+        """由一组结构相同的列表项生成 ItemsControl
+
+        Args:
+            items: 列表项
+            root: AST 根节点 (示例数据写入根节点资源)
+
+        Returns:
+            ItemsControl 节点,结构校验失败 (哈希冲突)、高度未知或没有截取列表的视口时返回 None
+        """
+        run_height = self._run_height(items)
+        viewport = self._viewport_height(items) if run_height is not None else None
+        if viewport is None or not 0 < viewport < run_height:
+            self.stats['unbounded'] += 1
+            return None
+        height = format(round(viewport, 2), 'g')
+
+        template = copy.deepcopy(items[0])
+        rows: List[Dict[str, str]] = [{} for _ in items]
+        fields: Dict[Tuple[Tuple[int, ...], str], str] = {}
+
+        # 并行遍历模板和各项,找出取值不同的属性
+        stack: List[Tuple[WpfNode, List[WpfNode], Tuple[int, ...]]] = [(template, items, ())]
+        while stack:
+            template_node, item_nodes, path = stack.pop()
+
+            for item_node in item_nodes:
+                if item_node.type != template_node.type or len(item_node.children) != len(template_node.children):
+                    return None
+
+            keys = [k for k in template_node.attributes if not k.startswith('_')]
+            if path == ():
+                # 根节点的间距 (最后一项没有 Margin) 各项不同时也变成绑定,缺少的项为 0
+                keys.extend(key for key in sorted(self.ITEM_ROOT_IGNORED)
+                            if key not in template_node.attributes and any(key in n.attributes for n in item_nodes))
+            for key in keys:
+                default = '0' if path == () and key in self.ITEM_ROOT_IGNORED else ''
+                values = [str(n.attributes.get(key, default)) for n in item_nodes]
+                if all(v == values[0] for v in values):
+                    continue
+
+                field_name = f"{key.replace('.', '_')}{len(fields)}"
+                fields[(path, key)] = field_name
+                template_node.attributes[key] = f"{{Binding XPath=@{field_name}}}"
+                for row, value in zip(rows, values):
+                    row[field_name] = value
+
+            for index in reversed(range(len(template_node.children))):
+                child = template_node.children[index]
+                stack.append((child, [n.children[index] for n in item_nodes], path + (index,)))
+
+        # 示例数据资源
+        resources = root.attributes.setdefault('_resources', [])
+        data_key = f"ListItems{self.stats['lists'] + 1}"
+        resources.append(WpfNode(
+            type='XmlDataProvider',
+            attributes={'x:Key': data_key, 'XPath': 'Items/Item', '_items': rows},
+        ))
+
+        label = items[0].comment or items[0].type
+        items_control = WpfNode(
+            type='ItemsControl',
+            comment=f"{label} 列表 ({len(items)} 项, 虚拟化)",
+            attributes={
+                'Height': height,
+                'ItemsSource': f"{{Binding Source={{StaticResource {data_key}}}}}",
+                'VirtualizingPanel.IsVirtualizing': 'True',
+                'VirtualizingPanel.VirtualizationMode': 'Recycling',
+                # 展开的列表: 原来的列表项放在垂直 StackPanel 中 (整个面板被替换时换成原面板)
+                '_expanded': WpfNode(type='StackPanel', comment=f"{label} 列表 ({len(items)} 项)",
+                                     attributes={'Orientation': 'Vertical'}, children=list(items)),
+            },
+            children=[template],
+        )
+
+        self._compute_hashes(items_control)
+        self.stats['lists'] += 1
+        self.stats['items'] += len(items)
+        return items_control
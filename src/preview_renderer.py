@@ -0,0 +1,505 @@
+"""
+预览渲染
+作用: 在没有 WPF 的环境 (如 Linux CI) 中按模拟布局把 WPF AST 画成 PNG,
+      同时按 Figma 几何画出参照图,两者做感知差异比较,用于视觉回归检查
+
+绘制内容: 背景/填充、边框、圆角、椭圆、直线和文本占位条 (不绘制真实字形和路径几何,
+         Path / VECTOR 两边都按包围盒填充);
+依赖 Pillow (可选依赖,未安装时 preview_available() 返回 False)
+"""
+import hashlib
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageChops, ImageDraw, ImageFilter
+except ImportError:  # Pillow 是可选依赖
+    Image = None
+
+from src.component_library import content_signature
+from src.layout_inference import overlapping_pairs
+from src.layout_simulator import LayoutSimulator, Rect, figma_rects, parse_number, parse_thickness
+from src.text_measurer import TextMeasurer
+from src.wpf_ast import WpfNode
+
+
+# 绘制规则版本 (规则变化时递增,旧的缓存图片自动失效)
+PREVIEW_VERSION = 1
+
+# 默认缓存目录 (项目根目录下)
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'previews')
+
+# 颜色 (R, G, B, A)
+RGBA = Tuple[int, int, int, int]
+
+# 绘制操作: (图形, (x0, y0, x1, y1), 圆角, 线宽)
+#   图形: 'rect' / 'ellipse' 填充, 'outline' / 'outline_ellipse' 描边, 'line' 直线
+DrawOp = Tuple[str, Tuple[float, float, float, float], float, float]
+
+# 元素的绘制操作: [(阶段, 颜色, 绘制操作)]  阶段: 0 填充, 1 描边, 2 文本
+Paint = List[Tuple[int, RGBA, DrawOp]]
+
+# 画布底色
+BACKGROUND: RGBA = (255, 255, 255, 255)
+
+# 文本占位条高度 (相对字号)
+TEXT_BAR_RATIO = 0.7
+
+# 感知差异: 模糊半径和逐通道色差阈值 (忽略抗锯齿和亚像素偏移)
+# 阈值必须低于界面常用的浅色底之间的差 (白色与 #F9FAFB 只差 4~6),否则卡片错位不计入差异
+DIFF_BLUR = 1.0
+DIFF_THRESHOLD = 3
+
+
+def preview_available() -> bool:
+    """是否安装了 Pillow"""
+    return Image is not None
+
+
+def parse_color(value: Any) -> Optional[RGBA]:
+    """颜色字符串 ('#RGB' / '#RRGGBB' / '#AARRGGBB') → RGBA (无法解析或透明时返回 None)"""
+    text = str(value or '').strip().lstrip('#')
+    if len(text) == 3:
+        text = ''.join(c * 2 for c in text)
+    if len(text) == 6:
+        text = 'FF' + text
+    if len(text) != 8:
+        return None
+    try:
+        alpha, red, green, blue = (int(text[i:i + 2], 16) for i in range(0, 8, 2))
+    except ValueError:
+        return None
+    return (red, green, blue, alpha) if alpha else None
+
+
+def _with_opacity(color: Optional[RGBA], opacity: float) -> Optional[RGBA]:
+    """颜色乘以不透明度"""
+    if color is None or opacity >= 1.0:
+        return color
+    alpha = int(color[3] * max(opacity, 0.0))
+    return (color[0], color[1], color[2], alpha) if alpha else None
+
+
+def _stroke_weight(node: Dict[str, Any]) -> float:
+    """Figma 描边宽度 (各边不同 'Mixed' 时取最宽的一边)"""
+    weight = node.get('strokeWeight', 1)
+    if isinstance(weight, (int, float)):
+        return weight
+    sides = [node.get(f'stroke{side}Weight', 0) for side in ('Top', 'Right', 'Bottom', 'Left')]
+    return max([side for side in sides if isinstance(side, (int, float))] or [1])
+
+
+def perceptual_diff(reference: 'Image.Image', candidate: 'Image.Image',
+                    threshold: int = DIFF_THRESHOLD, blur: float = DIFF_BLUR) -> Tuple[float, 'Image.Image']:
+    """感知差异
+
+    两张图先轻微模糊 (抗锯齿和亚像素偏移不计入差异),再按任一通道色差超过阈值的像素占比计分
+    (按亮度比较时浅色底上的白色卡片几乎没有差异,错位的布局也能得到很低的分数)
+
+    Args:
+        reference: 参照图 (Figma)
+        candidate: 比较图 (WPF 预览, 尺寸不同时缩放到参照图尺寸)
+        threshold: 逐通道色差阈值 (0-255)
+        blur: 高斯模糊半径
+
+    Returns:
+        (差异像素占比 0~1, 差异图: 参照图灰度 + 差异处标红)
+    """
+    if candidate.size != reference.size:
+        candidate = candidate.resize(reference.size)
+    blurred_reference = reference.convert('RGB').filter(ImageFilter.GaussianBlur(blur))
+    blurred_candidate = candidate.convert('RGB').filter(ImageFilter.GaussianBlur(blur))
+    red, green, blue = ImageChops.difference(blurred_reference, blurred_candidate).split()
+    mask = ImageChops.lighter(ImageChops.lighter(red, green), blue).point(
+        lambda v: 255 if v > threshold else 0)
+
+    pixels = mask.width * mask.height
+    score = mask.histogram()[255] / pixels if pixels else 0.0
+    diff = Image.composite(Image.new('RGB', reference.size, (255, 0, 0)),
+                           reference.convert('L').convert('RGB'), mask)
+    return score, diff
+
+
+def assign_layers(root: Any, children: Callable[[Any], List[Any]], rect: Callable[[Any], Rect]) -> Dict[int, int]:
+    """计算绘制层号
+
+    子元素在父元素的上一层;与前面的兄弟元素重叠的元素放到已分配的最高层之上,
+    同一层中的元素互不遮挡,可以按颜色成批绘制而不改变绘制顺序
+
+    Args:
+        root: 根节点
+        children: 取子节点 (按绘制顺序)
+        rect: 取节点矩形 (x, y, 宽, 高)
+
+    Returns:
+        {id(节点): 层号}
+    """
+    levels: Dict[int, int] = {}
+    top = 0
+    stack = [(root, 0, False)]
+    while stack:
+        node, base, overlaps = stack.pop()
+        level = max(base, top + 1) if overlaps else base
+        levels[id(node)] = level
+        top = max(top, level)
+
+        kids = children(node)
+        if not kids:
+            continue
+        boxes = [(x, y, x + w, y + h) for x, y, w, h in map(rect, kids)]
+        late = {max(pair) for pair in overlapping_pairs(boxes)} if len(kids) > 1 else set()
+        stack.extend((kids[i], level + 1, i in late) for i in range(len(kids) - 1, -1, -1))
+    return levels
+
+
+class PreviewRenderer:
+    """预览渲染器
+
+    preview() 画出 WPF 预览图和 Figma 参照图并比较;图片按子树哈希缓存 (内存 + 磁盘),
+    内容没有变化的文档直接读取缓存,整个语料库的预览只需几秒
+    """
+
+    def __init__(self, wpf_defaults: Optional[Dict[str, Dict[str, Any]]] = None, scale: float = 1.0,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR, text_measurer: Optional[TextMeasurer] = None):
+        """初始化渲染器
+
+        Args:
+            wpf_defaults: 渲染时省略的默认值表 (布局模拟使用)
+            scale: 缩放比例
+            cache_dir: 缓存图片目录 (None 表示只在内存中缓存)
+            text_measurer: 文本测量器 (与转换器共用时复用其度量缓存)
+
+        Raises:
+            RuntimeError: 没有安装 Pillow
+        """
+        if Image is None:
+            raise RuntimeError("预览需要安装 Pillow: pip install pillow")
+        self.simulator = LayoutSimulator(wpf_defaults, text_measurer=text_measurer)
+        self.text_measurer = self.simulator.text_measurer
+        self.scale = scale
+        self.cache_dir = cache_dir
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.result: Dict[str, Any] = {}
+        self._memory: Dict[str, 'Image.Image'] = {}
+
+    # ========== 对外接口 ==========
+
+    def preview(self, root: WpfNode, figma_root: Dict[str, Any], width: float, height: float) -> Dict[str, Any]:
+        """画出预览图和参照图并比较
+
+        Args:
+            root: 最终的 AST 根节点
+            figma_root: 来源 Figma 根节点
+            width: 设计宽度
+            height: 设计高度
+
+        Returns:
+            {'wpf': 预览图, 'figma': 参照图, 'diff': 差异图, 'score': 差异像素占比}
+        """
+        wpf = self._cached(self.ast_hash(root, width, height), lambda: self.render_ast(root, width, height))
+        figma = self._cached(self.figma_hash(figma_root, width, height),
+                             lambda: self.render_figma(figma_root, width, height))
+        score, diff = perceptual_diff(figma, wpf)
+        self.result = {'wpf': wpf, 'figma': figma, 'diff': diff, 'score': score}
+        return self.result
+
+    def save(self, directory: str, name: str) -> List[str]:
+        """保存最近一次的预览 (名称.png / 名称.figma.png / 名称.diff.png)
+
+        Returns:
+            写入的文件路径
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for key, suffix in (('wpf', ''), ('figma', '.figma'), ('diff', '.diff')):
+            path = os.path.join(directory, f"{name}{suffix}.png")
+            self.result[key].save(path)
+            paths.append(path)
+        return paths
+
+    def format_stats(self) -> str:
+        """格式化最近一次的比较结果和缓存命中"""
+        return (f"差异 {self.result.get('score', 0):.1%}, "
+                f"缓存命中 {self.cache_hits}/{self.cache_hits + self.cache_misses}")
+
+    # ========== 缓存 ==========
+
+    def ast_hash(self, root: WpfNode, width: float, height: float) -> str:
+        """AST 子树哈希 (类型 + 属性 + 资源 + 设计尺寸,前序显式栈)"""
+        digest = hashlib.sha1(f"wpf|{PREVIEW_VERSION}|{self.scale:g}|{width}|{height}".encode('utf-8'))
+        stack = [root] + list(reversed(root.attributes.get('_resources', [])))
+        while stack:
+            node = stack.pop()
+            if node is None:
+                digest.update(b')')
+                continue
+            digest.update(node.type.encode('utf-8'))
+            digest.update(repr(sorted((k, str(v)) for k, v in node.attributes.items()
+                                      if k != '_resources')).encode('utf-8'))
+            digest.update(b'(')
+            stack.append(None)
+            stack.extend(reversed(node.children))
+        return digest.hexdigest()
+
+    def figma_hash(self, figma_root: Dict[str, Any], width: float, height: float) -> str:
+        """Figma 子树哈希 (组件库的内容签名 + 根节点类型和设计尺寸)"""
+        key = f"figma|{PREVIEW_VERSION}|{self.scale:g}|{width}|{height}|{figma_root.get('type')}|"
+        return hashlib.sha1((key + content_signature(figma_root)).encode('utf-8')).hexdigest()
+
+    def _cached(self, key: str, render: Callable[[], 'Image.Image']) -> 'Image.Image':
+        """按哈希读取缓存图片,没有时绘制并写入缓存"""
+        image = self._memory.get(key)
+        path = os.path.join(self.cache_dir, f"{key}.png") if self.cache_dir else None
+        if image is None and path and os.path.exists(path):
+            with Image.open(path) as cached:
+                image = cached.convert('RGBA')
+        if image is not None:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+            image = render()
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                image.save(path)
+        self._memory[key] = image
+        return image
+
+    # ========== 绘制 ==========
+
+    def render_ast(self, root: WpfNode, width: float, height: float) -> 'Image.Image':
+        """按模拟布局画出 WPF AST"""
+        resources = root.attributes.get('_resources', [])
+        self.simulator.set_resources(resources)
+        rects = self.simulator.layout(root, width, height)
+        brushes = {r.attributes.get('x:Key'): r.attributes.get('Color')
+                   for r in resources if r.type == 'SolidColorBrush'}
+
+        levels = assign_layers(root, lambda node: node.children, lambda node: rects[id(node)])
+        paints = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            stack.extend(reversed(node.children))
+            paint = self._ast_paint(node, self.simulator.attributes(node), rects[id(node)], brushes)
+            if paint:
+                paints.append((levels[id(node)], paint))
+        return self._draw(paints, width, height)
+
+    def render_figma(self, figma_root: Dict[str, Any], width: float, height: float) -> 'Image.Image':
+        """按 Figma 几何画出参照图 (隐藏的节点及其子节点不绘制)"""
+        rects = figma_rects(figma_root)
+
+        def visible_children(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+            return [child for child in node.get('children', []) if child.get('visible', True)]
+
+        levels = assign_layers(figma_root, visible_children, lambda node: rects[id(node)])
+        paints = []
+        stack = [figma_root]
+        while stack:
+            node = stack.pop()
+            stack.extend(reversed(visible_children(node)))
+            paint = self._figma_paint(node, rects[id(node)])
+            if paint:
+                paints.append((levels[id(node)], paint))
+        return self._draw(paints, width, height)
+
+    def _draw(self, paints: List[Tuple[int, Paint]], width: float, height: float) -> 'Image.Image':
+        """逐层绘制,每层按 (阶段, 颜色) 成批绘制
+
+        不透明颜色直接画在画布上;半透明颜色整批先画到一张覆盖层 (只有该批的包围盒大小) 再混合,
+        每层每种半透明颜色只混合一次
+        """
+        layers: Dict[int, Dict[Tuple[int, RGBA], List[DrawOp]]] = {}
+        for level, paint in paints:
+            layer = layers.setdefault(level, {})
+            for stage, color, op in paint:
+                layer.setdefault((stage, color), []).append(op)
+
+        scale = self.scale
+        image = Image.new('RGBA', (max(math.ceil(width * scale), 1), max(math.ceil(height * scale), 1)), BACKGROUND)
+        draw = ImageDraw.Draw(image)
+        for level in sorted(layers):
+            for (stage, color), ops in sorted(layers[level].items()):
+                if color[3] == 255:
+                    self._paint_ops(draw, ops, color, 0.0, 0.0)
+                    continue
+                left = math.floor(min(min(op[1][0], op[1][2]) - op[3] for op in ops) * scale)
+                top = math.floor(min(min(op[1][1], op[1][3]) - op[3] for op in ops) * scale)
+                right = math.ceil(max(max(op[1][0], op[1][2]) + op[3] for op in ops) * scale) + 1
+                bottom = math.ceil(max(max(op[1][1], op[1][3]) + op[3] for op in ops) * scale) + 1
+                left, top = max(left, 0), max(top, 0)
+                right, bottom = min(right, image.width), min(bottom, image.height)
+                if right <= left or bottom <= top:
+                    continue
+                overlay = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+                self._paint_ops(ImageDraw.Draw(overlay), ops, color, left, top)
+                image.alpha_composite(overlay, (left, top))
+        return image
+
+    def _paint_ops(self, draw: 'ImageDraw.ImageDraw', ops: List[DrawOp], color: RGBA,
+                   offset_x: float, offset_y: float) -> None:
+        """用同一种颜色绘制一批操作 (坐标按缩放比例换算并减去覆盖层偏移)"""
+        scale = self.scale
+        for shape, (x0, y0, x1, y1), radius, line_width in ops:
+            box = [x0 * scale - offset_x, y0 * scale - offset_y, x1 * scale - offset_x, y1 * scale - offset_y]
+            stroke = max(round(line_width * scale), 1)
+            if shape == 'line':
+                draw.line(box, fill=color, width=stroke)
+                continue
+            # PIL 的矩形包含右下边界像素
+            box[2], box[3] = box[2] - 1, box[3] - 1
+            if box[2] < box[0] or box[3] < box[1]:
+                continue
+            if shape == 'rect':
+                if radius > 0:
+                    draw.rounded_rectangle(box, radius * scale, fill=color)
+                else:
+                    draw.rectangle(box, fill=color)
+            elif shape == 'outline':
+                draw.rounded_rectangle(box, radius * scale, outline=color, width=stroke)
+            elif shape == 'ellipse':
+                draw.ellipse(box, fill=color)
+            elif shape == 'outline_ellipse':
+                draw.ellipse(box, outline=color, width=stroke)
+
+    # ========== 元素 → 绘制操作 ==========
+
+    def _ast_paint(self, node: WpfNode, attrs: Dict[str, Any], rect: Rect, brushes: Dict[str, Any]) -> Paint:
+        """WPF 元素的绘制操作"""
+        x, y, width, height = rect
+        box = (x, y, x + width, y + height)
+        opacity = parse_number(attrs.get('Opacity'), 1.0)
+
+        def brush(name: str) -> Optional[RGBA]:
+            value = str(attrs.get(name, ''))
+            if value.startswith('{StaticResource '):
+                value = brushes.get(value[len('{StaticResource '):-1].strip(), '')
+            return _with_opacity(parse_color(value), opacity)
+
+        paint: Paint = []
+        node_type = node.type
+        if node_type in ('Rectangle', 'Ellipse', 'Path'):
+            fill, stroke = brush('Fill'), brush('Stroke')
+            shape = 'ellipse' if node_type == 'Ellipse' else 'rect'
+            radius = parse_number(attrs.get('RadiusX'), 0.0)
+            if fill:
+                paint.append((0, fill, (shape, box, radius, 0.0)))
+            if stroke:
+                paint.append((1, stroke, (f"outline_{shape}" if shape == 'ellipse' else 'outline', box, radius,
+                                          parse_number(attrs.get('StrokeThickness'), 1.0))))
+            return paint
+
+        if node_type == 'Line':
+            stroke = brush('Stroke')
+            if stroke:
+                line = (x + parse_number(attrs.get('X1'), 0.0), y + parse_number(attrs.get('Y1'), 0.0),
+                        x + parse_number(attrs.get('X2'), 0.0), y + parse_number(attrs.get('Y2'), 0.0))
+                paint.append((1, stroke, ('line', line, 0.0, parse_number(attrs.get('StrokeThickness'), 1.0))))
+            return paint
+
+        radius = parse_thickness(attrs.get('CornerRadius'))[0]
+        background = brush('Background')
+        if background:
+            paint.append((0, background, ('rect', box, radius, 0.0)))
+        border = brush('BorderBrush')
+        thickness = max(parse_thickness(attrs.get('BorderThickness')))
+        if border and thickness > 0:
+            paint.append((1, border, ('outline', box, radius, thickness)))
+
+        if node_type == 'TextBlock':
+            foreground = brush('Foreground') or _with_opacity((0, 0, 0, 255), opacity)
+            paint.extend(self._text_paint(
+                str(attrs.get('Text', '')), str(attrs.get('FontFamily', 'Segoe UI')),
+                str(attrs.get('FontWeight', 'Regular')), parse_number(attrs.get('FontSize'), 12.0),
+                foreground, rect, str(attrs.get('TextAlignment', 'Left')).upper()))
+        return paint
+
+    def _figma_paint(self, node: Dict[str, Any], rect: Rect) -> Paint:
+        """Figma 节点的绘制操作 (取色规则与构建器一致: 只取第一个填充/描边)"""
+        x, y, width, height = rect
+        box = (x, y, x + width, y + height)
+        opacity = node.get('opacity', 1.0)
+        fills = node.get('fills') or []
+        strokes = node.get('strokes') or []
+        node_type = node.get('type')
+
+        def paint_color(paints: List[Dict[str, Any]], default: str) -> Optional[RGBA]:
+            if not paints:
+                return None
+            return _with_opacity(parse_color(paints[0].get('color', default)), opacity * paints[0].get('opacity', 1.0))
+
+        paint: Paint = []
+        if node_type == 'TEXT':
+            color = paint_color(fills, '#000000') if fills else _with_opacity((0, 0, 0, 255), opacity)
+            font_name = node.get('fontName') or {}
+            weight = node.get('fontWeight', 400)
+            style = font_name.get('style', 'Regular')
+            if isinstance(weight, (int, float)) and weight >= 600 and 'bold' not in style.lower():
+                style = 'Bold'
+            paint.extend(self._text_paint(
+                str(node.get('characters', node.get('name', ''))), font_name.get('family', 'Segoe UI'),
+                style, node.get('fontSize', 12), color, rect, str(node.get('textAlignHorizontal', 'LEFT'))))
+            return paint
+
+        if node_type == 'LINE':
+            stroke = paint_color(strokes, '#000000')
+            if stroke:
+                angle = math.radians(node.get('rotation', 0) or 0)
+                line = (x, y, x + width * math.cos(angle), y - width * math.sin(angle))
+                paint.append((1, stroke, ('line', line, 0.0, _stroke_weight(node))))
+            return paint
+
+        corner_radius = node.get('cornerRadius', 0)
+        radius = node.get('topLeftRadius', 0) if corner_radius == 'Mixed' else corner_radius or 0
+        shape = 'ellipse' if node_type == 'ELLIPSE' else 'rect'
+        fill = paint_color(fills, '#FFFFFF')
+        if fill:
+            paint.append((0, fill, (shape, box, radius, 0.0)))
+        stroke = paint_color(strokes, '#000000')
+        if stroke:
+            paint.append((1, stroke, ('outline_ellipse' if shape == 'ellipse' else 'outline', box, radius,
+                                      _stroke_weight(node))))
+        return paint
+
+    def _text_paint(self, text: str, family: str, weight: str, size: float, color: Optional[RGBA],
+                    rect: Rect, alignment: str) -> Paint:
+        """文本占位条: 每行一条,宽度为测量的行宽 (不超过元素宽度),按水平对齐方式偏移"""
+        if color is None:
+            return []
+        x, y, width, _ = rect
+        metrics = self.text_measurer.get_metrics(family, weight, size)
+        line_height = metrics['ascent'] + metrics['descent'] + metrics['line_gap']
+        bar = size * TEXT_BAR_RATIO
+        paint: Paint = []
+        for index, line in enumerate(text.split('\n')):
+            if not line.strip():
+                continue
+            line_width = min(self.text_measurer.measure_text(line, metrics), width)
+            offset = {'CENTER': (width - line_width) / 2, 'RIGHT': width - line_width}.get(alignment, 0.0)
+            top = y + index * line_height + (line_height - bar) / 2
+            paint.append((2, color, ('rect', (x + offset, top, x + offset + line_width, top + bar), 0.0, 0.0)))
+        return paint
+
+
+# 测试代码
+if __name__ == '__main__':
+    import copy
+
+    # 浅色底上带浅灰描边的白色卡片,错位 65px 后必须得到明显的差异 (按亮度差 32 比较时为 0%)
+    card = {'id': '1:2', 'type': 'FRAME', 'name': 'Card', 'x': 24, 'y': 24, 'width': 240, 'height': 160,
+            'fills': [{'type': 'SOLID', 'color': '#FFFFFF'}], 'strokes': [{'type': 'SOLID', 'color': '#E5E7EB'}]}
+    screen = {'id': '1:1', 'type': 'FRAME', 'name': 'Screen', 'x': 0, 'y': 0, 'width': 400, 'height': 300,
+              'fills': [{'type': 'SOLID', 'color': '#F9FAFB'}], 'children': [card]}
+    shifted = copy.deepcopy(screen)
+    shifted['children'][0]['y'] += 65
+
+    renderer = PreviewRenderer(cache_dir=None)
+    reference = renderer.render_figma(screen, 400, 300)
+    same, _ = perceptual_diff(reference, renderer.render_figma(copy.deepcopy(screen), 400, 300))
+    moved, _ = perceptual_diff(reference, renderer.render_figma(shifted, 400, 300))
+    print(f"相同布局差异: {same:.1%}, 错位 65px 差异: {moved:.1%}")
+    assert same == 0.0
+    assert moved > 0.15
+    print("✅ 差异检查通过")
@@ -0,0 +1,156 @@
+"""
+转换流程性能分析器
+作用: 记录各阶段耗时/内存分配,以及节点类型、规则求值、缓存命中等计数
+"""
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+from src import json_io
+
+
+# 阶段钩子: hook(阶段名, 本次记录),GUI 状态栏和批量模式可订阅
+ProfileHook = Callable[[str, Dict[str, Any]], None]
+
+
+class PipelineProfiler:
+    """流程性能分析器
+
+    默认关闭,关闭时 stage()/count() 几乎没有开销
+    """
+
+    def __init__(self, enabled: bool = False, trace_memory: bool = False):
+        """初始化分析器
+
+        Args:
+            enabled: 是否启用
+            trace_memory: 是否用 tracemalloc 记录峰值内存 (会明显拖慢转换)
+        """
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.caches: Dict[str, Callable[[], Dict[str, int]]] = {}
+        self.hooks: List[ProfileHook] = []
+
+    def add_hook(self, hook: ProfileHook) -> None:
+        """注册阶段结束钩子"""
+        self.hooks.append(hook)
+
+    def register_cache(self, name: str, stats_getter: Callable[[], Dict[str, int]]) -> None:
+        """注册缓存,stats_getter 返回 {'hits': n, 'misses': m}"""
+        self.caches[name] = stats_getter
+
+    def reset(self) -> None:
+        """清空已记录的数据 (保留钩子和缓存注册)"""
+        self.stages = {}
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """记录一个阶段的耗时和内存分配
+
+        Args:
+            name: 阶段名 (json_load, compression, build, optimize, render, write 等)
+        """
+        if not self.enabled:
+            yield
+            return
+
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+
+        blocks_before = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            record = {
+                'seconds': elapsed,
+                'allocated_blocks': sys.getallocatedblocks() - blocks_before,
+            }
+            if self.trace_memory:
+                record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+
+            total = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'allocated_blocks': 0})
+            total['calls'] += 1
+            total['seconds'] += record['seconds']
+            total['allocated_blocks'] += record['allocated_blocks']
+            if 'peak_bytes' in record:
+                total['peak_bytes'] = max(total.get('peak_bytes', 0), record['peak_bytes'])
+
+            for hook in self.hooks:
+                hook(name, record)
+
+    def count(self, category: str, key: str, n: int = 1) -> None:
+        """计数 (如 node_types/FRAME, rules/垂直布局)"""
+        if not self.enabled:
+            return
+        bucket = self.counters.setdefault(category, {})
+        bucket[key] = bucket.get(key, 0) + n
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """各缓存的命中统计"""
+        result = {}
+        for name, getter in self.caches.items():
+            stats = dict(getter())
+            lookups = stats.get('hits', 0) + stats.get('misses', 0)
+            stats['hit_rate'] = stats.get('hits', 0) / lookups if lookups else 0.0
+            result[name] = stats
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为可 JSON 序列化的字典"""
+        return {
+            'stages': self.stages,
+            'counters': self.counters,
+            'caches': self.cache_stats(),
+        }
+
+    def write_json(self, path: str) -> None:
+        """写入 JSON 文件"""
+        json_io.dump(self.to_dict(), path, indent=True)
+
+    def format_table(self) -> str:
+        """格式化为文本表格"""
+        lines = []
+        total_seconds = sum(s['seconds'] for s in self.stages.values()) or 1e-12
+
+        lines.append(f"{'阶段':<14}{'次数':>6}{'耗时(ms)':>12}{'占比':>8}{'分配块':>12}")
+        lines.append('-' * 52)
+        for name, stats in self.stages.items():
+            lines.append(
+                f"{name:<14}{stats['calls']:>6}{stats['seconds'] * 1000:>12.2f}"
+                f"{stats['seconds'] / total_seconds * 100:>7.1f}%{stats['allocated_blocks']:>+12,}"
+            )
+
+        for category, bucket in self.counters.items():
+            lines.append('')
+            lines.append(f"{category}:")
+            for key, value in sorted(bucket.items(), key=lambda item: -item[1]):
+                lines.append(f"  {key:<40}{value:>8}")
+
+        cache_stats = self.cache_stats()
+        if cache_stats:
+            lines.append('')
+            lines.append('caches:')
+            for name, stats in cache_stats.items():
+                lines.append(
+                    f"  {name:<30}命中 {stats.get('hits', 0):>6} / 未命中 {stats.get('misses', 0):>6}"
+                    f"  命中率 {stats['hit_rate'] * 100:.1f}%"
+                )
+
+        return '\n'.join(lines)
+
+
+# 共享的关闭状态实例,未启用分析时使用
+NULL_PROFILER = PipelineProfiler(enabled=False)
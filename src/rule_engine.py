@@ -4,7 +4,9 @@
 """
 import yaml
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from types import CodeType
+from typing import Dict, Any, List, Optional, Tuple
+from src.profiler import NULL_PROFILER
 
 
 class SafeEvaluator:
@@ -16,8 +18,20 @@ class SafeEvaluator:
     - 逻辑: and, or, not
     - 成员: in, not in
     - 函数: is None, is not None
+    
+    表达式编译结果按字符串缓存,同一条规则只编译一次
     """
     
+    def __init__(self):
+        """初始化求值器"""
+        self._code_cache: Dict[str, CodeType] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """编译缓存命中统计"""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses, 'size': len(self._code_cache)}
+    
     def eval(self, expression: str, context: Dict[str, Any]) -> bool:
         """求值表达式
         
@@ -43,7 +57,14 @@ class SafeEvaluator:
         
         try:
             # 使用 eval 求值 (在受限环境中)
-            result = eval(expression, safe_globals, safe_locals)
+            code = self._code_cache.get(expression)
+            if code is None:
+                self.cache_misses += 1
+                code = compile(expression, '<rule>', 'eval')
+                self._code_cache[expression] = code
+            else:
+                self.cache_hits += 1
+            result = eval(code, safe_globals, safe_locals)
             return bool(result)
         except Exception as e:
             # 求值失败,返回 False 并打印警告
@@ -53,6 +74,18 @@ class SafeEvaluator:
             return False
 
 
+# 没有容器规则匹配时使用的默认规则
+DEFAULT_CONTAINER_RULE = {
+    'name': '默认容器',
+    'condition': 'true',
+    'result': {
+        'container_type': 'StackPanel',
+        'orientation': 'Vertical',
+        'use_grid': False
+    }
+}
+
+
 class RuleEngine:
     """规则引擎
     
@@ -67,6 +100,7 @@ class RuleEngine:
         """
         self.config_dir = Path(config_dir)
         self.evaluator = SafeEvaluator()
+        self.profiler = NULL_PROFILER  # 由转换器替换为启用的分析器
         
         # 加载配置文件
         self.mappings = self._load_yaml('figma_wpf_mapping.yaml')
@@ -100,21 +134,30 @@ class RuleEngine:
                     'use_grid': True
                 }
         """
+        return self.select_container_rule(context)['result']
+    
+    def select_container_rule(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """根据规则选择布局容器,返回匹配的整条规则 (name / condition / result)
+        
+        Args:
+            context: 上下文信息 (同 select_container)
+        
+        Returns:
+            匹配的规则,没有规则匹配时返回默认的 StackPanel (Vertical) 规则
+        """
         rules = self.layout_rules['container_selection_rules']
         
         for rule in rules:
             condition = rule['condition']
+            self.profiler.count('rules', rule['name'])
             
             # 求值条件
             if self.evaluator.eval(condition, context):
-                return rule['result']
+                self.profiler.count('matched_rules', rule['name'])
+                return rule
         
         # 默认返回 StackPanel (Vertical)
-        return {
-            'container_type': 'StackPanel',
-            'orientation': 'Vertical',
-            'use_grid': False
-        }
+        return DEFAULT_CONTAINER_RULE
     
     def calculate_attribute(
         self, 
@@ -132,11 +175,33 @@ class RuleEngine:
         Returns:
             属性值字符串,如果不应设置此属性则返回 None
         """
+        result = self.calculate_attribute_rule(control_type, attr_name, context)
+        return result[0] if result else None
+    
+    def calculate_attribute_rule(
+        self, 
+        control_type: str,
+        attr_name: str,
+        context: Dict[str, Any]
+    ) -> Optional[Tuple[str, str]]:
+        """根据规则计算属性值,同时返回匹配的规则 (源映射记录属性由哪条规则产生)
+        
+        Args:
+            control_type: 控件类型 (同 calculate_attribute)
+            attr_name: 属性名
+            context: 上下文信息
+        
+        Returns:
+            (属性值, 规则名),规则名形如 "Border.Width[sizing_horizontal == 'FIXED']"
+            (使用通用规则时控件类型为 Common); 不应设置此属性时返回 None
+        """
         # 获取规则
+        section = control_type
         rules = self.layout_rules['attribute_rules'].get(control_type, {}).get(attr_name, [])
         
         if not rules:
             # 尝试通用规则
+            section = 'Common'
             rules = self.layout_rules['attribute_rules'].get('Common', {}).get(attr_name, [])
         
         if not rules:
@@ -145,6 +210,7 @@ class RuleEngine:
         # 遍历规则,返回第一个匹配的
         for rule in rules:
             condition = rule['condition']
+            self.profiler.count('rules', f"{control_type}.{attr_name}")
             
             if self.evaluator.eval(condition, context):
                 value_template = rule['value']
@@ -153,7 +219,7 @@ class RuleEngine:
                 try:
                     # 支持简单的表达式: {parent_spacing / 2}
                     value = self._evaluate_value_template(value_template, context)
-                    return value
+                    return value, f"{section}.{attr_name}[{condition}]"
                 except Exception as e:
                     print(f"⚠️ 属性值模板求值失败: {value_template}")
                     print(f"   错误: {e}")
@@ -271,3 +337,4 @@ if __name__ == '__main__':
     }
     width = engine.calculate_attribute('Border', 'Width', context)
     print("Width 属性:", width)
+    print("Width 规则:", engine.calculate_attribute_rule('Border', 'Width', context)[1])
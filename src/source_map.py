@@ -0,0 +1,201 @@
+"""
+XAML 源映射
+作用: 记录 XAML 中每个元素和属性的行列范围、对应的 Figma 节点以及产生它的规则,
+输出为 JSON 旁路文件 (输出文件名.map.json)
+
+用途:
+    按 Figma 节点 id 定位 XAML 片段 (局部重新生成)
+    统计各设计节点产生的 XAML 体积 (找出输出最重的节点)
+
+映射在渲染器逐行写入时收集,只记录行号和列号,文档写完后一次换算字符数
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src import json_io
+from src.wpf_ast import WpfNode
+
+
+# 源映射格式版本
+SOURCE_MAP_VERSION = 1
+
+
+class AttributeOrigins:
+    """属性来源: 每个流程阶段结束后与上一次的属性快照比较,新增或改变的属性记为该阶段产生
+
+    构建阶段产生的属性记为构建器记录的规则: 规则表查出的属性为映射规则 (如 sizing_mode[FIXED]),
+    其余为设置它的构建方法 (如 _create_border_for_frame); 之后的阶段记为阶段名 (如 optimize / virtualize / styles)
+    """
+
+    def __init__(self):
+        """初始化属性来源表"""
+        self.elements: Dict[int, str] = {}               # id(节点) → 产生元素的规则
+        self.attributes: Dict[int, Dict[str, str]] = {}  # id(节点) → {属性名: 产生属性的规则}
+        self._snapshots: Dict[int, Tuple[WpfNode, Dict[str, Any]]] = {}
+
+    def reset(self) -> None:
+        """开始新文档"""
+        self.elements.clear()
+        self.attributes.clear()
+        self._snapshots.clear()
+
+    def record_build(self, root: WpfNode, sources: Dict[int, Any], rules: Dict[int, str],
+                     attribute_rules: Optional[Dict[int, Any]] = None) -> None:
+        """记录构建阶段: 元素按容器选择规则名或来源 Figma 节点类型,属性按构建器记录的规则"""
+        labels = {key: str(source[1].get('type', 'build')) for key, source in sources.items()}
+        labels.update(rules)
+        self.record(root, 'build', labels, attribute_rules)
+
+    def record(self, root: WpfNode, stage: str, labels: Optional[Dict[int, str]] = None,
+               attribute_rules: Optional[Dict[int, Any]] = None) -> None:
+        """比较整棵树 (含根节点资源) 的属性快照,记录本阶段新增或改变的属性
+
+        Args:
+            root: AST 根节点
+            stage: 阶段名
+            labels: 按节点指定的规则名 {id(节点): 规则名} (未指定的节点使用阶段名)
+            attribute_rules: 按属性指定的规则名 {id(节点): (节点, {属性名: (规则名, 值)})}
+                             (值与当前值相同时使用,否则使用节点的规则名)
+        """
+        labels = labels or {}
+        attribute_rules = attribute_rules or {}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children)
+            resources = node.attributes.get('_resources')
+            if resources:
+                stack.extend(resources)
+
+            key = id(node)
+            label = labels.get(key, stage)
+            previous = self._snapshots.get(key)
+            if previous is None or previous[0] is not node:
+                self.elements[key] = label
+                self.attributes[key] = {}
+                before: Dict[str, Any] = {}
+            else:
+                before = previous[1]
+            origins = self.attributes[key]
+            recorded = attribute_rules.get(key)
+            named = recorded[1] if recorded is not None and recorded[0] is node else {}
+            for name, value in node.attributes.items():
+                if not name.startswith('_') and (name not in before or before[name] != value):
+                    rule = named.get(name)
+                    origins[name] = rule[0] if rule is not None and rule[1] == value else label
+            self._snapshots[key] = (node, dict(node.attributes))
+
+
+class SourceMap:
+    """单个 XAML 文档的源映射 (渲染器写入元素时收集)
+
+    行列号从 1 开始,结束位置不含 (与编辑器的选区一致)
+    """
+
+    def __init__(self, sources: Dict[int, Any], origins: Optional[AttributeOrigins] = None):
+        """初始化源映射
+
+        Args:
+            sources: 构建器记录的源节点表 {id(AST 节点): (AST 节点, Figma 节点)}
+            origins: 属性来源 (可选,未提供时属性记为元素的规则)
+        """
+        self.sources = sources
+        self.origins = origins
+        self.elements: List[Dict[str, Any]] = []
+        self.total_chars = 0
+        self._open: Dict[int, Dict[str, Any]] = {}
+
+    def begin(self, node: WpfNode, tag: str, line: int, column: int,
+              pairs: List[Tuple[str, str]], attribute_column: int) -> None:
+        """记录开始标签 (标签在第 line 行,每个属性各占后续一行; 行列号从 0 开始,由 finish 换算)"""
+        source = self.sources.get(id(node))
+        if source is None or source[0] is not node:
+            return
+        figma_node = source[1]
+        origins = self.origins
+        rule = origins.elements.get(id(node)) if origins else None
+        rule = rule or str(figma_node.get('type', ''))
+        attribute_rules = origins.attributes.get(id(node), {}) if origins else {}
+        entry = {
+            'figma_id': figma_node.get('id'),
+            'figma_name': figma_node.get('name'),
+            'element': tag,
+            'rule': rule,
+            'range': [line, column, line, column],
+            'attributes': [
+                {'name': key,
+                 'range': [line + i, attribute_column, line + i, attribute_column + len(key) + len(value) + 3],
+                 'rule': attribute_rules.get(key, rule)}
+                for i, (key, value) in enumerate(pairs, 1)
+            ],
+        }
+        self.elements.append(entry)
+        self._open[id(node)] = entry
+
+    def end(self, node: WpfNode, line: int, column: int) -> None:
+        """记录元素结束位置 (结束标签或 /> 之后)"""
+        entry = self._open.pop(id(node), None)
+        if entry is not None:
+            entry['range'][2:] = [line, column]
+
+    def finish(self, lines: List[str], offset: int = 0) -> None:
+        """文档写完后换算: 加上文档头插入的行数,行列号改为从 1 开始,计算每个元素的字符数
+
+        Args:
+            lines: 文档的全部行
+            offset: 收集之后在文档头插入的行数
+        """
+        line_starts = [0] * (len(lines) + 1)
+        for i, text in enumerate(lines):
+            line_starts[i + 1] = line_starts[i] + len(text) + 1
+        self.total_chars = max(line_starts[-1] - 1, 0)
+
+        for entry in self.elements:
+            start_line, start_column, end_line, end_column = entry['range']
+            entry['chars'] = (line_starts[end_line + offset] + end_column
+                              - line_starts[start_line + offset] - start_column)
+            entry['range'] = [start_line + offset + 1, start_column + 1, end_line + offset + 1, end_column + 1]
+            for attribute in entry['attributes']:
+                line, column, _, end = attribute['range']
+                attribute['range'] = [line + offset + 1, column + 1, line + offset + 1, end + 1]
+        self._open.clear()
+
+    def nodes(self) -> List[Dict[str, Any]]:
+        """按 Figma 节点汇总 (字符数取最外层元素,包含子节点),按字符数从大到小排序"""
+        nodes: Dict[Any, Dict[str, Any]] = {}
+        for index, entry in enumerate(self.elements):
+            node = nodes.setdefault(entry['figma_id'], {
+                'figma_id': entry['figma_id'], 'figma_name': entry['figma_name'], 'chars': 0, 'elements': []})
+            node['chars'] = max(node['chars'], entry['chars'])
+            node['elements'].append(index)
+        return sorted(nodes.values(), key=lambda node: -node['chars'])
+
+    def to_dict(self, file: str = '', target: str = '') -> Dict[str, Any]:
+        """源映射 JSON 内容"""
+        return {
+            'version': SOURCE_MAP_VERSION,
+            'file': file,
+            'target': target,
+            'chars': self.total_chars,
+            'elements': self.elements,
+            'nodes': self.nodes(),
+        }
+
+    def save(self, path: str, file: str = '', target: str = '') -> None:
+        """写入 JSON 旁路文件"""
+        json_io.dump(self.to_dict(file, target), path)
+
+    def format_stats(self, top: int = 3) -> str:
+        """格式化统计信息 (映射的元素数和输出最重的节点)"""
+        text = f"映射 {len(self.elements)} 个元素"
+        heaviest = [node for node in self.nodes() if node['chars']][:top]
+        if heaviest and self.total_chars:
+            text += ", 最大节点: " + ", ".join(
+                f"{node['figma_name']} {node['chars'] / 1024:.1f}KB ({node['chars'] / self.total_chars:.0%})"
+                for node in heaviest)
+        return text
+
+
+def source_map_path(output_file: str) -> str:
+    """源映射文件路径 (Login.xaml → Login.xaml.map.json)"""
+    return str(Path(f"{output_file}.map.json"))
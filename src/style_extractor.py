@@ -0,0 +1,170 @@
+"""
+Style / 资源提取器
+作用: 统计 WPF AST 中重复出现的属性组合,提取为 UserControl.Resources 中的
+      命名 Style 和 SolidColorBrush,并把内联属性替换为 StaticResource 引用
+"""
+from typing import Dict, List, Any, Tuple
+from src.wpf_ast import UNSTYLED_TYPES, WpfNode
+
+
+class StyleExtractor:
+    """Style 提取器
+
+    两遍线性扫描:
+    1. 以 (控件类型, 视觉属性组合) 为键建立哈希索引,统计出现次数
+    2. 出现次数达到阈值的组合生成 Style,再对重复颜色生成 SolidColorBrush
+    """
+
+    # 参与 Style 提取的视觉属性 (布局属性因元素而异,不参与)
+    STYLE_PROPERTIES = {
+        'FontFamily', 'FontSize', 'FontWeight', 'Foreground',
+        'Background', 'BorderBrush', 'BorderThickness', 'CornerRadius', 'Padding',
+    }
+
+    # 取值为画刷的属性
+    BRUSH_PROPERTIES = {'Background', 'Foreground', 'BorderBrush', 'Fill', 'Stroke'}
+
+    def __init__(self, threshold: int = 3, min_bundle_size: int = 2):
+        """初始化提取器
+
+        Args:
+            threshold: 属性组合/颜色至少出现多少次才提取 (0 表示不提取)
+            min_bundle_size: Style 至少包含多少个属性
+        """
+        self.threshold = threshold
+        self.min_bundle_size = min_bundle_size
+        self.stats: Dict[str, int] = {}
+
+    def extract(self, root: WpfNode) -> WpfNode:
+        """提取 Style 和画刷资源
+
+        Args:
+            root: AST 根节点 (资源会挂在 root.attributes['_resources'] 上)
+
+        Returns:
+            根节点
+        """
+        self.stats = {'styles': 0, 'brushes': 0, 'replaced_attributes': 0}
+        if self.threshold <= 0:
+            return root
+
+        resources = root.attributes.get('_resources', [])
+        styles = self._extract_styles(root, resources)
+        brushes = self._extract_brushes(root, resources + styles)
+
+        # 画刷必须先于引用它的 Style 声明
+        if brushes or styles:
+            root.attributes['_resources'] = brushes + resources + styles
+
+        return root
+
+    def format_stats(self) -> str:
+        """格式化提取统计"""
+        return (
+            f"Style {self.stats.get('styles', 0)}, "
+            f"画刷 {self.stats.get('brushes', 0)}, "
+            f"替换属性 {self.stats.get('replaced_attributes', 0)}"
+        )
+
+    def _iter_nodes(self, root: WpfNode) -> List[WpfNode]:
+        """前序收集所有节点"""
+        nodes = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            stack.extend(reversed(node.children))
+        return nodes
+
+    def _bundle_key(self, node: WpfNode) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        """计算节点的视觉属性组合键 (绑定到组件属性的属性不参与)"""
+        bound = node.attributes.get('_bindings', ())
+        items = tuple(sorted(
+            (k, str(v)) for k, v in node.attributes.items() if k in self.STYLE_PROPERTIES and k not in bound
+        ))
+        return node.type, items
+
+    def _extract_styles(self, root: WpfNode, resources: List[WpfNode]) -> List[WpfNode]:
+        """提取重复的属性组合为命名 Style"""
+        # 第一遍: 哈希索引
+        index: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[WpfNode]] = {}
+        for node in self._iter_nodes(root):
+            if node.type in UNSTYLED_TYPES or 'Style' in node.attributes:
+                continue
+            key = self._bundle_key(node)
+            if len(key[1]) >= self.min_bundle_size:
+                index.setdefault(key, []).append(node)
+
+        # 已有隐式 Style 的类型,命名 Style 需要 BasedOn 才能保留隐式 Style 的属性
+        implicit_types = {
+            r.attributes['TargetType'] for r in resources
+            if r.type == 'Style' and 'x:Key' not in r.attributes
+        }
+
+        # 第二遍: 生成 Style 并替换内联属性 (按出现次数从多到少编号)
+        styles = []
+        type_counters: Dict[str, int] = {}
+        candidates = [(key, nodes) for key, nodes in index.items() if len(nodes) >= self.threshold]
+        candidates.sort(key=lambda item: -len(item[1]))
+
+        for (control_type, items), nodes in candidates:
+            type_counters[control_type] = type_counters.get(control_type, 0) + 1
+            style_key = f"{control_type}Style{type_counters[control_type]}"
+
+            style = WpfNode(type='Style', attributes={'x:Key': style_key, 'TargetType': control_type})
+            if control_type in implicit_types:
+                style.attributes['BasedOn'] = f"{{StaticResource {{x:Type {control_type}}}}}"
+            for prop, value in items:
+                style.add_child(WpfNode(type='Setter', attributes={'Property': prop, 'Value': value}))
+            styles.append(style)
+
+            for node in nodes:
+                for prop, _ in items:
+                    del node.attributes[prop]
+                node.attributes['Style'] = f"{{StaticResource {style_key}}}"
+
+            self.stats['replaced_attributes'] += len(items) * len(nodes)
+
+        self.stats['styles'] = len(styles)
+        return styles
+
+    def _extract_brushes(self, root: WpfNode, styles: List[WpfNode]) -> List[WpfNode]:
+        """提取重复的颜色为 SolidColorBrush 资源"""
+        # 第一遍: 统计颜色 (内联属性 + Style Setter)
+        usages: Dict[str, List[Tuple[Dict[str, Any], str]]] = {}
+        for node in self._iter_nodes(root):
+            bound = node.attributes.get('_bindings', ())
+            for key, value in node.attributes.items():
+                if key in self.BRUSH_PROPERTIES and key not in bound and self._is_color(value):
+                    usages.setdefault(str(value).upper(), []).append((node.attributes, key))
+        for style in styles:
+            for setter in style.children:
+                if setter.attributes['Property'] in self.BRUSH_PROPERTIES and self._is_color(setter.attributes['Value']):
+                    usages.setdefault(str(setter.attributes['Value']).upper(), []).append((setter.attributes, 'Value'))
+
+        # 第二遍: 生成画刷并替换为 StaticResource
+        brushes = []
+        for color, refs in sorted(usages.items()):
+            if len(refs) < self.threshold:
+                continue
+
+            brush_key = f"Brush{color[1:]}"
+            brushes.append(WpfNode(type='SolidColorBrush', attributes={'x:Key': brush_key, 'Color': color}))
+
+            for attributes, key in refs:
+                attributes[key] = f"{{StaticResource {brush_key}}}"
+            self.stats['replaced_attributes'] += len(refs)
+
+        self.stats['brushes'] = len(brushes)
+        return brushes
+
+    def _is_color(self, value: Any) -> bool:
+        """判断属性值是否为 #RRGGBB / #AARRGGBB 颜色"""
+        value = str(value)
+        if not value.startswith('#') or len(value) not in (7, 9):
+            return False
+        try:
+            int(value[1:], 16)
+            return True
+        except ValueError:
+            return False
@@ -0,0 +1,394 @@
+"""
+文本测量
+作用: 在构建 AST 之前批量测量所有 TEXT 节点的实际宽高,
+      找出固定尺寸 TextBlock 在字体回退后会溢出的情况,并标记或调整其尺寸
+
+字体度量来源 (按优先级):
+    1. 本地 TTF/OTF 字体 (需要安装 fontTools, 每个字体文件只解析一次)
+    2. 内置的字符类别宽度表 (近似值)
+度量结果按 (字体族, 字形, 字号) 缓存,并持久化到 JSON 文件
+"""
+import glob
+import math
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from src import json_io
+
+try:
+    from fontTools.ttLib import TTFont
+except ImportError:  # fontTools 是可选依赖
+    TTFont = None
+
+
+# 缓存文件格式版本 (结构变化时递增,旧缓存自动失效)
+CACHE_VERSION = 1
+
+# 默认缓存路径 (项目根目录下)
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'font_metrics.json')
+
+# 逐字符存储宽度的字符 (可打印 ASCII),其余字符按类别估算
+MEASURED_CHARS = ''.join(chr(c) for c in range(32, 127))
+
+# 内置度量表: 各字符类别的平均宽度 (单位 em)
+#   ascent / descent / line_gap: 垂直度量 (em)
+BUNDLED_METRICS = {
+    'Segoe UI': {'ascent': 1.005, 'descent': 0.245, 'line_gap': 0.078,
+                 'space': 0.274, 'narrow': 0.24, 'lower': 0.52, 'upper': 0.64, 'digit': 0.56, 'wide': 0.86},
+    'Roboto': {'ascent': 0.928, 'descent': 0.244, 'line_gap': 0.0,
+               'space': 0.248, 'narrow': 0.24, 'lower': 0.53, 'upper': 0.64, 'digit': 0.56, 'wide': 0.84},
+    'Inter': {'ascent': 0.969, 'descent': 0.242, 'line_gap': 0.0,
+              'space': 0.281, 'narrow': 0.26, 'lower': 0.55, 'upper': 0.68, 'digit': 0.61, 'wide': 0.88},
+    'Arial': {'ascent': 0.905, 'descent': 0.212, 'line_gap': 0.033,
+              'space': 0.278, 'narrow': 0.24, 'lower': 0.53, 'upper': 0.67, 'digit': 0.556, 'wide': 0.86},
+    'Microsoft YaHei': {'ascent': 1.058, 'descent': 0.262, 'line_gap': 0.0,
+                        'space': 0.3, 'narrow': 0.26, 'lower': 0.55, 'upper': 0.66, 'digit': 0.59, 'wide': 0.9},
+}
+
+# 未知字体族使用的度量 (偏宽,宁可多报溢出)
+FALLBACK_FAMILY = 'Segoe UI'
+
+# 粗体相对常规字重的宽度系数 (内置度量表)
+BOLD_WIDTH_FACTOR = 1.06
+
+# 各平台的字体目录
+SYSTEM_FONT_DIRS = {
+    'win32': [os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'),
+              os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Microsoft', 'Windows', 'Fonts')],
+    'darwin': ['/System/Library/Fonts', '/Library/Fonts', os.path.expanduser('~/Library/Fonts')],
+    'linux': ['/usr/share/fonts', '/usr/local/share/fonts',
+              os.path.expanduser('~/.fonts'), os.path.expanduser('~/.local/share/fonts')],
+}
+
+_NARROW_CHARS = frozenset("iljI.,:;'!|`frt()[]{}/\\-\"")
+_WIDE_CHARS = frozenset('mwMW@%')
+
+
+def _is_fullwidth(char: str) -> bool:
+    """CJK / 全角字符 (宽度约 1em)"""
+    code = ord(char)
+    return (0x2E80 <= code <= 0x9FFF or 0xAC00 <= code <= 0xD7AF or
+            0xF900 <= code <= 0xFAFF or 0xFF00 <= code <= 0xFF60 or 0x20000 <= code <= 0x3FFFF)
+
+
+def _char_class(char: str) -> str:
+    """内置度量表中的字符类别"""
+    if char == ' ':
+        return 'space'
+    if char in _NARROW_CHARS:
+        return 'narrow'
+    if char in _WIDE_CHARS:
+        return 'wide'
+    if char.isdigit():
+        return 'digit'
+    if char.isupper():
+        return 'upper'
+    return 'lower'
+
+
+def _is_bold(style: str, weight: Any) -> bool:
+    """字形名或字重是否为粗体"""
+    style = style.lower()
+    return (isinstance(weight, (int, float)) and weight >= 600) or any(
+        word in style for word in ('bold', 'black', 'heavy', 'semibold', 'semi bold'))
+
+
+class TextMeasurer:
+    """批量文本测量器
+
+    用法:
+        measurer = TextMeasurer(mode='flag')
+        measurer.measure_tree(figma_root)   # 在 FigmaToWpfBuilder.build 之前调用
+
+    测量结果写入 Figma 节点的私有字段,由构建器使用:
+        _measured_size: (宽, 高)
+        _text_adjust:   {'Width': ..., 'Height': ...}  (mode='adjust' 时,放大溢出的尺寸)
+        _text_warning:  溢出说明 (mode='flag' 时,追加到 TextBlock 注释)
+    """
+
+    MODES = ('flag', 'adjust')
+
+    def __init__(
+        self,
+        mode: str = 'flag',
+        font_dirs: Optional[List[str]] = None,
+        cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+        tolerance: float = 1.0
+    ):
+        """初始化测量器
+
+        Args:
+            mode: 'flag' 只标记溢出, 'adjust' 把溢出的宽高放大到测量值
+            font_dirs: 额外的字体目录 (优先于系统字体目录)
+            cache_path: 持久化度量缓存路径 (None 表示不持久化)
+            tolerance: 允许的溢出像素 (小于等于该值不算溢出)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"未知的文本测量模式: {mode} (可选: {', '.join(self.MODES)})")
+        self.mode = mode
+        self.font_dirs = list(font_dirs or []) + SYSTEM_FONT_DIRS.get(sys.platform, SYSTEM_FONT_DIRS['linux'])
+        self.cache_path = cache_path
+        self.tolerance = tolerance
+        self.stats: Dict[str, int] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+        self._font_index: Optional[Dict[str, str]] = None
+        self._dirty = False
+        self._load_cache()
+
+    # ========== 持久化缓存 ==========
+
+    def _font_signature(self) -> str:
+        """字体来源签名: fontTools 可用性 + 字体目录的修改时间 (字体增删后缓存失效)"""
+        if TTFont is None:
+            return 'bundled'
+        parts = []
+        for directory in self.font_dirs:
+            if os.path.isdir(directory):
+                parts.append(f"{directory}:{os.stat(directory).st_mtime_ns}")
+        return 'fonttools;' + ';'.join(parts)
+
+    def _load_cache(self) -> None:
+        """读取持久化缓存 (版本或字体签名不一致时丢弃)"""
+        self._signature = self._font_signature()
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            data = json_io.load(self.cache_path)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != CACHE_VERSION or data.get('signature') != self._signature:
+            return
+        self._metrics = data.get('metrics', {})
+        self._font_index = data.get('fonts')
+
+    def save_cache(self) -> None:
+        """把新测量的度量写回缓存文件"""
+        if not self.cache_path or not self._dirty:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {
+            'version': CACHE_VERSION,
+            'signature': self._signature,
+            'fonts': self._font_index,
+            'metrics': self._metrics,
+        }
+        json_io.dump(data, self.cache_path)
+        self._dirty = False
+
+    def cache_stats(self) -> Dict[str, int]:
+        """度量缓存命中统计"""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses, 'size': len(self._metrics)}
+
+    # ========== 字体度量 ==========
+
+    def _scan_fonts(self) -> Dict[str, str]:
+        """建立 "字体族|字形" → 字体文件 的索引 (只读取 name 表)"""
+        index: Dict[str, str] = {}
+        for directory in self.font_dirs:
+            if not os.path.isdir(directory):
+                continue
+            for pattern in ('**/*.ttf', '**/*.otf', '**/*.TTF', '**/*.OTF'):
+                for path in sorted(glob.glob(os.path.join(directory, pattern), recursive=True)):
+                    try:
+                        font = TTFont(path, lazy=True)
+                        names = font['name']
+                        family = names.getDebugName(16) or names.getDebugName(1)
+                        style = names.getDebugName(17) or names.getDebugName(2) or 'Regular'
+                        font.close()
+                    except Exception:
+                        continue
+                    if family:
+                        index.setdefault(f"{family}|{style}".lower(), path)
+        return index
+
+    def _font_path(self, family: str, style: str) -> Optional[str]:
+        """查找字体文件 (找不到指定字形时回退到 Regular)"""
+        if TTFont is None:
+            return None
+        if self._font_index is None:
+            self._font_index = self._scan_fonts()
+            self._dirty = True
+        return (self._font_index.get(f"{family}|{style}".lower()) or
+                self._font_index.get(f"{family}|regular".lower()))
+
+    def _metrics_from_font(self, path: str, size: float) -> Dict[str, Any]:
+        """从字体文件读取度量并缩放到字号"""
+        font = TTFont(path, lazy=True)
+        try:
+            scale = size / font['head'].unitsPerEm
+            cmap = font.getBestCmap() or {}
+            hmtx = font['hmtx']
+            hhea = font['hhea']
+
+            def advance(char: str) -> Optional[float]:
+                glyph = cmap.get(ord(char))
+                return hmtx[glyph][0] * scale if glyph in hmtx.metrics else None
+
+            advances = {char: advance(char) for char in MEASURED_CHARS}
+            lower = [w for c, w in advances.items() if c.islower() and w is not None]
+            default = sum(lower) / len(lower) if lower else size * 0.5
+            fullwidth = advance('中') or size
+            return {
+                'advances': {c: round(w, 3) for c, w in advances.items() if w is not None},
+                'default': round(default, 3),
+                'fullwidth': round(fullwidth, 3),
+                'ascent': hhea.ascent * scale,
+                'descent': -hhea.descent * scale,
+                'line_gap': hhea.lineGap * scale,
+                'source': os.path.basename(path),
+            }
+        finally:
+            font.close()
+
+    def _metrics_from_table(self, family: str, bold: bool, size: float) -> Dict[str, Any]:
+        """从内置度量表估算"""
+        table = BUNDLED_METRICS.get(family, BUNDLED_METRICS[FALLBACK_FAMILY])
+        factor = size * (BOLD_WIDTH_FACTOR if bold else 1.0)
+        return {
+            'advances': {c: round(table[_char_class(c)] * factor, 3) for c in MEASURED_CHARS},
+            'default': round(table['lower'] * factor, 3),
+            'fullwidth': float(size),
+            'ascent': table['ascent'] * size,
+            'descent': table['descent'] * size,
+            'line_gap': table['line_gap'] * size,
+            'source': 'table' if family in BUNDLED_METRICS else f"table:{FALLBACK_FAMILY}",
+        }
+
+    def get_metrics(self, family: str, style: str, size: float, weight: Any = 400) -> Dict[str, Any]:
+        """取得 (字体族, 字形, 字号) 的度量,优先使用缓存"""
+        key = f"{family}|{style}|{size:g}|{'bold' if _is_bold(style, weight) else 'regular'}"
+        metrics = self._metrics.get(key)
+        if metrics is not None:
+            self.cache_hits += 1
+            return metrics
+
+        self.cache_misses += 1
+        path = self._font_path(family, style)
+        metrics = None
+        if path:
+            try:
+                metrics = self._metrics_from_font(path, size)
+            except Exception:
+                metrics = None
+        if metrics is None:
+            metrics = self._metrics_from_table(family, _is_bold(style, weight), size)
+        self._metrics[key] = metrics
+        self._dirty = True
+        return metrics
+
+    # ========== 测量 ==========
+
+    @staticmethod
+    def _letter_spacing(node: Dict[str, Any], size: float) -> float:
+        """字间距 (像素)"""
+        spacing = node.get('letterSpacing')
+        if isinstance(spacing, dict):
+            value = spacing.get('value', 0) or 0
+            return value * size / 100 if spacing.get('unit') == 'PERCENT' else value
+        return spacing if isinstance(spacing, (int, float)) else 0
+
+    @staticmethod
+    def _line_height(node: Dict[str, Any], size: float, metrics: Dict[str, Any]) -> float:
+        """行高 (像素)"""
+        line_height = node.get('lineHeight')
+        if isinstance(line_height, dict):
+            unit = line_height.get('unit')
+            if unit == 'PIXELS':
+                return line_height.get('value', 0)
+            if unit == 'PERCENT':
+                return line_height.get('value', 100) * size / 100
+        return metrics['ascent'] + metrics['descent'] + metrics['line_gap']
+
+    def measure_text(self, text: str, metrics: Dict[str, Any], letter_spacing: float = 0) -> float:
+        """单行文本宽度"""
+        advances = metrics['advances']
+        default = metrics['default']
+        fullwidth = metrics['fullwidth']
+        width = 0.0
+        for char in text:
+            advance = advances.get(char)
+            if advance is None:
+                advance = fullwidth if _is_fullwidth(char) else default
+            width += advance
+        if len(text) > 1:
+            width += letter_spacing * (len(text) - 1)
+        return width
+
+    def measure_node(self, node: Dict[str, Any], metrics: Dict[str, Any]) -> Tuple[float, float]:
+        """TEXT 节点的 (宽, 高): 按换行符拆分,不做自动换行"""
+        size = node.get('fontSize', 12)
+        lines = str(node.get('characters', node.get('name', ''))).split('\n')
+        spacing = self._letter_spacing(node, size)
+        width = max(self.measure_text(line, metrics, spacing) for line in lines)
+        height = len(lines) * self._line_height(node, size, metrics)
+        return width, height
+
+    def measure_tree(self, root: Dict[str, Any]) -> Dict[str, int]:
+        """测量整棵树中的所有 TEXT 节点
+
+        先收集全部文本节点并按字体分组,每种字体只解析一次度量
+
+        Args:
+            root: Figma 根节点 (会被就地标注)
+
+        Returns:
+            统计信息
+        """
+        groups: Dict[Tuple[str, str, float, Any], List[Dict[str, Any]]] = {}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.get('type') == 'TEXT':
+                font_name = node.get('fontName') or {}
+                key = (
+                    font_name.get('family', 'Segoe UI'),
+                    font_name.get('style', 'Regular'),
+                    node.get('fontSize', 12),
+                    node.get('fontWeight', 400),
+                )
+                groups.setdefault(key, []).append(node)
+            stack.extend(node.get('children', []))
+
+        self.stats = {'measured': 0, 'overflow_width': 0, 'overflow_height': 0, 'fonts': len(groups)}
+        for (family, style, size, weight), nodes in groups.items():
+            metrics = self.get_metrics(family, style, size, weight)
+            for node in nodes:
+                self._check_node(node, metrics)
+        self.save_cache()
+        return self.stats
+
+    def _check_node(self, node: Dict[str, Any], metrics: Dict[str, Any]) -> None:
+        """比较测量值与 TextBlock 将要输出的固定尺寸"""
+        width, height = self.measure_node(node, metrics)
+        node['_measured_size'] = (width, height)
+        self.stats['measured'] += 1
+
+        overflow = {}
+        # 与 FigmaToWpfBuilder._build_text 一致: 非 HUG 时输出固定 Width / Height
+        if node.get('layoutSizingHorizontal', 'FIXED') != 'HUG' and node.get('width'):
+            if width > node['width'] + self.tolerance:
+                overflow['Width'] = width
+                self.stats['overflow_width'] += 1
+        if node.get('layoutSizingVertical', 'FIXED') != 'HUG' and node.get('height'):
+            if height > node['height'] + self.tolerance:
+                overflow['Height'] = height
+                self.stats['overflow_height'] += 1
+        if not overflow:
+            return
+
+        if self.mode == 'adjust':
+            node['_text_adjust'] = {name: str(math.ceil(value)) for name, value in overflow.items()}
+        else:
+            node['_text_warning'] = '文本溢出: ' + ', '.join(
+                f"{name} {math.ceil(value)} > {node[name.lower()]}" for name, value in overflow.items())
+
+    def format_stats(self) -> str:
+        """格式化统计信息"""
+        return (f"测量 {self.stats.get('measured', 0)} 个文本 ({self.stats.get('fonts', 0)} 种字体), "
+                f"宽度溢出 {self.stats.get('overflow_width', 0)}, 高度溢出 {self.stats.get('overflow_height', 0)}")
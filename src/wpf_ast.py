@@ -6,6 +6,10 @@ from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 
 
+# 不参与 Style 提取的节点类型 (未知节点; 组件引用的元素名不是 AST 类型,无法作为 TargetType)
+UNSTYLED_TYPES = frozenset({'Unknown', 'ComponentReference'})
+
+
 @dataclass
 class WpfNode:
     """WPF AST 节点基类
@@ -52,29 +56,23 @@ class WpfNode:
             del self.attributes[name]
     
     def optimize(self) -> 'WpfNode':
-        """优化 AST 节点
+        """优化以本节点为根的子树
         
-        根据 optimization_level 进行不同程度的优化
+        按 _optimization_level 调用 ASTOptimizer (不加载默认值表)
         Returns:
             优化后的节点 (可能是自己,也可能被替换)
         """
-        if self._optimization_level == 0:
-            # 不优化,直接返回
-            # 但仍需递归优化子节点
-            for i, child in enumerate(self.children):
-                self.children[i] = child.optimize()
-            return self
-        
-        # 未来可以添加优化逻辑
-        # 例如:
-        # - Level 1: 去除默认值属性
-        # - Level 2: 合并嵌套容器 (需要谨慎)
-        
-        # 递归优化子节点
-        for i, child in enumerate(self.children):
-            self.children[i] = child.optimize()
-        
-        return self
+        return ASTOptimizer(self._optimization_level).optimize(self)
+    
+    def count_elements(self) -> int:
+        """统计以本节点为根的元素数量 (包含自己)"""
+        count = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children)
+        return count
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典 (用于 JSON 序列化或模板渲染)
@@ -106,18 +104,37 @@ class ASTOptimizer:
     """AST 优化器
     
     对 WPF AST 进行优化,提升生成的 XAML 质量
+    
+    每一遍都是对树的一次线性遍历:
+    - Level 1: 去除默认值属性 + 折叠单子元素 StackPanel
+    - Level 2: 在 Level 1 基础上合并 Border 与子容器 + 提取隐式 Style
     """
     
-    def __init__(self, optimization_level: int = 0):
+    # 可以承载 Border 属性的容器类型
+    PANEL_TYPES = ('StackPanel', 'Grid', 'WrapPanel')
+    
+    # Border 合并到子容器时允许转移的属性 (容器都支持这些属性)
+    MERGEABLE_ATTRIBUTES = {'Width', 'Height', 'Background', 'Margin', 'HorizontalAlignment', 'VerticalAlignment'}
+    
+    # 影响子元素尺寸/外观的属性 (子元素自带对齐时不能转移)
+    SIZING_ATTRIBUTES = {'Width', 'Height', 'Background'}
+    
+    # 不能提取到隐式 Style 的属性
+    NON_STYLE_ATTRIBUTES = {'Text', 'x:Name', 'Style'}
+    
+    def __init__(self, optimization_level: int = 0, wpf_defaults: Optional[Dict[str, Dict[str, Any]]] = None):
         """初始化优化器
         
         Args:
             optimization_level: 优化等级
                 0 = 不优化 (第一版使用)
-                1 = 基础优化 (去除默认值)
-                2 = 激进优化 (合并容器,需谨慎)
+                1 = 基础优化 (去除默认值,折叠单子元素 StackPanel)
+                2 = 激进优化 (合并容器,提取隐式 Style,需谨慎)
+            wpf_defaults: WPF 默认值表 (wpf_defaults.yaml 的内容)
         """
         self.level = optimization_level
+        self.wpf_defaults = wpf_defaults or {}
+        self.stats: Dict[str, int] = {}
     
     def optimize(self, root: WpfNode) -> WpfNode:
         """优化整个 AST 树
@@ -128,17 +145,205 @@ class ASTOptimizer:
         Returns:
             优化后的根节点
         """
-        # 设置优化等级
-        self._set_optimization_level(root, self.level)
+        self.stats = {
+            'elements_before': root.count_elements(),
+            'removed_defaults': 0,
+            'collapsed_stackpanels': 0,
+            'merged_borders': 0,
+            'hoisted_setters': 0,
+        }
+        
+        if self.level > 0:
+            root = self._optimize_subtree(root)
+            if self.level >= 2:
+                self._hoist_implicit_styles(root)
+        
+        root._optimization_level = self.level
+        self.stats['elements_after'] = root.count_elements()
+        return root
+    
+    def format_stats(self) -> str:
+        """格式化优化统计 (元素数量变化)"""
+        before = self.stats.get('elements_before', 0)
+        after = self.stats.get('elements_after', before)
+        reduction = (1 - after / before) * 100 if before else 0
+        return (
+            f"元素数: {before} → {after} (-{reduction:.1f}%), "
+            f"默认值 {self.stats.get('removed_defaults', 0)}, "
+            f"折叠 StackPanel {self.stats.get('collapsed_stackpanels', 0)}, "
+            f"合并 Border {self.stats.get('merged_borders', 0)}, "
+            f"Style Setter {self.stats.get('hoisted_setters', 0)}"
+        )
+    
+    def _optimize_subtree(self, root: WpfNode) -> WpfNode:
+        """后序遍历 (显式栈): 先优化子节点,再优化自己"""
+        holder = [root]
+        # 栈元素: (节点, 所在列表, 下标, 子节点是否已处理)
+        stack = [(root, holder, 0, False)]
+        while stack:
+            node, siblings, index, visited = stack.pop()
+            if not visited:
+                stack.append((node, siblings, index, True))
+                for i in range(len(node.children) - 1, -1, -1):
+                    stack.append((node.children[i], node.children, i, False))
+                continue
+            
+            self._drop_default_attributes(node)
+            node = self._collapse_single_child_stackpanel(node)
+            
+            if self.level >= 2:
+                node = self._merge_border_into_panel(node)
+            
+            siblings[index] = node
+        
+        return holder[0]
+    
+    def _drop_default_attributes(self, node: WpfNode) -> None:
+        """去除等于 WPF 默认值的属性 (Margin=0, Stretch 对齐等)"""
+        defaults = self.wpf_defaults.get(node.type)
+        if not defaults:
+            return
+        
+        bound = node.attributes.get('_bindings', ())
+        for key in [k for k, v in node.attributes.items()
+                    if k in defaults and str(v) == str(defaults[k]) and k not in bound]:
+            del node.attributes[key]
+            self.stats['removed_defaults'] += 1
+    
+    def _can_absorb(self, outer: WpfNode, inner: WpfNode, allowed: Optional[set] = None) -> bool:
+        """判断 outer 的属性能否无冲突地转移到 inner 上
+        
+        Args:
+            outer: 要被移除的外层节点
+            inner: 接收属性的内层节点
+            allowed: 允许转移的属性集合 (None 表示除私有属性外都允许)
+        """
+        if inner.type == 'Unknown':
+            return False
+        
+        for key, value in outer.attributes.items():
+            if key == 'Orientation' and outer.type == 'StackPanel':
+                continue
+            if key.startswith('_'):
+                return False
+            if allowed is not None and key not in allowed and '.' not in key:
+                return False
+            if key in inner.attributes and str(inner.attributes[key]) != str(value):
+                return False
         
-        # 执行优化
-        return root.optimize()
+        # 外层定尺寸/背景而内层自带对齐时,合并会改变视觉效果
+        outer_sized = any(key in outer.attributes for key in self.SIZING_ATTRIBUTES)
+        inner_aligned = 'HorizontalAlignment' in inner.attributes or 'VerticalAlignment' in inner.attributes
+        if inner_aligned and outer_sized:
+            return False
+        
+        # 两层的 Margin 是叠加的,合并成一个会丢掉一层偏移;
+        # 外层定尺寸/背景时内层的 Margin 在尺寸之内,合并后会移到尺寸之外 (元素偏移并变大)
+        if 'Margin' in inner.attributes and ('Margin' in outer.attributes or outer_sized):
+            return False
+        
+        return True
+    
+    def _absorb(self, outer: WpfNode, inner: WpfNode) -> WpfNode:
+        """把 outer 的属性和注释转移到 inner 上,返回 inner"""
+        for key, value in outer.attributes.items():
+            if key == 'Orientation' and outer.type == 'StackPanel':
+                continue
+            inner.attributes.setdefault(key, value)
+        
+        if not inner.comment:
+            inner.comment = outer.comment
+        
+        return inner
+    
+    def _collapse_single_child_stackpanel(self, node: WpfNode) -> WpfNode:
+        """折叠只有一个子元素的 StackPanel"""
+        if node.type != 'StackPanel' or len(node.children) != 1:
+            return node
+        
+        child = node.children[0]
+        if not self._can_absorb(node, child):
+            return node
+        
+        # StackPanel 沿排列方向按内容决定子元素尺寸,折叠后子元素会被父容器拉伸:
+        # 子元素没有固定该方向的尺寸/对齐时补上靠左 (靠上) 对齐,StackPanel 自身定尺寸时不折叠
+        if node.attributes.get('Orientation') == 'Horizontal':
+            size_key, align_key, start = 'Width', 'HorizontalAlignment', 'Left'
+        else:
+            size_key, align_key, start = 'Height', 'VerticalAlignment', 'Top'
+        content_sized = size_key not in child.attributes and child.attributes.get(align_key, 'Stretch') == 'Stretch'
+        if content_sized and (size_key in node.attributes or node.attributes.get(align_key) == 'Stretch'):
+            return node
+        
+        self.stats['collapsed_stackpanels'] += 1
+        child = self._absorb(node, child)
+        if content_sized:
+            child.attributes[align_key] = node.attributes.get(align_key, start)
+        return child
+    
+    def _merge_border_into_panel(self, node: WpfNode) -> WpfNode:
+        """把只有布局属性的 Border 合并到唯一的子容器上"""
+        if node.type != 'Border' or len(node.children) != 1:
+            return node
+        
+        child = node.children[0]
+        if child.type not in self.PANEL_TYPES:
+            return node
+        if not self._can_absorb(node, child, allowed=self.MERGEABLE_ATTRIBUTES):
+            return node
+        
+        self.stats['merged_borders'] += 1
+        return self._absorb(node, child)
     
-    def _set_optimization_level(self, node: WpfNode, level: int) -> None:
-        """递归设置优化等级"""
-        node._optimization_level = level
-        for child in node.children:
-            self._set_optimization_level(child, level)
+    def _hoist_implicit_styles(self, root: WpfNode) -> None:
+        """把同类型所有元素都相同的属性提取为隐式 Style
+        
+        隐式 Style 会作用于该类型的所有元素,
+        所以只提取每个该类型元素上都出现且取值相同的属性
+        """
+        # 第一遍: 按类型收集公共属性
+        common: Dict[str, Dict[str, Any]] = {}
+        type_nodes: Dict[str, List[WpfNode]] = {}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children)
+            if node.type in UNSTYLED_TYPES:
+                continue
+            
+            nodes = type_nodes.setdefault(node.type, [])
+            nodes.append(node)
+            # 绑定到组件属性的属性必须留在元素上
+            bound = node.attributes.get('_bindings', ())
+            if len(nodes) == 1:
+                common[node.type] = {
+                    k: v for k, v in node.attributes.items()
+                    if not k.startswith('_') and '.' not in k and k not in self.NON_STYLE_ATTRIBUTES and k not in bound
+                }
+            else:
+                shared = common[node.type]
+                for key in [k for k, v in shared.items() if k in bound or str(node.attributes.get(k)) != str(v)]:
+                    del shared[key]
+        
+        # 第二遍: 生成 Style 并移除内联属性
+        styles = []
+        for control_type, nodes in type_nodes.items():
+            shared = common[control_type]
+            if len(nodes) < 2 or not shared:
+                continue
+            
+            style = WpfNode(type='Style', attributes={'TargetType': control_type})
+            for key, value in shared.items():
+                style.add_child(WpfNode(type='Setter', attributes={'Property': key, 'Value': value}))
+            styles.append(style)
+            
+            for node in nodes:
+                for key in shared:
+                    del node.attributes[key]
+            self.stats['hoisted_setters'] += len(shared) * len(nodes)
+        
+        if styles:
+            root.attributes.setdefault('_resources', []).extend(styles)
 
 
 # 便捷构造函数
@@ -179,6 +384,14 @@ def create_wrappanel(
     return WpfNode(type='WrapPanel', comment=comment, attributes=attrs)
 
 
+def create_canvas(
+    comment: str = '',
+    **attributes
+) -> WpfNode:
+    """创建 Canvas 节点"""
+    return WpfNode(type='Canvas', comment=comment, attributes=attributes)
+
+
 def create_textblock(
     text: str,
     comment: str = '',
@@ -222,3 +435,29 @@ if __name__ == '__main__':
     optimized = optimizer.optimize(root)
     print("\n优化后:")
     print(optimized)
+    
+    # 测试合并时的几何检查: 以下两种情况合并都会移动元素,必须保留 Border
+    cases = [
+        (create_border(Margin='10'), create_stackpanel(Margin='10')),
+        (create_border(Width='100', Height='40'), create_stackpanel(Margin='8')),
+    ]
+    for outer, inner in cases:
+        outer.add_child(inner)
+        merged = ASTOptimizer(optimization_level=2).optimize(outer)
+        print(f"\n{outer} → {merged}")
+        assert merged is outer, "Margin 冲突时不应合并"
+    
+    # 单子元素 StackPanel 折叠使用同样的检查
+    panel = create_stackpanel(Width='100')
+    panel.add_child(create_textblock(text='Hello', Margin='8'))
+    assert ASTOptimizer(optimization_level=1).optimize(panel) is panel, "Margin 冲突时不应折叠"
+    
+    # 折叠后子元素仍按内容决定排列方向上的尺寸 (不被父容器拉伸)
+    row = create_stackpanel(Orientation='Horizontal')
+    row.add_child(create_border(Background='#FF0000'))
+    chip = ASTOptimizer(optimization_level=1).optimize(row)
+    assert chip.type == 'Border' and chip.attributes.get('HorizontalAlignment') == 'Left', "折叠后应靠左对齐"
+    sized = create_stackpanel(Orientation='Horizontal', Width='150')
+    sized.add_child(create_border(Background='#FF0000'))
+    assert ASTOptimizer(optimization_level=1).optimize(sized) is sized, "定宽 StackPanel 不应折叠"
+    print("✅ 合并检查通过")
@@ -0,0 +1,491 @@
+"""
+XAML 增量更新
+作用: 重新生成时不覆盖手工修改过的 XAML 文件,只修补设计中变化的部分
+
+渲染器在增量更新模式下为每个元素输出设计时属性 (mc:Ignorable,不影响运行):
+    d:FigmaId    对应的 Figma 节点 id (同一节点生成多个元素时加 #序号)
+    d:FigmaHash  生成的元素名、属性和属性元素的摘要
+    d:FigmaAttrs 每个生成的属性和属性元素的值摘要 (记录哪些属性是生成的,以及生成时的值)
+修补时按 id 建立索引匹配新旧元素 (不做整树比较),所有修改以文本区间替换一次性应用:
+    摘要相同    → 设计没有变化,元素保持原样 (保留手工修改)
+    摘要不同    → 只写入值摘要变化的属性和属性元素,删除设计中不再生成的属性和属性元素
+                  (元素名、手工添加的属性和设计未变的手工修改保留)
+    新增的节点  → 插入到相邻的兄弟元素旁 (或父元素末尾)
+    删除的节点  → 删除元素及其注释
+没有 id 的元素 (手工添加的内容) 不会被修改
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.wpf_ast import WpfNode
+
+
+# 设计时属性名
+ID_ATTRIBUTE = 'd:FigmaId'
+HASH_ATTRIBUTE = 'd:FigmaHash'
+ATTRS_ATTRIBUTE = 'd:FigmaAttrs'
+
+# 设计时属性 (每次更新都写入)
+DESIGN_ATTRIBUTES = (ID_ATTRIBUTE, HASH_ATTRIBUTE, ATTRS_ATTRIBUTE)
+
+# 根元素上随设计同步的属性 (x:Class 等其余属性只补充缺失的)
+ROOT_SYNC_ATTRIBUTES = ('d:DesignWidth', 'd:DesignHeight')
+
+# 子元素缩进
+INDENT = '    '
+
+# 词法单元: 注释 / CDATA / 处理指令 / 结束标签 / 开始标签 (属性值中可以有 > 等字符)
+_NAME = r'[\w:.\-]+'
+TOKEN = re.compile(
+    r'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>'
+    rf'|</(?P<close>{_NAME})\s*>'
+    rf'|<(?P<open>{_NAME})(?P<attrs>(?:\s+{_NAME}\s*=\s*(?:"[^"]*"|\'[^\']*\'))*)\s*(?P<empty>/?)>',
+    re.S)
+ATTRIBUTE = re.compile(rf'({_NAME})\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+# 文本区间替换: (起点, 终点, 新文本)
+Edit = Tuple[int, int, str]
+
+
+@dataclass
+class XamlElement:
+    """XAML 元素在文本中的位置"""
+    tag: str
+    start: int                      # '<' 的位置
+    lead: int                       # 紧挨在前面的注释起点 (没有注释时等于 start)
+    tag_end: int                    # 开始标签结束位置 ('>' 之后)
+    attr_end: int                   # 最后一个属性 (或标签名) 之后
+    self_closing: bool
+    attributes: Dict[str, Tuple[str, int, int]]   # 属性名 → (值, 值起点, 值终点)
+    parent: Optional[int]
+    close_start: int = 0            # 结束标签的位置 (自闭合时等于 tag_end)
+    end: int = 0                    # 元素结束位置
+    children: List[int] = field(default_factory=list)
+
+    def get(self, name: str) -> Optional[str]:
+        """属性值"""
+        value = self.attributes.get(name)
+        return value[0] if value else None
+
+
+def parse_xaml(text: str) -> List[XamlElement]:
+    """扫描 XAML 文本,按文档顺序 (前序) 返回所有元素,第一个为根元素
+
+    只识别标签结构 (一次正则扫描, O(n)),不解码实体也不校验命名空间
+
+    Raises:
+        ValueError: 标签不配对
+    """
+    elements: List[XamlElement] = []
+    stack: List[int] = []
+    comment: Optional[Tuple[int, int]] = None
+    for match in TOKEN.finditer(text):
+        close, tag = match.group('close'), match.group('open')
+        if close is None and tag is None:
+            if text.startswith('<!--', match.start()):
+                comment = (match.start(), match.end())
+            continue
+
+        if close is not None:
+            if not stack or elements[stack[-1]].tag != close:
+                raise ValueError(f"结束标签 </{close}> 不配对 (位置 {match.start()})")
+            element = elements[stack.pop()]
+            element.close_start = match.start()
+            element.end = match.end()
+            comment = None
+            continue
+
+        lead = match.start()
+        if comment is not None and not text[comment[1]:match.start()].strip():
+            lead = comment[0]
+        comment = None
+
+        attributes = {}
+        for attr in ATTRIBUTE.finditer(text, match.start('attrs'), match.end('attrs')):
+            group = 2 if attr.group(2) is not None else 3
+            attributes[attr.group(1)] = (attr.group(group), attr.start(group), attr.end(group))
+        attr_end = match.end('attrs') if attributes else match.end('open')
+
+        parent = stack[-1] if stack else None
+        self_closing = bool(match.group('empty'))
+        element = XamlElement(tag, match.start(), lead, match.end(), attr_end, self_closing, attributes, parent)
+        if self_closing:
+            element.close_start = element.end = match.end()
+        if parent is not None:
+            elements[parent].children.append(len(elements))
+        elif elements:
+            raise ValueError(f"文档有多个根元素 (位置 {match.start()})")
+        elements.append(element)
+        if not self_closing:
+            stack.append(len(elements) - 1)
+
+    if stack:
+        raise ValueError(f"元素 <{elements[stack[-1]].tag}> 没有结束标签")
+    if not elements:
+        raise ValueError("没有找到 XAML 元素")
+    return elements
+
+
+def attribute_digests(element: XamlElement) -> Optional[Dict[str, str]]:
+    """d:FigmaAttrs 记录的 {属性名或属性元素名: 值摘要} (旧版本生成的元素没有该属性时返回 None)"""
+    value = element.get(ATTRS_ATTRIBUTE)
+    if value is None:
+        return None
+    return dict(item.split('=', 1) for item in value.split() if '=' in item)
+
+
+def design_ids(root: WpfNode, sources: Dict[int, Any]) -> Dict[int, str]:
+    """为有来源 Figma 节点的元素分配设计时 id
+
+    前序遍历中第一个元素使用 Figma 节点 id,同一节点生成的其他元素 (如 Frame 的内层面板) 加 #序号
+
+    Args:
+        root: AST 根节点
+        sources: 构建器记录的源节点表 {id(AST 节点): (AST 节点, Figma 节点)}
+
+    Returns:
+        {id(AST 节点): 设计时 id}
+    """
+    ids: Dict[int, str] = {}
+    counts: Dict[str, int] = {}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        stack.extend(reversed(node.children))
+        source = sources.get(id(node))
+        if source is None or source[0] is not node or not source[1].get('id'):
+            continue
+        figma_id = str(source[1]['id'])
+        count = counts.get(figma_id, 0)
+        counts[figma_id] = count + 1
+        ids[id(node)] = f"{figma_id}#{count}" if count else figma_id
+    return ids
+
+
+def _indent_at(text: str, position: int) -> str:
+    """position 所在行的缩进 (position 前面不全是空白时返回空串)"""
+    line_start = text.rfind('\n', 0, position) + 1
+    prefix = text[line_start:position]
+    return prefix if not prefix.strip() else ''
+
+
+def _reindent(block: str, source: str, target: str) -> str:
+    """把块中第二行起的缩进从 source 换成 target (第一行由调用方定位)"""
+    if source == target:
+        return block
+    lines = block.split('\n')
+    return '\n'.join([lines[0]] + [target + line[len(source):] if line.startswith(source) else line
+                                   for line in lines[1:]])
+
+
+class XamlPatcher:
+    """按设计时 id 增量修补已有的 XAML 文件"""
+
+    def __init__(self):
+        """初始化修补器"""
+        self.stats: Dict[str, int] = {}
+
+    def patch(self, existing: str, generated: str) -> str:
+        """把新生成的 XAML 中设计变化的部分合并到已有文件
+
+        Args:
+            existing: 已有的 (可能手工修改过的) XAML
+            generated: 新生成的 XAML (带设计时 id)
+
+        Returns:
+            修补后的 XAML
+
+        Raises:
+            ValueError: 已有文件无法解析
+        """
+        self.stats = {'unchanged': 0, 'updated': 0, 'inserted': 0, 'removed': 0, 'skipped': 0}
+        self._old_text, self._new_text = existing, generated
+        self._old, self._new = parse_xaml(existing), parse_xaml(generated)
+        self._edits: List[Edit] = []
+
+        old_ids = self._index(self._old)
+        new_ids = self._index(self._new)
+        old_scope = {key: self._scope(self._old, index) for key, index in old_ids.items()}
+        new_scope = {key: self._scope(self._new, index) for key, index in new_ids.items()}
+
+        # 删除: 设计中已不存在,或移动到了其他父节点 (在新位置重新插入)
+        removed_until = -1
+        for key, index in old_ids.items():
+            element = self._old[index]
+            if element.start < removed_until:
+                continue
+            if key not in new_ids or new_scope[key] != old_scope[key]:
+                self._remove(element)
+                removed_until = element.end
+        self._alive = {key: index for key, index in old_ids.items()
+                       if key in new_ids and new_scope[key] == old_scope[key]
+                       and not self._inside_removed(self._old[index].start)}
+
+        self._patch_root()
+
+        # 更新和插入 (插入的子树中的元素随子树一起插入)
+        inserted_until = -1
+        for key, index in new_ids.items():
+            element = self._new[index]
+            if element.start < inserted_until:
+                continue
+            if key in self._alive:
+                self._update(self._old[self._alive[key]], element)
+            elif self._insert(index):
+                inserted_until = element.end
+
+        return self._apply()
+
+    def format_stats(self) -> str:
+        """格式化统计信息"""
+        stats = self.stats
+        text = (f"更新 {stats.get('updated', 0)} 个元素, 新增 {stats.get('inserted', 0)}, "
+                f"删除 {stats.get('removed', 0)}, 未变 {stats.get('unchanged', 0)}")
+        if stats.get('skipped'):
+            text += f", 无法定位 {stats['skipped']}"
+        return text
+
+    # ========== 索引 ==========
+
+    @staticmethod
+    def _index(elements: List[XamlElement]) -> Dict[str, int]:
+        """设计时 id → 元素下标 (文档顺序)"""
+        return {element.get(ID_ATTRIBUTE): index for index, element in enumerate(elements)
+                if ID_ATTRIBUTE in element.attributes}
+
+    @staticmethod
+    def _scope(elements: List[XamlElement], index: int) -> Optional[str]:
+        """最近的带 id 的祖先 (手工加一层包装不算移动)"""
+        parent = elements[index].parent
+        while parent is not None:
+            key = elements[parent].get(ID_ATTRIBUTE)
+            if key is not None:
+                return key
+            parent = elements[parent].parent
+        return None
+
+    def _inside_removed(self, position: int) -> bool:
+        return any(start <= position < end for start, end, text in self._edits if not text)
+
+    # ========== 修改 ==========
+
+    def _update(self, old: XamlElement, new: XamlElement) -> None:
+        """摘要不同时写入设计中变化的属性、注释和属性元素
+
+        按 d:FigmaAttrs 逐个比较生成时的值摘要: 只写入摘要变化 (或新生成) 的属性,
+        删除上次生成而这次不再生成的属性; 没有记录的属性是手工添加的,保持原样。
+        旧版本生成的元素没有 d:FigmaAttrs,写入全部生成的属性
+        """
+        if old.get(HASH_ATTRIBUTE) == new.get(HASH_ATTRIBUTE):
+            self.stats['unchanged'] += 1
+            return
+        self.stats['updated'] += 1
+        old_digests, new_digests = attribute_digests(old), attribute_digests(new) or {}
+        if old_digests is None:
+            self._sync_attributes(old, new, list(new.attributes))
+        else:
+            changed = [name for name in new.attributes
+                       if name in DESIGN_ATTRIBUTES or new_digests.get(name) != old_digests.get(name)]
+            self._sync_attributes(old, new, changed)
+            self._remove_attributes(old, [name for name in old_digests
+                                          if name not in new_digests and name in old.attributes])
+
+        # 生成的注释 (如组件名、文本溢出说明)
+        if old.lead < old.start and new.lead < new.start:
+            old_comment = self._old_text[old.lead:self._old_text.index('-->', old.lead) + 3]
+            new_comment = self._new_text[new.lead:self._new_text.index('-->', new.lead) + 3]
+            if old_comment != new_comment:
+                self._edits.append((old.lead, old.lead + len(old_comment), new_comment))
+
+        # 属性元素 (如 Grid.RowDefinitions): 按属性名匹配整体替换,不含带 id 的子元素
+        for child_index in new.children:
+            child = self._new[child_index]
+            if '.' not in child.tag or self._has_ids(self._new, child_index):
+                continue
+            suffix = child.tag.split('.', 1)[1]
+            if old_digests is not None and new_digests.get(suffix) == old_digests.get(suffix):
+                continue
+            block = self._new_text[child.lead:child.end]
+            match = next((self._old[i] for i in old.children
+                          if '.' in self._old[i].tag and self._old[i].tag.split('.', 1)[1] == suffix), None)
+            if match is None:
+                self._insert_block(old, block, _indent_at(self._new_text, child.lead), first=True)
+            else:
+                block = _reindent(block, _indent_at(self._new_text, child.lead), _indent_at(self._old_text, match.lead))
+                if self._old_text[match.lead:match.end] != block:
+                    self._edits.append((match.lead, match.end, block))
+
+        # 设计中不再生成的属性元素
+        if old_digests is not None:
+            for child_index in old.children:
+                child = self._old[child_index]
+                if '.' not in child.tag or self._has_ids(self._old, child_index):
+                    continue
+                suffix = child.tag.split('.', 1)[1]
+                if suffix in old_digests and suffix not in new_digests:
+                    self._delete(child)
+
+    def _sync_attributes(self, old: XamlElement, new: XamlElement, names: List[str]) -> None:
+        """写入属性值: 已有的替换值,缺少的追加在最后一个属性之后 (沿用原文件的换行风格)"""
+        missing = []
+        for name in names:
+            value = new.attributes[name][0]
+            if name in old.attributes:
+                current, start, end = old.attributes[name]
+                if current != value:
+                    self._edits.append((start, end, value))
+            else:
+                missing.append(f'{name}="{value}"')
+        if not missing:
+            return
+        separator = ' '
+        if old.attributes:
+            last_start = max(old.attributes.values(), key=lambda a: a[1])[1]
+            name_start = self._old_text.rfind(' ', 0, last_start) + 1
+            name_start = max(name_start, self._old_text.rfind('\n', 0, last_start) + 1)
+            indent = _indent_at(self._old_text, name_start)
+            if indent:
+                separator = '\n' + indent
+        self._edits.append((old.attr_end, old.attr_end, ''.join(separator + attr for attr in missing)))
+
+    def _remove_attributes(self, old: XamlElement, names: List[str]) -> None:
+        """删除属性 (连同前面的空白和换行)"""
+        for name in names:
+            _, value_start, value_end = old.attributes[name]
+            start = self._old_text.rfind(name, old.start, value_start)
+            while start > 0 and self._old_text[start - 1] in ' \t\r\n':
+                start -= 1
+            self._edits.append((start, value_end + 1, ''))
+
+    def _patch_root(self) -> None:
+        """根元素: 同步设计尺寸,补充缺少的命名空间声明;资源按 x:Key / TargetType 同步"""
+        old_root, new_root = self._old[0], self._new[0]
+        names = [name for name in new_root.attributes
+                 if name in ROOT_SYNC_ATTRIBUTES or name not in old_root.attributes]
+        self._sync_attributes(old_root, new_root, names)
+
+        for index in new_root.children:
+            section = self._new[index]
+            if not section.tag.endswith(('.Resources', '.Styles')):
+                continue
+            match = next((self._old[i] for i in old_root.children if self._old[i].tag == section.tag), None)
+            if match is None:
+                block = self._new_text[section.lead:section.end]
+                self._edits.append((old_root.tag_end, old_root.tag_end, '\n\n' + INDENT + block))
+                continue
+            old_resources = {self._resource_key(self._old[i]): self._old[i] for i in match.children}
+            for resource_index in section.children:
+                resource = self._new[resource_index]
+                block = self._new_text[resource.lead:resource.end]
+                existing = old_resources.get(self._resource_key(resource))
+                if existing is None:
+                    self._insert_block(match, block, _indent_at(self._new_text, resource.lead), first=False)
+                elif self._old_text[existing.lead:existing.end] != block:
+                    self._edits.append((existing.lead, existing.end, block))
+
+    @staticmethod
+    def _resource_key(element: XamlElement) -> Tuple[str, Optional[str]]:
+        return element.tag, element.get('x:Key') or element.get('TargetType') or element.get('Selector')
+
+    def _has_ids(self, elements: List[XamlElement], index: int) -> bool:
+        """子树中是否有带 id 的元素"""
+        stack = list(elements[index].children)
+        while stack:
+            child = elements[stack.pop()]
+            if ID_ATTRIBUTE in child.attributes:
+                return True
+            stack.extend(child.children)
+        return False
+
+    def _insert(self, index: int) -> bool:
+        """插入新节点: 放在前一个 (或后一个) 仍存在的兄弟元素旁,都没有时放在父元素末尾
+
+        Returns:
+            是否插入 (父元素不在原文件中时跳过)
+        """
+        element = self._new[index]
+        parent_index = element.parent
+        if parent_index is None:
+            self.stats['skipped'] += 1
+            return False
+        parent = self._new[parent_index]
+        parent_key = parent.get(ID_ATTRIBUTE)
+        if parent_index == 0:
+            old_parent = self._old[0]
+        elif parent_key in self._alive:
+            old_parent = self._old[self._alive[parent_key]]
+        else:
+            self.stats['skipped'] += 1
+            return False
+
+        block = self._new_text[element.lead:element.end]
+        source_indent = _indent_at(self._new_text, element.lead)
+        siblings = parent.children
+        position = siblings.index(index)
+        for sibling_index in reversed(siblings[:position]):
+            anchor = self._alive.get(self._new[sibling_index].get(ID_ATTRIBUTE))
+            if anchor is not None:
+                anchor = self._old[anchor]
+                indent = _indent_at(self._old_text, anchor.lead)
+                self._edits.append((anchor.end, anchor.end, '\n' + indent + _reindent(block, source_indent, indent)))
+                self.stats['inserted'] += 1
+                return True
+        for sibling_index in siblings[position + 1:]:
+            anchor = self._alive.get(self._new[sibling_index].get(ID_ATTRIBUTE))
+            if anchor is not None:
+                anchor = self._old[anchor]
+                indent = _indent_at(self._old_text, anchor.lead)
+                self._edits.append((anchor.lead, anchor.lead, _reindent(block, source_indent, indent) + '\n' + indent))
+                self.stats['inserted'] += 1
+                return True
+        self._insert_block(old_parent, block, source_indent, first=False)
+        self.stats['inserted'] += 1
+        return True
+
+    def _insert_block(self, parent: XamlElement, block: str, source_indent: str, first: bool) -> None:
+        """把块插入父元素的开头或末尾 (自闭合的父元素改为开始/结束标签)"""
+        parent_indent = _indent_at(self._old_text, parent.lead)
+        indent = parent_indent + INDENT
+        block = _reindent(block, source_indent, indent)
+        if parent.self_closing:
+            tag_close = self._old_text.rindex('/', parent.attr_end, parent.tag_end)
+            self._edits.append((tag_close, parent.tag_end,
+                                f">\n{indent}{block}\n{parent_indent}</{parent.tag}>"))
+        elif first:
+            self._edits.append((parent.tag_end, parent.tag_end, f"\n{indent}{block}"))
+        else:
+            line_start = parent.close_start
+            while line_start > parent.tag_end and self._old_text[line_start - 1] in ' \t':
+                line_start -= 1
+            if self._old_text[line_start - 1] == '\n':
+                self._edits.append((line_start, line_start, f"{indent}{block}\n"))
+            else:
+                self._edits.append((parent.close_start, parent.close_start, f"\n{indent}{block}\n{parent_indent}"))
+
+    def _remove(self, element: XamlElement) -> None:
+        """删除元素和前面的注释 (连同所在行的缩进和换行)"""
+        self._delete(element)
+        self.stats['removed'] += 1
+
+    def _delete(self, element: XamlElement) -> None:
+        """删除元素 (或属性元素) 的文本区间"""
+        start = element.lead
+        while start > 0 and self._old_text[start - 1] in ' \t':
+            start -= 1
+        if start > 0 and self._old_text[start - 1] == '\n':
+            start -= 1
+        self._edits.append((start, element.end, ''))
+
+    def _apply(self) -> str:
+        """按位置一次性应用所有修改 (同一位置的插入保持生成顺序; 与已删除区间重叠的修改丢弃)"""
+        pieces = []
+        cursor = 0
+        for start, end, text in sorted(self._edits, key=lambda edit: (edit[0], edit[1])):
+            if start < cursor:
+                continue
+            pieces.append(self._old_text[cursor:start])
+            pieces.append(text)
+            cursor = end
+        pieces.append(self._old_text[cursor:])
+        return ''.join(pieces)
@@ -3,24 +3,104 @@ XAML 渲染器
 作用: 使用 Python 字符串拼接将 WPF AST 渲染为 XAML 字符串
 """
 from src.wpf_ast import WpfNode
-from typing import List, Dict, Any
+from src.dialects import Dialect
+from src.source_map import SourceMap
+from dataclasses import dataclass
+from typing import List, Dict, Any, Callable, Generator, Iterator, Optional, Tuple
+from xml.sax.saxutils import quoteattr
+import hashlib
 import yaml
 from pathlib import Path
 
 
+# 最大缩进层数 (XAML 中空白无意义,再深的嵌套保持同一缩进)
+MAX_INDENT_LEVEL = 64
+
+# 各缩进级别的缩进字符串
+INDENTS = tuple('    ' * level for level in range(MAX_INDENT_LEVEL + 1))
+
+# 容器控件的渲染过程: 写完开始标签后 yield (子节点, 缩进级别),全部子节点写完后写结束标签
+RenderTask = Generator[Tuple[WpfNode, int], None, None]
+
+# 内容模型
+CHILDREN = 'children'   # 总是写开始/结束标签
+OPTIONAL = 'optional'   # 没有子元素时自闭合
+EMPTY = 'empty'         # 总是自闭合
+
+# 属性元素: (内部属性, 属性元素名, 条目元素名, 条目属性名)
+PropertyElement = Tuple[str, str, str, str]
+
+
+@dataclass(frozen=True)
+class ElementSpec:
+    """元素渲染规格 (通用渲染器据此输出元素)"""
+    content: str = CHILDREN
+    property_elements: Tuple[PropertyElement, ...] = ()
+    item_template: bool = False   # 子元素放在 ItemTemplate/DataTemplate 中
+    tag_attribute: str = ''       # 元素名取自该内部属性 (如组件引用 local:Button)
+
+
+# 元素规格表: 新增控件只需在这里登记
+ELEMENT_SPECS: Dict[str, ElementSpec] = {
+    'Border': ElementSpec(content=OPTIONAL),
+    'Grid': ElementSpec(property_elements=(
+        ('_row_definitions', 'RowDefinitions', 'RowDefinition', 'Height'),
+        ('_column_definitions', 'ColumnDefinitions', 'ColumnDefinition', 'Width'),
+    )),
+    'StackPanel': ElementSpec(),
+    'WrapPanel': ElementSpec(),
+    'TextBlock': ElementSpec(content=EMPTY),
+    'ItemsControl': ElementSpec(item_template=True),
+    'Canvas': ElementSpec(),
+    'Ellipse': ElementSpec(content=EMPTY),
+    'Line': ElementSpec(content=EMPTY),
+    'Path': ElementSpec(content=EMPTY),
+    'ComponentReference': ElementSpec(content=EMPTY, tag_attribute='_element'),
+}
+
+
 class XamlRenderer:
     """XAML 渲染器
     
-    使用纯 Python 字符串拼接渲染 WPF AST
+    使用纯 Python 字符串拼接渲染 WPF AST,
+    元素名、属性和默认值按目标方言 (config/targets/) 映射
     """
     
-    def __init__(self, config_dir: str = 'config'):
+    def __init__(self, config_dir: str = 'config', target: str = 'wpf'):
         """初始化渲染器
         
         Args:
             config_dir: 配置文件目录
+            target: 目标方言 ('wpf' / 'avalonia' / 'maui')
         """
         self.wpf_defaults = self._load_wpf_defaults(config_dir)
+        self.dialect = Dialect.load(target, config_dir)
+        self.target = self.dialect.name
+        
+        # 设计时 id {id(节点): Figma 节点 id} (增量更新模式由转换器设置,None 表示不输出)
+        self.design_ids: Optional[Dict[int, str]] = None
+        
+        # 当前文档的源映射 (生成源映射时由转换器为每个文档设置,None 表示不收集)
+        self.source_map: Optional[SourceMap] = None
+        
+        # 当前文档 (组件) 绑定的组件属性 {属性名: 默认值},由 _begin_document 重置
+        self.component_properties: Dict[str, str] = {}
+        
+        # 当前文档的文档头行数,以及是否渲染过组件引用/设计时 id (由 _begin_document 重置)
+        self._header_end = 0
+        self._uses_components = False
+        self._uses_design_ids = False
+        
+        # 不支持 XmlDataProvider 的方言 (Avalonia / MAUI) 无法使用示例数据和 XPath 绑定,
+        # 虚拟化列表渲染为展开的列表项 (ListVirtualizer 保存在 ItemsControl 的 _expanded 中)
+        self.expand_lists = self.dialect.element_name('XmlDataProvider') is None
+        
+        # 资源元素 (单行属性格式) 的渲染方法
+        self._resource_renderers: Dict[str, Callable[[WpfNode, int, List[str]], None]] = {
+            'Style': self._render_style,
+            'SolidColorBrush': self._render_resource,
+            'XmlDataProvider': self._render_xmldataprovider,
+        }
     
     def _load_wpf_defaults(self, config_dir: str) -> Dict[str, Dict[str, Any]]:
         """加载 WPF 默认值配置
@@ -37,27 +117,6 @@ class XamlRenderer:
                 return yaml.safe_load(f) or {}
         return {}
     
-    def _is_default_value(self, control_type: str, attr_name: str, attr_value: str) -> bool:
-        """判断属性值是否为默认值
-        
-        Args:
-            control_type: 控件类型（如 'Border', 'Grid'）
-            attr_name: 属性名
-            attr_value: 属性值
-        
-        Returns:
-            True 表示是默认值，应该排除
-        """
-        if control_type not in self.wpf_defaults:
-            return False
-        
-        defaults = self.wpf_defaults[control_type]
-        if attr_name not in defaults:
-            return False
-        
-        default_value = str(defaults[attr_name])
-        return str(attr_value) == default_value
-    
     def render_usercontrol(
         self,
         root: WpfNode,
@@ -76,26 +135,108 @@ class XamlRenderer:
         Returns:
             XAML 字符串
         """
-        lines = []
+        lines: List[str] = []
+        self._begin_document(root, class_name, design_width, design_height, lines)
+        
+        # 渲染根节点
+        self._emit(root, 1, lines)
+        
+        self._end_document(lines)
+        return '\n'.join(lines)
+    
+    def iter_usercontrol(
+        self,
+        root: WpfNode,
+        class_name: str = 'FigmaControl',
+        design_width: int = 200,
+        design_height: int = 200,
+        chunk_lines: int = 256
+    ) -> Iterator[str]:
+        """逐块渲染完整的 UserControl,拼接结果与 render_usercontrol 相同
+        
+        文档头需要补充的命名空间在渲染前扫描确定,之后每写满 chunk_lines 行输出一块,
+        不必等整个文档渲染完 (不收集源映射)
+        
+        Yields:
+            XAML 片段
+        """
+        lines: List[str] = []
+        self._begin_document(root, class_name, design_width, design_height, lines)
+        self._uses_components, self._uses_design_ids = self._scan_namespaces(root)
+        self._insert_namespaces(lines)
+        
+        yield from self._emit_chunks(root, 1, lines, chunk_lines)
+        
+        lines.append(f'</{self.dialect.root_element}>')
+        yield '\n'.join(lines)
+    
+    def _scan_namespaces(self, root: WpfNode) -> Tuple[bool, bool]:
+        """渲染前确定文档是否用到组件引用 / 设计时 id (与渲染时的判断一致)"""
+        components = design = False
+        design_ids = self.design_ids or {}
+        stack = [root]
+        while stack:
+            node = self.content_node(stack.pop())
+            stack.extend(node.children)
+            spec = ELEMENT_SPECS.get(node.type)
+            if spec is None:
+                continue
+            if spec.tag_attribute:
+                components = True
+            elif id(node) in design_ids and self.dialect.element_name(node.type, node.attributes) is not None:
+                design = True
+        return components, design
+    
+    def _begin_document(self, root: WpfNode, class_name: str, design_width: Any, design_height: Any,
+                        lines: List[str]) -> None:
+        """写入文档头和资源"""
+        dialect = self.dialect
         
         # UserControl 头部
-        lines.append(f'<UserControl x:Class="YourNamespace.{class_name}"')
-        lines.append('             xmlns="http://schemas.microsoft.com/winfx/2006/xaml/presentation"')
-        lines.append('             xmlns:x="http://schemas.microsoft.com/winfx/2006/xaml"')
-        lines.append('             xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"')
-        lines.append('             xmlns:d="http://schemas.microsoft.com/expression/blend/2008"')
-        lines.append('             mc:Ignorable="d"')
-        lines.append(f'             d:DesignHeight="{design_height}" d:DesignWidth="{design_width}">')
+        lines.extend(dialect.header_lines(class_name, design_width, design_height))
+        self._header_end = len(lines)
+        self._uses_components = False
+        self._uses_design_ids = False
+        self.component_properties = {}
         lines.append('')
         
-        # 渲染根节点
-        root_xaml = self.render_node(root, indent_level=1)
-        lines.append(root_xaml)
-        
-        # UserControl 结束
-        lines.append('</UserControl>')
+        # 资源 (优化器/样式提取生成的 Style 等)
+        # Avalonia 的 Style 放在 .Styles 中,其余资源放在 .Resources 中
+        resources = root.attributes.get('_resources', [])
+        if self.expand_lists:
+            resources = [r for r in resources if r.type != 'XmlDataProvider']
+        sections = [('Resources', resources)]
+        if dialect.style_selectors:
+            sections = [
+                ('Styles', [r for r in resources if r.type == 'Style']),
+                ('Resources', [r for r in resources if r.type != 'Style']),
+            ]
+        for section, items in sections:
+            if items:
+                lines.append(f'    <{dialect.root_element}.{section}>')
+                for resource in items:
+                    self._emit(resource, 2, lines)
+                lines.append(f'    </{dialect.root_element}.{section}>')
+                lines.append('')
+    
+    def _end_document(self, lines: List[str]) -> None:
+        """写入根元素结束标签 (渲染过组件引用/设计时 id 时在文档头补充对应的命名空间)
         
-        return '\n'.join(lines)
+        源映射的行号在这里加上文档头补充的行数
+        """
+        body_lines = len(lines)
+        self._insert_namespaces(lines)
+        header_lines = len(lines) - body_lines
+        lines.append(f'</{self.dialect.root_element}>')
+        if self.source_map is not None:
+            self.source_map.finish(lines, header_lines)
+    
+    def _insert_namespaces(self, lines: List[str]) -> None:
+        """在文档头 (根元素的最后一个属性之前) 补充用到的组件/设计时命名空间"""
+        if self._uses_components and self.dialect.component_namespace:
+            lines.insert(self._header_end - 1, self.dialect.component_namespace)
+        if self._uses_design_ids and self.dialect.design_namespace:
+            lines[self._header_end - 1:self._header_end - 1] = self.dialect.design_namespace
     
     def render_node(self, node: WpfNode, indent_level: int = 0) -> str:
         """渲染单个节点
@@ -107,215 +248,330 @@ class XamlRenderer:
         Returns:
             XAML 字符串
         """
-        if node.type == 'Border':
-            return self._render_border(node, indent_level)
-        elif node.type == 'Grid':
-            return self._render_grid(node, indent_level)
-        elif node.type == 'StackPanel':
-            return self._render_stackpanel(node, indent_level)
-        elif node.type == 'WrapPanel':
-            return self._render_wrappanel(node, indent_level)
-        elif node.type == 'TextBlock':
-            return self._render_textblock(node, indent_level)
-        else:
-            # 未知类型
-            indent = '    ' * indent_level
-            return f'{indent}<!-- 未知控件类型: {node.type} -->'
-    
-    def _get_indent(self, level: int) -> str:
-        """获取缩进字符串"""
-        return '    ' * level
+        lines: List[str] = []
+        self._emit(node, indent_level, lines)
+        return '\n'.join(lines)
     
-    def _render_attributes(self, attributes: dict, indent_level: int, control_type: str = None) -> List[str]:
-        """渲染属性列表
+    def _emit(self, node: WpfNode, indent_level: int, lines: List[str]) -> None:
+        """把节点渲染追加到 lines
         
-        Args:
-            attributes: 属性字典
-            indent_level: 缩进级别
-            control_type: 控件类型（用于过滤默认值）
+        用显式栈代替递归: 带子元素的元素返回生成器,
+        写完开始标签后 yield (子节点, 缩进),子节点写完再继续写结束标签,
+        所有行直接追加到同一个列表,嵌套深度不受递归限制,也不会逐层拼接字符串
+        """
+        task = self._render_dispatch(node, indent_level, lines)
+        if task is None:
+            return
+        
+        stack = [task]
+        while stack:
+            try:
+                child, child_indent = next(stack[-1])
+            except StopIteration:
+                stack.pop()
+                continue
+            
+            task = self._render_dispatch(child, child_indent, lines)
+            if task is not None:
+                stack.append(task)
+    
+    def _emit_chunks(self, node: WpfNode, indent_level: int, lines: List[str], chunk_lines: int) -> Iterator[str]:
+        """与 _emit 相同的显式栈,lines 每写满 chunk_lines 行输出一块并清空 (每块以换行结尾)"""
+        task = self._render_dispatch(node, indent_level, lines)
+        stack = [task] if task is not None else []
+        while stack:
+            if len(lines) >= chunk_lines:
+                yield '\n'.join(lines) + '\n'
+                lines.clear()
+            try:
+                child, child_indent = next(stack[-1])
+            except StopIteration:
+                stack.pop()
+                continue
+            
+            task = self._render_dispatch(child, child_indent, lines)
+            if task is not None:
+                stack.append(task)
+    
+    def content_node(self, node: WpfNode) -> WpfNode:
+        """实际渲染的节点 (展开列表时虚拟化 ItemsControl 换成原来的列表项)"""
+        if self.expand_lists and node.type == 'ItemsControl':
+            return node.attributes.get('_expanded', node)
+        return node
+    
+    def _render_dispatch(self, node: WpfNode, indent_level: int, lines: List[str]) -> Optional[RenderTask]:
+        """按控件类型查表渲染
         
         Returns:
-            属性行列表
+            有元素体 (子元素/属性元素) 时返回待驱动的生成器,其余返回 None
         """
-        lines = []
-        indent = self._get_indent(indent_level)
-        
-        for key, value in attributes.items():
-            if value is not None and not key.startswith('_'):
-                # 检查是否为默认值
-                if control_type and self._is_default_value(control_type, key, value):
-                    continue
-                lines.append(f'{indent}    {key}="{value}"')
+        node = self.content_node(node)
+        spec = ELEMENT_SPECS.get(node.type)
+        if spec is not None:
+            return self._render_element(node, indent_level, lines, spec)
         
-        return lines
-
-
-    def _render_border(self, node: WpfNode, indent_level: int) -> str:
-        """渲染 Border 元素"""
-        lines = []
+        renderer = self._resource_renderers.get(node.type)
+        if renderer is None:
+            # 未知类型
+            lines.append(f'{self._get_indent(indent_level)}<!-- 未知控件类型: {node.type} -->')
+        elif self.dialect.element_name(node.type) is None:
+            # 目标方言不支持的元素
+            lines.append(f'{self._get_indent(indent_level)}<!-- {self.target} 不支持: {node.type} -->')
+        else:
+            renderer(node, indent_level, lines)
+        return None
+    
+    def _get_indent(self, level: int) -> str:
+        """获取缩进字符串 (超过 MAX_INDENT_LEVEL 层不再增加,避免深层嵌套时输出随层数平方增长)"""
+        return INDENTS[min(level, MAX_INDENT_LEVEL)]
+    
+    def _render_element(self, node: WpfNode, indent_level: int, lines: List[str],
+                        spec: ElementSpec) -> Optional[RenderTask]:
+        """通用元素渲染: 注释、开始标签、属性,按内容模型自闭合或返回元素体生成器"""
         indent = self._get_indent(indent_level)
+        dialect = self.dialect
+        attributes = node.attributes
+        
+        if spec.tag_attribute:
+            # 组件引用: 文档头需要声明组件命名空间
+            tag = attributes[spec.tag_attribute]
+            self._uses_components = True
+        else:
+            tag = dialect.element_name(node.type, attributes)
+        if tag is None:
+            # 目标方言不支持的元素
+            lines.append(f'{indent}<!-- {self.target} 不支持: {node.type} -->')
+            return None
         
-        # 注释
+        # 注释和开始标签
         if node.comment:
             lines.append(f'{indent}<!-- {node.comment} -->')
-        
-        # 开始标签
-        lines.append(f'{indent}<Border')
+        lines.append(f'{indent}<{tag}')
+        tag_line = len(lines) - 1
+        
+        # 属性元素可以写成简写属性时 (如 RowDefinitions="*,Auto"),追加到属性末尾
+        property_elements = spec.property_elements
+        if property_elements and dialect.grid_definitions == 'attribute':
+            attributes = dict(attributes)
+            for source, group, _, _ in property_elements:
+                values = attributes.get(source)
+                if values:
+                    attributes[group] = ','.join(values)
+            property_elements = ()
         
         # 属性
-        attr_lines = self._render_attributes(node.attributes, indent_level, 'Border')
-        lines.extend(attr_lines)
-        
-        # 子元素
-        if node.children:
-            # 最后一个属性后直接跟 >
-            if attr_lines:
-                lines[-1] = lines[-1] + '>'
-            else:
-                lines[-1] = lines[-1] + '>'
-            
-            for child in node.children:
-                child_xaml = self.render_node(child, indent_level + 1)
-                lines.append(child_xaml)
-            
-            lines.append(f'{indent}</Border>')
-        else:
-            # 自闭合 />
-            if attr_lines:
-                lines[-1] = lines[-1] + '/>'
+        attr_indent = indent + '    '
+        pairs = dialect.attribute_pairs(node.type, attributes, tag)
+        if '_bindings' in attributes:
+            pairs = self._bind_pairs(node, pairs)
+        if self.design_ids is not None and id(node) in self.design_ids:
+            pairs = pairs + self._design_pairs(node, tag, pairs, property_elements)
+        lines.extend([f'{attr_indent}{key}="{value}"' for key, value in pairs])
+        if self.source_map is not None:
+            self.source_map.begin(node, tag, tag_line, len(indent), pairs, len(attr_indent))
+        
+        # 最后一个属性 (或标签名) 后直接跟 /> 或 >
+        if spec.content == EMPTY or (spec.content == OPTIONAL and not node.children):
+            lines[-1] += '/>'
+            if self.source_map is not None:
+                self.source_map.end(node, len(lines) - 1, len(lines[-1]))
+            return None
+        lines[-1] += '>'
+        return self._render_body(node, tag, indent_level, lines, spec, property_elements)
+    
+    def _bind_pairs(self, node: WpfNode, pairs: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """组件中被实例覆盖过的属性改为绑定到组件属性,原值记为组件属性的默认值"""
+        pairs = list(pairs)
+        for source, name in node.attributes['_bindings'].items():
+            mapped = self.dialect.map_attribute(node.type, source, node.attributes[source])
+            if mapped is None:
+                continue
+            target, default = mapped
+            self.component_properties[name] = default
+            binding = (target, self.dialect.property_binding(name))
+            index = next((i for i, (key, _) in enumerate(pairs) if key == target), None)
+            if index is None:
+                pairs.append(binding)
             else:
-                lines[-1] = lines[-1] + '/>'
+                pairs[index] = binding
+        return pairs
+    
+    def _design_pairs(self, node: WpfNode, tag: str, pairs: List[Tuple[str, str]],
+                      property_elements: Tuple[PropertyElement, ...]) -> List[Tuple[str, str]]:
+        """设计时属性: d:FigmaId (对应的 Figma 节点)、d:FigmaHash (生成的元素名、属性和属性元素的摘要)
+        和 d:FigmaAttrs (每个生成的属性和属性元素的值摘要,如 "Width=1a2b3c4d RowDefinitions=...")
         
-        return '\n'.join(lines)
+        增量更新时摘要没有变化的元素保持原样; 摘要变化时只写入值摘要变化的属性 (保留手工修改)
+        """
+        self._uses_design_ids = True
+        values = [node.attributes.get(source) for source, _, _, _ in property_elements]
+        content = repr((tag, pairs, values))
+        digest = hashlib.sha1(content.encode('utf-8')).hexdigest()[:10]
+        items = [(key, str(value)) for key, value in pairs]
+        items.extend((group, repr(value)) for (_, group, _, _), value in zip(property_elements, values) if value)
+        attribute_digests = ' '.join(f"{key}={hashlib.sha1(value.encode('utf-8')).hexdigest()[:8]}"
+                                     for key, value in items)
+        return [('d:FigmaId', self.design_ids[id(node)]), ('d:FigmaHash', digest),
+                ('d:FigmaAttrs', attribute_digests)]
     
-    def _render_grid(self, node: WpfNode, indent_level: int) -> str:
-        """渲染 Grid 元素"""
-        lines = []
+    def _render_body(self, node: WpfNode, tag: str, indent_level: int, lines: List[str],
+                     spec: ElementSpec, property_elements: Tuple[PropertyElement, ...]) -> RenderTask:
+        """元素体: 属性元素、子元素 (可选的 ItemTemplate 包装) 和结束标签"""
         indent = self._get_indent(indent_level)
         
-        # 注释
-        if node.comment:
-            lines.append(f'{indent}<!-- {node.comment} -->')
-        
-        # 开始标签
-        lines.append(f'{indent}<Grid')
-        
-        # 其他属性（排除行列定义）
-        other_attrs = {k: v for k, v in node.attributes.items() 
-                      if k not in ['_row_definitions', '_column_definitions']}
-        attr_lines = self._render_attributes(other_attrs, indent_level, 'Grid')
-        lines.extend(attr_lines)
-        
-        # 关闭开始标签
-        if attr_lines:
-            lines[-1] = lines[-1] + '>'
-        else:
-            lines[-1] = lines[-1] + '>'
-        
-        # 行定义
-        row_defs = node.attributes.get('_row_definitions', [])
-        if row_defs:
-            lines.append(f'{indent}    <Grid.RowDefinitions>')
-            for row_height in row_defs:
-                lines.append(f'{indent}        <RowDefinition Height="{row_height}"/>')
-            lines.append(f'{indent}    </Grid.RowDefinitions>')
-        
-        # 列定义
-        col_defs = node.attributes.get('_column_definitions', [])
-        if col_defs:
-            lines.append(f'{indent}    <Grid.ColumnDefinitions>')
-            for col_width in col_defs:
-                lines.append(f'{indent}        <ColumnDefinition Width="{col_width}"/>')
-            lines.append(f'{indent}    </Grid.ColumnDefinitions>')
+        # 属性元素 (如 Grid.RowDefinitions)
+        for source, group, element, attr in property_elements:
+            values = node.attributes.get(source)
+            if values:
+                lines.append(f'{indent}    <{tag}.{group}>')
+                lines.extend([f'{indent}        <{element} {attr}="{value}"/>' for value in values])
+                lines.append(f'{indent}    </{tag}.{group}>')
         
         # 子元素
-        for child in node.children:
-            child_xaml = self.render_node(child, indent_level + 1)
-            lines.append(child_xaml)
-        
-        lines.append(f'{indent}</Grid>')
+        if spec.item_template:
+            # 虚拟化模板/面板 (由目标方言定义) + 单个 DataTemplate
+            lines.extend([f'{indent}{line}' for line in self.dialect.items_prelude])
+            lines.append(f'{indent}    <{tag}.ItemTemplate>')
+            lines.append(f'{indent}        <DataTemplate>')
+            for child in node.children:
+                yield child, indent_level + 3
+            lines.append(f'{indent}        </DataTemplate>')
+            lines.append(f'{indent}    </{tag}.ItemTemplate>')
+        else:
+            for child in node.children:
+                yield child, indent_level + 1
         
-        return '\n'.join(lines)
+        lines.append(f'{indent}</{tag}>')
+        if self.source_map is not None:
+            self.source_map.end(node, len(lines) - 1, len(lines[-1]))
     
-    def _render_stackpanel(self, node: WpfNode, indent_level: int) -> str:
-        """渲染 StackPanel 元素"""
-        lines = []
+    def _render_style(self, node: WpfNode, indent_level: int, lines: List[str]) -> None:
+        """渲染 Style 资源 (Setter 每个一行)"""
         indent = self._get_indent(indent_level)
         
-        # 注释
-        if node.comment:
-            lines.append(f'{indent}<!-- {node.comment} -->')
+        dialect = self.dialect
+        attrs = ' '.join(f'{k}="{v}"' for k, v in dialect.style_attributes(node.attributes))
+        lines.append(f'{indent}<Style {attrs}>')
         
-        # 开始标签和属性
-        lines.append(f'{indent}<StackPanel')
-        attr_lines = self._render_attributes(node.attributes, indent_level, 'StackPanel')
-        lines.extend(attr_lines)
-        
-        # 最后一个属性后直接跟 >
-        if attr_lines:
-            lines[-1] = lines[-1] + '>'
-        else:
-            lines[-1] = lines[-1] + '>'
+        target_type = node.attributes.get('TargetType', '')
+        for setter in node.children:
+            mapped = dialect.map_attribute(target_type, setter.attributes['Property'], setter.attributes['Value'])
+            if mapped is None:
+                continue
+            lines.append(f'{indent}    <Setter Property="{mapped[0]}" Value="{mapped[1]}"/>')
         
-        # 子元素
-        for child in node.children:
-            child_xaml = self.render_node(child, indent_level + 1)
-            lines.append(child_xaml)
-        
-        lines.append(f'{indent}</StackPanel>')
-        
-        return '\n'.join(lines)
+        lines.append(f'{indent}</Style>')
     
-    def _render_wrappanel(self, node: WpfNode, indent_level: int) -> str:
-        """渲染 WrapPanel 元素"""
-        lines = []
+    def _render_resource(self, node: WpfNode, indent_level: int, lines: List[str]) -> None:
+        """渲染单行资源元素 (如 SolidColorBrush)"""
         indent = self._get_indent(indent_level)
-        
-        # 注释
-        if node.comment:
-            lines.append(f'{indent}<!-- {node.comment} -->')
-        
-        # 开始标签和属性
-        lines.append(f'{indent}<WrapPanel')
-        attr_lines = self._render_attributes(node.attributes, indent_level, 'WrapPanel')
-        lines.extend(attr_lines)
-        
-        # 最后一个属性后直接跟 >
-        if attr_lines:
-            lines[-1] = lines[-1] + '>'
+        tag = self.dialect.element_name(node.type, node.attributes)
+        content_attr = self.dialect.content_attributes.get(tag)
+        attrs = ' '.join(f'{k}="{v}"' for k, v in node.attributes.items()
+                         if not k.startswith('_') and k != content_attr)
+        if content_attr:
+            lines.append(f'{indent}<{tag} {attrs}>{node.attributes.get(content_attr, "")}</{tag}>')
         else:
-            lines[-1] = lines[-1] + '>'
-        
-        # 子元素
-        for child in node.children:
-            child_xaml = self.render_node(child, indent_level + 1)
-            lines.append(child_xaml)
+            lines.append(f'{indent}<{tag} {attrs}/>')
+    
+    def _render_xmldataprovider(self, node: WpfNode, indent_level: int, lines: List[str]) -> None:
+        """渲染 XmlDataProvider 资源 (内嵌 x:XData 示例数据)"""
+        indent = self._get_indent(indent_level)
         
-        lines.append(f'{indent}</WrapPanel>')
+        attrs = ' '.join(f'{k}="{v}"' for k, v in node.attributes.items() if not k.startswith('_'))
+        lines.append(f'{indent}<XmlDataProvider {attrs}>')
+        lines.append(f'{indent}    <x:XData>')
+        lines.append(f'{indent}        <Items xmlns="">')
+        for row in node.attributes.get('_items', []):
+            fields = ''.join(f' {k}={quoteattr(v)}' for k, v in row.items())
+            lines.append(f'{indent}            <Item{fields}/>')
+        lines.append(f'{indent}        </Items>')
+        lines.append(f'{indent}    </x:XData>')
+        lines.append(f'{indent}</XmlDataProvider>')
+
+
+class MultiTargetRenderer:
+    """多目标渲染器
+    
+    同一棵 AST (只构建、优化一次) 一次遍历同时渲染为多个方言:
+    每个节点依次交给各目标的 XamlRenderer,各目标的容器生成器按相同顺序 yield 子节点,
+    由同一个显式栈驱动,各自追加到自己的行列表
+    """
+    
+    def __init__(self, targets: List[str], config_dir: str = 'config'):
+        """初始化渲染器
         
-        return '\n'.join(lines)
+        Args:
+            targets: 目标方言列表 (如 ['wpf', 'avalonia', 'maui'])
+            config_dir: 配置文件目录
+        """
+        self.renderers = [XamlRenderer(config_dir, target=target) for target in dict.fromkeys(targets)]
     
-    def _render_textblock(self, node: WpfNode, indent_level: int) -> str:
-        """渲染 TextBlock 元素"""
-        lines = []
-        indent = self._get_indent(indent_level)
+    @property
+    def targets(self) -> List[str]:
+        """目标方言名"""
+        return [renderer.target for renderer in self.renderers]
+    
+    def render_usercontrol(
+        self,
+        root: WpfNode,
+        class_name: str = 'FigmaControl',
+        design_width: int = 200,
+        design_height: int = 200
+    ) -> Dict[str, str]:
+        """渲染所有目标
         
-        # 注释
-        if node.comment:
-            lines.append(f'{indent}<!-- {node.comment} -->')
+        Returns:
+            {目标方言: XAML 字符串}
+        """
+        outputs = [[] for _ in self.renderers]
+        for renderer, lines in zip(self.renderers, outputs):
+            renderer._begin_document(root, class_name, design_width, design_height, lines)
         
-        # 自闭合标签和属性
-        lines.append(f'{indent}<TextBlock')
-        attr_lines = self._render_attributes(node.attributes, indent_level, 'TextBlock')
-        lines.extend(attr_lines)
+        self._emit_all(root, 1, outputs)
         
-        # 最后一个属性后直接跟 />
-        if attr_lines:
-            lines[-1] = lines[-1] + '/>'
-        else:
-            lines[-1] = lines[-1] + '/>'
+        for renderer, lines in zip(self.renderers, outputs):
+            renderer._end_document(lines)
+        return {renderer.target: '\n'.join(lines) for renderer, lines in zip(self.renderers, outputs)}
+    
+    def _dispatch_all(self, node: WpfNode, indents: List[Tuple[int, int]],
+                      outputs: List[List[str]]) -> List[Tuple[int, RenderTask]]:
+        """把节点交给各目标渲染,返回带子元素的 (目标序号, 生成器)
         
-        return '\n'.join(lines)
+        某个目标把节点换成另一棵子树时 (展开的虚拟化列表),子节点顺序与其他目标不同,该目标单独渲染整棵子树
+        """
+        tasks = []
+        for index, indent_level in indents:
+            renderer = self.renderers[index]
+            if renderer.content_node(node) is not node:
+                renderer._emit(node, indent_level, outputs[index])
+                continue
+            task = renderer._render_dispatch(node, indent_level, outputs[index])
+            if task is not None:
+                tasks.append((index, task))
+        return tasks
+    
+    def _emit_all(self, node: WpfNode, indent_level: int, outputs: List[List[str]]) -> None:
+        """一次遍历渲染所有目标 (与 XamlRenderer._emit 相同的显式栈)"""
+        tasks = self._dispatch_all(node, [(i, indent_level) for i in range(len(self.renderers))], outputs)
+        stack = [tasks] if tasks else []
+        while stack:
+            child = None
+            indents = []
+            for index, task in stack[-1]:
+                try:
+                    child, child_indent = next(task)
+                except StopIteration:
+                    continue
+                indents.append((index, child_indent))
+            
+            if not indents:
+                stack.pop()
+                continue
+            
+            tasks = self._dispatch_all(child, indents, outputs)
+            if tasks:
+                stack.append(tasks)
 
 
 # 测试代码
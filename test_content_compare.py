@@ -2,6 +2,7 @@
 智能 XAML 对比 - 提取关键信息对比
 支持语义对比,忽略无关紧要的差异
 """
+import math
 import re
 from collections import Counter
 import xml.etree.ElementTree as ET
@@ -143,74 +144,351 @@ def compare_xaml_semantically(xaml1, xaml2, tolerance=2.0):
     
     # 尝试解析为 XML
     try:
-        # 包装成完整的 XML
-        wrapped1 = f'<Root xmlns="http://schemas.microsoft.com/winfx/2006/xaml/presentation">{xaml1}</Root>'
-        wrapped2 = f'<Root xmlns="http://schemas.microsoft.com/winfx/2006/xaml/presentation">{xaml2}</Root>'
-        
-        root1 = ET.fromstring(wrapped1)
-        root2 = ET.fromstring(wrapped2)
-        
-        # 递归对比元素
-        compare_elements(root1, root2, differences, tolerance, path="Root")
-        
+        root1 = parse_xaml_fragment(xaml1)
+        root2 = parse_xaml_fragment(xaml2)
     except ET.ParseError as e:
         # XML 解析失败,回退到文本对比
         differences.append(f"XML 解析失败: {e}")
         return False, differences
     
+    return compare_parsed_xaml(root1, root2, tolerance)
+
+
+def parse_xaml_fragment(xaml):
+    """把 XAML 片段包装成完整的 XML 并解析
+    
+    解析结果可以缓存 (如预期文件),之后用 compare_parsed_xaml 对比
+    
+    Raises:
+        ET.ParseError: XML 格式错误
+    """
+    # 声明 x: / d: / local: 前缀,片段中可能含有 x:Key 等资源属性和组件引用
+    wrapped = (
+        '<Root xmlns="http://schemas.microsoft.com/winfx/2006/xaml/presentation"'
+        ' xmlns:x="http://schemas.microsoft.com/winfx/2006/xaml"'
+        ' xmlns:d="http://schemas.microsoft.com/expression/blend/2008"'
+        ' xmlns:local="clr-namespace:YourNamespace">'
+        f'{xaml}</Root>'
+    )
+    return ET.fromstring(wrapped)
+
+
+def compare_parsed_xaml(root1, root2, tolerance=2.0):
+    """对比两个已解析的 XAML 树
+    
+    Returns:
+        (is_match, differences): 是否匹配,差异列表
+    """
+    differences = []
+    compare_elements(root1, root2, differences, tolerance, path="Root")
     return len(differences) == 0, differences
 
 
-def compare_elements(elem1, elem2, differences, tolerance, path=""):
-    """递归对比两个 XML 元素"""
-    # 去除命名空间
-    tag1 = elem1.tag.split('}')[-1] if '}' in elem1.tag else elem1.tag
-    tag2 = elem2.tag.split('}')[-1] if '}' in elem2.tag else elem2.tag
+# 忽略的属性(不重要)
+IGNORE_ATTRS = {'xmlns', 'x:Name'}
+
+# 子元素对齐时 LCS 动态规划的最大规模 (超过后改用 Myers 差分)
+MAX_ALIGN_CELLS = 1_000_000
+
+# 大规模子元素对齐时 Myers 差分允许的最大编辑数 (超过后按位置对齐)
+MAX_DIFF_EDITS = 2000
+
+
+def _local_name(name):
+    """去除命名空间"""
+    return name.split('}')[-1] if '}' in name else name
+
+
+def _element_attrs(elem):
+    """元素属性 (去除命名空间和忽略的属性)"""
+    attrs = {_local_name(k): v for k, v in elem.attrib.items()}
+    for key in IGNORE_ATTRS:
+        attrs.pop(key, None)
+    return attrs
+
+
+def _canonical_value(value, tolerance):
+    """属性值的规范形式: 数值按容差分桶,其余保持原样
+    
+    同一个桶内的两个数值之差小于 tolerance,所以规范形式相同的值
+    在 compare_elements 中一定判为相等 (反之不一定,相邻桶交给逐项对比)
+    """
+    try:
+        num = float(value)
+    except ValueError:
+        return value
+    if not math.isfinite(num):
+        return value
+    if tolerance > 0:
+        return ('#', math.floor(num / tolerance))
+    return ('#', num)
+
+
+def compute_subtree_hashes(root, tolerance=2.0):
+    """后序计算每个子树的 Merkle 哈希
+    
+    哈希由标签、规范化属性、文本和子树哈希组成,哈希相同的子树视为相同
     
-    # 对比标签名
-    if tag1 != tag2:
-        differences.append(f"{path}: 标签不同 ({tag1} vs {tag2})")
-        return
+    Returns:
+        {id(element): hash}
+    """
+    hashes = {}
+    stack = [(root, False)]
+    while stack:
+        elem, visited = stack.pop()
+        if not visited:
+            stack.append((elem, True))
+            stack.extend((child, False) for child in elem)
+            continue
+        attrs = tuple(sorted(
+            (key, _canonical_value(value, tolerance))
+            for key, value in _element_attrs(elem).items() if value != ''
+        ))
+        hashes[id(elem)] = hash((
+            _local_name(elem.tag),
+            attrs,
+            (elem.text or '').strip(),
+            tuple(hashes[id(child)] for child in elem),
+        ))
+    return hashes
+
+
+def _align_children(children1, children2, hashes1, hashes2):
+    """对齐两组子元素
     
-    current_path = f"{path}/{tag1}"
+    先去掉哈希相同的公共前后缀,中间部分用加权 LCS 对齐 (规模过大时先做 Myers 差分)
+    (哈希相同记 2 分, 仅标签相同记 1 分)
     
-    # 对比属性
-    attrs1 = {k.split('}')[-1]: v for k, v in elem1.attrib.items()}
-    attrs2 = {k.split('}')[-1]: v for k, v in elem2.attrib.items()}
+    Returns:
+        [(index1 或 None, index2 或 None)] 按文档顺序
+    """
+    n, m = len(children1), len(children2)
+    h1 = [hashes1[id(c)] for c in children1]
+    h2 = [hashes2[id(c)] for c in children2]
     
-    # 忽略的属性(不重要)
-    ignore_attrs = {'xmlns', 'x:Name'}
+    prefix = 0
+    while prefix < n and prefix < m and h1[prefix] == h2[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and suffix < m - prefix and h1[n - 1 - suffix] == h2[m - 1 - suffix]:
+        suffix += 1
     
-    all_keys = (set(attrs1.keys()) | set(attrs2.keys())) - ignore_attrs
+    pairs = [(i, i) for i in range(prefix)]
+    a = range(prefix, n - suffix)
+    b = range(prefix, m - suffix)
     
-    for key in all_keys:
-        val1 = attrs1.get(key, '')
-        val2 = attrs2.get(key, '')
+    if len(a) * len(b) <= MAX_ALIGN_CELLS:
+        pairs.extend(_lcs_align(a, b, h1, h2, children1, children2))
+    else:
+        # 规模过大: 先用 Myers 差分 (O((N+M)·D)) 按哈希对齐,相同子树之间的间隙再细对齐
+        matches = _myers_matches(a, b, h1, h2)
+        if matches is None:
+            matches = []
+        x, y = a.start, b.start
+        for i, j in matches + [(a.stop, b.stop)]:
+            gap1, gap2 = range(x, i), range(y, j)
+            if len(gap1) * len(gap2) <= MAX_ALIGN_CELLS:
+                pairs.extend(_lcs_align(gap1, gap2, h1, h2, children1, children2))
+            else:
+                pairs.extend(_positional_align(gap1, gap2))
+            if i < a.stop:
+                pairs.append((i, j))
+            x, y = i + 1, j + 1
+    
+    pairs.extend((n - suffix + k, m - suffix + k) for k in range(suffix))
+    return pairs
+
+
+def _positional_align(a, b):
+    """按位置对齐,多出的部分单独报告"""
+    return [
+        (a[k] if k < len(a) else None, b[k] if k < len(b) else None)
+        for k in range(max(len(a), len(b)))
+    ]
+
+
+def _myers_matches(a, b, h1, h2, max_edits=MAX_DIFF_EDITS):
+    """Myers 差分: 按子树哈希求最短编辑脚本中保留的元素
+    
+    Returns:
+        [(index1, index2)] 按下标递增; 编辑数超过 max_edits 时返回 None
+    """
+    seq1 = [h1[i] for i in a]
+    seq2 = [h2[j] for j in b]
+    n, m = len(seq1), len(seq2)
+    
+    v = {1: 0}
+    trace = []
+    for d in range(max_edits + 1):
+        trace.append(dict(v))
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1] < v[k + 1]):
+                x = v[k + 1]
+            else:
+                x = v[k - 1] + 1
+            y = x - k
+            while x < n and y < m and seq1[x] == seq2[y]:
+                x += 1
+                y += 1
+            v[k] = x
+            if x >= n and y >= m:
+                break
+        else:
+            continue
+        break
+    else:
+        return None
+    
+    # 回溯收集对角线 (相同元素)
+    matches = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        previous = trace[d]
+        k = x - y
+        if k == -d or (k != d and previous[k - 1] < previous[k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = previous[prev_k]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            matches.append((a[x], b[y]))
+        x, y = prev_x, prev_y
+    
+    matches.reverse()
+    return matches
+
+
+def _lcs_align(a, b, h1, h2, children1, children2):
+    """加权 LCS 对齐 a/b 两段下标,未匹配的间隙等长时按位置配对"""
+    tags1 = [_local_name(children1[i].tag) for i in a]
+    tags2 = [_local_name(children2[j].tag) for j in b]
+    
+    rows, cols = len(a), len(b)
+    score = [[0] * (cols + 1) for _ in range(rows + 1)]
+    for x in range(rows - 1, -1, -1):
+        row, below = score[x], score[x + 1]
+        for y in range(cols - 1, -1, -1):
+            best = below[y] if below[y] > row[y + 1] else row[y + 1]
+            if h1[a[x]] == h2[b[y]]:
+                best = max(best, below[y + 1] + 2)
+            elif tags1[x] == tags2[y]:
+                best = max(best, below[y + 1] + 1)
+            row[y] = best
+    
+    pairs = []
+    gap1, gap2 = [], []
+    
+    def flush_gap():
+        if len(gap1) == len(gap2):
+            pairs.extend(zip(gap1, gap2))
+        else:
+            pairs.extend((i, None) for i in gap1)
+            pairs.extend((None, j) for j in gap2)
+        gap1.clear()
+        gap2.clear()
+    
+    x = y = 0
+    while x < rows and y < cols:
+        if h1[a[x]] == h2[b[y]] and score[x][y] == score[x + 1][y + 1] + 2:
+            matched = True
+        elif tags1[x] == tags2[y] and score[x][y] == score[x + 1][y + 1] + 1:
+            matched = True
+        else:
+            matched = False
+        
+        if matched:
+            flush_gap()
+            pairs.append((a[x], b[y]))
+            x += 1
+            y += 1
+        elif score[x + 1][y] >= score[x][y + 1]:
+            gap1.append(a[x])
+            x += 1
+        else:
+            gap2.append(b[y])
+            y += 1
+    
+    gap1.extend(a[x:])
+    gap2.extend(b[y:])
+    flush_gap()
+    return pairs
+
+
+def _child_labels(children):
+    """子元素路径名: 同名兄弟多于一个时附加序号 (如 Border[2])"""
+    tags = [_local_name(c.tag) for c in children]
+    totals = Counter(tags)
+    seen = Counter()
+    labels = []
+    for tag in tags:
+        seen[tag] += 1
+        labels.append(tag if totals[tag] == 1 else f"{tag}[{seen[tag]}]")
+    return labels
+
+
+def compare_elements(elem1, elem2, differences, tolerance, path=""):
+    """对比两个 XML 元素
+    
+    先计算两棵树的 Merkle 哈希,哈希相同的子树直接跳过;
+    哈希不同时逐项对比属性和文本,子元素用 LCS 对齐,
+    插入/删除的元素单独报告,不影响其余子元素的对比
+    """
+    hashes1 = compute_subtree_hashes(elem1, tolerance)
+    hashes2 = compute_subtree_hashes(elem2, tolerance)
+    
+    stack = [(elem1, elem2, path, None)]
+    while stack:
+        e1, e2, parent_path, label = stack.pop()
+        if hashes1[id(e1)] == hashes2[id(e2)]:
+            continue
+        
+        tag1 = _local_name(e1.tag)
+        tag2 = _local_name(e2.tag)
+        
+        # 对比标签名
+        if tag1 != tag2:
+            differences.append(f"{parent_path}: 标签不同 ({tag1} vs {tag2})")
+            continue
+        
+        current_path = f"{parent_path}/{label or tag1}"
+        
+        # 对比属性
+        attrs1 = _element_attrs(e1)
+        attrs2 = _element_attrs(e2)
+        for key in sorted(set(attrs1) | set(attrs2)):
+            val1 = attrs1.get(key, '')
+            val2 = attrs2.get(key, '')
+            if val1 != val2 and not is_numeric_diff_acceptable(val1, val2, tolerance):
+                differences.append(f"{current_path}[@{key}]: '{val1}' vs '{val2}'")
+        
+        # 对比文本内容
+        text1 = (e1.text or '').strip()
+        text2 = (e2.text or '').strip()
+        if text1 != text2:
+            differences.append(f"{current_path}/text(): '{text1}' vs '{text2}'")
+        
+        # 对齐子元素
+        children1 = list(e1)
+        children2 = list(e2)
+        if len(children1) != len(children2):
+            differences.append(f"{current_path}: 子元素数量不同 ({len(children1)} vs {len(children2)})")
+        
+        labels1 = _child_labels(children1)
+        labels2 = _child_labels(children2)
+        pending = []
+        for i, j in _align_children(children1, children2, hashes1, hashes2):
+            if j is None:
+                differences.append(f"{current_path}/{labels1[i]}: 多出子元素 (仅在第一个 XAML 中, 第 {i + 1} 个)")
+            elif i is None:
+                differences.append(f"{current_path}/{labels2[j]}: 缺少子元素 (仅在第二个 XAML 中, 第 {j + 1} 个)")
+            elif hashes1[id(children1[i])] != hashes2[id(children2[j])]:
+                pending.append((children1[i], children2[j], current_path, labels1[i]))
         
-        if val1 != val2:
-            # 检查是否是数值差异
-            if is_numeric_diff_acceptable(val1, val2, tolerance):
-                continue
-            
-            differences.append(f"{current_path}[@{key}]: '{val1}' vs '{val2}'")
-    
-    # 对比文本内容
-    text1 = (elem1.text or '').strip()
-    text2 = (elem2.text or '').strip()
-    if text1 != text2:
-        differences.append(f"{current_path}/text(): '{text1}' vs '{text2}'")
-    
-    # 对比子元素数量
-    children1 = list(elem1)
-    children2 = list(elem2)
-    
-    if len(children1) != len(children2):
-        differences.append(f"{current_path}: 子元素数量不同 ({len(children1)} vs {len(children2)})")
-        return
-    
-    # 递归对比子元素
-    for child1, child2 in zip(children1, children2):
-        compare_elements(child1, child2, differences, tolerance, current_path)
+        # 逆序入栈,保持文档顺序输出
+        stack.extend(reversed(pending))
 
 
 def is_numeric_diff_acceptable(val1, val2, tolerance):